@@ -28,35 +28,82 @@ def wraps_safely(obj, attr_names=functools.WRAPPER_ASSIGNMENTS):
 global_lock_counter = 0
 
 
+def _call_with_state_machine_lock(func, args, kwargs):
+    """Calls a function of a state or state element, while the modification lock of its state machine is acquired"""
+    from rafcon.core.state_elements.state_element import StateElement
+    from rafcon.core.states.state import State
+    global global_lock_counter
+    self_reference = args[0]
+    target_state_machine = None
+    if isinstance(self_reference, State):
+        target_state_machine = self_reference.get_state_machine()
+    elif isinstance(self_reference, StateElement):
+        if self_reference.parent:
+            target_state_machine = self_reference.parent.get_state_machine()
+
+    if target_state_machine:
+        target_state_machine.acquire_modification_lock()
+        global_lock_counter += 1
+    try:
+        return_value = func(*args, **kwargs)
+    except Exception:
+        # logger.debug("Exception occurred during execution of function {0}. ".format(str(func)))
+        raise
+    finally:
+        if target_state_machine:
+            target_state_machine.release_modification_lock()
+            global_lock_counter -= 1
+    return return_value
+
+
+def _count_modification(self_reference):
+    """Increases the modification counter of the state changed by an edit of itself or of one of its state elements"""
+    from rafcon.core.state_elements.state_element import StateElement
+    from rafcon.core.states.state import State
+    if isinstance(self_reference, StateElement):
+        self_reference = self_reference.parent
+    if isinstance(self_reference, State):
+        self_reference.modification_counter += 1
+
+
 def lock_state_machine(func):
     @wraps_safely(func)
     def func_wrapper(*args, **kwargs):
         """ Decorate method to observable core edit methods. If the core method of rafcon core object is called
         the respective state machine object edition will be locked by the respective thread until the handed function
-        execution is finished.
+        execution is finished. Edits of frozen state machines are rejected with a RuntimeError. Each edit increases
+        the modification counter of the edited state.
         """
-        from rafcon.core.state_elements.state_element import StateElement
-        from rafcon.core.states.state import State
-        global global_lock_counter
         self_reference = args[0]
-        target_state_machine = None
-        if isinstance(self_reference, State):
-            target_state_machine = self_reference.get_state_machine()
-        elif isinstance(self_reference, StateElement):
-            if self_reference.parent:
-                target_state_machine = self_reference.parent.get_state_machine()
-
-        if target_state_machine:
-            target_state_machine.acquire_modification_lock()
-            global_lock_counter += 1
+        if getattr(self_reference, 'frozen_state_machine', None) is not None:
+            raise RuntimeError("{0} cannot be modified ({1}), as its state machine is frozen during its execution"
+                               "".format(self_reference, func.__name__))
         try:
-            return_value = func(*args, **kwargs)
-        except Exception:
-            # logger.debug("Exception occurred during execution of function {0}. ".format(str(func)))
-            raise
+            return _call_with_state_machine_lock(func, args, kwargs)
         finally:
-            if target_state_machine:
-                target_state_machine.release_modification_lock()
-                global_lock_counter -= 1
-        return return_value
+            _count_modification(self_reference)
+    return func_wrapper
+
+
+def lock_state_machine_unless_frozen(func=None, observed=True):
+    """Decorates methods changing the execution data of states, e.g. their execution status or scoped data
+
+    Such methods are called many times during the execution. If the state machine is not frozen, the method is called
+    like a method decorated with :func:`lock_state_machine` and `Observable.observed`. Within a frozen state machine,
+    its structure cannot change. Thus, the method is called directly, without searching and locking the state machine
+    and without notifying observers.
+
+    :param func: the decorated method, which must not be decorated with `Observable.observed`
+    :param bool observed: whether observers are notified about calls of the method, if the state machine is not frozen
+    """
+    if func is None:
+        return functools.partial(lock_state_machine_unless_frozen, observed=observed)
+    from gtkmvc3.observable import Observable
+    notifying_func = Observable.observed(func) if observed else func
+
+    @wraps_safely(func)
+    def func_wrapper(*args, **kwargs):
+        if args[0].frozen_state_machine is not None:
+            return func(*args, **kwargs)
+        return _call_with_state_machine_lock(notifying_func, args, kwargs)
     return func_wrapper
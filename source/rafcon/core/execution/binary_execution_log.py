@@ -0,0 +1,255 @@
+# Copyright (C) 2019 DLR
+#
+# All rights reserved. This program and the accompanying materials are made
+# available under the terms of the Eclipse Public License v1.0 which
+# accompanies this distribution, and is available at
+# http://www.eclipse.org/legal/epl-v10.html
+
+"""
+.. module:: binary_execution_log
+   :synopsis: An append-only binary file format for execution logs with a sidecar index
+
+A binary execution log is a directory holding numbered segment files and an index file. The records (the dictionaries
+of the history items) are pickled and appended to the current segment file. For every record, an entry is appended to
+the index file holding the history_item_id, the run_id, the state path and the timestamp of the record together with
+its position in the segments. Thus, a reader only has to load the (small) index to open the log and can look up single
+records from the memory-mapped segments.
+
+Both files consist of a sequence of chunks, each prefixed by the length of the chunk. An incomplete chunk at the end of
+a file, e.g. after a crash, is ignored by the reader.
+"""
+from builtins import object
+from bisect import bisect_left
+import mmap
+import os
+import pickle
+import struct
+from collections import namedtuple
+try:
+    from collections.abc import Mapping
+except ImportError:
+    from collections import Mapping
+
+from rafcon.utils import log
+
+logger = log.get_logger(__name__)
+
+FILE_EXTENSION = 'rlog'
+INDEX_FILE_NAME = 'index'
+SEGMENT_FILE_NAME = 'segment_{0:05d}'
+DEFAULT_SEGMENT_SIZE = 64 * 1024 * 1024
+
+_chunk_header = struct.Struct('<I')
+
+#: The index entry of a record: the segment number, the offset and size of the pickled record within the segment
+IndexEntry = namedtuple('IndexEntry', ['history_item_id', 'run_id', 'path', 'timestamp', 'segment', 'offset', 'size'])
+
+
+def is_binary_execution_log(path):
+    """Checks whether the given path is a binary execution log
+
+    :param str path: the path to be checked
+    :rtype: bool
+    """
+    return os.path.isdir(path) and os.path.isfile(os.path.join(path, INDEX_FILE_NAME))
+
+
+def _read_chunks(data):
+    """Yields the offset and size of all complete chunks in the data
+
+    :param data: a memory-mapped file or bytes
+    """
+    offset = 0
+    length = len(data)
+    while offset + _chunk_header.size <= length:
+        size, = _chunk_header.unpack_from(data, offset)
+        offset += _chunk_header.size
+        if offset + size > length:
+            logger.warning("Ignoring incomplete chunk at the end of the execution log")
+            return
+        yield offset, size
+        offset += size
+
+
+def _map_file(path):
+    """Memory-maps a file for reading
+
+    :param str path: the path of the file
+    :return: the memory map or an empty bytes object for an empty file
+    """
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return b''
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+class BinaryExecutionLogWriter(object):
+    """Appends records to a binary execution log
+
+    The writer offers the subset of the shelve interface used by the
+    :class:`rafcon.core.execution.execution_history.ExecutionHistoryStorage`. If the log already exists, new records
+    are appended.
+
+    :ivar str path: the path of the log directory
+    :ivar int segment_size: the size in bytes after which a new segment file is started
+    :ivar int last_record_size: the number of bytes written for the last record, including its index entry
+    """
+
+    def __init__(self, path, segment_size=DEFAULT_SEGMENT_SIZE):
+        self.path = path
+        self.segment_size = segment_size
+        if not os.path.isdir(path):
+            os.makedirs(path)
+        self._segment = 0
+        while os.path.exists(self._get_segment_path(self._segment + 1)):
+            self._segment += 1
+        self._segment_file = open(self._get_segment_path(self._segment), 'ab')
+        self._segment_length = self._segment_file.tell()
+        self._index_file = open(os.path.join(path, INDEX_FILE_NAME), 'ab')
+        self.last_record_size = 0
+
+    def _get_segment_path(self, segment):
+        return os.path.join(self.path, SEGMENT_FILE_NAME.format(segment))
+
+    def _start_next_segment(self):
+        self._segment_file.close()
+        self._segment += 1
+        self._segment_file = open(self._get_segment_path(self._segment), 'ab')
+        self._segment_length = 0
+
+    def __setitem__(self, history_item_id, record):
+        """Appends a record to the log
+
+        :param str history_item_id: the id of the history item the record belongs to
+        :param dict record: the record
+        """
+        data = pickle.dumps(record, protocol=2)
+        if self._segment_length > 0 and self._segment_length + _chunk_header.size + len(data) > self.segment_size:
+            self._start_next_segment()
+        self._segment_file.write(_chunk_header.pack(len(data)))
+        self._segment_file.write(data)
+        offset = self._segment_length + _chunk_header.size
+        self._segment_length = offset + len(data)
+
+        # the index entry is written after the record, thus every entry of the index refers to a complete record
+        entry = IndexEntry(history_item_id, record.get('run_id'), record.get('path'), record.get('timestamp'),
+                           self._segment, offset, len(data))
+        entry_data = pickle.dumps(tuple(entry), protocol=2)
+        self._index_file.write(_chunk_header.pack(len(entry_data)))
+        self._index_file.write(entry_data)
+        self.last_record_size = 2 * _chunk_header.size + len(data) + len(entry_data)
+
+    def sync(self):
+        """Writes the buffered records to the disk"""
+        self._segment_file.flush()
+        self._index_file.flush()
+
+    def close(self):
+        self._segment_file.close()
+        self._index_file.close()
+
+
+class BinaryExecutionLogReader(Mapping):
+    """Reads a binary execution log
+
+    The reader is a mapping from history_item_ids to records and can thus be used in place of an opened shelve log,
+    e.g. for the functions in :mod:`rafcon.utils.execution_log`. When opening the log, only the index is loaded; records
+    are unpickled on access. The iteration order is the order in which the records were written.
+
+    :ivar str path: the path of the log directory
+    """
+
+    def __init__(self, path):
+        if not is_binary_execution_log(path):
+            raise ValueError("{0} is not a binary execution log".format(path))
+        self.path = path
+        self._segments = {}
+        self._entries = {}
+        self._keys = []
+        self._keys_by_run_id = {}
+        self._keys_by_path = {}
+
+        index = _map_file(os.path.join(path, INDEX_FILE_NAME))
+        try:
+            for offset, size in _read_chunks(index):
+                entry = IndexEntry(*pickle.loads(index[offset:offset + size]))
+                if entry.history_item_id not in self._entries:
+                    self._keys.append(entry.history_item_id)
+                self._entries[entry.history_item_id] = entry
+                self._keys_by_run_id.setdefault(entry.run_id, []).append(entry.history_item_id)
+                self._keys_by_path.setdefault(entry.path, []).append(entry.history_item_id)
+        finally:
+            if isinstance(index, mmap.mmap):
+                index.close()
+        self._keys_by_timestamp = None
+        self._timestamps = None
+
+    def _get_segment(self, segment):
+        if segment not in self._segments:
+            self._segments[segment] = _map_file(os.path.join(self.path, SEGMENT_FILE_NAME.format(segment)))
+        return self._segments[segment]
+
+    def __getitem__(self, history_item_id):
+        entry = self._entries[history_item_id]
+        data = self._get_segment(entry.segment)
+        return pickle.loads(data[entry.offset:entry.offset + entry.size])
+
+    def __iter__(self):
+        return iter(self._keys)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, history_item_id):
+        return history_item_id in self._entries
+
+    def get_index_entry(self, history_item_id):
+        """Returns the index entry of a record without loading the record
+
+        :param str history_item_id: the id of the history item
+        :rtype: IndexEntry
+        """
+        return self._entries[history_item_id]
+
+    def get_keys_by_run_id(self, run_id):
+        """Returns the ids of all history items with the given run_id in the order of writing
+
+        :param str run_id: the run_id of a state execution
+        :rtype: list
+        """
+        return list(self._keys_by_run_id.get(run_id, []))
+
+    def get_keys_by_path(self, path):
+        """Returns the ids of all history items of the state with the given path in the order of writing
+
+        :param str path: the path of the state
+        :rtype: list
+        """
+        return list(self._keys_by_path.get(path, []))
+
+    def get_keys_by_time(self, start=None, end=None):
+        """Returns the ids of all history items within the given time span, sorted by their timestamp
+
+        :param float start: the start of the time span (inclusive), None for no limit
+        :param float end: the end of the time span (exclusive), None for no limit
+        :rtype: list
+        """
+        if self._keys_by_timestamp is None:
+            self._keys_by_timestamp = sorted((entry.timestamp, key) for key, entry in self._entries.items()
+                                             if entry.timestamp is not None)
+            self._timestamps = [timestamp for timestamp, _ in self._keys_by_timestamp]
+        first = 0 if start is None else bisect_left(self._timestamps, start)
+        last = len(self._timestamps) if end is None else bisect_left(self._timestamps, end)
+        return [key for _, key in self._keys_by_timestamp[first:last]]
+
+    def close(self):
+        for segment in self._segments.values():
+            if isinstance(segment, mmap.mmap):
+                segment.close()
+        self._segments = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -28,6 +28,7 @@ from threading import Lock, RLock
 import sys
 
 from gtkmvc3.observable import Observable
+from rafcon.core.config import global_config
 from rafcon.core.execution.execution_status import ExecutionStatus
 from rafcon.core.execution.execution_status import StateMachineExecutionStatus
 from rafcon.utils import log
@@ -36,103 +37,234 @@ from rafcon.utils import plugins
 logger = log.get_logger(__name__)
 
 
+class StateMachineExecutionContext(object):
+    """The execution of one state machine by the execution engine
+
+    Each state machine executed concurrently by the execution engine has its own context. Thus, the state machines can
+    be started, paused, stepped and stopped independently.
+
+    :ivar rafcon.core.state_machine.StateMachine state_machine: the executed state machine, None if no state machine was
+        started yet
+    :ivar ExecutionStatus status: the execution status of the state machine
+    :ivar list start_state_paths: the paths of the states, from which the execution starts
+    :ivar bool state_machine_running: whether the state machine is executed
+    :ivar int synchronization_counter: counts how often the execution waited for a new execution command; the thread,
+        that wants to synchronize, has to acquire the execution_condition_variable of the status; this is only relevant
+        for tests
+    """
+
+    def __init__(self):
+        self.state_machine = None
+        self.status = ExecutionStatus(StateMachineExecutionStatus.STOPPED)
+        self.start_state_paths = []
+        self.state_machine_running = False
+        self.synchronization_counter = 0
+        self.wait_for_finishing_thread = None
+        self._run_to_states = []
+        self._run_to_states_lock = Lock()
+
+    @property
+    def state_machine_id(self):
+        return self.state_machine.state_machine_id if self.state_machine is not None else None
+
+    @property
+    def run_to_states(self):
+        """The paths of the states, at which the execution waits for the next execution command
+
+        """
+        with self._run_to_states_lock:
+            return self._run_to_states
+
+    @run_to_states.setter
+    def run_to_states(self, run_to_states):
+        if not isinstance(run_to_states, list):
+            raise TypeError("run_to_states must be of type list")
+        with self._run_to_states_lock:
+            self._run_to_states = run_to_states
+
+    def finished_or_stopped(self):
+        """Condition check on finished or stopped status
+
+        :return: outcome of condition check stopped or finished
+        :rtype: bool
+        """
+        return (self.status.execution_mode is StateMachineExecutionStatus.STOPPED) or \
+               (self.status.execution_mode is StateMachineExecutionStatus.FINISHED)
+
+
 class ExecutionEngine(Observable):
     """A class that cares for the execution of the state machine
 
+    The execution engine can execute several state machines concurrently, each within its own
+    :class:`StateMachineExecutionContext`. The methods controlling the execution optionally get the id of the state
+    machine to be controlled. Without id, they control the active state machine of the state machine manager, which is
+    executed within the primary context. If the primary context is busy, other state machines are executed within
+    additional contexts.
+
     :ivar state_machine_manager: holds the state machine manager of all states that can be executed
-    :ivar status: holds the current execution status of the state machine
+    :ivar status: holds the current execution status of the active state machine
     :ivar execution_history: the history of the execution TODO: should be an list
 
     """
 
-    __wait_for_finishing_thread = None
-    __running_state_machine = None
-
     def __init__(self, state_machine_manager):
         Observable.__init__(self)
         self.state_machine_manager = state_machine_manager
-        self._status = ExecutionStatus(StateMachineExecutionStatus.STOPPED)
+        # the context of the active state machine
+        self._primary_context = StateMachineExecutionContext()
+        # the contexts of the executed state machines by their ids, removed when the execution finished
+        self._contexts = {}
         logger.debug("State machine execution engine initialized")
-        self.start_state_paths = []
 
         self.execution_engine_lock = Lock()
-        self._run_to_states = []
-        self.run_to_states = []
-        self.state_machine_running = False
-        # the thread, that wants to synchronize, has to acquire the self._status.execution_condition_variable
-        # then it can read or set the synchronization_counter; this is only relevant for tests
-        self.synchronization_counter = 0
         # counts how often a state asks for the current execution status
         self.state_counter = 0
         self.state_counter_lock = Lock()
 
+    def get_execution_context(self, state_machine_id=None):
+        """Returns the execution context of a state machine
+
+        :param int state_machine_id: the id of the state machine, None for the primary context
+        :return: the context, in which the state machine is executed, the primary context if the state machine is not
+            executed
+        :rtype: StateMachineExecutionContext
+        """
+        if state_machine_id is None:
+            return self._primary_context
+        with self.execution_engine_lock:
+            return self._contexts.get(state_machine_id, self._primary_context)
+
+    def _get_execution_context_of_state(self, state):
+        """Returns the execution context of the state machine of a state
+
+        :param rafcon.core.states.state.State state: the executed state
+        :rtype: StateMachineExecutionContext
+        """
+        state_machine = state.get_state_machine()
+        if state_machine is None:
+            return self._primary_context
+        return self.get_execution_context(state_machine.state_machine_id)
+
+    def _get_context_to_control(self, state_machine_id):
+        """Returns the execution context of a state machine to be controlled
+
+        :param int state_machine_id: the id of the state machine, None for the active state machine
+        :rtype: StateMachineExecutionContext
+        """
+        if state_machine_id is None or state_machine_id == self._primary_context.state_machine_id:
+            return self._primary_context
+        context = self.get_execution_context(state_machine_id)
+        if context is self._primary_context or context.finished_or_stopped():
+            return None
+        return context
+
+    def _get_context_to_start(self, state_machine_id):
+        """Returns an execution context, in which the execution of a state machine can be started
+
+        The primary context is used, if no state machine is executed within it. Then, the started state machine becomes
+        the active state machine.
+
+        :param int state_machine_id: the id of the state machine, None for the active state machine
+        :return: the context or None, if the state machine cannot be started
+        :rtype: StateMachineExecutionContext
+        """
+        primary_context = self._primary_context
+        if primary_context.state_machine_running and \
+                (state_machine_id is None or state_machine_id == primary_context.state_machine_id):
+            # do not start another state machine before the old one did not finish its execution
+            logger.warning("An old state machine is still running! Make sure that it terminates,"
+                           " before you can start another state machine! {0}".format(self))
+            return None
+        if primary_context.finished_or_stopped() and not primary_context.state_machine_running:
+            if state_machine_id is not None:
+                self.state_machine_manager.active_state_machine_id = state_machine_id
+            if not self.state_machine_manager.active_state_machine_id:
+                logger.error("There exists no active state machine!")
+                return None
+            return primary_context
+        if state_machine_id not in self.state_machine_manager.state_machines:
+            logger.error("The state machine with id {0} does not exist!".format(state_machine_id))
+            return None
+        context = self.get_execution_context(state_machine_id)
+        if context is not primary_context and context.state_machine_running:
+            logger.warning("An old execution of the state machine {0} is still running! Make sure that it terminates, "
+                           "before you can start it again! {1}".format(state_machine_id, self))
+            return None
+        return StateMachineExecutionContext()
+
     @Observable.observed
-    def pause(self):
+    def pause(self, state_machine_id=None):
         """Set the execution mode to paused
+
+        :param int state_machine_id: the id of the state machine to be paused, None for the active state machine
         """
-        if self.state_machine_manager.active_state_machine_id is None:
+        context = self._get_context_to_control(state_machine_id)
+        if context is None or (context is self._primary_context and
+                               self.state_machine_manager.active_state_machine_id is None):
             logger.info("'Pause' is not a valid action to initiate state machine execution.")
             return
-        if self.state_machine_manager.get_active_state_machine() is not None:
-            self.state_machine_manager.get_active_state_machine().root_state.recursively_pause_states()
+        state_machine = self._get_controlled_state_machine(context)
+        if state_machine is not None:
+            state_machine.root_state.recursively_pause_states()
 
         logger.debug("Pause execution ...")
-        self.set_execution_mode(StateMachineExecutionStatus.PAUSED)
+        self.set_execution_mode(StateMachineExecutionStatus.PAUSED, state_machine_id=context.state_machine_id)
 
-    def finished_or_stopped(self):
+    def _get_controlled_state_machine(self, context):
+        if context is self._primary_context:
+            return self.state_machine_manager.get_active_state_machine()
+        return context.state_machine
+
+    def finished_or_stopped(self, state_machine_id=None):
         """ Condition check on finished or stopped status
 
         The method returns a value which is equivalent with not 'active' status of the current state machine.
 
+        :param int state_machine_id: the id of the state machine to be checked, None for the active state machine
         :return: outcome of condition check stopped or finished
         :rtype: bool
         """
-        return (self._status.execution_mode is StateMachineExecutionStatus.STOPPED) or \
-               (self._status.execution_mode is StateMachineExecutionStatus.FINISHED)
+        if state_machine_id is None:
+            return self._primary_context.finished_or_stopped()
+        context = self.get_execution_context(state_machine_id)
+        if context.state_machine_id != state_machine_id:
+            return True
+        return context.finished_or_stopped()
 
     @Observable.observed
     def start(self, state_machine_id=None, start_state_path=None):
         """ Start state machine
 
-        If no state machine is running start a specific state machine.
-        If no state machine is provided the currently active state machine is started.
-        If there is already a state machine running, just resume it without taking the passed state_machine_id argument
-        into account.
+        If the state machine is not running, it is started. If no state machine is provided the currently active
+        state machine is started. If another state machine is running, the state machine is executed concurrently.
+        If the state machine is already running, just resume it.
 
         :param state_machine_id: The id if the state machine to be started
         :param start_state_path: The path of the state in the state machine, from which the execution will start
         :return:
         """
+        context = self._get_context_to_control(state_machine_id)
+        if context is self._primary_context and state_machine_id is not None and not context.finished_or_stopped() \
+                and self.state_machine_manager.active_state_machine_id != state_machine_id:
+            # another state machine is executed within the primary context
+            context = None
 
-        if not self.finished_or_stopped():
+        if context is not None and not context.finished_or_stopped():
             logger.debug("Resume execution engine ...")
-            self.run_to_states = []
-            if self.state_machine_manager.get_active_state_machine() is not None:
-                self.state_machine_manager.get_active_state_machine().root_state.recursively_resume_states()
-                if isinstance(state_machine_id, int) and \
-                        state_machine_id != self.state_machine_manager.get_active_state_machine().state_machine_id:
-                    logger.info("Resumed state machine with id {0} but start of state machine id {1} was requested."
-                                "".format(self.state_machine_manager.get_active_state_machine().state_machine_id,
-                                          state_machine_id))
-            self.set_execution_mode(StateMachineExecutionStatus.STARTED)
+            context.run_to_states = []
+            state_machine = self._get_controlled_state_machine(context)
+            if state_machine is not None:
+                state_machine.root_state.recursively_resume_states()
+            self.set_execution_mode(StateMachineExecutionStatus.STARTED, state_machine_id=context.state_machine_id)
         else:
-            # do not start another state machine before the old one did not finish its execution
-            if self.state_machine_running:
-                logger.warning("An old state machine is still running! Make sure that it terminates,"
-                               " before you can start another state machine! {0}".format(self))
+            context = self._get_context_to_start(state_machine_id)
+            if context is None:
                 return
 
             logger.debug("Start execution engine ...")
-            if state_machine_id is not None:
-                self.state_machine_manager.active_state_machine_id = state_machine_id
-
-            if not self.state_machine_manager.active_state_machine_id:
-                logger.error("There exists no active state machine!")
-                return
-
-            self.set_execution_mode(StateMachineExecutionStatus.STARTED)
+            self._set_execution_mode_of_context(context, StateMachineExecutionStatus.STARTED)
 
-            self.start_state_paths = []
+            context.start_state_paths = []
 
             if start_state_path:
                 path_list = start_state_path.split("/")
@@ -142,187 +274,256 @@ class ExecutionEngine(Observable):
                         cur_path = path
                     else:
                         cur_path = cur_path + "/" + path
-                    self.start_state_paths.append(cur_path)
+                    context.start_state_paths.append(cur_path)
 
-            self._run_active_state_machine()
+            self._run_state_machine(context, state_machine_id)
 
     @Observable.observed
-    def stop(self):
+    def stop(self, state_machine_id=None):
         """Set the execution mode to stopped
+
+        :param int state_machine_id: the id of the state machine to be stopped, None for the active state machine
         """
         logger.debug("Stop the state machine execution ...")
-        if self.state_machine_manager.get_active_state_machine() is not None:
-            self.state_machine_manager.get_active_state_machine().root_state.recursively_preempt_states()
-        self.__set_execution_mode_to_stopped()
+        context = self._get_context_to_control(state_machine_id)
+        if context is None:
+            return
+        state_machine = self._get_controlled_state_machine(context)
+        if state_machine is not None:
+            state_machine.root_state.recursively_preempt_states()
+        context.run_to_states = []
+        self._set_execution_mode_of_context(context, StateMachineExecutionStatus.STOPPED)
 
         # Notifies states waiting in step mode or those that are paused about execution stop
-        self._status.execution_condition_variable.acquire()
-        self._status.execution_condition_variable.notify_all()
-        self._status.execution_condition_variable.release()
-        self.__running_state_machine = None
+        context.status.execution_condition_variable.acquire()
+        context.status.execution_condition_variable.notify_all()
+        context.status.execution_condition_variable.release()
 
-    def join(self, timeout=None):
+    def stop_all(self, timeout=None):
+        """Stops the execution of all state machines and waits for them to finish
+
+        :param float timeout: the maximum time in seconds to wait for each state machine, None waits infinitely
+        :return: True if all executions finished, False if a timeout occurred
+        :rtype: bool
+        """
+        with self.execution_engine_lock:
+            contexts = [self._primary_context] + [context for context in self._contexts.values()
+                                                  if context is not self._primary_context]
+        for context in contexts:
+            if not context.finished_or_stopped():
+                self.stop(None if context is self._primary_context else context.state_machine_id)
+        all_finished = True
+        for context in contexts:
+            wait_for_finishing_thread = context.wait_for_finishing_thread
+            if wait_for_finishing_thread:
+                wait_for_finishing_thread.join(timeout)
+                all_finished = all_finished and not wait_for_finishing_thread.is_alive()
+        return all_finished
+
+    def join(self, timeout=None, state_machine_id=None):
         """Blocking wait for the execution to finish
 
         :param float timeout: Maximum time to wait or None for infinitely
-        :return: True if the execution finished, False if no state machine was started or a timeout occurred
+        :param int state_machine_id: the id of the state machine to wait for, None for the active state machine
+        :return: True if the execution finished or the given state machine is not executed, False if no state machine
+            was started or a timeout occurred
         :rtype: bool
         """
-        if self.__wait_for_finishing_thread:
+        context = self.get_execution_context(state_machine_id)
+        if state_machine_id is not None and context.state_machine_id != state_machine_id:
+            # the context of the state machine was removed after its execution finished
+            return True
+        wait_for_finishing_thread = context.wait_for_finishing_thread
+        if wait_for_finishing_thread:
             if not timeout:
                 # signal handlers won't work if timeout is None and the thread is joined
                 while True:
-                    self.__wait_for_finishing_thread.join(0.5)
-                    if not self.__wait_for_finishing_thread.isAlive():
+                    wait_for_finishing_thread.join(0.5)
+                    if not wait_for_finishing_thread.is_alive():
                         break
             else:
-                self.__wait_for_finishing_thread.join(timeout)
-            return not self.__wait_for_finishing_thread.is_alive()
+                wait_for_finishing_thread.join(timeout)
+            return not wait_for_finishing_thread.is_alive()
         else:
             logger.warning("Cannot join as state machine was not started yet.")
             return False
 
-    def __set_execution_mode_to_stopped(self):
-        """Stop and reset execution engine"""
-        self.run_to_states = []
-        self.set_execution_mode(StateMachineExecutionStatus.STOPPED)
-
-    def __set_execution_mode_to_finished(self):
-        """Stop and reset execution engine"""
-        self.run_to_states = []
-        self.set_execution_mode(StateMachineExecutionStatus.FINISHED)
-
-    def _run_active_state_machine(self):
+    def _run_state_machine(self, context, state_machine_id=None):
         """Store running state machine and observe its status
+
+        :param StateMachineExecutionContext context: the context, in which the state machine is executed
+        :param int state_machine_id: the id of the state machine, None for the active state machine
         """
+        if context is self._primary_context or state_machine_id is None:
+            state_machine = self.state_machine_manager.get_active_state_machine()
+        else:
+            state_machine = self.state_machine_manager.state_machines.get(state_machine_id)
+        if not state_machine:
+            logger.warning("Currently no active state machine! Please create a new state machine.")
+            self._set_execution_mode_of_context(context, StateMachineExecutionStatus.STOPPED)
+            return
 
+        context.state_machine = state_machine
+        with self.execution_engine_lock:
+            self._contexts[state_machine.state_machine_id] = context
         # Create new concurrency queue for root state to be able to synchronize with the execution
-        self.__running_state_machine = self.state_machine_manager.get_active_state_machine()
-        if not self.__running_state_machine:
-            logger.error("The running state machine must not be None")
-        self.__running_state_machine.root_state.concurrency_queue = queue.Queue(maxsize=0)
+        state_machine.root_state.concurrency_queue = queue.Queue(maxsize=0)
+        # the state machine is marked as running before the thread starts, so that it is not started twice
+        context.state_machine_running = True
+        if global_config.get_config_value("EXECUTION_FREEZE_STATE_MACHINE", False):
+            state_machine.freeze()
+        state_machine.start()
 
-        if self.__running_state_machine:
-            self.__running_state_machine.start()
+        context.wait_for_finishing_thread = threading.Thread(target=self._wait_for_finishing, args=(context, ))
+        context.wait_for_finishing_thread.start()
 
-            self.__wait_for_finishing_thread = threading.Thread(target=self._wait_for_finishing)
-            self.__wait_for_finishing_thread.start()
-        else:
-            logger.warning("Currently no active state machine! Please create a new state machine.")
-            self.set_execution_mode(StateMachineExecutionStatus.STOPPED)
+    def _run_active_state_machine(self):
+        """Store running active state machine and observe its status
+        """
+        self._run_state_machine(self._primary_context)
 
-    def _wait_for_finishing(self):
+    def _wait_for_finishing(self, context):
         """Observe running state machine and stop engine if execution has finished"""
-        self.state_machine_running = True
-        self.__running_state_machine.join()
-        self.__set_execution_mode_to_finished()
-        self.state_machine_manager.active_state_machine_id = None
+        context.state_machine_running = True
+        context.state_machine.join()
+        if context.state_machine.frozen:
+            context.state_machine.unfreeze()
+        context.run_to_states = []
+        self._set_execution_mode_of_context(context, StateMachineExecutionStatus.FINISHED)
+        if context is self._primary_context:
+            self.state_machine_manager.active_state_machine_id = None
+        self._export_execution_metrics()
         plugins.run_on_state_machine_execution_finished()
-        # self.__set_execution_mode_to_stopped()
-        self.state_machine_running = False
+        with self.execution_engine_lock:
+            if self._contexts.get(context.state_machine_id) is context:
+                del self._contexts[context.state_machine_id]
+        context.state_machine_running = False
+
+    @staticmethod
+    def _export_execution_metrics():
+        """Writes the execution metrics to the file given by the config option EXECUTION_METRICS_EXPORT_PATH"""
+        from rafcon.core.singleton import execution_metrics  # delayed imported on purpose
+        export_path = global_config.get_config_value("EXECUTION_METRICS_EXPORT_PATH", None)
+        if not execution_metrics.enabled or export_path in (None, "None"):
+            return
+        try:
+            execution_metrics.export(export_path)
+        except (IOError, OSError) as e:
+            logger.error("Could not export the execution metrics to {0}: {1}".format(export_path, e))
 
-    def backward_step(self):
+    def backward_step(self, state_machine_id=None):
         """Take a backward step for all active states in the state machine
+
+        :param int state_machine_id: the id of the state machine, None for the active state machine
         """
         logger.debug("Executing backward step ...")
-        self.run_to_states = []
-        self.set_execution_mode(StateMachineExecutionStatus.BACKWARD)
+        context = self._get_context_to_control(state_machine_id)
+        if context is None:
+            return
+        context.run_to_states = []
+        self.set_execution_mode(StateMachineExecutionStatus.BACKWARD, state_machine_id=context.state_machine_id)
+
+    def _step(self, execution_mode, state_machine_id):
+        """Sets a step mode and starts the state machine, if it is not running
+
+        :param execution_mode: the step mode
+        :param int state_machine_id: the id of the state machine, None for the active state machine
+        """
+        context = self._get_context_to_control(state_machine_id)
+        if context is self._primary_context and state_machine_id is not None and not context.finished_or_stopped() \
+                and self.state_machine_manager.active_state_machine_id != state_machine_id:
+            context = None
+        if context is None or context.finished_or_stopped():
+            context = self._get_context_to_start(state_machine_id)
+            if context is None:
+                return
+            context.run_to_states = []
+            self._set_execution_mode_of_context(context, execution_mode)
+            self._run_state_machine(context, state_machine_id)
+        else:
+            context.run_to_states = []
+            self.set_execution_mode(execution_mode, state_machine_id=context.state_machine_id)
 
     @Observable.observed
     def step_mode(self, state_machine_id=None):
         """Set the execution mode to stepping mode. Transitions are only triggered if a new step is triggered
         """
         logger.debug("Activate step mode")
+        self._step(StateMachineExecutionStatus.STEP_MODE, state_machine_id)
 
-        if state_machine_id is not None:
-            self.state_machine_manager.active_state_machine_id = state_machine_id
-
-        self.run_to_states = []
-        if self.finished_or_stopped():
-            self.set_execution_mode(StateMachineExecutionStatus.STEP_MODE)
-            self._run_active_state_machine()
-        else:
-            self.set_execution_mode(StateMachineExecutionStatus.STEP_MODE)
-
-    def step_into(self):
+    def step_into(self, state_machine_id=None):
         """Take a forward step (into) for all active states in the state machine
         """
         logger.debug("Execution step into ...")
-        self.run_to_states = []
-        if self.finished_or_stopped():
-            self.set_execution_mode(StateMachineExecutionStatus.FORWARD_INTO)
-            self._run_active_state_machine()
-        else:
-            self.set_execution_mode(StateMachineExecutionStatus.FORWARD_INTO)
+        self._step(StateMachineExecutionStatus.FORWARD_INTO, state_machine_id)
 
-    def step_over(self):
+    def step_over(self, state_machine_id=None):
         """Take a forward step (over) for all active states in the state machine
         """
         logger.debug("Execution step over ...")
-        self.run_to_states = []
-        if self.finished_or_stopped():
-            self.set_execution_mode(StateMachineExecutionStatus.FORWARD_OVER)
-            self._run_active_state_machine()
-        else:
-            self.set_execution_mode(StateMachineExecutionStatus.FORWARD_OVER)
+        self._step(StateMachineExecutionStatus.FORWARD_OVER, state_machine_id)
 
-    def step_out(self):
+    def step_out(self, state_machine_id=None):
         """Take a forward step (out) for all active states in the state machine
         """
         logger.debug("Execution step out ...")
-        self.run_to_states = []
-        if self.finished_or_stopped():
-            self.set_execution_mode(StateMachineExecutionStatus.FORWARD_OUT)
-            self._run_active_state_machine()
-        else:
-            self.set_execution_mode(StateMachineExecutionStatus.FORWARD_OUT)
+        self._step(StateMachineExecutionStatus.FORWARD_OUT, state_machine_id)
 
     def run_to_selected_state(self, path, state_machine_id=None):
         """Execute the state machine until a specific state. This state won't be executed. This is an asynchronous task
         """
-        if self.state_machine_manager.get_active_state_machine() is not None:
-            self.state_machine_manager.get_active_state_machine().root_state.recursively_resume_states()
-
-        if not self.finished_or_stopped():
+        context = self._get_context_to_control(state_machine_id)
+        if context is self._primary_context and state_machine_id is not None and not context.finished_or_stopped() \
+                and self.state_machine_manager.active_state_machine_id != state_machine_id:
+            context = None
+        if context is not None:
+            state_machine = self._get_controlled_state_machine(context)
+            if state_machine is not None:
+                state_machine.root_state.recursively_resume_states()
+
+        if context is not None and not context.finished_or_stopped():
             logger.debug("Resume execution engine and run to selected state!")
-            self.run_to_states = []
-            self.run_to_states.append(path)
-            self.set_execution_mode(StateMachineExecutionStatus.RUN_TO_SELECTED_STATE)
+            context.run_to_states = [path]
+            self.set_execution_mode(StateMachineExecutionStatus.RUN_TO_SELECTED_STATE,
+                                    state_machine_id=context.state_machine_id)
         else:
             logger.debug("Start execution engine and run to selected state!")
-            if state_machine_id is not None:
-                self.state_machine_manager.active_state_machine_id = state_machine_id
-            self.set_execution_mode(StateMachineExecutionStatus.RUN_TO_SELECTED_STATE)
-            self.run_to_states = []
-            self.run_to_states.append(path)
-            self._run_active_state_machine()
+            context = self._get_context_to_start(state_machine_id)
+            if context is None:
+                return
+            self._set_execution_mode_of_context(context, StateMachineExecutionStatus.RUN_TO_SELECTED_STATE)
+            context.run_to_states = [path]
+            self._run_state_machine(context, state_machine_id)
 
-    def _wait_while_in_pause_or_in_step_mode(self):
+    def _wait_while_in_pause_or_in_step_mode(self, context):
         """ Waits as long as the execution_mode is in paused or step_mode
         """
-        while (self._status.execution_mode is StateMachineExecutionStatus.PAUSED) \
-                or (self._status.execution_mode is StateMachineExecutionStatus.STEP_MODE):
+        status = context.status
+        while (status.execution_mode is StateMachineExecutionStatus.PAUSED) \
+                or (status.execution_mode is StateMachineExecutionStatus.STEP_MODE):
             try:
-                self._status.execution_condition_variable.acquire()
-                self.synchronization_counter += 1
-                logger.verbose("Increase synchronization_counter: " + str(self.synchronization_counter))
-                self._status.execution_condition_variable.wait()
+                status.execution_condition_variable.acquire()
+                context.synchronization_counter += 1
+                logger.verbose("Increase synchronization_counter: " + str(context.synchronization_counter))
+                status.execution_condition_variable.wait()
             finally:
-                self._status.execution_condition_variable.release()
+                status.execution_condition_variable.release()
 
-    def _wait_if_required(self, container_state, next_child_state_to_execute, woke_up_from_pause_or_step_mode):
+    def _wait_if_required(self, context, container_state, next_child_state_to_execute,
+                          woke_up_from_pause_or_step_mode):
         """ Calls a blocking wait for the calling thread, depending on the execution mode.
 
+        :param context: the execution context of the state machine of :param container_state
         :param container_state: the current hierarhcy state to handle the execution mode for
         :param next_child_state_to_execute: the next child state for :param container_state to be executed
         :param woke_up_from_pause_or_step_mode: a flag to check if the execution just woke up from paused- or step-mode
         """
         wait = True
-        # if there is a state in self.run_to_states then RAFCON was commanded
+        # if there is a state in context.run_to_states then RAFCON was commanded
         #    a) a step_over
         #    b) a step_out
         #    c) a run_until
-        for state_path in copy.deepcopy(self.run_to_states):
+        for state_path in copy.deepcopy(context.run_to_states):
             next_child_state_path = None
             # can be None in case of no transition given
             if next_child_state_to_execute:
@@ -330,10 +531,10 @@ class ExecutionEngine(Observable):
             if state_path == container_state.get_path():
                 # the execution did a whole step_over inside hierarchy state "state" (case a) )
                 # or a whole step_out into the hierarchy state "state" (case b) )
-                # thus we delete its state path from self.run_to_states
+                # thus we delete its state path from context.run_to_states
                 # and wait for another step (of maybe different kind)
                 wait = True
-                self.run_to_states.remove(state_path)
+                context.run_to_states.remove(state_path)
                 break
             elif state_path == next_child_state_path:
                 # this is the case that execution has reached a specific state explicitly marked via
@@ -341,7 +542,7 @@ class ExecutionEngine(Observable):
                 # if this is the case run_to_selected_state() is finished and the execution
                 # has to wait for new execution commands
                 wait = True
-                self.run_to_states.remove(state_path)
+                context.run_to_states.remove(state_path)
                 break
             # don't wait if its just a normal step
             else:
@@ -352,14 +553,14 @@ class ExecutionEngine(Observable):
         if wait and not woke_up_from_pause_or_step_mode:
             logger.debug("Stepping mode: waiting for next step!")
             try:
-                self._status.execution_condition_variable.acquire()
-                self.synchronization_counter += 1
-                logger.verbose("Increase synchronization_counter: " + str(self.synchronization_counter))
-                self._status.execution_condition_variable.wait()
+                context.status.execution_condition_variable.acquire()
+                context.synchronization_counter += 1
+                logger.verbose("Increase synchronization_counter: " + str(context.synchronization_counter))
+                context.status.execution_condition_variable.wait()
             finally:
-                self._status.execution_condition_variable.release()
+                context.status.execution_condition_variable.release()
             # if the status was set to PAUSED or STEP_MODE don't wake up!
-            self._wait_while_in_pause_or_in_step_mode()
+            self._wait_while_in_pause_or_in_step_mode(context)
             # container_state was notified => thus, a new user command was issued, which has to be handled!
             container_state.execution_history.new_execution_command_handled = False
 
@@ -381,46 +582,49 @@ class ExecutionEngine(Observable):
         # logger.verbose("Increase state_counter!" + str(self.state_counter))
         self.state_counter_lock.release()
 
+        context = self._get_execution_context_of_state(container_state)
+        status = context.status
         woke_up_from_pause_or_step_mode = False
 
-        if (self._status.execution_mode is StateMachineExecutionStatus.PAUSED) \
-                or (self._status.execution_mode is StateMachineExecutionStatus.STEP_MODE):
-            self._wait_while_in_pause_or_in_step_mode()
+        if (status.execution_mode is StateMachineExecutionStatus.PAUSED) \
+                or (status.execution_mode is StateMachineExecutionStatus.STEP_MODE):
+            self._wait_while_in_pause_or_in_step_mode(context)
             # new command was triggered => execution command has to handled
             container_state.execution_history.new_execution_command_handled = False
             woke_up_from_pause_or_step_mode = True
 
         # no elif here: if the execution woke up from e.g. paused mode, it has to check the current execution mode
-        if self._status.execution_mode is StateMachineExecutionStatus.STARTED:
+        if status.execution_mode is StateMachineExecutionStatus.STARTED:
             # logger.debug("Execution engine started!")
             pass
 
-        elif self._status.execution_mode is StateMachineExecutionStatus.STOPPED:
+        elif status.execution_mode is StateMachineExecutionStatus.STOPPED:
             logger.debug("Execution engine stopped. State '{0}' is going to quit in the case of "
                          "no preemption handling has to be done!".format(container_state.name))
 
-        elif self._status.execution_mode is StateMachineExecutionStatus.FINISHED:
+        elif status.execution_mode is StateMachineExecutionStatus.FINISHED:
             # this must never happen during execution of the execution engine
             raise Exception
 
         else:  # all other step modes
             logger.verbose("before wait")
-            self._wait_if_required(container_state, next_child_state_to_execute, woke_up_from_pause_or_step_mode)
+            self._wait_if_required(context, container_state, next_child_state_to_execute,
+                                   woke_up_from_pause_or_step_mode)
             logger.verbose("after wait")
 
             # calculate states to which should be run
-            if self._status.execution_mode is StateMachineExecutionStatus.BACKWARD:
+            if status.execution_mode is StateMachineExecutionStatus.BACKWARD:
                 pass
-            elif self._status.execution_mode is StateMachineExecutionStatus.FORWARD_INTO:
+            elif status.execution_mode is StateMachineExecutionStatus.FORWARD_INTO:
                 pass
-            elif self._status.execution_mode is StateMachineExecutionStatus.FORWARD_OVER:
+            elif status.execution_mode is StateMachineExecutionStatus.FORWARD_OVER:
                 if not container_state.execution_history.new_execution_command_handled:
                     # the state that called this method is a hierarchy state => thus we save this state and wait until
                     # thise very state will execute its next state; only then we will wait on the condition variable
-                    self.run_to_states.append(container_state.get_path())
+                    context.run_to_states.append(container_state.get_path())
                 else:
                     pass
-            elif self._status.execution_mode is StateMachineExecutionStatus.FORWARD_OUT:
+            elif status.execution_mode is StateMachineExecutionStatus.FORWARD_OUT:
                 from rafcon.core.states.state import State
                 if isinstance(container_state.parent, State):
                     if not container_state.execution_history.new_execution_command_handled:
@@ -429,14 +633,15 @@ class ExecutionEngine(Observable):
                             parent_path = container_state.parent.parent.get_path()
                         else:
                             parent_path = container_state.parent.get_path()
-                        self.run_to_states.append(parent_path)
+                        context.run_to_states.append(parent_path)
                     else:
                         pass
                 else:
                     # if step_out is called from the highest level just run the state machine to the end
-                    self.run_to_states = []
-                    self.set_execution_mode(StateMachineExecutionStatus.STARTED)
-            elif self._status.execution_mode is StateMachineExecutionStatus.RUN_TO_SELECTED_STATE:
+                    context.run_to_states = []
+                    self.set_execution_mode(StateMachineExecutionStatus.STARTED,
+                                            state_machine_id=context.state_machine_id)
+            elif status.execution_mode is StateMachineExecutionStatus.RUN_TO_SELECTED_STATE:
                 # "run_to_states" were already updated thus doing nothing
                 pass
 
@@ -444,25 +649,26 @@ class ExecutionEngine(Observable):
 
         # in the case that the stop method wakes up the paused or step mode a StateMachineExecutionStatus.STOPPED
         # will be returned
-        return_value = self._status.execution_mode
+        return_value = status.execution_mode
 
         return return_value
 
     def _modify_run_to_states(self, state):
         """
         This is a special case. Inside a hierarchy state a step_over is triggered and affects the last child.
-        In this case the self.run_to_states has to be modified in order to contain the parent of the hierarchy state.
+        In this case the run_to_states has to be modified in order to contain the parent of the hierarchy state.
         Otherwise the execution won't respect the step_over any more and run until the end of the state machine.
         The same holds for a step_out.
         The reason for this is, that handle_execution_mode() can not be called between
         the last state of a hierarchy state and the termination of the hierarchy state itself.
         """
-        if self._status.execution_mode is StateMachineExecutionStatus.FORWARD_OVER or \
-                self._status.execution_mode is StateMachineExecutionStatus.FORWARD_OUT:
-            for state_path in copy.deepcopy(self.run_to_states):
+        context = self._get_execution_context_of_state(state)
+        if context.status.execution_mode is StateMachineExecutionStatus.FORWARD_OVER or \
+                context.status.execution_mode is StateMachineExecutionStatus.FORWARD_OUT:
+            for state_path in copy.deepcopy(context.run_to_states):
                 if state_path == state.get_path():
                     logger.verbose("Modifying run_to_states; triggered by state %s!", state.name)
-                    self.run_to_states.remove(state_path)
+                    context.run_to_states.remove(state_path)
                     from rafcon.core.states.state import State
                     if isinstance(state.parent, State):
                         from rafcon.core.states.library_state import LibraryState
@@ -470,9 +676,17 @@ class ExecutionEngine(Observable):
                             parent_path = state.parent.parent.get_path()
                         else:
                             parent_path = state.parent.get_path()
-                        self.run_to_states.append(parent_path)
+                        context.run_to_states.append(parent_path)
                     break
 
+    def get_start_state_paths(self, state):
+        """Returns the paths of the states, from which the execution of the state machine of a state starts
+
+        :param rafcon.core.states.state.State state: a state of the executed state machine
+        :rtype: list
+        """
+        return self._get_execution_context_of_state(state).start_state_paths
+
     def execute_state_machine_from_path(self, state_machine=None, path=None, start_state_path=None, wait_for_execution_finished=True):
         """ A helper function to start an arbitrary state machine at a given path.
 
@@ -492,25 +706,41 @@ class ExecutionEngine(Observable):
             state_machine.state_machine_id, start_state_path=start_state_path)
 
         if wait_for_execution_finished:
-            self.join()
-            self.stop()
+            self.join(state_machine_id=state_machine.state_machine_id)
+            self.stop(state_machine.state_machine_id)
         return state_machine
 
     @Observable.observed
-    def set_execution_mode(self, execution_mode, notify=True):
+    def set_execution_mode(self, execution_mode, notify=True, state_machine_id=None):
         """ An observed setter for the execution mode of the state machine status. This is necessary for the
         monitoring client to update the local state machine in the same way as the root state machine of the server.
 
         :param execution_mode: the new execution mode of the state machine
+        :param notify: whether to wake up the execution waiting for a new execution mode
+        :param int state_machine_id: the id of the state machine, None for the active state machine
         :raises exceptions.TypeError: if the execution mode is of the wrong type
         """
         if not isinstance(execution_mode, StateMachineExecutionStatus):
             raise TypeError("status must be of type StateMachineExecutionStatus")
-        self._status.execution_mode = execution_mode
+
+        context = self.get_execution_context(state_machine_id)
+        context.status.execution_mode = execution_mode
+        if notify:
+            context.status.execution_condition_variable.acquire()
+            context.status.execution_condition_variable.notify_all()
+            context.status.execution_condition_variable.release()
+
+    def _set_execution_mode_of_context(self, context, execution_mode, notify=True):
+        """Sets the execution mode of an execution context, which might not be registered yet"""
+        if context is self._primary_context:
+            # the observers are notified about changes of the execution mode of the active state machine
+            self.set_execution_mode(execution_mode, notify)
+            return
+        context.status.execution_mode = execution_mode
         if notify:
-            self._status.execution_condition_variable.acquire()
-            self._status.execution_condition_variable.notify_all()
-            self._status.execution_condition_variable.release()
+            context.status.execution_condition_variable.acquire()
+            context.status.execution_condition_variable.notify_all()
+            context.status.execution_condition_variable.release()
 
     #########################################################################
     # Properties for all class fields that must be observed by gtkmvc3
@@ -521,23 +751,48 @@ class ExecutionEngine(Observable):
         """Property for the _status field
 
         """
-        return self._status
+        return self._primary_context.status
+
+    @property
+    def _status(self):
+        return self._primary_context.status
 
     @property
     def run_to_states(self):
         """Property for the _run_to_states field
 
         """
-        self.execution_engine_lock.acquire()
-        return_value = self._run_to_states
-        self.execution_engine_lock.release()
-        return return_value
+        return self._primary_context.run_to_states
 
     @run_to_states.setter
     def run_to_states(self, run_to_states):
-        if not isinstance(run_to_states, list):
-            raise TypeError("run_to_states must be of type list")
-        self.execution_engine_lock.acquire()
-        self._run_to_states = run_to_states
-        self.execution_engine_lock.release()
+        self._primary_context.run_to_states = run_to_states
+
+    @property
+    def start_state_paths(self):
+        """The paths of the states, from which the execution of the active state machine starts
+
+        """
+        return self._primary_context.start_state_paths
+
+    @start_state_paths.setter
+    def start_state_paths(self, start_state_paths):
+        self._primary_context.start_state_paths = start_state_paths
+
+    @property
+    def state_machine_running(self):
+        """Whether the active state machine is executed
+
+        """
+        return self._primary_context.state_machine_running
+
+    @property
+    def synchronization_counter(self):
+        """Counts how often the execution of the active state machine waited for a new execution command
+
+        """
+        return self._primary_context.synchronization_counter
 
+    @synchronization_counter.setter
+    def synchronization_counter(self, synchronization_counter):
+        self._primary_context.synchronization_counter = synchronization_counter
@@ -0,0 +1,142 @@
+# Copyright (C) 2019 DLR
+#
+# All rights reserved. This program and the accompanying materials are made
+# available under the terms of the Eclipse Public License v1.0 which
+# accompanies this distribution, and is available at
+# http://www.eclipse.org/legal/epl-v10.html
+
+"""
+.. module:: execution_events
+   :synopsis: A channel for the execution status events of states, which is read by consumers at their own pace
+
+Observers of the execution status of states (e.g. the GUI) are called synchronously in the executing thread. Slow
+observers thus slow down the execution. Instead, the execution status changes can be read from an
+:class:`ExecutionEventBus`: the executing threads only write an event into a ring buffer, while the consumers drain the
+buffer whenever they like, e.g. with a fixed frame rate, optionally reduced to the latest status per state.
+
+Neither writing nor reading acquires a lock: the events are numbered and each event is written into the slot of the
+ring buffer given by its sequence number. If a consumer reads too slowly, the oldest events are overwritten and
+counted as missed by the consumer.
+"""
+from builtins import object
+from collections import namedtuple, OrderedDict
+import itertools
+import time
+
+DEFAULT_BUFFER_SIZE = 10000
+
+ExecutionStatusEvent = namedtuple('ExecutionStatusEvent', ['sequence_number', 'state_machine_id', 'path', 'status',
+                                                           'timestamp', 'run_id'])
+ExecutionStatusEvent.__doc__ = """A change of the execution status of a state
+
+:ivar int sequence_number: the number of the event, increased by one for each event
+:ivar int state_machine_id: the id of the state machine of the state, None if the state has no state machine
+:ivar str path: the path of the state
+:ivar rafcon.core.states.state.StateExecutionStatus status: the new execution status of the state
+:ivar float timestamp: the time of the change
+:ivar str run_id: the run id of the state
+"""
+
+
+class ExecutionEventBus(object):
+    """A ring buffer of execution status events
+
+    :ivar int size: the number of events kept in the ring buffer
+    """
+
+    def __init__(self, size=DEFAULT_BUFFER_SIZE):
+        if size < 1:
+            raise ValueError("The size of the execution event bus must be positive")
+        self.size = size
+        self._buffer = [None] * size
+        # next() of itertools.count is atomic, so concurrent writers get distinct sequence numbers
+        self._sequence_numbers = itertools.count()
+        self._next_sequence_number = 0
+
+    @property
+    def next_sequence_number(self):
+        """The sequence number of the next event, approximately, if events are written concurrently
+
+        :rtype: int
+        """
+        return self._next_sequence_number
+
+    def publish(self, state_machine_id, path, status, run_id=None):
+        """Writes an execution status event
+
+        :param int state_machine_id: the id of the state machine of the state
+        :param str path: the path of the state
+        :param rafcon.core.states.state.StateExecutionStatus status: the new execution status of the state
+        :param str run_id: the run id of the state
+        :return: the written event
+        :rtype: ExecutionStatusEvent
+        """
+        sequence_number = next(self._sequence_numbers)
+        event = ExecutionStatusEvent(sequence_number, state_machine_id, path, status, time.time(), run_id)
+        self._buffer[sequence_number % self.size] = event
+        self._next_sequence_number = sequence_number + 1
+        return event
+
+    def create_consumer(self, from_oldest=False):
+        """Creates a consumer reading the events of the bus
+
+        :param bool from_oldest: if True, the consumer starts with the oldest event kept in the ring buffer, otherwise
+            with the next written event
+        :rtype: ExecutionEventConsumer
+        """
+        next_sequence_number = self._next_sequence_number
+        if from_oldest:
+            next_sequence_number = max(0, next_sequence_number - self.size)
+        return ExecutionEventConsumer(self, next_sequence_number)
+
+
+class ExecutionEventConsumer(object):
+    """Reads the events of an :class:`ExecutionEventBus` in the order of their sequence numbers
+
+    A consumer must only be drained by one thread at a time.
+
+    :ivar int missed_events: the number of events that were overwritten before they were read
+    """
+
+    def __init__(self, event_bus, next_sequence_number=0):
+        self._event_bus = event_bus
+        self._next_sequence_number = next_sequence_number
+        self.missed_events = 0
+
+    def drain(self, coalesce=False, max_events=None):
+        """Returns the events written since the last call
+
+        An event that is still being written by another thread, ends the read events. It is returned by the next call.
+
+        :param bool coalesce: if True, only the latest event of each state is returned
+        :param int max_events: the maximum number of read events, None for all available events
+        :return: the events in the order of their sequence numbers
+        :rtype: list[ExecutionStatusEvent]
+        """
+        buffer = self._event_bus._buffer
+        size = self._event_bus.size
+        events = []
+        expected_sequence_number = self._next_sequence_number
+        while max_events is None or len(events) < max_events:
+            event = buffer[expected_sequence_number % size]
+            if event is None or event.sequence_number < expected_sequence_number:
+                # the event was not written, yet
+                break
+            if event.sequence_number > expected_sequence_number:
+                # the expected event was overwritten, continue with the oldest kept event
+                oldest_sequence_number = event.sequence_number - size + 1
+                self.missed_events += oldest_sequence_number - expected_sequence_number
+                expected_sequence_number = oldest_sequence_number
+                continue
+            events.append(event)
+            expected_sequence_number += 1
+        self._next_sequence_number = expected_sequence_number
+
+        if coalesce:
+            latest_events = OrderedDict()
+            for event in events:
+                key = (event.state_machine_id, event.path)
+                latest_events.pop(key, None)
+                latest_events[key] = event
+            events = list(latest_events.values())
+        return events
@@ -23,53 +23,258 @@ from builtins import range
 from builtins import str
 import time
 import copy
-from collections import Iterable, Sized
+from timeit import default_timer as timer
+from collections import Iterable, Sized, deque
 import json
 from jsonconversion.decoder import JSONObjectDecoder
 from jsonconversion.encoder import JSONObjectEncoder
 
 import shelve
-from threading import Lock
+from threading import Condition, Lock, Thread
 from enum import Enum
 from gtkmvc3.observable import Observable
 import traceback
 
+from rafcon.core.execution.binary_execution_log import BinaryExecutionLogWriter, FILE_EXTENSION as BINARY_LOG_EXTENSION
 from rafcon.core.id_generator import history_item_id_generator
+from rafcon.core.state_elements.scope import get_scoped_data_snapshot
 from rafcon.utils import log
 logger = log.get_logger(__name__)
 import os
 import subprocess
 import pickle
+import sys
 from weakref import ref
 
 
+def open_shelve_store(filename):
+    # 'c' for read/write/create
+    # protocol 2 cause of in some cases smaller file size
+    # writeback disabled, cause we don't need caching of entries in memory but continuous writes to the disk
+    return shelve.open(filename, flag='c', protocol=2, writeback=False)
+
+
+#: The available storage backends for execution logs: the name of the backend is mapped to a function opening the store
+#: for writing and the file extension of the logs. A store must support item assignment, `sync` and `close`.
+execution_log_backends = {
+    'shelve': (open_shelve_store, 'shelve'),
+    'binary': (BinaryExecutionLogWriter, BINARY_LOG_EXTENSION),
+}
+
+
 class ExecutionHistoryStorage(object):
-    def __init__(self, filename):
+    """A file log of the history items of a state machine execution
+
+    If a queue size is given, the history items are written by a background writer thread: the executing threads only
+    take a snapshot of the state of a history item and enqueue it, the writer thread encodes the history items and
+    writes them in batches. Otherwise, every history item is written synchronously.
+
+    :ivar str filename: the path of the log file
+    :ivar str backend: the name of the storage backend, one of :data:`execution_log_backends`
+    :ivar int queue_size: the maximum number of history items waiting to be written, 0 for synchronous writes
+    :ivar int batch_size: the number of history items that triggers a write of the writer thread
+    :ivar float flush_interval: the maximum time in seconds a history item waits to be written
+    :ivar str backpressure_policy: the behavior of the executing threads if the queue is full: 'BLOCK' waits for the
+        writer thread, 'DROP_DATA' only logs the structure of the history item (without any port or semantic data);
+        if `queue_size` further history items without data are waiting, history items are dropped completely
+    """
+
+    BACKPRESSURE_POLICIES = ('BLOCK', 'DROP_DATA')
+
+    def __init__(self, filename, queue_size=0, batch_size=100, flush_interval=1., backpressure_policy='BLOCK',
+                 backend='shelve'):
         self.filename = filename
         self.store_lock = Lock()
+        if backend not in execution_log_backends:
+            logger.error("Unknown execution log backend {0}, using 'shelve'".format(backend))
+            backend = 'shelve'
+        self.backend = backend
         try:
-            # 'c' for read/write/create
-            # protocol 2 cause of in some cases smaller file size
-            # writeback disabled, cause we don't need caching of entries in memory but continuous writes to the disk
-            self.store = shelve.open(filename, flag='c', protocol=2, writeback=False)
+            self.store = self._open_store()
             logger.debug('Openend log file for writing %s' % self.filename)
         except Exception as e:
             logger.error('Exception: ' + str(e) + str(traceback.format_exc()))
 
-    def store_item(self, key, value):
+        if backpressure_policy not in self.BACKPRESSURE_POLICIES:
+            logger.warning("Unknown backpressure policy {0} for the execution log, using 'BLOCK'".format(
+                backpressure_policy))
+            backpressure_policy = 'BLOCK'
+        self.queue_size = queue_size
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.backpressure_policy = backpressure_policy
+        self.number_of_items_without_data = 0
+        self.number_of_dropped_items = 0
+
+        self._pending_items = deque()
+        self._number_of_pending_items_with_data = 0
+        self._writing = False
+        self._flush_requested = False
+        self._closing = False
+        self._condition = Condition()
+        self._writer_thread = None
+        if queue_size > 0:
+            self._writer_thread = Thread(target=self._write_pending_items,
+                                         name="ExecutionLogWriter-{0}".format(os.path.basename(filename)))
+            self._writer_thread.daemon = True
+            self._writer_thread.start()
+
+    def _open_store(self):
+        open_store, _ = execution_log_backends[self.backend]
+        return open_store(self.filename)
+
+    def store_history_item(self, history_item):
+        """Stores a history item in the log file
+
+        With a writer thread, the history item is only enqueued. If the queue is full, the backpressure policy is
+        applied.
+
+        :param HistoryItem history_item: the history item to be stored
+        """
+        if self._writer_thread is None:
+            from rafcon.core.singleton import execution_metrics  # delayed imported on purpose
+            record_size = self.store_item(history_item.history_item_id, history_item.to_dict(),
+                                          measure_size=execution_metrics.enabled)
+            if record_size is not None:
+                execution_metrics.record_log_item(history_item.state_reference, record_size)
+            history_item.stored = True
+            return
+
+        with self._condition:
+            if self._closing:
+                logger.error("The execution log {0} is already closed, cannot store {1}".format(self.filename,
+                                                                                               history_item))
+                return
+            with_data = True
+            while self._number_of_pending_items_with_data >= self.queue_size:
+                if self.backpressure_policy == 'DROP_DATA':
+                    if len(self._pending_items) >= 2 * self.queue_size:
+                        # also the queue of the history items without data is full
+                        self.number_of_dropped_items += 1
+                        history_item.stored = True
+                        return
+                    with_data = False
+                    self.number_of_items_without_data += 1
+                    break
+                self._condition.wait()
+            # the state may change until the writer thread encodes the history item
+            history_item.snapshot_state(with_data)
+            self._pending_items.append((history_item, with_data))
+            if with_data:
+                self._number_of_pending_items_with_data += 1
+            if len(self._pending_items) >= self.batch_size:
+                self._condition.notify_all()
+
+    def _write_pending_items(self):
+        """The loop of the writer thread writing the enqueued history items in batches"""
+        while True:
+            with self._condition:
+                deadline = time.time() + self.flush_interval
+                while len(self._pending_items) < self.batch_size and not self._flush_requested and \
+                        not self._closing:
+                    remaining_time = deadline - time.time()
+                    if remaining_time <= 0:
+                        break
+                    self._condition.wait(remaining_time)
+                if not self._pending_items and self._closing:
+                    return
+                batch = list(self._pending_items)
+                self._pending_items.clear()
+                self._number_of_pending_items_with_data = 0
+                self._flush_requested = False
+                self._writing = True
+                # wake up execution threads blocked by a full queue
+                self._condition.notify_all()
+
+            records = []
+            for history_item, with_data in batch:
+                try:
+                    records.append((history_item.state_reference, history_item.history_item_id,
+                                    history_item.to_dict(with_data)))
+                except Exception as e:
+                    logger.error('Exception: ' + str(e) + str(traceback.format_exc()))
+            if records:
+                from rafcon.core.singleton import execution_metrics  # delayed imported on purpose
+                measure_size = execution_metrics.enabled
+                record_sizes = []
+                with self.store_lock:
+                    try:
+                        for state, key, value in records:
+                            record_size = self._write_record(key, value, measure_size)
+                            if record_size is not None:
+                                record_sizes.append((state, record_size))
+                        self.store.sync()
+                    except Exception as e:
+                        logger.error('Exception: ' + str(e) + str(traceback.format_exc()))
+                for state, record_size in record_sizes:
+                    execution_metrics.record_log_item(state, record_size)
+            for history_item, _ in batch:
+                history_item.release_state_snapshot()
+                history_item.stored = True
+
+            with self._condition:
+                self._writing = False
+                self._condition.notify_all()
+
+    def wait_until_written(self):
+        """Blocks until all enqueued history items are written to the log file"""
+        if self._writer_thread is None:
+            return
+        with self._condition:
+            while (self._pending_items or self._writing) and self._writer_thread.is_alive():
+                self._flush_requested = True
+                self._condition.notify_all()
+                self._condition.wait(self.flush_interval)
+
+    def _stop_writer_thread(self):
+        """Writes all enqueued history items and terminates the writer thread"""
+        if self._writer_thread is None:
+            return
+        with self._condition:
+            self._closing = True
+            self._condition.notify_all()
+        self._writer_thread.join()
+        if self.number_of_items_without_data:
+            logger.warning("The data of {0} history items was not written to the execution log {1}, as the writer "
+                           "could not keep up".format(self.number_of_items_without_data, self.filename))
+            self.number_of_items_without_data = 0
+        if self.number_of_dropped_items:
+            logger.warning("{0} history items were not written to the execution log {1}, as the writer could not keep "
+                           "up".format(self.number_of_dropped_items, self.filename))
+            self.number_of_dropped_items = 0
+
+    def _write_record(self, key, value, measure_size=False):
+        """Writes a record to the store, the store lock must be held
+
+        :param key: the key of the record
+        :param dict value: the record
+        :param bool measure_size: whether the number of bytes written for the record is determined
+        :return: the number of bytes written for the record, None if not measured
+        :rtype: int
+        """
+        self.store[native_str(key)] = value
+        if not measure_size:
+            return None
+        if isinstance(self.store, BinaryExecutionLogWriter):
+            return self.store.last_record_size
+        # the shelve store pickles the records with protocol 2
+        return len(pickle.dumps(value, protocol=2))
+
+    def store_item(self, key, value, measure_size=False):
         self.store_lock.acquire()
         try:
-            self.store[native_str(key)] = value
+            return self._write_record(key, value, measure_size)
         except Exception as e:
             logger.error('Exception: ' + str(e) + str(traceback.format_exc()))
         finally:
             self.store_lock.release()
 
     def flush(self):
+        self.wait_until_written()
         self.store_lock.acquire()
         try:
             self.store.close()
-            self.store = shelve.open(self.filename, flag='c', protocol=2, writeback=False)
+            self.store = self._open_store()
             logger.debug('Flushed log file %s' % self.filename)
         except Exception as e:
             logger.error('Exception: ' + str(e) + str(traceback.format_exc()))
@@ -77,12 +282,16 @@ class ExecutionHistoryStorage(object):
             self.store_lock.release()
 
     def close(self, make_read_and_writable_for_all=False):
+        self._stop_writer_thread()
         self.store_lock.acquire()
         try:
             self.store.close()
             logger.debug('Closed log file %s' % self.filename)
             if make_read_and_writable_for_all:
-                ret = subprocess.call(['chmod', 'a+rw', self.filename])
+                if os.path.isdir(self.filename):
+                    ret = subprocess.call(['chmod', '-R', 'a+rwX', self.filename])
+                else:
+                    ret = subprocess.call(['chmod', 'a+rw', self.filename])
                 if ret:
                     logger.debug('Could not make log file readable for all. chmod a+rw failed on %s.' % self.filename)
                 else:
@@ -103,22 +312,138 @@ class ExecutionHistoryStorage(object):
             self.store_lock.release()
 
 
+def estimate_size(data):
+    """Estimates the memory consumption of (history item) data in bytes
+
+    :param data: the data to be measured
+    :return: the size of the pickled data or, if the data cannot be pickled, the size of the object
+    :rtype: int
+    """
+    try:
+        return len(pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL))
+    except Exception:
+        return sys.getsizeof(data)
+
+
+def copy_port_data(state, port_data):
+    """Copies the input or output data of a state for a history item
+
+    The values of data ports passing by reference are not copied.
+
+    :param rafcon.core.states.state.State state: the state the data belongs to
+    :param dict port_data: the input or output data
+    :return: the copied data
+    """
+    by_reference = set(port.name for port in list(state.input_data_ports.values()) +
+                       list(state.output_data_ports.values()) if port.pass_by_reference)
+    if not port_data or not by_reference:
+        return copy.deepcopy(port_data)
+    return {name: value if name in by_reference else copy.deepcopy(value) for name, value in port_data.items()}
+
+
 class ExecutionHistory(Observable, Iterable, Sized):
     """A class for the history of a state machine execution
 
         It stores all history elements in a stack wise fashion.
 
+        The number of history items and their (estimated) size can be limited. If a limit is exceeded, the oldest
+        history items are handled according to the retention policy:
+
+        * 'DROP_ITEMS': the history items are removed from the history
+        * 'DROP_DATA': the history items are kept, but their scoped data and input/output data is released
+        * 'KEEP_SCOPED_DATA': only the input/output data is released, the scoped data needed for backward stepping is
+          kept (thus, only the size limit is effective)
+
+        Backward stepping is only possible within the history items holding their data. If an execution log is
+        enabled, the history items are stored when being pushed; the data of a history item is only released after it
+        was stored.
+
         :ivar initial_prev: optional link to a previous element for the first element pushed into this history of
                             type :class:`rafcon.core.execution.execution_history.HistoryItem`
+        :ivar int max_items: the maximum number of history items (with data), 0 for no limit
+        :ivar int max_bytes: the maximum estimated size of the data of all history items, 0 for no limit
+        :ivar str retention_policy: the handling of history items exceeding the limits, one of RETENTION_POLICIES
     """
 
-    def __init__(self, initial_prev=None):
+    RETENTION_POLICIES = ('DROP_ITEMS', 'DROP_DATA', 'KEEP_SCOPED_DATA')
+
+    def __init__(self, initial_prev=None, max_items=0, max_bytes=0, retention_policy='DROP_ITEMS'):
         super(ExecutionHistory, self).__init__()
-        self._history_items = []            
+        self._history_items = deque()
         self.initial_prev = initial_prev
         self.execution_history_storage = None
         self.new_execution_command_handled = True
 
+        if retention_policy not in self.RETENTION_POLICIES:
+            logger.warning("Unknown retention policy {0} for the execution history, using 'DROP_ITEMS'".format(
+                retention_policy))
+            retention_policy = 'DROP_ITEMS'
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self.retention_policy = retention_policy
+        # the number of history items (at the beginning) whose data was released
+        self._number_of_items_without_data = 0
+        self._data_size = 0
+
+    def get_retention_settings(self):
+        """Returns the retention settings of the history, e.g. to be passed to the histories of concurrent branches
+
+        :rtype: dict
+        """
+        return {'max_items': self.max_items, 'max_bytes': self.max_bytes, 'retention_policy': self.retention_policy}
+
+    @property
+    def data_size(self):
+        """The estimated size of the data of all history items in bytes (only determined if max_bytes is set)"""
+        return self._data_size
+
+    def _limits_exceeded(self):
+        number_of_items_with_data = len(self._history_items) - self._number_of_items_without_data
+        return (self.max_items and number_of_items_with_data > self.max_items) or \
+               (self.max_bytes and self._data_size > self.max_bytes)
+
+    def _apply_retention_policy(self):
+        """Drops the oldest history items or their data while the limits are exceeded
+
+        The last two history items are always kept, as they are required to determine the previously executed state.
+        """
+        if self.retention_policy == 'DROP_ITEMS':
+            while self._limits_exceeded() and len(self._history_items) > 2:
+                history_item = self._history_items.popleft()
+                self._data_size -= history_item.data_size
+                history_item.next = None
+                # the predecessor of the new first item is dropped, but its id is kept for the execution log
+                self._history_items[0].detach_prev()
+            return
+
+        while self._limits_exceeded() and self._number_of_items_without_data < len(self._history_items) - 2:
+            history_item = self._history_items[self._number_of_items_without_data]
+            if self.execution_history_storage is not None and not history_item.stored:
+                # the data of the history item is released not before it was written to the execution log
+                break
+            self._data_size -= history_item.data_size
+            history_item.release_data(keep_scoped_data=self.retention_policy == 'KEEP_SCOPED_DATA')
+            self._data_size += history_item.data_size
+            self._number_of_items_without_data += 1
+
+    def is_backward_step_possible(self):
+        """Checks whether the history holds all data required to step back over the last executed state
+
+        :return: False, if the history items required for the step were dropped or their data was released
+        :rtype: bool
+        """
+        last_history_item = self.get_last_history_item()
+        if last_history_item is None or last_history_item.data_released:
+            return False
+        if not isinstance(last_history_item, ReturnItem) or last_history_item.call_type is not CallType.EXECUTE:
+            return True
+        # the history items of a state execution are enclosed by the call and return item with the same run_id
+        for history_item in reversed(self._history_items):
+            if isinstance(history_item, CallItem) and history_item.run_id == last_history_item.run_id and \
+                    history_item.call_type is CallType.EXECUTE:
+                return not history_item.data_released
+        return False
+
     def destroy(self):
         # logger.verbose("Destroy execution history!")
         if self.execution_history_storage:
@@ -142,6 +467,9 @@ class ExecutionHistory(Observable, Iterable, Sized):
         return len(self._history_items)
 
     def __getitem__(self, index):
+        if isinstance(index, slice):
+            # a deque does not support slicing
+            return list(self._history_items)[index]
         return self._history_items[index]
 
     def get_last_history_item(self):
@@ -155,14 +483,24 @@ class ExecutionHistory(Observable, Iterable, Sized):
         except IndexError:  # this is the case for the very first executed state
             return None
 
-    def _push_item(self, last_history_item, current_item):
+    def _push_item(self, last_history_item, current_item, start_time=None):
         if last_history_item is None:
             current_item.prev = self.initial_prev
         if last_history_item is not None:
             last_history_item.next = current_item
         if self.execution_history_storage is not None:
-            self.execution_history_storage.store_item(current_item.history_item_id, current_item.to_dict())
+            self.execution_history_storage.store_history_item(current_item)
         self._history_items.append(current_item)
+        if self.max_bytes:
+            current_item.determine_data_size()
+            self._data_size += current_item.data_size
+        if self.max_items or self.max_bytes:
+            self._apply_retention_policy()
+        if start_time is not None:
+            from rafcon.core.singleton import execution_metrics  # delayed imported on purpose
+            if execution_metrics.enabled:
+                execution_metrics.record_history_item(current_item.state_reference, timer() - start_time,
+                                                      current_item.data_size)
         return current_item
 
     @Observable.observed
@@ -178,13 +516,14 @@ class ExecutionHistory(Observable, Iterable, Sized):
         :param state_for_scoped_data: the state of which the scoped data needs to be saved for further usages
             (e.g. backward stepping)
         """
+        start_time = timer()
         last_history_item = self.get_last_history_item()
         from rafcon.core.states.library_state import LibraryState  # delayed imported on purpose
         if isinstance(state_for_scoped_data, LibraryState):
             state_for_scoped_data = state_for_scoped_data.state_copy
         return_item = CallItem(state, last_history_item, call_type, state_for_scoped_data, input_data,
                                state.run_id)
-        return self._push_item(last_history_item, return_item)
+        return self._push_item(last_history_item, return_item, start_time)
 
     @Observable.observed
     def push_return_history_item(self, state, call_type, state_for_scoped_data, output_data=None):
@@ -199,13 +538,14 @@ class ExecutionHistory(Observable, Iterable, Sized):
         :param state_for_scoped_data: the state of which the scoped data needs to be saved for further usages (e.g.
             backward stepping)
         """
+        start_time = timer()
         last_history_item = self.get_last_history_item()
         from rafcon.core.states.library_state import LibraryState  # delayed imported on purpose
         if isinstance(state_for_scoped_data, LibraryState):
             state_for_scoped_data = state_for_scoped_data.state_copy
         return_item = ReturnItem(state, last_history_item, call_type, state_for_scoped_data, output_data,
                                  state.run_id)
-        return self._push_item(last_history_item, return_item)
+        return self._push_item(last_history_item, return_item, start_time)
 
     @Observable.observed
     def push_concurrency_history_item(self, state, number_concurrent_threads):
@@ -221,14 +561,14 @@ class ExecutionHistory(Observable, Iterable, Sized):
         last_history_item = self.get_last_history_item()
         return_item = ConcurrencyItem(state, self.get_last_history_item(),
                                       number_concurrent_threads, state.run_id,
-                                      self.execution_history_storage)
+                                      self.execution_history_storage, self.get_retention_settings())
         return self._push_item(last_history_item, return_item)
 
     @Observable.observed
     def push_state_machine_start_history_item(self, state_machine, run_id):
         return_item = StateMachineStartItem(state_machine, run_id)
         if self.execution_history_storage is not None:
-            self.execution_history_storage.store_item(return_item.history_item_id, return_item.to_dict())
+            self.execution_history_storage.store_history_item(return_item)
         self._history_items.append(return_item)
         return return_item
 
@@ -240,10 +580,13 @@ class ExecutionHistory(Observable, Iterable, Sized):
         :rtype: HistoryItem
         """
         try:
-            return self._history_items.pop()
+            history_item = self._history_items.pop()
         except IndexError:
             logger.error("No item left in the history item list in the execution history.")
             return None
+        self._data_size -= history_item.data_size
+        self._number_of_items_without_data = min(self._number_of_items_without_data, len(self._history_items))
+        return history_item
 
 
 class HistoryItem(object):
@@ -257,17 +600,52 @@ class HistoryItem(object):
     :ivar timestamp: the time of the call/return
     :ivar prev: the previous history item
     :ivar next: the next history item
+    :ivar bool stored: whether the history item was written to the execution log
     """
 
     def __init__(self, state, prev, run_id):
         self._state_reference = state
-        self.path = copy.deepcopy(state.get_path())
+        self.path = state.get_path()
         self.timestamp = time.time()
         self.run_id = run_id
         self.prev = prev
         self.next = None
         self.history_item_id = history_item_id_generator()
         self.state_type = str(type(state).__name__)
+        self.stored = False
+        self.data_size = 0
+        self.data_released = False
+        self._state_record = None
+
+    @property
+    def prev(self):
+        """The previous history item"""
+        return self._prev
+
+    @prev.setter
+    def prev(self, prev):
+        self._prev = prev
+        self._prev_history_item_id = None if prev is None else prev.history_item_id
+
+    @property
+    def prev_history_item_id(self):
+        """The id of the previous history item, also available if the previous item was dropped from the history"""
+        return self._prev_history_item_id
+
+    def detach_prev(self):
+        """Removes the reference to the previous history item, but keeps its id"""
+        self._prev = None
+
+    def determine_data_size(self):
+        """Estimates the size of the data held by the history item"""
+        self.data_size = 0
+
+    def release_data(self, keep_scoped_data=False):
+        """Releases the data of the history item
+
+        :param bool keep_scoped_data: if True, the scoped data is kept for backward stepping
+        """
+        self.data_released = not keep_scoped_data
 
     def destroy(self):
         self._state_reference = None
@@ -288,7 +666,30 @@ class HistoryItem(object):
     def __str__(self):
         return "HistoryItem with reference state name %s (time: %s)" % (self.state_reference.name, self.timestamp)
 
-    def to_dict(self):
+    def snapshot_state(self, with_data=True):
+        """Takes a snapshot of the fields of the record derived from the state (see :meth:`to_dict`)
+
+        The snapshot is taken, when the history item is handed over to the writer thread of the execution log, so that
+        the record shows the state at the time of the execution step.
+
+        :param bool with_data: if False, the semantic data is not included in the snapshot
+        """
+        self._state_record = self._get_state_record(with_data, copy_data=True)
+
+    def release_state_snapshot(self):
+        """Removes the snapshot taken by :meth:`snapshot_state` after the history item was written"""
+        self._state_record = None
+
+    def _get_state_record(self, with_data, copy_data=False):
+        """Returns the fields of the record derived from the state
+
+        The semantic data is not encoded, yet, the values that could not be copied are reported under the key
+        'semantic_data_errors'.
+
+        :param bool with_data: if False, the semantic data is not included
+        :param bool copy_data: if True, the semantic data is copied, otherwise it is referenced
+        :rtype: dict
+        """
         record = dict()
 
         # here always the correct path is desired
@@ -314,25 +715,48 @@ class HistoryItem(object):
         # there are 3 names of interest:
         # library_name (= library key), library_state_name (name of the user), state_name (name of the developer)
         record['state_name'] = target_state.name
+        record['description'] = target_state.description
+        semantic_data = {}
+        semantic_data_errors = {}
+        if with_data:
+            for k, v in target_state.semantic_data.items():
+                try:
+                    semantic_data[k] = copy.deepcopy(v) if copy_data else v
+                except Exception as e:
+                    semantic_data_errors['!' + k] = (str(e), str(v))
+        record['semantic_data'] = semantic_data
+        record['semantic_data_errors'] = semantic_data_errors
+        return record
+
+    def to_dict(self, with_data=True):
+        """Creates the record of the history item stored in the execution log
+
+        The fields derived from the state are taken from the snapshot, if :meth:`snapshot_state` was called before.
+
+        :param bool with_data: if False, the data (port values and semantic data) is not included in the record
+        :return: the record of the history item
+        :rtype: dict
+        """
+        if self._state_record is not None:
+            record = dict(self._state_record)
+        else:
+            record = self._get_state_record(with_data)
         record['timestamp'] = self.timestamp
         record['run_id'] = self.run_id  # library state and state copy have the same run_id
         record['history_item_id'] = self.history_item_id
 
         # semantic data
-        semantic_data_dict = {}
-        for k, v in target_state.semantic_data.items():
+        semantic_data_dict = record.pop('semantic_data_errors')
+        for k, v in record['semantic_data'].items():
             try:
                 semantic_data_dict[k] = pickle.dumps(v)
             except Exception as e:
                 semantic_data_dict['!' + k] = (str(e), str(v))
+        if not with_data:
+            record['data_dropped'] = True
         record['semantic_data'] = semantic_data_dict
 
-        record['description'] = target_state.description
-
-        if self.prev is not None:
-            record['prev_history_item_id'] = self.prev.history_item_id
-        else:
-            record['prev_history_item_id'] = None
+        record['prev_history_item_id'] = self.prev_history_item_id
         # store the specialized class name as item_type,
         # e.g. CallItem, ReturnItem, StatemachineStartItem when saved
         record['item_type'] = self.__class__.__name__
@@ -350,8 +774,8 @@ class StateMachineStartItem(HistoryItem):
     def __str__(self):
         return "StateMachineStartItem with name %s (time: %s)" % (self.sm_dict['root_state_storage_id'], self.timestamp)
 
-    def to_dict(self):
-        record = HistoryItem.to_dict(self)
+    def to_dict(self, with_data=True):
+        record = HistoryItem.to_dict(self, with_data)
         record.update(self.sm_dict)
         record['call_type'] = 'EXECUTE'
         record['state_name'] = 'StateMachineStartItem'
@@ -359,10 +783,7 @@ class StateMachineStartItem(HistoryItem):
         record['path'] = ''
         record['path_by_name'] = ''
         record['os_environment'] = self.os_environment
-        if self.prev is not None:
-            record['prev_history_item_id'] = self.prev.history_item_id
-        else:
-            record['prev_history_item_id'] = None
+        record['prev_history_item_id'] = self.prev_history_item_id
         return record
 
 
@@ -381,13 +802,28 @@ class ScopedDataItem(HistoryItem):
         else:
             raise Exception('unkown calltype, neither CONTAINER nor EXECUTE')
         self.call_type = call_type
-        self.scoped_data = {} if state_for_scoped_data is None else copy.deepcopy(state_for_scoped_data._scoped_data)
-        self.child_state_input_output_data = copy.deepcopy(child_state_input_output_data)
-
-    def to_dict(self):
-        record = HistoryItem.to_dict(self)
+        # unchanged scoped data is shared with the previous history items
+        self.scoped_data = {} if state_for_scoped_data is None else \
+            get_scoped_data_snapshot(state_for_scoped_data._scoped_data)
+        self.child_state_input_output_data = copy_port_data(state, child_state_input_output_data)
+        self._scoped_data_size = 0
+
+    def determine_data_size(self):
+        self._scoped_data_size = estimate_size([v.value for v in self.scoped_data.values()])
+        self.data_size = self._scoped_data_size + estimate_size(self.child_state_input_output_data)
+
+    def release_data(self, keep_scoped_data=False):
+        super(ScopedDataItem, self).release_data(keep_scoped_data)
+        self.child_state_input_output_data = {}
+        self.data_size = self._scoped_data_size
+        if not keep_scoped_data:
+            self.scoped_data = {}
+            self.data_size = 0
+
+    def to_dict(self, with_data=True):
+        record = HistoryItem.to_dict(self, with_data)
         scoped_data_dict = {}
-        for k, v in self.scoped_data.items():
+        for k, v in (self.scoped_data.items() if with_data else []):
             try:
                 scoped_data_dict[v.name] = pickle.dumps(v.value)
             except Exception as e:
@@ -398,7 +834,7 @@ class ScopedDataItem(HistoryItem):
         record['scoped_data'] = scoped_data_dict
 
         child_state_input_output_dict = {}
-        for k, v in self.child_state_input_output_data.items():
+        for k, v in (self.child_state_input_output_data.items() if with_data else []):
             try:
                 child_state_input_output_dict[k] = pickle.dumps(v)
             except Exception as e:
@@ -437,8 +873,8 @@ class CallItem(ScopedDataItem):
     def __str__(self):
         return "CallItem %s" % (ScopedDataItem.__str__(self))
 
-    def to_dict(self):
-        record = ScopedDataItem.to_dict(self)
+    def to_dict(self, with_data=True):
+        record = ScopedDataItem.to_dict(self, with_data)
         return record
 
 
@@ -452,8 +888,8 @@ class ReturnItem(ScopedDataItem):
     def __str__(self):
         return "ReturnItem %s" % (ScopedDataItem.__str__(self))
 
-    def to_dict(self):
-        record = ScopedDataItem.to_dict(self)
+    def to_dict(self, with_data=True):
+        record = ScopedDataItem.to_dict(self, with_data)
         if self.outcome is not None:
             record['outcome_name'] = self.outcome.to_dict()['name']
             record['outcome_id'] = self.outcome.to_dict()['outcome_id']
@@ -466,20 +902,21 @@ class ReturnItem(ScopedDataItem):
 class ConcurrencyItem(HistoryItem):
     """A class to hold all the data for an invocation of several concurrent threads.
     """
-    def __init__(self, container_state, prev, number_concurrent_threads, run_id, execution_history_storage):
+    def __init__(self, container_state, prev, number_concurrent_threads, run_id, execution_history_storage,
+                 retention_settings=None):
         HistoryItem.__init__(self, container_state, prev, run_id)
         self.execution_histories = []
 
         for i in range(number_concurrent_threads):
-            execution_history = ExecutionHistory(initial_prev=self)
+            execution_history = ExecutionHistory(initial_prev=self, **(retention_settings or {}))
             execution_history.set_execution_history_storage(execution_history_storage)
             self.execution_histories.append(execution_history)
 
     def __str__(self):
         return "ConcurrencyItem %s" % (HistoryItem.__str__(self))
 
-    def to_dict(self):
-        record = HistoryItem.to_dict(self)
+    def to_dict(self, with_data=True):
+        record = HistoryItem.to_dict(self, with_data)
         record['call_type'] = 'CONTAINER'
         return record
 
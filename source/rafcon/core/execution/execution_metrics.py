@@ -0,0 +1,429 @@
+# Copyright (C) 2019 DLR
+#
+# All rights reserved. This program and the accompanying materials are made
+# available under the terms of the Eclipse Public License v1.0 which
+# accompanies this distribution, and is available at
+# http://www.eclipse.org/legal/epl-v10.html
+
+"""
+.. module:: execution_metrics
+   :synopsis: A registry of execution metrics of states, e.g. execution counts and latency histograms
+
+The registry collects metrics per state, identified by the path of the state. For each state, the number of
+executions, aborts and preemptions, the number and estimated size of the pushed history items, the number and size of
+the records written to the execution log and histograms of the durations of the execution phases are kept:
+
+- ``total``: the whole execution of the state
+- ``input``: gathering the input data of the state by its parent
+- ``script``: the execute function of the script of an execution state
+- ``output``: checking the output data of an execution state
+- ``history``: creating and pushing the history items of the state
+
+The metrics can be queried during and after an execution and be exported as JSON snapshot or in the text format of
+Prometheus.
+"""
+from builtins import object
+from builtins import str
+import json
+import threading
+import time
+
+from rafcon.core.config import global_config
+from rafcon.utils.filesystem import write_file
+
+PHASES = ('total', 'input', 'script', 'output', 'history')
+
+QUANTILES = (0.5, 0.9, 0.99, 1.)
+
+
+class LatencyHistogram(object):
+    """A histogram of durations with logarithmic buckets, similar to a HDR histogram
+
+    Durations are recorded with the resolution of the given unit. Each power of two is split into linear sub-buckets,
+    so that the relative error of the quantiles is bounded by the size of a sub-bucket (6.25 %), independent of the
+    magnitude of the durations.
+
+    :ivar float unit: the resolution of the histogram in seconds
+    :ivar int count: the number of recorded durations
+    :ivar float sum: the sum of all recorded durations in seconds
+    :ivar float min: the shortest recorded duration in seconds
+    :ivar float max: the longest recorded duration in seconds
+    """
+
+    SUB_BUCKET_BITS = 4
+    _SUB_BUCKET_COUNT = 1 << SUB_BUCKET_BITS
+    _SUB_BUCKET_HALF_COUNT = _SUB_BUCKET_COUNT >> 1
+
+    def __init__(self, unit=1e-6):
+        self.unit = unit
+        self.count = 0
+        self.sum = 0.
+        self.min = None
+        self.max = None
+        self._bucket_counts = {}
+
+    @classmethod
+    def _get_bucket_index(cls, value):
+        if value < cls._SUB_BUCKET_COUNT:
+            return value
+        exponent = value.bit_length() - cls.SUB_BUCKET_BITS
+        return exponent * cls._SUB_BUCKET_HALF_COUNT + (value >> exponent)
+
+    @classmethod
+    def _get_bucket_bounds(cls, index):
+        """Returns the lowest value and the upper bound (exclusive) of the values of a bucket"""
+        if index < cls._SUB_BUCKET_COUNT:
+            return index, index + 1
+        exponent = (index - cls._SUB_BUCKET_HALF_COUNT) // cls._SUB_BUCKET_HALF_COUNT
+        sub_bucket = index - exponent * cls._SUB_BUCKET_HALF_COUNT
+        return sub_bucket << exponent, (sub_bucket + 1) << exponent
+
+    def record(self, duration):
+        """Records a duration
+
+        :param float duration: the duration in seconds
+        """
+        index = self._get_bucket_index(max(0, int(duration / self.unit)))
+        self._bucket_counts[index] = self._bucket_counts.get(index, 0) + 1
+        self.count += 1
+        self.sum += duration
+        if self.min is None or duration < self.min:
+            self.min = duration
+        if self.max is None or duration > self.max:
+            self.max = duration
+
+    def merge(self, other):
+        """Adds the recorded durations of another histogram with the same unit
+
+        :param LatencyHistogram other: the other histogram
+        """
+        if other.unit != self.unit:
+            raise ValueError("Only histograms with the same unit can be merged")
+        for index, count in other._bucket_counts.items():
+            self._bucket_counts[index] = self._bucket_counts.get(index, 0) + count
+        self.count += other.count
+        self.sum += other.sum
+        if other.min is not None and (self.min is None or other.min < self.min):
+            self.min = other.min
+        if other.max is not None and (self.max is None or other.max > self.max):
+            self.max = other.max
+
+    @property
+    def mean(self):
+        """The mean of the recorded durations in seconds, None if no durations were recorded"""
+        return self.sum / self.count if self.count else None
+
+    def quantile(self, q):
+        """Returns the duration below which the given fraction of the recorded durations lies
+
+        :param float q: the fraction between 0 and 1
+        :return: the duration in seconds, None if no durations were recorded
+        :rtype: float
+        """
+        if not self.count:
+            return None
+        if q >= 1.:
+            return self.max
+        rank = max(1, int(q * self.count + 0.5))
+        counted = 0
+        for index in sorted(self._bucket_counts):
+            counted += self._bucket_counts[index]
+            if counted >= rank:
+                lowest_value, upper_bound = self._get_bucket_bounds(index)
+                value = (lowest_value + upper_bound) / 2. * self.unit
+                return min(max(value, self.min), self.max)
+        return self.max
+
+    def to_dict(self):
+        """Returns a summary of the histogram
+
+        :rtype: dict
+        """
+        summary = {'count': self.count, 'sum': self.sum, 'min': self.min, 'max': self.max, 'mean': self.mean}
+        for q in QUANTILES[:-1]:
+            summary['p{0:g}'.format(q * 100)] = self.quantile(q)
+        return summary
+
+
+class StateMetrics(object):
+    """The execution metrics of a single state
+
+    :ivar str path: the path of the state
+    :ivar str name: the name of the state
+    :ivar str state_type: the class name of the state
+    :ivar str library: the library (library path and name) of the state, if it is a library state or part of a
+        library, otherwise None
+    :ivar int executions: the number of finished executions
+    :ivar int aborted: the number of executions that ended with the aborted outcome
+    :ivar int preempted: the number of executions that ended with the preempted outcome
+    :ivar int history_items: the number of history items pushed for the state
+    :ivar int history_bytes: the estimated size of the data of the history items, only determined if the size of the
+        execution history is limited
+    :ivar int log_items: the number of records of the state written to the execution log
+    :ivar int log_bytes: the number of bytes written to the execution log for the records of the state
+    :ivar dict durations: the latency histograms of the execution phases
+    """
+
+    def __init__(self, path, name, state_type, library=None):
+        self.path = path
+        self.name = name
+        self.state_type = state_type
+        self.library = library
+        self.executions = 0
+        self.aborted = 0
+        self.preempted = 0
+        self.history_items = 0
+        self.history_bytes = 0
+        self.log_items = 0
+        self.log_bytes = 0
+        self.durations = {}
+        self._lock = threading.Lock()
+
+    def record_duration(self, phase, duration):
+        with self._lock:
+            histogram = self.durations.get(phase)
+            if histogram is None:
+                histogram = self.durations[phase] = LatencyHistogram()
+            histogram.record(duration)
+
+    def record_execution(self, duration, outcome_id=None):
+        with self._lock:
+            self.executions += 1
+            if outcome_id == -1:
+                self.aborted += 1
+            elif outcome_id == -2:
+                self.preempted += 1
+        self.record_duration('total', duration)
+
+    def record_history_item(self, duration, data_size=0):
+        with self._lock:
+            self.history_items += 1
+            self.history_bytes += data_size
+        self.record_duration('history', duration)
+
+    def record_log_item(self, size):
+        with self._lock:
+            self.log_items += 1
+            self.log_bytes += size
+
+    def to_dict(self):
+        """Returns a snapshot of the metrics
+
+        :rtype: dict
+        """
+        with self._lock:
+            return {
+                'path': self.path,
+                'name': self.name,
+                'state_type': self.state_type,
+                'library': self.library,
+                'executions': self.executions,
+                'aborted': self.aborted,
+                'preempted': self.preempted,
+                'history_items': self.history_items,
+                'history_bytes': self.history_bytes,
+                'log_items': self.log_items,
+                'log_bytes': self.log_bytes,
+                'durations': {phase: histogram.to_dict() for phase, histogram in self.durations.items()}
+            }
+
+
+def _get_library_of_state(state):
+    from rafcon.core.states.library_state import LibraryState  # delayed imported on purpose
+    if not isinstance(state, LibraryState):
+        library_root_state = state.get_next_upper_library_root_state()
+        if library_root_state is None:
+            return None
+        state = library_root_state.parent
+    return "{0}/{1}".format(state.library_path, state.library_name)
+
+
+def _escape_label_value(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class ExecutionMetricsRegistry(object):
+    """Collects the execution metrics of states
+
+    Metrics are only recorded if the registry is enabled, by default depending on the config option
+    ``EXECUTION_METRICS_ENABLED``. The metrics of a state are identified by its path, they are kept until the registry
+    is reset.
+    """
+
+    def __init__(self):
+        self._enabled = None
+        self._state_metrics = {}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        """Whether metrics are recorded, the config option ``EXECUTION_METRICS_ENABLED`` is used if not set explicitly
+
+        :rtype: bool
+        """
+        if self._enabled is None:
+            return global_config.get_config_value("EXECUTION_METRICS_ENABLED", False)
+        return self._enabled
+
+    @enabled.setter
+    def enabled(self, enabled):
+        self._enabled = enabled
+
+    def get_metrics_of_state(self, state):
+        """Returns the metrics of a state, they are created if not existing
+
+        The name of the metrics is updated, as the state might have been renamed.
+
+        :param rafcon.core.states.state.State state: the state
+        :rtype: StateMetrics
+        """
+        path = state.get_path()
+        state_metrics = self._state_metrics.get(path)
+        if state_metrics is None:
+            with self._lock:
+                state_metrics = self._state_metrics.get(path)
+                if state_metrics is None:
+                    state_metrics = StateMetrics(path, state.name, type(state).__name__, _get_library_of_state(state))
+                    self._state_metrics[path] = state_metrics
+        state_metrics.name = state.name
+        return state_metrics
+
+    def record_duration(self, state, phase, duration):
+        """Records the duration of an execution phase of a state
+
+        :param rafcon.core.states.state.State state: the state
+        :param str phase: the execution phase, one of :data:`PHASES`
+        :param float duration: the duration in seconds
+        """
+        self.get_metrics_of_state(state).record_duration(phase, duration)
+
+    def record_execution(self, state, duration, outcome=None):
+        """Records a finished execution of a state
+
+        :param rafcon.core.states.state.State state: the state
+        :param float duration: the duration of the execution in seconds
+        :param rafcon.core.state_elements.logical_port.Outcome outcome: the final outcome of the state
+        """
+        self.get_metrics_of_state(state).record_execution(duration, outcome.outcome_id if outcome else None)
+
+    def record_history_item(self, state, duration, data_size=0):
+        """Records a history item pushed for a state
+
+        :param rafcon.core.states.state.State state: the state
+        :param float duration: the time needed to create and push the history item in seconds
+        :param int data_size: the estimated size of the data of the history item
+        """
+        self.get_metrics_of_state(state).record_history_item(duration, data_size)
+
+    def record_log_item(self, state, size):
+        """Records a record of a state written to the execution log
+
+        :param rafcon.core.states.state.State state: the state
+        :param int size: the number of bytes written for the record
+        """
+        self.get_metrics_of_state(state).record_log_item(size)
+
+    def get_metrics(self, path=None, library=None):
+        """Returns the collected metrics
+
+        :param str path: if given, only the metrics of the state with this path and its descendants are returned
+        :param str library: if given, only the metrics of states of this library (library path and name) are returned
+        :rtype: list[StateMetrics]
+        """
+        with self._lock:
+            state_metrics = list(self._state_metrics.values())
+        if path is not None:
+            state_metrics = [metrics for metrics in state_metrics
+                             if metrics.path == path or metrics.path.startswith(path + '/')]
+        if library is not None:
+            state_metrics = [metrics for metrics in state_metrics if metrics.library == library]
+        return state_metrics
+
+    def get_hot_spots(self, phase='total', number=10):
+        """Returns the states with the largest accumulated duration of an execution phase
+
+        :param str phase: the execution phase, one of :data:`PHASES`
+        :param int number: the maximum number of returned states
+        :return: the metrics of the states, sorted by the accumulated duration in descending order
+        :rtype: list[StateMetrics]
+        """
+        state_metrics = [metrics for metrics in self.get_metrics() if phase in metrics.durations]
+        state_metrics.sort(key=lambda metrics: metrics.durations[phase].sum, reverse=True)
+        return state_metrics[:number]
+
+    def reset(self):
+        """Removes all collected metrics"""
+        with self._lock:
+            self._state_metrics = {}
+
+    def snapshot(self):
+        """Returns a snapshot of all collected metrics
+
+        :rtype: dict
+        """
+        return {'timestamp': time.time(),
+                'states': [metrics.to_dict() for metrics in sorted(self.get_metrics(), key=lambda m: m.path)]}
+
+    def to_json(self):
+        """Returns a snapshot of all collected metrics as JSON string
+
+        :rtype: str
+        """
+        return json.dumps(self.snapshot(), indent=1, sort_keys=True)
+
+    def to_prometheus_text(self):
+        """Returns all collected metrics in the text format of Prometheus
+
+        The durations are exported as summaries with quantiles.
+
+        :rtype: str
+        """
+        snapshot = self.snapshot()['states']
+        lines = []
+
+        def add_sample(name, labels, value):
+            lines.append('{0}{{{1}}} {2!r}'.format(name, ','.join('{0}="{1}"'.format(key, _escape_label_value(label))
+                                                                  for key, label in labels), value))
+
+        def state_labels(state_snapshot):
+            return [('path', state_snapshot['path']), ('name', state_snapshot['name']),
+                    ('library', state_snapshot['library'] or '')]
+
+        for key, help_text in [('executions', "Number of finished executions of the state"),
+                               ('aborted', "Number of executions of the state that were aborted"),
+                               ('preempted', "Number of executions of the state that were preempted"),
+                               ('history_items', "Number of history items pushed for the state"),
+                               ('history_bytes', "Estimated size of the data of the history items of the state"),
+                               ('log_items', "Number of records of the state written to the execution log"),
+                               ('log_bytes', "Number of bytes written to the execution log for the state")]:
+            name = "rafcon_state_{0}_total".format(key)
+            lines.append("# HELP {0} {1}".format(name, help_text))
+            lines.append("# TYPE {0} counter".format(name))
+            for state_snapshot in snapshot:
+                add_sample(name, state_labels(state_snapshot), state_snapshot[key])
+
+        name = "rafcon_state_duration_seconds"
+        lines.append("# HELP {0} Durations of the execution phases of the state".format(name))
+        lines.append("# TYPE {0} summary".format(name))
+        for state_snapshot in snapshot:
+            for phase, summary in sorted(state_snapshot['durations'].items()):
+                labels = state_labels(state_snapshot) + [('phase', phase)]
+                for q in QUANTILES:
+                    value = summary['max'] if q >= 1. else summary['p{0:g}'.format(q * 100)]
+                    add_sample(name, labels + [('quantile', q)], value)
+                add_sample(name + "_sum", labels, summary['sum'])
+                add_sample(name + "_count", labels, summary['count'])
+        return "\n".join(lines) + "\n"
+
+    def export(self, file_path):
+        """Writes all collected metrics to a file
+
+        The file is written as JSON snapshot if its extension is ``.json``, otherwise in the text format of Prometheus.
+
+        :param str file_path: the path of the file
+        """
+        if file_path.endswith('.json'):
+            content = self.to_json()
+        else:
+            content = self.to_prometheus_text()
+        write_file(file_path, content, create_full_path=True, atomic=True)
@@ -0,0 +1,286 @@
+# Copyright (C) 2019 DLR
+#
+# All rights reserved. This program and the accompanying materials are made
+# available under the terms of the Eclipse Public License v1.0 which
+# accompanies this distribution, and is available at
+# http://www.eclipse.org/legal/epl-v10.html
+
+"""
+.. module:: execution_process_pool
+   :synopsis: A module holding a pool of worker processes for the execution of the scripts of execution states
+
+The scripts of execution states with the process backend are executed in worker processes. Thus, CPU-heavy scripts of
+concurrent branches run in parallel and are not limited by the GIL. Furthermore, a script can be interrupted at any
+point: if its state is preempted, the worker process is terminated.
+
+Inputs, outputs and the return value of a script are exchanged by pickling. The script functions get a proxy of the
+state (providing its name, id, path, logger and persistent variables of the worker) and a proxy of the global variable
+manager, which forwards all calls to the global variable manager of the RAFCON process.
+
+This module must not import any modules of the RAFCON core at module level, as it is imported by every worker process.
+"""
+from builtins import object
+import hashlib
+import multiprocessing
+import threading
+import time
+import traceback
+import types
+
+from rafcon.utils import log
+
+logger = log.get_logger(__name__)
+
+#: The interval in seconds, in which a waiting execution checks whether its state was preempted
+PREEMPTION_CHECK_INTERVAL = 0.02
+
+
+def _get_multiprocessing_context():
+    # worker processes are spawned, as forking a process with several running threads can lead to dead locks
+    if hasattr(multiprocessing, 'get_context'):
+        return multiprocessing.get_context('spawn')
+    return multiprocessing
+
+
+class ScriptExecutionError(Exception):
+    """Raised, if the script of a state raised an exception in the worker process
+
+    :ivar str formatted_traceback: the traceback of the exception in the worker process
+    """
+
+    def __init__(self, message, formatted_traceback):
+        super(ScriptExecutionError, self).__init__(message)
+        self.formatted_traceback = formatted_traceback
+
+
+class GlobalVariableManagerProxy(object):
+    """A proxy for the global variable manager of the RAFCON process
+
+    Each method call is forwarded to the RAFCON process. The arguments and return values must be picklable.
+    """
+
+    def __init__(self, connection):
+        self._connection = connection
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+
+        def call_global_variable_manager(*args, **kwargs):
+            self._connection.send(('gvm', name, args, kwargs))
+            success, result = self._connection.recv()
+            if not success:
+                raise result
+            return result
+        return call_global_variable_manager
+
+
+class StateProxy(object):
+    """The proxy of an execution state passed as `self` to the script functions in a worker process
+
+    :ivar str name: the name of the state
+    :ivar str state_id: the id of the state
+    :ivar dict persistent_variables: variables kept for the next execution of the state in the same worker
+    """
+
+    def __init__(self, name, state_id, path, persistent_variables):
+        self.name = name
+        self.state_id = state_id
+        self._path = path
+        self.logger = log.get_logger(name)
+        self.persistent_variables = persistent_variables
+        # a preempted state is not informed, but its worker process is terminated
+        self.preempted = False
+
+    def get_path(self):
+        return self._path
+
+    def preemptive_wait(self, time_to_wait=None):
+        if time_to_wait is not None:
+            time.sleep(time_to_wait)
+        return False
+
+
+def _run_worker(connection):
+    """The main loop of a worker process, executing one script function per received task
+
+    :param connection: the connection to the RAFCON process
+    """
+    modules = {}
+    persistent_variables = {}
+    while True:
+        try:
+            task = connection.recv()
+        except (EOFError, KeyboardInterrupt):
+            return
+        if task is None:
+            return
+        script_text, filename, name, state_id, path, inputs, outputs, backward_execution, reload_module = task
+        try:
+            key = (hashlib.sha1(script_text.encode('utf-8')).hexdigest(), filename, path)
+            module = modules.get(key)
+            if module is None or reload_module:
+                module = types.ModuleType(filename)
+                exec(compile(script_text, filename, 'exec'), module.__dict__)
+                modules[key] = module
+            state = StateProxy(name, state_id, path, persistent_variables.setdefault(path, {}))
+            gvm = GlobalVariableManagerProxy(connection)
+            if backward_execution:
+                result = None
+                if hasattr(module, "backward_execute"):
+                    result = module.backward_execute(state, inputs, outputs, gvm)
+            else:
+                result = module.execute(state, inputs, outputs, gvm)
+            connection.send(('result', result, outputs))
+        except Exception as e:
+            connection.send(('error', "{0}: {1}".format(type(e).__name__, e), traceback.format_exc()))
+
+
+class ExecutionWorker(object):
+    """A worker process executing scripts
+
+    :ivar process: the worker process
+    :ivar connection: the connection to the worker process
+    """
+
+    def __init__(self, context, name):
+        self.connection, worker_connection = context.Pipe()
+        self.process = context.Process(target=_run_worker, args=(worker_connection,), name=name)
+        # idle workers must not block the interpreter shutdown
+        self.process.daemon = True
+        self.process.start()
+        worker_connection.close()
+
+    def is_alive(self):
+        return self.process.is_alive()
+
+    def stop(self):
+        """Asks the worker process to exit after its current task"""
+        try:
+            self.connection.send(None)
+        except (IOError, OSError):
+            pass
+        self.connection.close()
+
+    def terminate(self):
+        """Terminates the worker process immediately"""
+        self.process.terminate()
+        self.process.join(1.)
+        self.connection.close()
+
+
+class ExecutionProcessPool(object):
+    """A pool of worker processes executing the scripts of execution states
+
+    Like the :class:`rafcon.core.execution.execution_thread_pool.ExecutionThreadPool`, the pool never queues a task
+    behind a busy worker: if no worker is idle, a new one is started. The pool size limits the number of idle workers
+    kept for later reuse.
+
+    :ivar int max_idle_workers: the maximum number of idle worker processes kept for later reuse
+    """
+
+    def __init__(self, max_idle_workers=4, name="RAFCON-Execution-Process"):
+        self.max_idle_workers = max_idle_workers
+        self._name = name
+        self._context = _get_multiprocessing_context()
+        self._lock = threading.Lock()
+        self._idle_workers = []
+        self._created_workers = 0
+        self._shut_down = False
+
+    def _acquire_worker(self):
+        with self._lock:
+            if self._shut_down:
+                raise RuntimeError("The execution process pool was already shut down")
+            while self._idle_workers:
+                worker = self._idle_workers.pop()
+                if worker.is_alive():
+                    return worker
+            self._created_workers += 1
+            name = "{0}-{1}".format(self._name, self._created_workers)
+        return ExecutionWorker(self._context, name)
+
+    def _release_worker(self, worker):
+        with self._lock:
+            if not self._shut_down and len(self._idle_workers) < self.max_idle_workers and worker.is_alive():
+                self._idle_workers.append(worker)
+                return
+        worker.stop()
+
+    def execute(self, state, script_text, filename, inputs, outputs, backward_execution=False, reload_module=False):
+        """Executes the execute (or backward_execute) function of a script in a worker process
+
+        The method blocks until the script function returned. Calls to the global variable manager are handled
+        meanwhile. If the state is preempted, the worker process is terminated and None is returned.
+
+        :param rafcon.core.states.execution_state.ExecutionState state: the state the script belongs to
+        :param str script_text: the source code of the script
+        :param str filename: the file name of the script, used in tracebacks
+        :param dict inputs: the input data of the state
+        :param dict outputs: the output data of the state, updated with the outputs written by the script
+        :param bool backward_execution: whether to call the backward_execute function
+        :param bool reload_module: whether to rebuild the script module in the worker process
+        :return: the return value of the script function
+        :raises ScriptExecutionError: if the script raised an exception
+        """
+        from rafcon.core.singleton import global_variable_manager
+
+        worker = self._acquire_worker()
+        reusable = False
+        try:
+            worker.connection.send((script_text, filename, state.name, state.state_id, state.get_path(),
+                                    inputs, outputs, backward_execution, reload_module))
+            while True:
+                if state.preempted:
+                    logger.debug("Terminating the worker process of preempted state {0}".format(state))
+                    return None
+                if not worker.connection.poll(PREEMPTION_CHECK_INTERVAL):
+                    if not worker.is_alive():
+                        raise ScriptExecutionError("The worker process of {0} exited unexpectedly".format(state), "")
+                    continue
+                message = worker.connection.recv()
+                if message[0] == 'gvm':
+                    _, method_name, args, kwargs = message
+                    try:
+                        result = (True, getattr(global_variable_manager, method_name)(*args, **kwargs))
+                    except Exception as e:
+                        result = (False, e)
+                    worker.connection.send(result)
+                elif message[0] == 'result':
+                    _, result, new_outputs = message
+                    outputs.update(new_outputs)
+                    reusable = True
+                    return result
+                else:
+                    _, error_message, formatted_traceback = message
+                    reusable = True
+                    raise ScriptExecutionError(error_message, formatted_traceback)
+        finally:
+            if reusable:
+                self._release_worker(worker)
+            else:
+                worker.terminate()
+
+    def shutdown(self):
+        """Stops all idle worker processes
+
+        Scripts that are currently executed are not affected.
+        """
+        with self._lock:
+            self._shut_down = True
+            idle_workers = self._idle_workers
+            self._idle_workers = []
+        for worker in idle_workers:
+            worker.stop()
+
+    @property
+    def number_of_idle_workers(self):
+        """The number of worker processes that are currently waiting for a new task
+        """
+        return len(self._idle_workers)
+
+    @property
+    def number_of_created_workers(self):
+        """The number of worker processes created in total
+        """
+        return self._created_workers
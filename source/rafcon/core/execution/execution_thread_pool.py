@@ -0,0 +1,150 @@
+# Copyright (C) 2019 DLR
+#
+# All rights reserved. This program and the accompanying materials are made
+# available under the terms of the Eclipse Public License v1.0 which
+# accompanies this distribution, and is available at
+# http://www.eclipse.org/legal/epl-v10.html
+
+"""
+.. module:: execution_thread_pool
+   :synopsis: A module holding a pool of reusable threads for the execution of states
+
+"""
+from future import standard_library
+standard_library.install_aliases()
+import queue
+import threading
+
+from rafcon.utils import log
+
+logger = log.get_logger(__name__)
+
+
+class ExecutionTask(object):
+    """A handle for a function executed by a thread of the :class:`ExecutionThreadPool`
+
+    The task offers the subset of the :class:`threading.Thread` interface, which is used by the states to synchronize
+    with their execution (`join` and `is_alive`).
+
+    :ivar target: the function to be executed
+    """
+
+    def __init__(self, target):
+        self.target = target
+        self._finished = threading.Event()
+
+    def run(self):
+        """Executes the target function and marks the task as finished afterwards
+        """
+        try:
+            self.target()
+        except Exception:
+            logger.exception("Unhandled exception in execution task {0}".format(self.target))
+        finally:
+            self.target = None
+            self._finished.set()
+
+    def join(self, timeout=None):
+        """Wait until the task has finished
+
+        :param float timeout: Maximum time to wait, None if infinitely
+        """
+        self._finished.wait(timeout)
+
+    def is_alive(self):
+        """Check whether the task is still being executed
+
+        :return: True if the task has not finished, yet
+        :rtype: bool
+        """
+        return not self._finished.is_set()
+
+    isAlive = is_alive
+
+
+class ExecutionThreadPool(object):
+    """A pool of worker threads executing states
+
+    Creating a new thread for every single state execution is expensive. The pool keeps finished worker threads
+    alive and reuses them for subsequent executions. A task is never queued behind a busy worker: if no worker is
+    idle, a new one is created. Thus, nested executions (a container state waiting for its children) cannot
+    deadlock, independent of the pool size. The pool size only limits the number of idle threads kept alive.
+
+    :ivar int max_idle_threads: the maximum number of idle worker threads kept for later reuse
+    """
+
+    def __init__(self, max_idle_threads=10, name="RAFCON-Execution"):
+        self.max_idle_threads = max_idle_threads
+        self._name = name
+        self._tasks = queue.Queue(maxsize=0)
+        self._lock = threading.Lock()
+        self._idle_threads = 0
+        self._created_threads = 0
+        self._shut_down = False
+
+    def start_task(self, target):
+        """Executes the target function in a worker thread of the pool
+
+        If the pool was already shut down, e.g. by a concurrent reconfiguration, the task is executed by a new
+        thread, which is not reused afterwards.
+
+        :param target: the function to be executed
+        :return: a handle for the task, that can be joined
+        :rtype: ExecutionTask
+        """
+        task = ExecutionTask(target)
+        with self._lock:
+            if self._shut_down:
+                logger.verbose("The execution thread pool was already shut down, using a new thread")
+                thread = threading.Thread(target=task.run)
+                thread.daemon = True
+                thread.start()
+                return task
+            if self._idle_threads > 0:
+                # reserve one of the idle workers for the task
+                self._idle_threads -= 1
+            else:
+                self._created_threads += 1
+                worker = threading.Thread(target=self._work,
+                                          name="{0}-{1}".format(self._name, self._created_threads))
+                # the worker threads must not block the interpreter shutdown while being idle; running executions
+                # are joined by the execution engine anyway
+                worker.daemon = True
+                worker.start()
+        self._tasks.put(task)
+        return task
+
+    def _work(self):
+        while True:
+            task = self._tasks.get()
+            if task is None:
+                return
+            task.run()
+            with self._lock:
+                if self._shut_down or self._idle_threads >= self.max_idle_threads:
+                    return
+                self._idle_threads += 1
+
+    def shutdown(self):
+        """Terminates all idle worker threads
+
+        Tasks that are currently executed are not affected.
+        """
+        with self._lock:
+            self._shut_down = True
+            idle_threads = self._idle_threads
+            self._idle_threads = 0
+        for _ in range(idle_threads):
+            self._tasks.put(None)
+
+    @property
+    def number_of_idle_threads(self):
+        """The number of worker threads that are currently waiting for a new task
+        """
+        return self._idle_threads
+
+    @property
+    def number_of_created_threads(self):
+        """The number of worker threads created in total
+        """
+        return self._created_threads
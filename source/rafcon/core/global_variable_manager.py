@@ -20,27 +20,239 @@
 
 """
 
+from builtins import object
 from builtins import str
 import time
 import copy
+from collections import deque, namedtuple
+from future.utils import string_types
+from functools import wraps
+from itertools import count
 from gtkmvc3.observable import Observable
-from threading import Lock, currentThread, RLock
+from threading import Condition, Event, Lock, Thread, currentThread, RLock
+from rafcon.core.config import global_config
 from rafcon.core.id_generator import *
 
 from rafcon.utils.type_helpers import type_inherits_of_type
 from rafcon.utils import log
+from rafcon.utils import multi_event
 from rafcon.utils import type_helpers
 logger = log.get_logger(__name__)
 
+#: The interval in seconds, in which threads waiting for a locked global variable are logged
+LOCK_WAIT_LOG_INTERVAL = 2.
+
+#: The number of changes kept in the change feed of the global variable manager
+CHANGE_FEED_SIZE = 1000
+
+#: A change of a global variable: the sequence number of the change (increasing over all variables), the key of the
+#: variable, the version of the variable after the change and whether the variable was deleted
+VariableChange = namedtuple('VariableChange', ['sequence_number', 'key', 'version', 'deleted'])
+
+
+def _raise_frozen(self, *args, **kwargs):
+    raise TypeError("'{0}' object of an immutable global variable cannot be modified".format(type(self).__name__))
+
+
+class FrozenDict(dict):
+    """A dictionary that cannot be modified, used for the values of immutable global variables
+
+    As the dictionary cannot be modified, copying it returns the dictionary itself.
+    """
+
+    __setitem__ = __delitem__ = clear = pop = popitem = setdefault = update = _raise_frozen
+    __ior__ = _raise_frozen
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __reduce__(self):
+        return FrozenDict, (dict(self), )
+
+
+class FrozenList(list):
+    """A list that cannot be modified, used for the values of immutable global variables
+
+    As the list cannot be modified, copying it returns the list itself.
+    """
+
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _raise_frozen
+    append = extend = insert = pop = remove = reverse = sort = clear = _raise_frozen
+    __setslice__ = __delslice__ = _raise_frozen
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __reduce__(self):
+        return FrozenList, (list(self), )
+
+
+def freeze_value(value):
+    """Creates an immutable copy of a value
+
+    Dictionaries, lists, tuples and sets are converted recursively into :class:`FrozenDict`, :class:`FrozenList`,
+    tuples and frozensets, numpy arrays into read-only copies. All other objects are deep-copied and must not be
+    modified by the readers of the value.
+
+    :param value: the value to be frozen
+    :return: the frozen copy of the value, already frozen values are returned unchanged
+    """
+    value_type = type(value)
+    if value_type in (FrozenDict, FrozenList, frozenset, str, bytes, int, float, bool, type(None)):
+        return value
+    if value_type is dict:
+        return FrozenDict((key, freeze_value(item)) for key, item in value.items())
+    if value_type is list:
+        return FrozenList(freeze_value(item) for item in value)
+    if value_type is tuple:
+        return tuple(freeze_value(item) for item in value)
+    if value_type is set:
+        return frozenset(value)
+    # numpy is an optional dependency, thus it is not imported here
+    if value_type.__module__ == 'numpy' and hasattr(value, 'flags') and hasattr(value, 'copy'):
+        value = value.copy()
+        value.flags.writeable = False
+        return value
+    return copy.deepcopy(value)
+
+
+class VariableLock(object):
+    """A fair lock of a global variable, which is held either by one writer or by several readers
+
+    Waiting threads are blocked on a condition variable until the lock is released. The lock is granted in the order
+    of the requests: a writer waits for all earlier requests, a reader only for earlier writers. Thus, neither readers
+    nor writers can starve.
+
+    :ivar str key: the key of the global variable, used for log messages
+    """
+
+    def __init__(self, key=None):
+        self.key = key
+        self._condition = Condition(Lock())
+        self._writer = False
+        self._readers = 0
+        # the requests of waiting threads, each a list holding whether the request is shared
+        self._requests = deque()
+
+    def _can_be_granted(self, request):
+        if self._writer:
+            return False
+        for waiting_request in self._requests:
+            if waiting_request is request:
+                return True
+            if not waiting_request[0] or not request[0]:
+                # an earlier writer request or this is a writer request waiting for earlier requests
+                return False
+        return False
+
+    def acquire(self, blocking=True, timeout=None, shared=False):
+        """Acquires the lock
+
+        :param bool blocking: whether to wait for the lock, if it cannot be acquired immediately
+        :param float timeout: the maximum time in seconds to wait for the lock, None waits infinitely
+        :param bool shared: whether to acquire the lock as reader, which can be held by several threads
+        :return: whether the lock was acquired
+        :rtype: bool
+        """
+        with self._condition:
+            if not self._writer and not self._requests and (shared or self._readers == 0):
+                self._grant(shared)
+                return True
+            if not blocking:
+                return False
+            request = [shared]
+            self._requests.append(request)
+            start_time = time.time()
+            next_log_time = start_time + LOCK_WAIT_LOG_INTERVAL
+            try:
+                while not (self._can_be_granted(request) and (shared or self._readers == 0)):
+                    now = time.time()
+                    if timeout is not None and now - start_time >= timeout:
+                        return False
+                    if now >= next_log_time:
+                        # informs the user about long locked variables
+                        logger.verbose("Variable '{2}' is locked and thread {0} waits already {1:.1f} seconds to "
+                                       "access it.".format(currentThread(), now - start_time, self.key))
+                        next_log_time = now + LOCK_WAIT_LOG_INTERVAL
+                    wait_time = next_log_time - now
+                    if timeout is not None:
+                        wait_time = min(wait_time, start_time + timeout - now)
+                    self._condition.wait(wait_time)
+                self._grant(shared)
+                return True
+            finally:
+                self._requests.remove(request)
+                # the next request might be grantable now, e.g. several readers behind this one
+                self._condition.notify_all()
+
+    def _grant(self, shared):
+        if shared:
+            self._readers += 1
+        else:
+            self._writer = True
+
+    def release(self, shared=False):
+        """Releases the lock
+
+        :param bool shared: whether the lock was acquired as reader
+        :raises exceptions.RuntimeError: if the lock is not held in the given mode
+        """
+        with self._condition:
+            if shared:
+                if self._readers == 0:
+                    raise RuntimeError("Release of a global variable lock that is not held by a reader")
+                self._readers -= 1
+            else:
+                if not self._writer:
+                    raise RuntimeError("Release of a global variable lock that is not held by a writer")
+                self._writer = False
+            self._condition.notify_all()
+
+    def locked(self):
+        """Returns whether the lock is held by a writer
+
+        :rtype: bool
+        """
+        return self._writer
+
+
+def forward_to_server(method):
+    """Decorator forwarding the calls of a method to the global variable server, if the manager is connected to one
+
+    See :meth:`GlobalVariableManager.connect_to_server`.
+    """
+    @wraps(method)
+    def forwarding_method(self, *args, **kwargs):
+        server_client = self._server_client
+        if server_client is not None:
+            return server_client.call(method.__name__, args, kwargs)
+        return method(self, *args, **kwargs)
+    return forwarding_method
+
 
 class GlobalVariableManager(Observable):
     """A class for organizing all global variables of the state machine
 
     :ivar __global_variable_dictionary: the dictionary, where all global variables are stored
-    :ivar __variable_locks: a dictionary that holds one mutex for each global variable
+    :ivar __variable_locks: a dictionary that holds one :class:`VariableLock` for each global variable
     :ivar __global_lock: a mutex to prevent that the dictionary is written by two threads simultaneously
     :ivar __access_keys: a dictionary that holds an access key to each locked global variable
     :ivar __variable_references: a dictionary that stores whether a variable can be returned by reference or not
+    :ivar __variable_versions: a dictionary that holds the version of each global variable, which is increased with
+        every change of its value
+    :ivar __immutable_variables: the keys of the variables, whose values are stored as frozen snapshots
+    :ivar __change_condition: a condition variable notified on every change of a global variable
+    :ivar __change_feed: the last changes of all global variables, see :meth:`get_changes`
+    :ivar __last_changes: the last change of each global variable
+    :ivar __subscriptions: the callbacks and keys of the subscriptions by their ids, see :meth:`subscribe`
+    :ivar _server_client: the connection to the global variable server, if the variables are shared with other
+        processes
     """
 
     def __init__(self):
@@ -51,26 +263,111 @@ class GlobalVariableManager(Observable):
         self.__global_lock = RLock()
         self.__access_keys = {}
         self.__variable_references = {}
+        self.__variable_versions = {}
+        self.__immutable_variables = set()
+        self.__change_condition = Condition(Lock())
+        self.__change_sequence_number = 0
+        self.__change_feed = deque(maxlen=CHANGE_FEED_SIZE)
+        self.__last_changes = {}
+        self.__subscriptions = {}
+        self.__subscription_ids = count(1)
+        self._server_client = None
+        self._change_listener_stopped = None
+
+    def initialize(self):
+        """Applies the global variable backend of the core configuration
+
+        With the backend `SHARED` (config option ``GLOBAL_VARIABLE_BACKEND``), the global variables are shared with
+        other processes by connecting to the global variable server. Called after the configuration was loaded, by
+        the core as well as by the GUI.
+        """
+        if global_config.get_config_value('GLOBAL_VARIABLE_BACKEND', 'LOCAL') == 'SHARED':
+            address = global_config.get_config_value('GLOBAL_VARIABLE_SERVER_ADDRESS')
+            idle_timeout = global_config.get_config_value('GLOBAL_VARIABLE_SERVER_IDLE_TIMEOUT', 60)
+            self.connect_to_server(address if address not in (None, "None") else None, idle_timeout=idle_timeout)
+
+    def connect_to_server(self, address=None, start_server=True, idle_timeout=60.):
+        """Shares the global variables with other processes by connecting to a global variable server
+
+        The server is started, if it is not running. After connecting, all calls are forwarded to the server, the
+        variables set before are not shared. The values of shared variables must be picklable. They are always
+        transferred by value, also when being set or read per reference.
+
+        :param str address: the path of the socket of the server, None for the default path
+        :param bool start_server: whether to start the server, if it is not running
+        :param float idle_timeout: the time in seconds a started server keeps running without connected processes
+        :raises exceptions.IOError: if no connection to the server could be established
+        """
+        from rafcon.core.global_variable_server import connect
+        if self._server_client is not None:
+            self.disconnect_from_server()
+        self._server_client = connect(address, start_server, idle_timeout)
+        logger.info("Sharing the global variables with the server {0}".format(self._server_client.address))
+        if self.__subscriptions:
+            self._start_change_listener()
+
+    def disconnect_from_server(self):
+        """Stops sharing the global variables, all locks held by this process are released"""
+        server_client = self._server_client
+        if server_client is None:
+            return
+        if self._change_listener_stopped is not None:
+            self._change_listener_stopped.set()
+            self._change_listener_stopped = None
+        self._server_client = None
+        server_client.close()
+
+    @property
+    def shared(self):
+        """Whether the global variables are shared with other processes by a global variable server
+
+        :rtype: bool
+        """
+        return self._server_client is not None
+
+    def _start_change_listener(self):
+        """Starts a thread calling the subscribed callbacks on the changes of the shared variables"""
+        if self._change_listener_stopped is not None:
+            return
+        stopped = self._change_listener_stopped = Event()
+        server_client = self._server_client
+        # the current sequence number is requested before the thread starts, so that no later change is missed
+        sequence_number = server_client.call('get_change_sequence_number')
+
+        def listen_for_changes(sequence_number):
+            while not stopped.is_set():
+                try:
+                    if server_client.wait_for_change(None, sequence_number, None, stopped) is None:
+                        return
+                    changes = server_client.call('get_changes', (sequence_number, ))
+                except (IOError, OSError, EOFError, RuntimeError) as e:
+                    if not stopped.is_set():
+                        logger.error("Lost connection to the global variable server: {0}".format(e))
+                    return
+                if changes:
+                    sequence_number = changes[-1].sequence_number
+                    self._call_subscriptions(changes)
+
+        thread = Thread(target=listen_for_changes, args=(sequence_number, ), name="GlobalVariableChangeListener")
+        thread.daemon = True
+        thread.start()
 
     @Observable.observed
-    def set_variable(self, key, value, per_reference=False, access_key=None, data_type=None):
+    @forward_to_server
+    def set_variable(self, key, value, per_reference=False, access_key=None, data_type=None, immutable=False):
         """Sets a global variable
 
         :param key: the key of the global variable to be set
         :param value: the new value of the global variable
         :param per_reference: a flag to decide if the variable should be stored per reference or per value
         :param access_key: if the variable was explicitly locked with the  rafcon.state lock_variable
+        :param data_type: the data type of the variable, defaults to the current data type of an existing variable
+        :param bool immutable: a flag to store a frozen copy of the value (see :func:`freeze_value`), which is shared by
+            all readers without copying it
         :raises exceptions.RuntimeError: if a wrong access key is passed
         """
         key = str(key)  # Ensure that we have the same string type for all keys (under Python2 and 3!)
-        if self.variable_exist(key):
-            if data_type is None:
-                data_type = self.__global_variable_type_dictionary[key]
-        else:
-            if data_type is None:
-                data_type = type(None)
-        assert isinstance(data_type, type)
-        self.check_value_and_type(value, data_type)
+        data_type = self._check_value(key, value, data_type)
 
         with self.__global_lock:
             unlock = True
@@ -82,25 +379,268 @@ class GlobalVariableManager(Observable):
                 else:
                     access_key = self.lock_variable(key, block=True)
             else:
-                self.__variable_locks[key] = Lock()
+                self.__variable_locks[key] = VariableLock(key)
                 access_key = self.lock_variable(key, block=True)
 
             # --- variable locked
-            if per_reference:
-                self.__global_variable_dictionary[key] = value
-                self.__global_variable_type_dictionary[key] = data_type
-                self.__variable_references[key] = True
-            else:
-                self.__global_variable_dictionary[key] = copy.deepcopy(value)
-                self.__global_variable_type_dictionary[key] = data_type
-                self.__variable_references[key] = False
+            version = self._store_value(key, value, data_type, per_reference, immutable)
+            changes = self._record_changes({key: version})
             # --- release variable
 
             if unlock:
                 self.unlock_variable(key, access_key)
 
         logger.debug("Global variable '{}' was set to value '{}' with type '{}'".format(key, value, data_type.__name__))
+        self._call_subscriptions(changes)
+
+    @Observable.observed
+    @forward_to_server
+    def set_variables(self, variables, per_reference=False, immutable=False):
+        """Sets several global variables at once
+
+        The variables are locked together, so that readers of several variables with :meth:`get_variables` either get
+        all old or all new values.
 
+        :param dict variables: the new values of the global variables by their keys
+        :param per_reference: a flag to decide if the variables should be stored per reference or per value
+        :param bool immutable: a flag to store frozen copies of the values, see :meth:`set_variable`
+        :raises exceptions.RuntimeError: if one of the variables is locked
+        """
+        variables = {str(key): value for key, value in variables.items()}
+        data_types = {key: self._check_value(key, value) for key, value in variables.items()}
+
+        with self.__global_lock:
+            for key in variables:
+                if self.is_locked(key):
+                    raise RuntimeError("Global variable {} is locked".format(key))
+                if key not in self.__variable_locks:
+                    self.__variable_locks[key] = VariableLock(key)
+            # the locks are always acquired in the same order to prevent deadlocks
+            variable_locks = [self.__variable_locks[key] for key in sorted(variables)]
+            for variable_lock in variable_locks:
+                variable_lock.acquire()
+            # --- variables locked
+            versions = {}
+            try:
+                for key, value in variables.items():
+                    versions[key] = self._store_value(key, value, data_types[key], per_reference, immutable)
+                changes = self._record_changes(versions)
+            # --- release variables
+            finally:
+                for variable_lock in variable_locks:
+                    variable_lock.release()
+
+        logger.debug("Global variables {} were set".format(", ".join(sorted(variables))))
+        self._call_subscriptions(changes)
+
+    def _check_value(self, key, value, data_type=None):
+        """Checks the new value of a global variable against its data type
+
+        :return: the data type of the variable
+        :raises exceptions.TypeError: if the value is not of the data type
+        """
+        if data_type is None:
+            data_type = self.__global_variable_type_dictionary[key] if self.variable_exist(key) else type(None)
+        assert isinstance(data_type, type)
+        self.check_value_and_type(value, data_type)
+        return data_type
+
+    def _store_value(self, key, value, data_type, per_reference, immutable):
+        """Stores the value of a global variable, the variable must be locked
+
+        :return: the new version of the variable
+        """
+        if immutable:
+            self.__global_variable_dictionary[key] = freeze_value(value)
+            self.__immutable_variables.add(key)
+        else:
+            self.__global_variable_dictionary[key] = value if per_reference else copy.deepcopy(value)
+            self.__immutable_variables.discard(key)
+        self.__global_variable_type_dictionary[key] = data_type
+        self.__variable_references[key] = bool(per_reference or immutable)
+        self.__variable_versions[key] = self.__variable_versions.get(key, 0) + 1
+        return self.__variable_versions[key]
+
+    def _record_changes(self, versions):
+        """Records changes of global variables and wakes up waiting threads
+
+        The changed variables must still be locked, so that the changes are recorded in the order of the new versions.
+        The subscribed callbacks have to be called with the returned changes after the variables were unlocked (see
+        :meth:`_call_subscriptions`).
+
+        :param dict versions: the new versions of the changed variables by their keys, None for deleted variables
+        :return: the recorded changes
+        :rtype: list[VariableChange]
+        """
+        changes = []
+        with self.__change_condition:
+            for key in sorted(versions):
+                self.__change_sequence_number += 1
+                change = VariableChange(self.__change_sequence_number, key, versions[key], versions[key] is None)
+                self.__change_feed.append(change)
+                self.__last_changes[key] = change
+                changes.append(change)
+            self.__change_condition.notify_all()
+        return changes
+
+    def _call_subscriptions(self, changes):
+        """Calls the subscribed callbacks for changes of global variables"""
+        with self.__change_condition:
+            subscriptions = list(self.__subscriptions.values())
+        # the callbacks are called without holding any lock, so that they can access the global variables
+        for callback, keys in subscriptions:
+            for change in changes:
+                if keys is None or change.key in keys:
+                    try:
+                        callback(change)
+                    except Exception as e:
+                        logger.exception("Error in the callback of a global variable subscription: {}".format(e))
+
+    @property
+    def change_sequence_number(self):
+        """The sequence number of the last change of any global variable, 0 if no variable was changed yet
+
+        :rtype: int
+        """
+        if self._server_client is not None:
+            return self._server_client.call('get_change_sequence_number')
+        return self.__change_sequence_number
+
+    @forward_to_server
+    def get_changes(self, since_sequence_number=0):
+        """Returns the changes of the global variables after a given change
+
+        Only the last :data:`CHANGE_FEED_SIZE` changes are kept. If older changes were requested, the first returned
+        change has a sequence number larger than `since_sequence_number` + 1.
+
+        :param int since_sequence_number: the sequence number of the last known change
+        :return: the changes ordered by their sequence numbers
+        :rtype: list[VariableChange]
+        """
+        with self.__change_condition:
+            return [change for change in self.__change_feed if change.sequence_number > since_sequence_number]
+
+    def subscribe(self, callback, keys=None):
+        """Subscribes a callback to the changes of global variables
+
+        The callback is called with the :class:`VariableChange` as argument in the thread that changed the variable,
+        after the variable was unlocked. Thus, it should return quickly. For shared variables, the callbacks are called
+        by a separate thread on the changes of all processes.
+
+        :param callable callback: the function to be called on changes
+        :param keys: the keys of the variables to be observed, None to observe all variables
+        :return: the id of the subscription, needed to unsubscribe
+        :rtype: int
+        """
+        keys = None if keys is None else frozenset(str(key) for key in keys)
+        with self.__change_condition:
+            subscription_id = next(self.__subscription_ids)
+            self.__subscriptions[subscription_id] = (callback, keys)
+        if self._server_client is not None:
+            self._start_change_listener()
+        return subscription_id
+
+    def unsubscribe(self, subscription_id):
+        """Removes a subscription
+
+        :param int subscription_id: the id returned by :meth:`subscribe`
+        :raises exceptions.KeyError: if there is no subscription with the given id
+        """
+        with self.__change_condition:
+            del self.__subscriptions[subscription_id]
+
+    def wait_for_change(self, keys=None, since_sequence_number=None, timeout=None, state=None):
+        """Waits until one of the given global variables is changed
+
+        In contrast to polling a variable, the waiting thread is woken up right after the change.
+
+        :param keys: the key or the keys of the variables to wait for, None to wait for a change of any variable
+        :param int since_sequence_number: the sequence number of the last known change, changes after it are returned
+            immediately; None to wait for the next change
+        :param float timeout: the maximum time in seconds to wait, None waits infinitely
+        :param rafcon.core.states.state.State state: the waiting state, its preemption ends the waiting
+        :return: the last change of the variables or None, if the timeout was reached or the state was preempted
+        :rtype: VariableChange
+        """
+        if keys is not None:
+            keys = [str(key) for key in ([keys] if isinstance(keys, string_types) else keys)]
+        # the preemption of the state is signaled by an event
+        preempted_event = state._preempted if state is not None else None
+        if self._server_client is not None:
+            return self._server_client.wait_for_change(keys, since_sequence_number, timeout, preempted_event)
+        return self._wait_for_change(keys, since_sequence_number, timeout, preempted_event)
+
+    def _wait_for_change(self, keys, since_sequence_number, timeout, preempted_event):
+        """Waits until one of the given global variables is changed or the given event is set
+
+        See :meth:`wait_for_change`, the event must be created by :func:`rafcon.utils.multi_event.create` or extended by
+        :func:`rafcon.utils.multi_event.orify`.
+        """
+        def get_change():
+            if keys is None:
+                return self.__change_feed[-1] if self.__change_sequence_number > since_sequence_number else None
+            changes = [self.__last_changes[key] for key in keys if key in self.__last_changes and
+                       self.__last_changes[key].sequence_number > since_sequence_number]
+            return max(changes) if changes else None
+
+        def wake_up():
+            with self.__change_condition:
+                self.__change_condition.notify_all()
+
+        # the event is extended by a callback waking up this thread
+        preempted = preempted_event
+        if preempted is not None:
+            multi_event.orify(preempted, wake_up)
+        end_time = time.time() + timeout if timeout is not None else None
+        try:
+            with self.__change_condition:
+                if since_sequence_number is None:
+                    since_sequence_number = self.__change_sequence_number
+                while True:
+                    change = get_change()
+                    if change is not None:
+                        return change
+                    if preempted is not None and preempted.is_set():
+                        return None
+                    if end_time is None:
+                        self.__change_condition.wait()
+                    else:
+                        remaining_time = end_time - time.time()
+                        if remaining_time <= 0:
+                            return None
+                        self.__change_condition.wait(remaining_time)
+        finally:
+            if preempted is not None:
+                multi_event.remove_callback(preempted, wake_up)
+
+    def wait_for_value(self, key, predicate, timeout=None, state=None):
+        """Waits until the value of a global variable fulfills a condition
+
+        :param key: the key of the variable
+        :param predicate: a function called with the value, which returns whether the condition is fulfilled, or a value
+            the variable has to be equal to
+        :param float timeout: the maximum time in seconds to wait, None waits infinitely
+        :param rafcon.core.states.state.State state: the waiting state, its preemption ends the waiting
+        :return: True, if the condition is fulfilled, False if the timeout was reached or the state was preempted
+        :rtype: bool
+        """
+        key = str(key)
+        if not callable(predicate):
+            expected_value = predicate
+            predicate = lambda value: value == expected_value
+        end_time = time.time() + timeout if timeout is not None else None
+        while True:
+            # the sequence number is read before the value, so that no change in between is missed
+            sequence_number = self.change_sequence_number
+            if self.variable_exist(key) and predicate(self.get_variable(key)):
+                return True
+            remaining_time = end_time - time.time() if end_time is not None else None
+            if remaining_time is not None and remaining_time <= 0:
+                return False
+            if self.wait_for_change([key], sequence_number, remaining_time, state) is None:
+                return False
+
+    @forward_to_server
     def get_variable(self, key, per_reference=None, access_key=None, default=None):
         """Fetches the value of a global variable
 
@@ -113,39 +653,96 @@ class GlobalVariableManager(Observable):
         """
         key = str(key)
         if self.variable_exist(key):
+            variable_lock = self.__variable_locks[key]
             unlock = True
-            if self.is_locked(key):
-                if self.__access_keys[key] == access_key:
-                    unlock = False
-                else:
-                    if not access_key:
-                        access_key = self.lock_variable(key, block=True)
-                    else:
-                        raise RuntimeError("Wrong access key for accessing global variable")
+            if self.is_locked(key) and self.__access_keys[key] == access_key:
+                unlock = False
+            elif self.is_locked(key) and access_key:
+                raise RuntimeError("Wrong access key for accessing global variable")
             else:
-                access_key = self.lock_variable(key, block=True)
+                # readers share the lock of the variable, they only wait for writers
+                variable_lock.acquire(shared=True)
 
             # --- variable locked
-            if self.variable_can_be_referenced(key):
-                if per_reference or per_reference is None:
-                    return_value = self.__global_variable_dictionary[key]
-                else:
-                    return_value = copy.deepcopy(self.__global_variable_dictionary[key])
-            else:
-                if per_reference:
-                    self.unlock_variable(key, access_key)
-                    raise RuntimeError("Variable cannot be accessed by reference")
-                else:
-                    return_value = copy.deepcopy(self.__global_variable_dictionary[key])
+            try:
+                return_value = self._get_value(key, per_reference)
             # --- release variable
-
-            if unlock:
-                self.unlock_variable(key, access_key)
+            finally:
+                if unlock:
+                    variable_lock.release(shared=True)
             return return_value
         else:
             # logger.warning("Global variable '{0}' not existing, returning default value".format(key))
             return default
 
+    @forward_to_server
+    def get_variables(self, keys, per_reference=None, default=None):
+        """Fetches the values of several global variables at once
+
+        The variables are locked together, so that the values are consistent with each other (see
+        :meth:`set_variables`).
+
+        :param keys: the keys of the global variables to be fetched
+        :param bool per_reference: a flag to decide if the variables should be returned per reference or per value
+        :param default: the value to be returned for keys that do not exist
+        :return: the values of the global variables by their keys
+        :rtype: dict
+        :raises exceptions.RuntimeError: if a variable cannot be accessed by reference
+        """
+        keys = [str(key) for key in keys]
+        with self.__global_lock:
+            # the locks are always acquired in the same order to prevent deadlocks
+            variable_locks = [self.__variable_locks[key] for key in sorted(set(keys)) if key in self.__variable_locks]
+        acquired_locks = []
+        try:
+            for variable_lock in variable_locks:
+                variable_lock.acquire(shared=True)
+                acquired_locks.append(variable_lock)
+            # --- variables locked
+            return {key: self._get_value(key, per_reference) if self.variable_exist(key) else default
+                    for key in keys}
+        # --- release variables
+        finally:
+            for variable_lock in acquired_locks:
+                variable_lock.release(shared=True)
+
+    def _get_value(self, key, per_reference):
+        """Returns the value of a global variable, the variable must be locked"""
+        value = self.__global_variable_dictionary[key]
+        if key in self.__immutable_variables:
+            # frozen snapshots are shared by all readers
+            return value
+        if self.variable_can_be_referenced(key):
+            if per_reference or per_reference is None:
+                return value
+            return copy.deepcopy(value)
+        if per_reference:
+            raise RuntimeError("Variable cannot be accessed by reference")
+        return copy.deepcopy(value)
+
+    @forward_to_server
+    def get_variable_version(self, key):
+        """Returns the version of a global variable
+
+        The version is increased with every change of the value. Thus, readers can skip the processing of values they
+        already know.
+
+        :param key: the key of the global variable
+        :return: the version of the variable or None, if the variable does not exist
+        :rtype: int
+        """
+        return self.__variable_versions.get(str(key))
+
+    @forward_to_server
+    def is_immutable(self, key):
+        """Returns whether the value of a global variable is stored as frozen snapshot
+
+        :param key: the key of the global variable
+        :rtype: bool
+        """
+        return str(key) in self.__immutable_variables
+
+    @forward_to_server
     def variable_can_be_referenced(self, key):
         """Checks whether the value of the variable can be returned by reference
 
@@ -156,6 +753,7 @@ class GlobalVariableManager(Observable):
         return key in self.__variable_references and self.__variable_references[key]
 
     @Observable.observed
+    @forward_to_server
     def delete_variable(self, key):
         """Deletes a global variable
 
@@ -170,41 +768,43 @@ class GlobalVariableManager(Observable):
             if key in self.__global_variable_dictionary:
                 access_key = self.lock_variable(key, block=True)
                 del self.__global_variable_dictionary[key]
+                changes = self._record_changes({key: None})
                 self.unlock_variable(key, access_key)
                 del self.__variable_locks[key]
                 del self.__variable_references[key]
+                del self.__variable_versions[key]
+                self.__immutable_variables.discard(key)
             else:
                 raise AttributeError("Global variable %s does not exist!" % str(key))
 
         logger.debug("Global variable %s was deleted!" % str(key))
+        self._call_subscriptions(changes)
 
     @Observable.observed
-    def lock_variable(self, key, block=False):
+    @forward_to_server
+    def lock_variable(self, key, block=False, timeout=None):
         """Locks a global variable
 
+        Blocking calls wait until the variable is unlocked, without polling. Waiting threads get the lock in the order
+        of their calls.
+
         :param key: the key of the global variable to be locked
         :param block: a flag to specify if to wait for locking the variable in blocking mode
+        :param float timeout: the maximum time in seconds to wait in blocking mode, None waits infinitely
+        :return: the access key or False, if the variable could not be locked
         """
         key = str(key)
         # watch out for releasing the __dictionary_lock properly
         try:
             if key in self.__variable_locks:
-                # acquire without arguments is blocking
-                lock_successful = self.__variable_locks[key].acquire(False)
-                if lock_successful or block:
-                    if (not lock_successful) and block:  # case: lock could not be acquired => wait for it as block=True
-                        duration = 0.
-                        loop_time = 0.1
-                        while not self.__variable_locks[key].acquire(False):
-                            time.sleep(loop_time)
-                            duration += loop_time
-                            if int(duration*10) % 20 == 0:
-                                # while loops informs the user about long locked variables
-                                logger.verbose("Variable '{2}' is locked and thread {0} waits already {1} seconds to "
-                                               "access it.".format(currentThread(), duration, key))
+                if self.__variable_locks[key].acquire(block, timeout):
                     access_key = global_variable_id_generator()
                     self.__access_keys[key] = access_key
                     return access_key
+                elif block:
+                    logger.warning("Global variable {} could not be locked within {} seconds".format(str(key),
+                                                                                                     timeout))
+                    return False
                 else:
                     logger.warning("Global variable {} already locked".format(str(key)))
                     return False
@@ -216,6 +816,7 @@ class GlobalVariableManager(Observable):
             return False
 
     @Observable.observed
+    @forward_to_server
     def unlock_variable(self, key, access_key, force=False):
         """Unlocks a global variable
 
@@ -257,6 +858,7 @@ class GlobalVariableManager(Observable):
         """
         return self.get_variable(key, per_reference=False, access_key=access_key)
 
+    @forward_to_server
     def variable_exist(self, key):
         """Checks if a global variable exist
 
@@ -267,6 +869,7 @@ class GlobalVariableManager(Observable):
 
     variable_exists = variable_exist
 
+    @forward_to_server
     def data_type_exist(self, key):
         """Checks if a global variable exist
 
@@ -275,6 +878,7 @@ class GlobalVariableManager(Observable):
         key = str(key)
         return key in self.__global_variable_type_dictionary
 
+    @forward_to_server
     def is_locked(self, key):
         """Returns the status of the lock of a global variable
 
@@ -286,6 +890,7 @@ class GlobalVariableManager(Observable):
             return self.__variable_locks[key].locked()
         return False
 
+    @forward_to_server
     def get_all_keys_starting_with(self, start_key):
         """ Returns all keys, which start with a certain pattern defined in :param start_key.
 
@@ -309,6 +914,8 @@ class GlobalVariableManager(Observable):
     @property
     def global_variable_dictionary(self):
         """Property for the _global_variable_dictionary field"""
+        if self._server_client is not None:
+            return self._server_client.call('get_global_variable_dictionary')
         dict_copy = {}
         for key, value in self.__global_variable_dictionary.items():
             if key in self.__variable_references and self.__variable_references[key]:
@@ -318,6 +925,7 @@ class GlobalVariableManager(Observable):
 
         return dict_copy
 
+    @forward_to_server
     def get_all_keys(self):
         """Returns all variable names in the GVM
 
@@ -325,12 +933,14 @@ class GlobalVariableManager(Observable):
         """
         return list(self.__global_variable_dictionary.keys())
 
+    @forward_to_server
     def get_representation(self, key):
         key = str(key)
         if not self.variable_exist(key):
             return None
         return self.__global_variable_dictionary[key]
 
+    @forward_to_server
     def get_data_type(self, key):
         key = str(key)
         if not self.data_type_exist(key):
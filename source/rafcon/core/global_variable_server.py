@@ -0,0 +1,416 @@
+# Copyright (C) 2019 DLR
+#
+# All rights reserved. This program and the accompanying materials are made
+# available under the terms of the Eclipse Public License v1.0 which
+# accompanies this distribution, and is available at
+# http://www.eclipse.org/legal/epl-v10.html
+
+"""
+.. module:: global_variable_server
+   :synopsis: A server process holding global variables, which are shared by several RAFCON processes on one host
+
+The server holds a :class:`rafcon.core.global_variable_manager.GlobalVariableManager` and listens on a local (Unix
+domain) socket. A global variable manager connected to the server (see
+:meth:`rafcon.core.global_variable_manager.GlobalVariableManager.connect_to_server`) forwards all calls to it through a
+:class:`GlobalVariableClient`. Thus, the variables, their locks and access keys are shared by all connected processes.
+
+The server is started on demand by the first connecting process and stops, if no process was connected for a while.
+Only processes of the same user can connect: the socket is protected by an authentication key, which is stored in a
+file readable only by the user. Locks held by a process are released when the process disconnects.
+
+Values are exchanged by pickling. Thus, they must be picklable and are always passed by value between processes.
+
+The server can also be started manually::
+
+    python -m rafcon.core.global_variable_server <socket path> [--idle-timeout <seconds>]
+"""
+from builtins import object
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from multiprocessing.connection import Client, Listener
+
+from rafcon.utils import log
+
+logger = log.get_logger(__name__)
+
+#: The maximum time in seconds to wait for a started server to accept connections
+SERVER_START_TIMEOUT = 10.
+
+#: The time in seconds a cancellation received before its wait is kept; cancellations received after their wait
+#: ended are never claimed and removed after this time
+UNCLAIMED_CANCELLATION_TIMEOUT = 60.
+
+#: The methods of the global variable manager that can be called by clients
+SHARED_METHODS = frozenset([
+    'set_variable', 'set_variables', 'get_variable', 'get_variables', 'delete_variable', 'lock_variable',
+    'unlock_variable', 'variable_exist', 'data_type_exist', 'is_locked', 'get_all_keys', 'get_all_keys_starting_with',
+    'get_representation', 'get_data_type', 'variable_can_be_referenced', 'get_variable_version', 'is_immutable',
+    'get_changes', 'get_global_variable_dictionary', 'get_change_sequence_number', 'wait_for_change'])
+
+
+def get_default_address():
+    """Returns the default path of the socket of the global variable server
+
+    The socket is placed in a folder of the user in the temporary directory.
+
+    :rtype: str
+    """
+    user_id = os.getuid() if hasattr(os, 'getuid') else os.getenv('USERNAME', 'user')
+    return os.path.join(tempfile.gettempdir(), "rafcon-{0}".format(user_id), "global_variables.sock")
+
+
+def _get_key_file_path(address):
+    return address + ".key"
+
+
+def _check_folder(address):
+    """Checks that the folder of the socket is owned by the user, as other users could fake the server otherwise"""
+    folder = os.path.dirname(address)
+    if hasattr(os, 'getuid') and os.stat(folder).st_uid != os.getuid():
+        raise IOError("The folder {0} of the global variable server is not owned by the user".format(folder))
+
+
+def _read_authentication_key(address):
+    _check_folder(address)
+    with open(_get_key_file_path(address), 'rb') as f:
+        return f.read()
+
+
+class GlobalVariableClient(object):
+    """The connection of a global variable manager to the global variable server
+
+    Each thread uses its own connection, so that blocking calls (e.g. waiting for a lock) of one thread do not block
+    the calls of other threads. The main connection identifies the client process: when it is closed, the server
+    releases all locks held by the client.
+
+    :ivar str address: the path of the socket of the server
+    :ivar str client_id: the unique id of the client
+    """
+
+    def __init__(self, address):
+        self.address = address
+        self.client_id = uuid.uuid4().hex
+        self._authentication_key = _read_authentication_key(address)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._closed = False
+        self._main_connection = self._connect()
+
+    def _connect(self):
+        connection = Client(self.address, authkey=self._authentication_key)
+        connection.send(self.client_id)
+        return connection
+
+    def _get_connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            if self._closed:
+                raise RuntimeError("The connection to the global variable server {0} is closed".format(self.address))
+            connection = self._local.connection = self._connect()
+        return connection
+
+    def call(self, method_name, args=(), kwargs=None):
+        """Calls a method of the global variable manager of the server
+
+        :param str method_name: the name of the method
+        :param tuple args: the positional arguments
+        :param dict kwargs: the keyword arguments
+        :return: the return value of the method
+        :raises: the exception raised by the method
+        """
+        connection = self._get_connection()
+        connection.send((method_name, args, kwargs or {}))
+        success, result = connection.recv()
+        if not success:
+            raise result
+        return result
+
+    def wait_for_change(self, keys, since_sequence_number, timeout, preempted_event):
+        """Waits for a change of global variables on the server, the waiting is cancelled if an event is set
+
+        :param keys: the keys of the variables to wait for, None for any variable
+        :param int since_sequence_number: the sequence number of the last known change or None
+        :param float timeout: the maximum time in seconds to wait, None waits infinitely
+        :param threading.Event preempted_event: an event created by :func:`rafcon.utils.multi_event.create` or
+            extended by :func:`rafcon.utils.multi_event.orify`, which cancels the waiting, or None
+        :return: the change or None, if the timeout was reached or the waiting was cancelled
+        """
+        from rafcon.utils import multi_event
+        wait_id = uuid.uuid4().hex
+
+        def cancel():
+            if preempted_event.is_set():
+                # the waiting thread blocks its connection, thus the main connection is used
+                with self._lock:
+                    if not self._closed:
+                        self._main_connection.send(('cancel_wait', (wait_id, ), {}))
+                        self._main_connection.recv()
+
+        if preempted_event is not None:
+            multi_event.orify(preempted_event, cancel)
+        try:
+            if preempted_event is not None and preempted_event.is_set():
+                return None
+            return self.call('wait_for_change', (keys, since_sequence_number, timeout), {'wait_id': wait_id})
+        finally:
+            if preempted_event is not None:
+                multi_event.remove_callback(preempted_event, cancel)
+
+    def close(self):
+        """Closes the connections to the server, which releases all locks held by the client"""
+        with self._lock:
+            self._closed = True
+            self._main_connection.close()
+        connection = getattr(self._local, 'connection', None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+
+def _start_server_process(address, idle_timeout):
+    with open(os.devnull, 'w') as devnull:
+        # the server runs in its own session, so that it survives the starting process
+        subprocess.Popen([sys.executable, '-m', 'rafcon.core.global_variable_server', address,
+                          '--idle-timeout', str(idle_timeout)],
+                         stdin=devnull, stdout=devnull, stderr=devnull, preexec_fn=os.setsid, close_fds=True)
+
+
+def connect(address=None, start_server=True, idle_timeout=60.):
+    """Connects to a global variable server, which is started if it is not running
+
+    :param str address: the path of the socket of the server, None for the default path
+    :param bool start_server: whether to start the server, if it is not running
+    :param float idle_timeout: the time in seconds a started server keeps running without connected clients
+    :return: the client connected to the server
+    :rtype: GlobalVariableClient
+    :raises exceptions.IOError: if no connection to the server could be established
+    """
+    address = address or get_default_address()
+    try:
+        return GlobalVariableClient(address)
+    except (IOError, OSError, EOFError):
+        if not start_server:
+            raise
+    logger.info("Starting global variable server {0}".format(address))
+    _start_server_process(address, idle_timeout)
+    end_time = time.time() + SERVER_START_TIMEOUT
+    while True:
+        try:
+            return GlobalVariableClient(address)
+        except (IOError, OSError, EOFError):
+            if time.time() > end_time:
+                raise IOError("The global variable server {0} could not be started".format(address))
+            time.sleep(0.05)
+
+
+class GlobalVariableServer(object):
+    """A server holding global variables for the connected clients
+
+    :ivar str address: the path of the socket
+    :ivar float idle_timeout: the time in seconds, after which the server stops without connected clients; 0 keeps the
+        server running
+    :ivar rafcon.core.global_variable_manager.GlobalVariableManager global_variable_manager: the manager holding the
+        shared global variables
+    """
+
+    def __init__(self, address, idle_timeout=60.):
+        from rafcon.core.global_variable_manager import GlobalVariableManager
+        self.address = address
+        self.idle_timeout = idle_timeout
+        self.global_variable_manager = GlobalVariableManager()
+        self._listener = None
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        # the number of open connections and the access keys of the held locks by client id
+        self._connection_counts = {}
+        self._held_locks = {}
+        # the events cancelling waits by wait id
+        self._wait_cancellations = {}
+        # the reception times of the cancellations not claimed by a wait, yet, by wait id
+        self._unclaimed_cancellations = {}
+        self._last_activity_time = time.time()
+
+    def start(self):
+        """Starts listening on the socket
+
+        :return: False, if another server is already listening on the socket
+        :rtype: bool
+        """
+        import fcntl
+        folder = os.path.dirname(self.address)
+        if not os.path.isdir(folder):
+            os.makedirs(folder, 0o700)
+        _check_folder(self.address)
+        # the lock file prevents that concurrently started servers remove the socket of each other
+        with open(self.address + ".lock", 'w') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                if os.path.exists(self.address):
+                    try:
+                        Client(self.address, authkey=_read_authentication_key(self.address)).close()
+                        return False
+                    except (IOError, OSError, EOFError):
+                        # the socket was left by a server that was not shut down
+                        os.remove(self.address)
+                authentication_key = os.urandom(32)
+                key_file_descriptor = os.open(_get_key_file_path(self.address),
+                                              os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+                with os.fdopen(key_file_descriptor, 'wb') as f:
+                    f.write(authentication_key)
+                self._listener = Listener(self.address, authkey=authentication_key)
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+        accept_thread = threading.Thread(target=self._accept_connections, name="GlobalVariableServer")
+        accept_thread.daemon = True
+        accept_thread.start()
+        logger.info("Global variable server listening on {0}".format(self.address))
+        return True
+
+    def serve_forever(self):
+        """Handles the requests of clients until the server is shut down or idle"""
+        while not self._stopped.wait(min(1., self.idle_timeout) if self.idle_timeout > 0 else 1.):
+            with self._lock:
+                idle = not self._connection_counts and time.time() - self._last_activity_time > self.idle_timeout
+            if self.idle_timeout > 0 and idle:
+                logger.info("Stopping idle global variable server {0}".format(self.address))
+                break
+        self.shutdown()
+
+    def shutdown(self):
+        """Stops listening and removes the socket"""
+        self._stopped.set()
+        if self._listener is not None:
+            # closing the listener also removes the socket
+            self._listener.close()
+            self._listener = None
+
+    def _accept_connections(self):
+        while not self._stopped.is_set():
+            try:
+                connection = self._listener.accept()
+            except Exception as e:
+                if not self._stopped.is_set():
+                    logger.warning("Rejected connection to the global variable server: {0}".format(e))
+                continue
+            thread = threading.Thread(target=self._handle_connection, args=(connection, ),
+                                      name="GlobalVariableServerConnection")
+            thread.daemon = True
+            thread.start()
+
+    def _handle_connection(self, connection):
+        try:
+            client_id = connection.recv()
+        except (EOFError, IOError, OSError):
+            return
+        with self._lock:
+            self._connection_counts[client_id] = self._connection_counts.get(client_id, 0) + 1
+            self._held_locks.setdefault(client_id, {})
+        try:
+            while True:
+                try:
+                    method_name, args, kwargs = connection.recv()
+                except (EOFError, IOError, OSError):
+                    return
+                try:
+                    result = (True, self._call(client_id, method_name, args, kwargs))
+                except Exception as e:
+                    result = (False, e)
+                try:
+                    connection.send(result)
+                except (IOError, OSError):
+                    return
+        finally:
+            connection.close()
+            self._remove_connection(client_id)
+
+    def _call(self, client_id, method_name, args, kwargs):
+        gvm = self.global_variable_manager
+        if method_name == 'cancel_wait':
+            self._cancel_wait(args[0])
+            return None
+        if method_name not in SHARED_METHODS:
+            raise AttributeError("The global variable server has no method {0}".format(method_name))
+        if method_name == 'get_global_variable_dictionary':
+            return gvm.global_variable_dictionary
+        if method_name == 'get_change_sequence_number':
+            return gvm.change_sequence_number
+        if method_name == 'wait_for_change':
+            wait_id = kwargs.pop('wait_id')
+            try:
+                return gvm._wait_for_change(*args, preempted_event=self._get_wait_cancellation(wait_id))
+            finally:
+                with self._lock:
+                    del self._wait_cancellations[wait_id]
+
+        result = getattr(gvm, method_name)(*args, **kwargs)
+        # the locks of the clients are tracked, so that they can be released on disconnect
+        if method_name == 'lock_variable' and result:
+            with self._lock:
+                self._held_locks[client_id][str(kwargs.get('key', args[0] if args else None))] = result
+        elif method_name == 'unlock_variable' and result:
+            key = str(kwargs.get('key', args[0] if args else None))
+            with self._lock:
+                for held_locks in self._held_locks.values():
+                    held_locks.pop(key, None)
+        return result
+
+    def _get_wait_cancellation(self, wait_id):
+        with self._lock:
+            self._unclaimed_cancellations.pop(wait_id, None)
+            return self._wait_cancellations.setdefault(wait_id, threading.Event())
+
+    def _cancel_wait(self, wait_id):
+        with self._lock:
+            now = time.time()
+            for unclaimed_wait_id, reception_time in list(self._unclaimed_cancellations.items()):
+                if now - reception_time > UNCLAIMED_CANCELLATION_TIMEOUT:
+                    del self._unclaimed_cancellations[unclaimed_wait_id]
+                    del self._wait_cancellations[unclaimed_wait_id]
+            cancellation = self._wait_cancellations.get(wait_id)
+            if cancellation is None:
+                # the cancellation arrived before its wait or after the wait ended
+                cancellation = self._wait_cancellations[wait_id] = threading.Event()
+                self._unclaimed_cancellations[wait_id] = now
+        cancellation.set()
+
+    def _remove_connection(self, client_id):
+        with self._lock:
+            self._last_activity_time = time.time()
+            self._connection_counts[client_id] -= 1
+            if self._connection_counts[client_id] > 0:
+                return
+            del self._connection_counts[client_id]
+            held_locks = self._held_locks.pop(client_id)
+        for key, access_key in held_locks.items():
+            logger.info("Releasing the lock of global variable {0} held by disconnected client".format(key))
+            try:
+                self.global_variable_manager.unlock_variable(key, access_key)
+            except (AttributeError, RuntimeError, KeyError):
+                pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve global variables shared by several RAFCON processes")
+    parser.add_argument("address", nargs='?', default=None, help="path of the socket, defaults to a path in the "
+                                                                 "temporary directory")
+    parser.add_argument("--idle-timeout", type=float, default=60.,
+                        help="time in seconds after which the server stops without clients, 0 runs forever")
+    args = parser.parse_args()
+    server = GlobalVariableServer(args.address or get_default_address(), args.idle_timeout)
+    if not server.start():
+        logger.info("A global variable server is already listening on {0}".format(server.address))
+        return
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
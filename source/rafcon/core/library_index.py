@@ -0,0 +1,270 @@
+# Copyright (C) 2019 DLR
+#
+# All rights reserved. This program and the accompanying materials are made
+# available under the terms of the Eclipse Public License v1.0 which
+# accompanies this distribution, and is available at
+# http://www.eclipse.org/legal/epl-v10.html
+
+"""
+.. module:: library_index
+   :synopsis: An index of the libraries within the library root paths, which is updated incrementally
+
+The index holds an entry per folder of the library root paths: the modification time of the folder, its sub folders
+and, for library folders, the modification time and size of the state machine file. Each save of a state machine,
+which changes any of its files, rewrites the state machine file (its update time changes). Thus, the files of a library
+are not inspected. When the index is updated, only folders whose modification time changed are listed again and only
+libraries whose folder or state machine file changed are updated. An update needs one `stat` per folder and two per
+library, but no directory listings and no file reads for unchanged folders. The index can be stored in a file to be
+reused by the next RAFCON process.
+
+A :class:`LibraryWatcher` polls the library root paths in the background and triggers the update of the library
+manager if libraries were added, removed or changed.
+"""
+from builtins import object
+import hashlib
+import json
+import os
+import threading
+
+from rafcon.core.storage import storage
+from rafcon.utils.filesystem import write_file
+from rafcon.utils import storage_utils
+from rafcon.utils import log
+
+logger = log.get_logger(__name__)
+
+INDEX_FORMAT_VERSION = 3
+
+
+class LibraryIndexEntry(object):
+    """The index entry of a folder of a library root path
+
+    :ivar float mtime: the modification time of the folder
+    :ivar list sub_folder_names: the names of the sub folders, empty for libraries
+    :ivar signature: the signature of the state machine file (see :func:`_get_library_signature`), if the folder is a
+        library
+    :ivar dict library_info: the version and interface signature of the library, read on demand
+    """
+
+    __slots__ = ('mtime', 'sub_folder_names', 'signature', 'library_info')
+
+    def __init__(self, mtime, sub_folder_names, signature=None, library_info=None):
+        self.mtime = mtime
+        self.sub_folder_names = sub_folder_names
+        self.signature = signature
+        self.library_info = library_info
+
+    @property
+    def is_library(self):
+        return self.signature is not None
+
+    def to_list(self):
+        return [self.mtime, self.sub_folder_names, self.signature, self.library_info]
+
+    @classmethod
+    def from_list(cls, values):
+        mtime, sub_folder_names, signature, library_info = values
+        return cls(mtime, sub_folder_names, tuple(signature) if signature is not None else None, library_info)
+
+
+def _get_library_signature(folder_path):
+    """Returns the signature of a library folder
+
+    The modification of a file does not change the modification time of its folder. As every save of a state machine
+    rewrites the state machine file, the signature is taken from it instead of from all files of the library.
+
+    :param str folder_path: the path of the folder
+    :return: the name, the modification time and the size of the state machine file or None, if the folder is no
+        library
+    :rtype: tuple
+    """
+    for file_name in (storage.STATEMACHINE_FILE, storage.STATEMACHINE_FILE_OLD):
+        try:
+            stat = os.stat(os.path.join(folder_path, file_name))
+        except OSError:
+            continue
+        return file_name, stat.st_mtime, stat.st_size
+    return None
+
+
+class LibraryIndex(object):
+    """An incrementally updated index of the folders and libraries within library root paths
+
+    :ivar str index_file_path: the path of the file the index is stored in, None if the index is not stored
+    """
+
+    def __init__(self, index_file_path=None):
+        self.index_file_path = index_file_path
+        self._entries = {}
+        self._lock = threading.RLock()
+        self._changed = False
+        if index_file_path:
+            self.load()
+
+    def load(self):
+        """Loads the index from the index file, an invalid index file is ignored"""
+        try:
+            with open(self.index_file_path, 'r') as f:
+                document = json.load(f)
+            if document.get('format_version') != INDEX_FORMAT_VERSION:
+                return
+            entries = {path: LibraryIndexEntry.from_list(values) for path, values in document['entries'].items()}
+        except (IOError, OSError):
+            return
+        except (ValueError, KeyError, TypeError) as e:
+            logger.warning("Ignoring invalid library index {0}: {1}".format(self.index_file_path, e))
+            return
+        with self._lock:
+            self._entries = entries
+            self._changed = False
+
+    def save(self):
+        """Stores the index in the index file, if it changed since the last loading or storing"""
+        if not self.index_file_path or not self._changed:
+            return
+        with self._lock:
+            document = {'format_version': INDEX_FORMAT_VERSION,
+                        'entries': {path: entry.to_list() for path, entry in self._entries.items()}}
+            self._changed = False
+        try:
+            write_file(self.index_file_path, json.dumps(document), create_full_path=True, atomic=True)
+        except (IOError, OSError) as e:
+            logger.warning("Could not store the library index {0}: {1}".format(self.index_file_path, e))
+
+    def update(self, root_path, check_folder_name=None):
+        """Updates the index of a library root path and returns its libraries
+
+        :param str root_path: the library root path
+        :param callable check_folder_name: called with the path of each newly listed folder and the name of each of its
+            sub folders
+        :return: the library tree of the root path (nested dictionaries holding the paths of the libraries by their
+            names) and the paths of all libraries that were added, removed or changed
+        :rtype: dict, set
+        """
+        changed_library_paths = set()
+        with self._lock:
+            library_tree = self._update_folder(root_path, check_folder_name, changed_library_paths)
+        if not isinstance(library_tree, dict):
+            # the root path does not exist or is a library itself
+            library_tree = {}
+        return library_tree, changed_library_paths
+
+    def _update_folder(self, folder_path, check_folder_name, changed_library_paths):
+        try:
+            mtime = os.stat(folder_path).st_mtime
+        except OSError:
+            self._remove_entries(folder_path, changed_library_paths)
+            return None
+        entry = self._entries.get(folder_path)
+        if entry is None or entry.mtime != mtime:
+            entry = self._list_folder(folder_path, mtime, entry, check_folder_name, changed_library_paths)
+        elif entry.is_library:
+            # modifications of files do not change the modification time of their folder
+            signature = _get_library_signature(folder_path)
+            if signature != entry.signature:
+                entry = self._list_folder(folder_path, mtime, entry, check_folder_name, changed_library_paths)
+
+        if entry.is_library:
+            return folder_path
+        library_tree = {}
+        for folder_name in entry.sub_folder_names:
+            sub_tree = self._update_folder(os.path.join(folder_path, folder_name), check_folder_name,
+                                           changed_library_paths)
+            if sub_tree is not None:
+                library_tree[folder_name] = sub_tree
+        return library_tree
+
+    def _list_folder(self, folder_path, mtime, old_entry, check_folder_name, changed_library_paths):
+        signature = _get_library_signature(folder_path)
+        if signature is not None:
+            sub_folder_names = []
+        else:
+            sub_folder_names = []
+            for name in sorted(os.listdir(folder_path)):
+                if name[0] == '.' or not os.path.isdir(os.path.join(folder_path, name)):
+                    continue
+                if check_folder_name:
+                    check_folder_name(folder_path, name)
+                sub_folder_names.append(name)
+
+        if old_entry is not None:
+            if old_entry.is_library and old_entry.signature != signature:
+                changed_library_paths.add(folder_path)
+            for name in set(old_entry.sub_folder_names) - set(sub_folder_names):
+                self._remove_entries(os.path.join(folder_path, name), changed_library_paths)
+        if signature is not None and (old_entry is None or old_entry.signature != signature):
+            changed_library_paths.add(folder_path)
+
+        entry = LibraryIndexEntry(mtime, sub_folder_names, signature)
+        self._entries[folder_path] = entry
+        self._changed = True
+        return entry
+
+    def _remove_entries(self, folder_path, changed_library_paths):
+        entry = self._entries.pop(folder_path, None)
+        if entry is None:
+            return
+        self._changed = True
+        if entry.is_library:
+            changed_library_paths.add(folder_path)
+        for name in entry.sub_folder_names:
+            self._remove_entries(os.path.join(folder_path, name), changed_library_paths)
+
+    def get_library_info(self, library_os_path):
+        """Returns the version and the interface signature of a library
+
+        The information is read from the library files on the first request after the library changed.
+
+        :param str library_os_path: the path of the library
+        :return: a dictionary with the version of the library and a hash of the outcomes and data ports of its root
+            state or None, if the library is not indexed
+        :rtype: dict
+        """
+        with self._lock:
+            entry = self._entries.get(library_os_path)
+            if entry is None or not entry.is_library:
+                return None
+            if entry.library_info is None:
+                entry.library_info = self._read_library_info(library_os_path)
+                self._changed = True
+            return entry.library_info
+
+    @staticmethod
+    def _read_library_info(library_os_path):
+        state_machine_dict = storage_utils.load_objects_from_json(
+            os.path.join(library_os_path, storage.STATEMACHINE_FILE), as_dict=True)
+        root_state_storage_id = state_machine_dict.get('root_state_storage_id', state_machine_dict.get('root_state_id'))
+        core_data_dict = storage_utils.load_objects_from_json(
+            os.path.join(library_os_path, root_state_storage_id, storage.FILE_NAME_CORE_DATA), as_dict=True)
+        interface = [core_data_dict.get(key) for key in ('outcomes', 'input_data_ports', 'output_data_ports')]
+        interface_signature = hashlib.sha1(json.dumps(interface, sort_keys=True).encode('utf-8')).hexdigest()
+        return {'version': state_machine_dict.get('version'), 'interface_signature': interface_signature}
+
+
+class LibraryWatcher(threading.Thread):
+    """Polls the library root paths and updates the library manager, if libraries changed
+
+    File system notifications (e.g. inotify) are not used, as they do not report changes made by other hosts on
+    network file systems.
+
+    :ivar rafcon.core.library_manager.LibraryManager library_manager: the library manager to be updated
+    :ivar float interval: the time in seconds between two updates
+    """
+
+    def __init__(self, library_manager, interval):
+        super(LibraryWatcher, self).__init__(name="LibraryWatcher")
+        self.daemon = True
+        self.library_manager = library_manager
+        self.interval = interval
+        self._stopped = threading.Event()
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            try:
+                self.library_manager.update_libraries()
+            except Exception as e:
+                logger.exception("Error while updating the libraries: {0}".format(e))
+
+    def stop(self):
+        """Stops the watcher after the current update"""
+        self._stopped.set()
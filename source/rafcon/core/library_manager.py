@@ -20,9 +20,11 @@
 import os
 import shutil
 import copy
+import threading
 from gtkmvc3.observable import Observable
 
 from rafcon.core import interface
+from rafcon.core.library_index import LibraryIndex, LibraryWatcher
 from rafcon.core.storage import storage
 from rafcon.core.custom_exceptions import LibraryNotFoundException
 import rafcon.core.config as config
@@ -62,15 +64,22 @@ class LibraryManager(Observable):
         self._skipped_states = []
         self._skipped_library_roots = []
 
-        # loaded libraries
+        # loaded libraries, also changed by the thread of the library watcher
         self._loaded_libraries = {}
+        self._loaded_libraries_lock = threading.RLock()
         self._libraries_instances = {}
 
+        # the index of the folders of the library root paths and the watcher updating the libraries
+        self._library_index = None
+        self._library_watcher = None
+
     def prepare_destruction(self):
+        self.stop_library_watcher()
         self.clean_loaded_libraries()
 
     def clean_loaded_libraries(self):
-        self._loaded_libraries.clear()
+        with self._loaded_libraries_lock:
+            self._loaded_libraries.clear()
 
     def initialize(self):
         """Initializes the library manager
@@ -81,6 +90,15 @@ class LibraryManager(Observable):
         singleton.py before the state*.pys are loaded
         """
         logger.debug("Initializing LibraryManager: Loading libraries ... ")
+        # the watcher of a previous initialization must not read the libraries while they are rebuilt
+        self.stop_library_watcher()
+        index_file_path = config.global_config.get_config_value("LIBRARY_INDEX_PATH", None)
+        if index_file_path == "None":
+            index_file_path = None
+        if index_file_path:
+            index_file_path = self._clean_path(index_file_path)
+        if self._library_index is None or self._library_index.index_file_path != index_file_path:
+            self._library_index = LibraryIndex(index_file_path)
         self._libraries = {}
         self._library_root_paths = {}
         self._replaced_libraries = {}
@@ -122,8 +140,28 @@ class LibraryManager(Observable):
             logger.debug("Adding library '{1}' from {0}".format(library_root_path, library_root_key))
 
         self._libraries = OrderedDict(sorted(self._libraries.items()))
+        self._library_index.save()
+        self._start_library_watcher()
         logger.debug("Initialization of LibraryManager done")
 
+    def _start_library_watcher(self):
+        interval = config.global_config.get_config_value("LIBRARY_WATCH_INTERVAL", 0)
+        if interval:
+            self._library_watcher = LibraryWatcher(self, interval)
+            self._library_watcher.start()
+
+    def stop_library_watcher(self):
+        """Stops the background updates of the libraries (see config value LIBRARY_WATCH_INTERVAL)
+
+        Waits for a running update to finish, unless called by the watcher itself.
+        """
+        library_watcher = self._library_watcher
+        if library_watcher is not None:
+            library_watcher.stop()
+            if library_watcher is not threading.current_thread():
+                library_watcher.join()
+            self._library_watcher = None
+
     @staticmethod
     def _clean_path(path):
         """Create a fully fissile absolute system path with no symbolic links and environment variables"""
@@ -144,9 +182,27 @@ class LibraryManager(Observable):
 
     def _load_libraries_from_root_path(self, library_root_key, library_root_path):
         self._library_root_paths[library_root_key] = library_root_path
-        self._libraries[library_root_key] = {}
-        self._load_nested_libraries(library_root_path, self._libraries[library_root_key])
-        self._libraries[library_root_key] = OrderedDict(sorted(self._libraries[library_root_key].items()))
+        self._libraries[library_root_key] = self._get_libraries_from_index(library_root_path)
+
+    def _get_libraries_from_index(self, library_root_path):
+        """Updates the library index of a library root path and returns its libraries
+
+        Loaded libraries that changed on the file system are removed, so that they are loaded again on next use.
+
+        :param str library_root_path: the library root path
+        :return: the library tree of the root path
+        """
+        library_tree, changed_library_paths = self._library_index.update(library_root_path,
+                                                                         self.check_clean_path_of_library)
+        with self._loaded_libraries_lock:
+            for library_os_path in changed_library_paths:
+                if self._loaded_libraries.pop(library_os_path, None) is not None:
+                    logger.debug("The library {0} changed and will be loaded again".format(library_os_path))
+        return self._sort_library_tree(library_tree)
+
+    def _sort_library_tree(self, library_tree):
+        return OrderedDict(sorted((name, self._sort_library_tree(sub_tree) if isinstance(sub_tree, dict) else sub_tree)
+                                  for name, sub_tree in library_tree.items()))
 
     def check_clean_path_of_library(self, folder_path, folder_name):
         library_root_path = self._library_root_paths[self._get_library_root_key_for_os_path(folder_path)]
@@ -159,33 +215,38 @@ class LibraryManager(Observable):
                            "".format(not_allowed_characters, full_path))
         return folder_path, folder_name
 
-    def _load_nested_libraries(self, library_path, target_dict):
-        """Recursively load libraries within path
-
-        Adds all libraries specified in a given path and stores them into the provided library dictionary. The library
-        entries in the dictionary consist only of the path to the library in the file system.
-
-        :param library_path: the path to add all libraries from
-        :param target_dict: the target dictionary to store all loaded libraries to
-        """
-        for library_name in os.listdir(library_path):
-            library_folder_path, library_name = self.check_clean_path_of_library(library_path, library_name)
-            full_library_path = os.path.join(library_path, library_name)
-            if os.path.isdir(full_library_path) and library_name[0] != '.':
-                if os.path.exists(os.path.join(full_library_path, storage.STATEMACHINE_FILE)) \
-                        or os.path.exists(os.path.join(full_library_path, storage.STATEMACHINE_FILE_OLD)):
-                    target_dict[library_name] = full_library_path
-                else:
-                    target_dict[library_name] = {}
-                    self._load_nested_libraries(full_library_path, target_dict[library_name])
-                    target_dict[library_name] = OrderedDict(sorted(target_dict[library_name].items()))
-
     @Observable.observed
     def refresh_libraries(self):
         """Deletes all loaded libraries and reloads them from the file system
         """
         self.initialize()
 
+    def update_libraries(self):
+        """Updates the libraries of all library root paths from the file system
+
+        In contrast to :meth:`refresh_libraries`, only folders that changed are listed again and the replaced and
+        skipped libraries are kept. Observers are only notified, if libraries were added or removed.
+
+        :return: whether libraries were added or removed
+        :rtype: bool
+        """
+        libraries = OrderedDict(sorted((library_root_key, self._get_libraries_from_index(library_root_path))
+                                       for library_root_key, library_root_path in list(self._library_root_paths.items())))
+        self._library_index.save()
+        if libraries == self._libraries:
+            return False
+        self.libraries = libraries
+        return True
+
+    def get_library_info(self, library_os_path):
+        """Returns the version and the interface signature of a library without loading it
+
+        :param str library_os_path: the path of the library
+        :return: a dictionary with the keys 'version' and 'interface_signature' or None, if the path is no library
+        :rtype: dict
+        """
+        return self._library_index.get_library_info(os.path.realpath(library_os_path))
+
     #########################################################################
     # Properties for all class fields that must be observed by gtkmvc3
     #########################################################################
@@ -374,6 +435,36 @@ class LibraryManager(Observable):
         else:
             logger.warning("Library manager will not create a library instance which is not in the mounted libraries.")
 
+    def get_library_state_template(self, lib_os_path):
+        """ A method to get the shared root state of the library specified via the lib_os_path
+
+        The returned state is shared by all library states of the library and must not be modified or executed, but
+        only be copied.
+
+        :param lib_os_path: the location of the library
+        :return: the version of the library and its root state
+        """
+        state_machine, _ = self._get_loaded_library(lib_os_path)
+        return state_machine.version, state_machine.root_state
+
+    def _get_loaded_library(self, lib_os_path):
+        """Returns the loaded state machine of a library, the library is loaded, if necessary
+
+        :param lib_os_path: the location of the library
+        :return: the state machine of the library and whether it was loaded before
+        :rtype: rafcon.core.state_machine.StateMachine, bool
+        """
+        with self._loaded_libraries_lock:
+            state_machine = self._loaded_libraries.get(lib_os_path)
+        if state_machine is not None:
+            return state_machine, True
+        # the library is loaded without holding the lock, which would block the library watcher meanwhile
+        state_machine = storage.load_state_machine_from_path(lib_os_path)
+        with self._loaded_libraries_lock:
+            loaded_state_machine = self._loaded_libraries.setdefault(lib_os_path, state_machine)
+        # another thread may have stored the library meanwhile, then its state machine is shared and was loaded before
+        return loaded_state_machine, loaded_state_machine is not state_machine
+
     def get_library_state_copy_instance(self, lib_os_path):
         """ A method to get a state copy of the library specified via the lib_os_path.
 
@@ -385,17 +476,15 @@ class LibraryManager(Observable):
         # state_machine = storage.load_state_machine_from_path(lib_os_path)
         # return state_machine.version, state_machine.root_state
 
-        # TODO observe changes on file system and update data
-        if lib_os_path in self._loaded_libraries:
+        # changed libraries are removed from the loaded libraries by the library index
+        state_machine, was_loaded = self._get_loaded_library(lib_os_path)
+        if was_loaded:
             # this list can also be taken to open library state machines TODO -> implement it -> because faster
-            state_machine = self._loaded_libraries[lib_os_path]
             # logger.info("Take copy of {0}".format(lib_os_path))
             # as long as the a library state root state is never edited so the state first has to be copied here
             state_copy = copy.deepcopy(state_machine.root_state)
             return state_machine.version, state_copy
         else:
-            state_machine = storage.load_state_machine_from_path(lib_os_path)
-            self._loaded_libraries[lib_os_path] = state_machine
             if config.global_config.get_config_value("NO_PROGRAMMATIC_CHANGE_OF_LIBRARY_STATES_PERFORMED", False):
                 return state_machine.version, state_machine.root_state
             else:
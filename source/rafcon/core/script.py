@@ -20,10 +20,14 @@ from future.utils import string_types
 from builtins import str
 import os
 import imp
+import hashlib
+from collections import OrderedDict
+from threading import Lock
 import yaml
 from gtkmvc3.observable import Observable
 
 from rafcon.core.id_generator import generate_script_id
+from rafcon.core.config import global_config
 import rafcon.core.singleton
 
 from rafcon.utils import filesystem
@@ -36,6 +40,43 @@ DEFAULT_SCRIPT_FILE = "default_script.py"
 
 DEFAULT_SCRIPT = filesystem.read_file(os.path.dirname(__file__), DEFAULT_SCRIPT_FILE)
 
+# compiled code objects of all scripts, indexed by the hash of the script text and the script filename
+# the code objects are immutable and can thus be shared between all scripts with the same text, e.g. the copies
+# of an execution state within multiple library states; the least recently used code objects are removed, if the cache
+# holds more than COMPILED_CODE_CACHE_SIZE code objects
+COMPILED_CODE_CACHE_SIZE = 1000
+_compiled_code_cache = OrderedDict()
+_compiled_code_cache_lock = Lock()
+
+
+def get_compiled_code(script_text, filename):
+    """Returns the compiled code object for the given script text
+
+    The script text is only compiled, if no code object for the same text was compiled recently.
+
+    :param str script_text: the source code of the script
+    :param str filename: the name of the script file, used in tracebacks
+    :return: the compiled code object
+    """
+    encoded_script_text = script_text if isinstance(script_text, bytes) else script_text.encode('utf-8')
+    script_hash = hashlib.sha1(encoded_script_text).hexdigest()
+    key = (script_hash, filename)
+    with _compiled_code_cache_lock:
+        code = _compiled_code_cache.pop(key, None)
+        if code is None:
+            code = compile(script_text, '%s (%s)' % (filename, script_hash[:10]), 'exec')
+            while len(_compiled_code_cache) >= COMPILED_CODE_CACHE_SIZE:
+                _compiled_code_cache.popitem(last=False)
+        # the code object is (re-)inserted as the most recently used one
+        _compiled_code_cache[key] = code
+    return code
+
+
+def clear_compiled_code_cache():
+    """Removes all compiled code objects from the cache"""
+    with _compiled_code_cache_lock:
+        _compiled_code_cache.clear()
+
 
 class Script(Observable, yaml.YAMLObject):
     """A class for representing the script file for all execution states in a state machine.
@@ -45,6 +86,7 @@ class Script(Observable, yaml.YAMLObject):
     :ivar path: the path where the script resides
     :ivar filename: the full name of the script file
     :ivar _compiled_module: the compiled module
+    :ivar _compiled_script: the script text, the compiled module was built from
     :ivar _script_id: the id of the script
     :ivar check_path: a flag to indicate if the path should be checked for existence
 
@@ -58,6 +100,7 @@ class Script(Observable, yaml.YAMLObject):
         self._path = None
         self._filename = None
         self._compiled_module = None
+        self._compiled_script = None
         self._script_id = generate_script_id()
         self._parent = None
         self._check_path = check_path
@@ -116,11 +159,22 @@ class Script(Observable, yaml.YAMLObject):
                           "".format(os.path.join(self.path, self.filename)))
         self.script = script_text
 
-    def build_module(self):
+    def build_module(self, force=False):
         """Builds a temporary module from the script file
 
+        The module is only rebuilt, if the script text changed since the last build. The compiled code is shared
+        between all scripts with the same text. If the config option RELOAD_SCRIPT_ON_EVERY_EXECUTION is set, the module
+        is rebuilt on every call, which resets all module level variables of the script.
+
+        :param bool force: rebuild the module, even if the script text did not change
         :raises exceptions.IOError: if the compilation of the script module failed
         """
+        script = self.script
+        if not force and self._compiled_module is not None and self._compiled_script is script and \
+                not global_config.get_config_value("RELOAD_SCRIPT_ON_EVERY_EXECUTION", False):
+            return
+
+        code = get_compiled_code(script, self.filename)
         try:
             imp.acquire_lock()
             module_name = os.path.splitext(self.filename)[0] + str(self._script_id)
@@ -128,8 +182,6 @@ class Script(Observable, yaml.YAMLObject):
             # load module
             tmp_module = imp.new_module(module_name)
 
-            code = compile(self.script, '%s (%s)' % (self.filename, self._script_id), 'exec')
-
             try:
                 exec(code, tmp_module.__dict__)
             except RuntimeError as e:
@@ -137,6 +189,7 @@ class Script(Observable, yaml.YAMLObject):
 
             # return the module
             self.compiled_module = tmp_module
+            self._compiled_script = script
         finally:
             imp.release_lock()
 
@@ -23,6 +23,8 @@ import threading
 from rafcon.core.global_variable_manager import GlobalVariableManager
 from rafcon.core.library_manager import LibraryManager
 from rafcon.core.execution.execution_engine import ExecutionEngine
+from rafcon.core.execution.execution_events import ExecutionEventBus
+from rafcon.core.execution.execution_metrics import ExecutionMetricsRegistry
 from rafcon.core.state_machine_manager import StateMachineManager
 
 # thread id of the thread which created the core singletons
@@ -40,6 +42,12 @@ state_machine_manager = StateMachineManager()
 # This variable holds the execution engine singleton
 state_machine_execution_engine = ExecutionEngine(state_machine_manager)
 
+# This variable holds the bus of the execution status events of all states
+execution_event_bus = ExecutionEventBus()
+
+# This variable holds the execution metrics of all states
+execution_metrics = ExecutionMetricsRegistry()
+
 # signal that cause shut down
 shut_down_signal = None
 
@@ -148,6 +148,8 @@ def setup_configuration(config_path):
     else:
         global_config.load(path=config_path)
 
+    core_singletons.global_variable_manager.initialize()
+
     # Initialize libraries
     core_singletons.library_manager.initialize()
 
@@ -226,9 +228,8 @@ def signal_handler(signal, frame):
     logger.info("Shutting down ...")
 
     try:
-        if not state_machine_execution_engine.finished_or_stopped():
-            state_machine_execution_engine.stop()
-            state_machine_execution_engine.join(3)  # Wait max 3 sec for the execution to stop
+        # stops all concurrently executed state machines, not only the active one
+        state_machine_execution_engine.stop_all(3)  # Wait max 3 sec for each execution to stop
     except Exception:
         logger.exception("Could not stop state machine")
 
@@ -18,7 +18,9 @@
 
 """
 from future.utils import string_types
+from copy import deepcopy
 from enum import Enum
+import numbers
 from gtkmvc3.observable import Observable
 
 from rafcon.core.id_generator import generate_data_port_id
@@ -29,6 +31,37 @@ from rafcon.utils import type_helpers
 logger = log.get_logger(__name__)
 
 
+def make_read_only(value):
+    """Protects a value passed by reference against modifications, where possible
+
+    Numpy arrays are replaced by a read-only view on the same data. All other values are returned unchanged.
+
+    :param value: the value passed by reference
+    :return: the protected value
+    """
+    # numpy is an optional dependency, thus it is not imported here
+    if type(value).__module__ == 'numpy' and hasattr(value, 'flags') and hasattr(value, 'view'):
+        if value.flags.writeable:
+            value = value.view()
+            value.flags.writeable = False
+    return value
+
+
+def is_read_only(value):
+    """Checks whether a value passed by reference cannot be modified in place
+
+    This is the case for numbers, strings and other immutable builtin values, as well as for read-only numpy arrays.
+
+    :param value: the value passed by reference
+    :rtype: bool
+    """
+    if value is None or isinstance(value, (numbers.Number, string_types, bytes, frozenset)):
+        return True
+    if type(value).__module__ == 'numpy' and hasattr(value, 'flags'):
+        return not value.flags.writeable
+    return False
+
+
 class DataPort(StateElement):
     """A class for representing a data ports in a state
 
@@ -42,6 +75,9 @@ class DataPort(StateElement):
     :ivar bool DataPort.init_without_default_value_type_exceptions: if true it is allowed to initiate with any default
                                                                     value type used to load not matching default value
                                                                     data types and correct them using the GUI.
+    :ivar bool DataPort.pass_by_reference: if true, the values of the data port are passed by reference to the
+                                           connected states instead of copying them. The values must not be modified
+                                           by the receiving states; numpy arrays are passed as read-only views.
     """
 
     # Define all parameters and set their default values
@@ -49,9 +85,10 @@ class DataPort(StateElement):
     _data_port_id = None
     _data_type = type(None)
     _default_value = None
+    _pass_by_reference = False
 
     def __init__(self, name=None, data_type=None, default_value=None, data_port_id=None, parent=None, force_type=False,
-                 init_without_default_value_type_exceptions=False):
+                 init_without_default_value_type_exceptions=False, pass_by_reference=False):
         if type(self) == DataPort and not force_type:
             raise NotImplementedError
         super(DataPort, self).__init__()
@@ -68,6 +105,7 @@ class DataPort(StateElement):
         if data_type is not None:
             self.data_type = data_type
         self.default_value = default_value
+        self.pass_by_reference = pass_by_reference
 
         # Checks for validity
         self.parent = parent
@@ -82,7 +120,7 @@ class DataPort(StateElement):
 
     def __copy__(self):
         return self.__class__(self._name, self._data_type, self._default_value, self._data_port_id, None,
-                              self._was_forced_type)
+                              self._was_forced_type, pass_by_reference=self._pass_by_reference)
 
     def __deepcopy__(self, memo=None, _nil=[]):
         return self.__copy__()
@@ -97,23 +135,28 @@ class DataPort(StateElement):
         name = dictionary['name']
         data_type = dictionary['data_type']
         default_value = dictionary['default_value']
+        pass_by_reference = dictionary.get('pass_by_reference', False)
         # Allow creation of DataPort class when loading from YAML file
         if cls == DataPort:
             return DataPort(name, data_type, default_value, data_port_id, force_type=True,
-                            init_without_default_value_type_exceptions=True)
+                            init_without_default_value_type_exceptions=True, pass_by_reference=pass_by_reference)
         # Call appropriate constructor, e.g. InputDataPort(...) for input data ports
         else:
             return cls(name, data_type, default_value, data_port_id, force_type=True,
-                       init_without_default_value_type_exceptions=True)
+                       init_without_default_value_type_exceptions=True, pass_by_reference=pass_by_reference)
 
     @staticmethod
     def state_element_to_dict(state_element):
-        return {
+        dict_representation = {
             'data_port_id': state_element.data_port_id,
             'name': state_element.name,
             'data_type': state_element.data_type,
             'default_value': state_element.default_value
         }
+        # only stored if set, to keep the files of existing state machines unchanged
+        if state_element.pass_by_reference:
+            dict_representation['pass_by_reference'] = True
+        return dict_representation
 
     #########################################################################
     # Properties for all class fields that must be observed by gtkmvc3
@@ -184,6 +227,31 @@ class DataPort(StateElement):
         except (TypeError, AttributeError) as e:
             raise e
 
+    @property
+    def pass_by_reference(self):
+        """Property for the _pass_by_reference field
+
+        """
+        return self._pass_by_reference
+
+    @pass_by_reference.setter
+    @lock_state_machine
+    @Observable.observed
+    def pass_by_reference(self, pass_by_reference):
+        if not isinstance(pass_by_reference, bool):
+            raise TypeError("pass_by_reference must be of type bool")
+        self._pass_by_reference = pass_by_reference
+
+    def get_value_to_pass(self, value):
+        """Returns the value to be passed via the data port
+
+        :param value: the value of the data port
+        :return: a deep copy of the value or, if the data port passes by reference, the (read-only) value itself
+        """
+        if self._pass_by_reference:
+            return make_read_only(value)
+        return deepcopy(value)
+
     @lock_state_machine
     @Observable.observed
     def change_data_type(self, data_type, default_value=None):
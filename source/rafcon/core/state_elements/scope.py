@@ -17,14 +17,15 @@
 """
 
 from future.utils import string_types
+from copy import deepcopy
 import datetime
 import time
 
 from gtkmvc3.observable import Observable
 
 from rafcon.core.state_elements.state_element import StateElement
-from rafcon.core.state_elements.data_port import DataPort
-from rafcon.core.decorators import lock_state_machine
+from rafcon.core.state_elements.data_port import DataPort, is_read_only
+from rafcon.core.decorators import lock_state_machine, lock_state_machine_unless_frozen
 from rafcon.utils import type_helpers
 
 
@@ -62,18 +63,21 @@ class ScopedVariable(DataPort):
 
     yaml_tag = u'!ScopedVariable'
 
-    def __init__(self, name=None, data_type=None, default_value=None, scoped_variable_id=None, parent=None):
+    def __init__(self, name=None, data_type=None, default_value=None, scoped_variable_id=None, parent=None,
+                 pass_by_reference=False):
 
         Observable.__init__(self)
 
-        DataPort.__init__(self, name, data_type, default_value, scoped_variable_id, parent)
+        DataPort.__init__(self, name, data_type, default_value, scoped_variable_id, parent,
+                          pass_by_reference=pass_by_reference)
 
     def __str__(self):
         return "ScopedVariable '{0}' [{1}] ({3} {2})".format(self.name, self.data_port_id, self.data_type,
                                                              self.default_value)
 
     def __copy__(self):
-        return self.__class__(self._name, self._data_type, self._default_value, self._data_port_id, None)
+        return self.__class__(self._name, self._data_type, self._default_value, self._data_port_id, None,
+                              self._pass_by_reference)
 
     def __deepcopy__(self, memo=None, _nil=[]):
         return self.__copy__()
@@ -87,16 +91,25 @@ class ScopedVariable(DataPort):
         name = dictionary['name']
         data_type = dictionary['data_type']
         default_value = dictionary['default_value']
-        return cls(name, data_type, default_value, data_port_id)
+        pass_by_reference = dictionary.get('pass_by_reference', False)
+        return cls(name, data_type, default_value, data_port_id, pass_by_reference=pass_by_reference)
 
     @staticmethod
     def state_element_to_dict(state_element):
-        return {
-            'data_port_id': state_element.data_port_id,
-            'name': state_element.name,
-            'data_type': state_element.data_type,
-            'default_value': state_element.default_value
-        }
+        return DataPort.state_element_to_dict(state_element)
+
+
+def get_scoped_data_snapshot(scoped_data):
+    """Creates a snapshot of the scoped data dictionary of a container state
+
+    Only the entries that changed since their last snapshot and the entries with modifiable values passed by
+    reference are copied, all other entries are shared with previous snapshots.
+
+    :param dict scoped_data: the scoped data dictionary
+    :return: a dictionary with the snapshots of all scoped data entries
+    :rtype: dict
+    """
+    return {key: entry.get_snapshot() for key, entry in scoped_data.items()}
 
 
 class ScopedData(StateElement):
@@ -111,7 +124,12 @@ class ScopedData(StateElement):
     :ivar value: the current value of the scoped data
     :ivar data_port_type: the type of the data port that wrote to the scoped data last
     :ivar str timestamp: the timestamp when the scoped data was written to last
+    :ivar bool pass_by_reference: if true, the value is written by a data port passing by reference and thus only
+                                  copied for snapshots, if it can be modified in place
 
+    Scoped data is written by replacing the entries of the scoped data dictionary of a container state. Thus, snapshots
+    of the scoped data (e.g. in the execution history) can share the copies of all entries that did not change, see
+    :meth:`get_snapshot`.
     """
     _from_state = None
     _name = None
@@ -119,8 +137,9 @@ class ScopedData(StateElement):
     _value = None
     _data_port_type = None
     _primary_key = None
+    _snapshot = None
 
-    def __init__(self, name, value, value_type, from_state, data_port_type, parent=None):
+    def __init__(self, name, value, value_type, from_state, data_port_type, parent=None, pass_by_reference=False):
 
         super(ScopedData, self).__init__()
 
@@ -132,6 +151,7 @@ class ScopedData(StateElement):
         self.value = value
 
         self.data_port_type = data_port_type
+        self.pass_by_reference = pass_by_reference
 
         self._timestamp = generate_time_stamp()
         # for storage purpose inside the container states (generated from key_name and from_state)
@@ -142,6 +162,28 @@ class ScopedData(StateElement):
     def state_element_id(self):
         return self._primary_key
 
+    def get_snapshot(self):
+        """Returns a copy of the scoped data, which is shared by all snapshots until the scoped data is modified
+
+        The copy is created on the first call. Snapshots must not be modified. A snapshot of a snapshot is the snapshot
+        itself.
+
+        Values passed by reference are shared with the snapshot, if they are read-only (see :func:`is_read_only`).
+        Other values passed by reference can be modified in place, thus every call creates a new copy of them.
+
+        :return: the copy of the scoped data
+        :rtype: ScopedData
+        """
+        if self._snapshot is not None:
+            return self._snapshot
+        shared_value = self.pass_by_reference and is_read_only(self._value)
+        memo = {id(self._value): self._value} if shared_value else None
+        snapshot = deepcopy(self, memo)
+        snapshot._snapshot = snapshot
+        if shared_value or not self.pass_by_reference:
+            self._snapshot = snapshot
+        return snapshot
+
     def __str__(self):
         return "ScopedData: \n name: %s \n data_type: %s \n value: %s \n from_state %s" % \
                (self.name, self.value_type, self.value, self.from_state)
@@ -174,14 +216,14 @@ class ScopedData(StateElement):
         return self._name
 
     @name.setter
-    @lock_state_machine
-    @Observable.observed
+    @lock_state_machine_unless_frozen
     def name(self, name):
         if not isinstance(name, string_types):
             raise TypeError("key_name must be a string")
         self._name = name
         # update key
         self._primary_key = self._name + self.from_state
+        self._snapshot = None
 
     @property
     def value(self):
@@ -191,8 +233,7 @@ class ScopedData(StateElement):
         return self._value
 
     @value.setter
-    @lock_state_machine
-    @Observable.observed
+    @lock_state_machine_unless_frozen
     def value(self, value):
         # check for primitive data types
         if value is not None and not type_helpers.type_inherits_of_type(type(value), self.value_type):
@@ -207,6 +248,7 @@ class ScopedData(StateElement):
         self._timestamp = generate_time_stamp()
         # print("new scope data update {0}: {1} t:{2}".format(self.name+self.from_state, self._value, self._timestamp))
         self._value = value
+        self._snapshot = None
 
     @property
     def value_type(self):
@@ -216,10 +258,10 @@ class ScopedData(StateElement):
         return self._value_type
 
     @value_type.setter
-    @lock_state_machine
-    @Observable.observed
+    @lock_state_machine_unless_frozen
     def value_type(self, value_type):
         self._value_type = type_helpers.convert_string_to_type(value_type)
+        self._snapshot = None
 
     @property
     def from_state(self):
@@ -229,8 +271,7 @@ class ScopedData(StateElement):
         return self._from_state
 
     @from_state.setter
-    @lock_state_machine
-    @Observable.observed
+    @lock_state_machine_unless_frozen
     def from_state(self, from_state):
         if from_state is not None:
             if not isinstance(from_state, string_types):
@@ -239,6 +280,7 @@ class ScopedData(StateElement):
                 # update key
                 self._primary_key = self.name + self._from_state
         self._from_state = from_state
+        self._snapshot = None
 
     @property
     def data_port_type(self):
@@ -248,12 +290,12 @@ class ScopedData(StateElement):
         return self._data_port_type
 
     @data_port_type.setter
-    @lock_state_machine
-    @Observable.observed
+    @lock_state_machine_unless_frozen
     def data_port_type(self, data_port_type):
         if not issubclass(data_port_type, DataPort):
             raise TypeError("data_port_type must be a subclass of DataPort")
         self._data_port_type = data_port_type
+        self._snapshot = None
 
     @property
     def timestamp(self):
@@ -265,9 +307,9 @@ class ScopedData(StateElement):
     # WARNING: This setter function should never be used, as the timestamp is generated when the setter function of
     # the self._result variable is called
     @timestamp.setter
-    @lock_state_machine
-    @Observable.observed
+    @lock_state_machine_unless_frozen
     def timestamp(self, timestamp):
         if not isinstance(timestamp, float):
             raise TypeError("timestamp must be of type float")
         self._timestamp = timestamp
+        self._snapshot = None
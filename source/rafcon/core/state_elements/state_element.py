@@ -127,6 +127,15 @@ class StateElement(Observable, YAMLObject, JSONObject, Hashable):
                     raise ValueError("{0} invalid within state \"{1}\" (id {2}): {3} {4}".format(
                         class_name, parent.name, parent.state_id, message, self))
 
+    @property
+    def frozen_state_machine(self):
+        """The state machine of the parent state, if it is frozen during its execution, otherwise None
+
+        :rtype: rafcon.core.state_machine.StateMachine
+        """
+        parent = self.parent
+        return parent.frozen_state_machine if parent is not None else None
+
     @property
     def state_element_id(self):
         """Returns the id of the state element
@@ -180,9 +189,20 @@ class StateElement(Observable, YAMLObject, JSONObject, Hashable):
         valid, message = self._check_validity()
         if not valid:
             setattr(self, property_name, old_value)
+            self._invalidate_parent_lookup_tables()
             class_name = self.__class__.__name__
             raise ValueError("The {2}'s '{0}' could not be changed: {1}".format(property_name[1:], message, class_name))
 
+    def _invalidate_parent_lookup_tables(self):
+        """Invalidates the lookup tables of the parent after a rejected change of the state element was reverted
+
+        The tables can be rebuilt during the validity check, e.g. by another thread, and then hold the rejected value.
+        """
+        from rafcon.core.states.container_state import ContainerState
+        parent = self.parent
+        if isinstance(parent, ContainerState):
+            parent._invalidate_lookup_tables()
+
     def _check_validity(self):
         """Checks the validity of the state element's properties
 
@@ -131,6 +131,7 @@ class Transition(StateElement):
         if not valid:
             self._from_state = old_from_state
             self._from_outcome = old_from_outcome
+            self._invalidate_parent_lookup_tables()
             raise ValueError("The transition origin could not be changed: {0}".format(message))
 
     @lock_state_machine
@@ -158,6 +159,7 @@ class Transition(StateElement):
         if not valid:
             self._to_state = old_to_state
             self._to_outcome = old_to_outcome
+            self._invalidate_parent_lookup_tables()
             raise ValueError("The transition target could not be changed: {0}".format(message))
 
     @property
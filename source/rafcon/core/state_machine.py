@@ -26,14 +26,17 @@ from future.utils import string_types
 from builtins import range
 from contextlib import contextmanager
 from copy import copy
-from threading import RLock
+from threading import RLock, Lock
 from datetime import datetime
+from weakref import WeakValueDictionary
 
 from gtkmvc3.observable import Observable
 from jsonconversion.jsonobject import JSONObject
 
 import rafcon
-from rafcon.core.execution.execution_history import ExecutionHistory, ExecutionHistoryStorage
+from rafcon.core.execution.execution_history import ExecutionHistory, ExecutionHistoryStorage, execution_log_backends
+from rafcon.core.execution.execution_thread_pool import ExecutionThreadPool
+from rafcon.core.execution.execution_process_pool import ExecutionProcessPool
 from rafcon.core.id_generator import generate_state_machine_id, run_id_generator
 from rafcon.utils import log
 from rafcon.utils.hashable import Hashable
@@ -70,6 +73,11 @@ class StateMachine(Observable, JSONObject, Hashable):
         Observable.__init__(self)
 
         self._modification_lock = RLock()
+        # an index of the states by their paths, filled by get_state_by_path
+        self._states_by_path = WeakValueDictionary()
+        # whether the structure of the state machine is frozen, see freeze
+        self._frozen = False
+        self._execution_status_callbacks = []
 
         if state_machine_id is None:
             self.state_machine_id = generate_state_machine_id()
@@ -99,6 +107,17 @@ class StateMachine(Observable, JSONObject, Hashable):
 
         self._execution_histories = []
 
+        # the fingerprints of the files written by the last saves of the state machine, used for incremental saves
+        self.storage_fingerprints = {}
+
+        # the pool of threads used to execute the states of the state machine, it is created with the first execution
+        self._execution_thread_pool = None
+        # the pool of worker processes for execution states with the process backend, it is created on demand
+        self._execution_process_pool = None
+        self._execution_process_pool_lock = Lock()
+        # specifies if the children of hierarchy states are executed in the thread of their parent
+        self.inline_hierarchy_children = False
+
         # specifies if this state machine supports saving states with state_name + state_id
         self._supports_saving_state_names = True
 
@@ -138,6 +157,7 @@ class StateMachine(Observable, JSONObject, Hashable):
     def start(self):
         """Starts the execution of the root state.
         """
+        self._setup_execution_threading()
         # load default input data for the state
         self._root_state.input_data = self._root_state.get_default_input_values_for_state(self._root_state)
         self._root_state.output_data = self._root_state.create_output_dictionary_for_state(self._root_state)
@@ -148,7 +168,7 @@ class StateMachine(Observable, JSONObject, Hashable):
     def join(self):
         """Wait for root state to finish execution"""
         self._root_state.join()
-        # execution finished, close execution history log file (if present)
+        # execution finished, close execution history log file (if present), this also writes all pending history items
         if len(self._execution_histories) > 0:
             if self._execution_histories[-1].execution_history_storage is not None:
                 set_read_and_writable_for_all = global_config.get_config_value("EXECUTION_LOG_SET_READ_AND_WRITABLE_FOR_ALL", False)
@@ -156,6 +176,56 @@ class StateMachine(Observable, JSONObject, Hashable):
         from rafcon.core.states.state import StateExecutionStatus
         self._root_state.state_execution_status = StateExecutionStatus.INACTIVE
 
+    def _setup_execution_threading(self):
+        """Applies the threading related settings of the configuration before an execution"""
+        pool_size = global_config.get_config_value("EXECUTION_THREAD_POOL_SIZE", 0)
+        if pool_size:
+            if self._execution_thread_pool is None:
+                self._execution_thread_pool = ExecutionThreadPool(pool_size)
+            else:
+                self._execution_thread_pool.max_idle_threads = pool_size
+        else:
+            self.shutdown_execution_thread_pool()
+        self.inline_hierarchy_children = global_config.get_config_value("EXECUTION_INLINE_HIERARCHY_CHILDREN", False)
+
+    def shutdown_execution_thread_pool(self):
+        """Terminates the idle threads of the execution thread pool
+
+        States that are started afterwards use their own threads, until the pool is recreated with the next execution.
+        """
+        if self._execution_thread_pool is not None:
+            self._execution_thread_pool.shutdown()
+            self._execution_thread_pool = None
+
+    def get_execution_process_pool(self):
+        """Returns the pool of worker processes executing the scripts of execution states with the process backend
+
+        The pool is created on the first call.
+
+        :rtype: rafcon.core.execution.execution_process_pool.ExecutionProcessPool
+        """
+        with self._execution_process_pool_lock:
+            if self._execution_process_pool is None:
+                self._execution_process_pool = ExecutionProcessPool(
+                    global_config.get_config_value("EXECUTION_PROCESS_POOL_SIZE", 4))
+            return self._execution_process_pool
+
+    def shutdown_execution_process_pool(self):
+        """Stops the idle worker processes of the execution process pool"""
+        with self._execution_process_pool_lock:
+            if self._execution_process_pool is not None:
+                self._execution_process_pool.shutdown()
+                self._execution_process_pool = None
+
+    @property
+    def execution_thread_pool(self):
+        """The pool of threads used to execute the states of the state machine
+
+        :rtype: rafcon.core.execution.execution_thread_pool.ExecutionThreadPool
+        :return: the thread pool or None if the state machine was not executed yet or the pool is disabled
+        """
+        return self._execution_thread_pool
+
     @contextmanager
     def modification_lock(self, blocking=True):
         """Get modification lock in with() statement
@@ -167,6 +237,64 @@ class StateMachine(Observable, JSONObject, Hashable):
         finally:
             self.release_modification_lock()
 
+    @property
+    def frozen(self):
+        """Whether the structure of the state machine is frozen, see :meth:`freeze`
+
+        :rtype: bool
+        """
+        return self._frozen
+
+    def freeze(self):
+        """Freezes the structure of the state machine for its execution
+
+        Modifications of the states and state elements of a frozen state machine (e.g. adding states or renaming
+        them) are rejected with a RuntimeError. In return, the execution data of the states (e.g. their execution
+        status, input and output data and scoped data) is changed without acquiring the modification lock and without
+        notifying observers. Instead of the observers, the callbacks added by :meth:`add_execution_status_callback` are
+        informed about changes of the execution status of the states.
+        """
+        with self.modification_lock():
+            if self._root_state is not None:
+                self._root_state._set_frozen_state_machine(self)
+            self._frozen = True
+
+    def unfreeze(self):
+        """Allows modifications of the state machine again, see :meth:`freeze`"""
+        with self.modification_lock():
+            if self._root_state is not None:
+                self._root_state._set_frozen_state_machine(None)
+            self._frozen = False
+
+    def add_execution_status_callback(self, callback):
+        """Adds a callback, which is called whenever the execution status of a state of the frozen state machine changes
+
+        The callback is called in the execution thread of the state and must return quickly.
+
+        :param callable callback: called with the state and its new execution status
+        """
+        self._execution_status_callbacks.append(callback)
+
+    def remove_execution_status_callback(self, callback):
+        """Removes a callback added by :meth:`add_execution_status_callback`
+
+        :param callable callback: the callback to be removed
+        """
+        if callback in self._execution_status_callbacks:
+            self._execution_status_callbacks.remove(callback)
+
+    def notify_execution_status_callbacks(self, state, state_execution_status):
+        """Calls the execution status callbacks
+
+        :param rafcon.core.states.state.State state: the state, whose execution status changed
+        :param rafcon.core.states.state.StateExecutionStatus state_execution_status: the new execution status
+        """
+        for callback in list(self._execution_status_callbacks):
+            try:
+                callback(state, state_execution_status)
+            except Exception as e:
+                logger.exception("Error in execution status callback {0}: {1}".format(callback, e))
+
     # @Observable.observed
     def acquire_modification_lock(self, blocking=True):
         """Acquires the modification lock of the state machine
@@ -206,6 +334,7 @@ class StateMachine(Observable, JSONObject, Hashable):
                 raise AttributeError("root_state has to be of type State")
             root_state.parent = self
         self._root_state = root_state
+        self._states_by_path.clear()
 
     @property
     def execution_histories(self):
@@ -222,7 +351,10 @@ class StateMachine(Observable, JSONObject, Hashable):
 
     @Observable.observed
     def _add_new_execution_history(self):
-        new_execution_history = ExecutionHistory()
+        new_execution_history = ExecutionHistory(
+            max_items=global_config.get_config_value("EXECUTION_HISTORY_MAX_ITEMS", 0),
+            max_bytes=global_config.get_config_value("EXECUTION_HISTORY_MAX_BYTES", 0),
+            retention_policy=global_config.get_config_value("EXECUTION_HISTORY_RETENTION_POLICY", "DROP_ITEMS"))
 
         if global_config.get_config_value("EXECUTION_LOG_ENABLE", False):
             base_dir = global_config.get_config_value("EXECUTION_LOG_PATH", "%RAFCON_TEMP_PATH_BASE/execution_logs")
@@ -230,12 +362,25 @@ class StateMachine(Observable, JSONObject, Hashable):
                 base_dir = base_dir.replace('%RAFCON_TEMP_PATH_BASE', RAFCON_TEMP_PATH_BASE)
             if not os.path.exists(base_dir):
                 os.makedirs(base_dir)
-            shelve_name = os.path.join(base_dir, '%s_rafcon_execution_log_%s.shelve' %
-                                       (time.strftime('%Y-%m-%d-%H:%M:%S', time.localtime()),
-                                        self.root_state.name.replace(' ', '-')))
-            execution_history_store = ExecutionHistoryStorage(shelve_name)
+            backend = global_config.get_config_value("EXECUTION_LOG_BACKEND", "shelve")
+            _, file_extension = execution_log_backends.get(backend, execution_log_backends['shelve'])
+            log_file_name = os.path.join(base_dir, '%s_rafcon_execution_log_%s.%s' %
+                                         (time.strftime('%Y-%m-%d-%H:%M:%S', time.localtime()),
+                                          self.root_state.name.replace(' ', '-'), file_extension))
+            execution_history_store = ExecutionHistoryStorage(
+                log_file_name,
+                queue_size=global_config.get_config_value("EXECUTION_LOG_QUEUE_SIZE", 0),
+                batch_size=global_config.get_config_value("EXECUTION_LOG_BATCH_SIZE", 100),
+                flush_interval=global_config.get_config_value("EXECUTION_LOG_FLUSH_INTERVAL", 1.),
+                backpressure_policy=global_config.get_config_value("EXECUTION_LOG_BACKPRESSURE_POLICY", "BLOCK"),
+                backend=backend)
             new_execution_history.set_execution_history_storage(execution_history_store)
         self._execution_histories.append(new_execution_history)
+        # only keep the histories of the last runs
+        max_runs = global_config.get_config_value("EXECUTION_HISTORY_MAX_RUNS", 0)
+        if max_runs:
+            while len(self._execution_histories) > max_runs:
+                self._execution_histories.pop(0).destroy()
         return new_execution_history
 
     @Observable.observed
@@ -268,9 +413,23 @@ class StateMachine(Observable, JSONObject, Hashable):
         self._marked_dirty = marked_dirty
 
     def get_state_by_path(self, path, as_check=False):
+        """Returns the state with the given path
+
+        Found states are added to an index of the states by their paths. Thus, repeated lookups do not need to walk
+        down the state hierarchy. An indexed state is only returned if it still has the path and belongs to the state
+        machine.
+
+        :param str path: the path of the state, consisting of state ids
+        :param bool as_check: if True, no warning is logged if there is no state with the path
+        :return: the state or None, if there is no state with the path
+        :rtype: rafcon.core.states.state.State
+        """
         if not path:
             logger.debug("No start state specified!")
             return None
+        state = self._states_by_path.get(path)
+        if state is not None and state.get_path() == path and state.get_state_machine() is self:
+            return state
         from rafcon.core.states.library_state import LibraryState
         from rafcon.core.states.execution_state import ExecutionState
         path_item_list = path.split('/')
@@ -297,6 +456,7 @@ class StateMachine(Observable, JSONObject, Hashable):
                                                                                               note))
                     return None
             prev_state_id = state_id
+        self._states_by_path[path] = state
         return state
 
     def get_last_execution_log_filename(self):
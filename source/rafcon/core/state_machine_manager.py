@@ -123,6 +123,8 @@ class StateMachineManager(Observable):
 
         # destroy execution history
         removed_state_machine.destroy_execution_histories()
+        removed_state_machine.shutdown_execution_thread_pool()
+        removed_state_machine.shutdown_execution_process_pool()
         return removed_state_machine
 
     def get_active_state_machine(self):
@@ -168,5 +170,9 @@ class StateMachineManager(Observable):
         if not core_singletons.state_machine_execution_engine.finished_or_stopped() and \
                 state_machine_id != self._active_state_machine_id:
             raise AttributeError("Active state machine can not be changed because state machine execution is active.")
+        if state_machine_id is not None and state_machine_id != self._active_state_machine_id and \
+                not core_singletons.state_machine_execution_engine.finished_or_stopped(state_machine_id):
+            raise AttributeError("The state machine can not become the active state machine, as it is executed "
+                                 "concurrently.")
 
         self._active_state_machine_id = state_machine_id
@@ -22,15 +22,16 @@
 from builtins import str
 import traceback
 from copy import copy, deepcopy
-from threading import Condition
+from threading import Condition, Lock, RLock
+from timeit import default_timer as timer
 
 from gtkmvc3.observable import Observable
 
 from rafcon.core.custom_exceptions import RecoveryModeException
-from rafcon.core.decorators import lock_state_machine
+from rafcon.core.decorators import lock_state_machine, lock_state_machine_unless_frozen
 from rafcon.core.execution.execution_status import StateMachineExecutionStatus
 from rafcon.core.id_generator import *
-from rafcon.core.singleton import state_machine_execution_engine
+from rafcon.core.singleton import state_machine_execution_engine, execution_metrics
 from rafcon.core.state_elements.data_flow import DataFlow
 from rafcon.core.state_elements.logical_port import Outcome
 from rafcon.core.state_elements.scope import ScopedData, ScopedVariable
@@ -83,6 +84,14 @@ class ContainerState(State):
         self._transitions_cv = Condition()
         self._child_execution = False
         self._start_state_modified = False
+        # lookup tables for transitions and data flows, lazily (re)built after modifications
+        self._lookup_tables = None
+        self._lookup_tables_version = 0
+        self._lookup_tables_lock = Lock()
+        # loads the child states, transitions and data flows of a lazily loaded container state on first access
+        self._child_states_loader = None
+        self._child_states_loader_lock = RLock()
+        self._loading_child_states = False
 
         State.__init__(self, name, state_id, input_data_ports, output_data_ports, income, outcomes)
 
@@ -97,7 +106,7 @@ class ContainerState(State):
     # ----------------------------------- generic methods -----------------------------------------
     # ---------------------------------------------------------------------------------------------
 
-    @lock_state_machine
+    @lock_state_machine_unless_frozen(observed=False)
     def update_hash(self, obj_hash):
         super(ContainerState, self).update_hash(obj_hash)
         for state_element in sorted(self.states.values()) + sorted(list(self.transitions.values()) +
@@ -176,10 +185,10 @@ class ContainerState(State):
         output_data_ports = {elem_id: copy(elem) for elem_id, elem in self._output_data_ports.items()}
         income = copy(self._income)
         outcomes = {elem_id: copy(elem) for elem_id, elem in self._outcomes.items()}
-        states = {elem_id: copy(elem) for elem_id, elem in self._states.items()}
+        states = {elem_id: copy(elem) for elem_id, elem in self.states.items()}
         scoped_variables = {elem_id: copy(elem) for elem_id, elem in self._scoped_variables.items()}
-        data_flows = {elem_id: copy(elem) for elem_id, elem in self._data_flows.items()}
-        transitions = {elem_id: copy(elem) for elem_id, elem in self._transitions.items()}
+        data_flows = {elem_id: copy(elem) for elem_id, elem in self.data_flows.items()}
+        transitions = {elem_id: copy(elem) for elem_id, elem in self.transitions.items()}
 
         state = self.__class__(self.name, self.state_id, input_data_ports, output_data_ports, income, outcomes, states,
                                transitions, data_flows, None, scoped_variables)
@@ -1094,10 +1103,11 @@ class ContainerState(State):
         """
 
         # overwrite the start state in the case that a specific start state is specific e.g. by start_from_state
-        if self.get_path() in state_machine_execution_engine.start_state_paths:
+        start_state_paths = state_machine_execution_engine.get_start_state_paths(self)
+        if self.get_path() in start_state_paths:
             for state_id, state in self.states.items():
-                if state.get_path() in state_machine_execution_engine.start_state_paths:
-                    state_machine_execution_engine.start_state_paths.remove(self.get_path())
+                if state.get_path() in start_state_paths:
+                    start_state_paths.remove(self.get_path())
                     self._start_state_modified = True
                     return state
 
@@ -1138,6 +1148,82 @@ class ContainerState(State):
         else:
             super(ContainerState, self).remove(state_element, force=force, destroy=destroy)
 
+    # ---------------------------------------------------------------------------------------------
+    # --------------------------- transition and data flow lookup tables --------------------------
+    # ---------------------------------------------------------------------------------------------
+
+    def _set_frozen_state_machine(self, state_machine):
+        super(ContainerState, self)._set_frozen_state_machine(state_machine)
+        # lazily loaded child states, which were not loaded yet, are marked after their loading
+        for state in list(self._states.values()):
+            state._set_frozen_state_machine(state_machine)
+
+    def _invalidate_child_path_caches(self):
+        # lazily loaded child states, which were not loaded yet, have no cached paths
+        for state in list(self._states.values()):
+            state._invalidate_path_cache()
+
+    def _invalidate_lookup_tables(self):
+        """Marks the lookup tables of transitions and data flows as outdated
+
+        Must be called whenever transitions or data flows are added, removed or modified. The tables are rebuilt with
+        the next lookup.
+        """
+        with self._lookup_tables_lock:
+            self._lookup_tables_version += 1
+            self._lookup_tables = None
+
+    def _get_lookup_tables(self):
+        """Returns the lookup tables of transitions and data flows
+
+        The lookup tables map the origin and target ports to the connected transitions and data flows. This spares
+        iterating over all transitions and data flows for every executed child state.
+
+        :return: transitions by (from_state, from_outcome), list of data flows by (from_state, from_key), list of data
+            flows by (to_state, to_key)
+        :rtype: tuple(dict, dict, dict)
+        """
+        lookup_tables = self._lookup_tables
+        if lookup_tables is not None:
+            return lookup_tables
+
+        version = self._lookup_tables_version
+        transitions_by_origin = {}
+        data_flows_by_origin = {}
+        data_flows_by_target = {}
+        for transition in list(self.transitions.values()):
+            transitions_by_origin[(transition.from_state, transition.from_outcome)] = transition
+        for data_flow in list(self.data_flows.values()):
+            data_flows_by_origin.setdefault((data_flow.from_state, data_flow.from_key), []).append(data_flow)
+            data_flows_by_target.setdefault((data_flow.to_state, data_flow.to_key), []).append(data_flow)
+        lookup_tables = transitions_by_origin, data_flows_by_origin, data_flows_by_target
+
+        with self._lookup_tables_lock:
+            # do not store the tables, if the transitions or data flows were modified in the meantime
+            if version == self._lookup_tables_version:
+                self._lookup_tables = lookup_tables
+        return lookup_tables
+
+    def get_data_flows_from_port(self, state_id, data_port_id):
+        """Returns all data flows starting at the given data port
+
+        :param str state_id: The id of the state the data port belongs to
+        :param int data_port_id: The id of the data port
+        :return: the data flows with the data port as origin
+        :rtype: list
+        """
+        return self._get_lookup_tables()[1].get((state_id, data_port_id), [])
+
+    def get_data_flows_to_port(self, state_id, data_port_id):
+        """Returns all data flows ending at the given data port
+
+        :param str state_id: The id of the state the data port belongs to
+        :param int data_port_id: The id of the data port
+        :return: the data flows with the data port as target
+        :rtype: list
+        """
+        return self._get_lookup_tables()[2].get((state_id, data_port_id), [])
+
     # ---------------------------------------------------------------------------------------------
     # ---------------------------------- transition functions -------------------------------------
     # ---------------------------------------------------------------------------------------------
@@ -1150,11 +1236,11 @@ class ContainerState(State):
         :raises exceptions.AttributeError: if transition.transition_id already exists
         """
         if transition_id is not None:
-            if transition_id in self._transitions.keys():
+            if transition_id in self.transitions.keys():
                 raise AttributeError("The transition id %s already exists. Cannot add transition!", transition_id)
         else:
             transition_id = generate_transition_id()
-            while transition_id in self._transitions.keys():
+            while transition_id in self.transitions.keys():
                 transition_id = generate_transition_id()
         return transition_id
 
@@ -1169,11 +1255,9 @@ class ContainerState(State):
         :raises exceptions.AttributeError: if the outcome of the state with the state_id==from_state_id
                                             is already connected
         """
-        for trans_key, transition in self.transitions.items():
-            if transition.from_state == from_state_id:
-                if transition.from_outcome == from_outcome:
-                    raise AttributeError("Outcome %s of state %s is already connected" %
-                                         (str(from_outcome), str(from_state_id)))
+        if (from_state_id, from_outcome) in self._get_lookup_tables()[0]:
+            raise AttributeError("Outcome %s of state %s is already connected" %
+                                 (str(from_outcome), str(from_state_id)))
 
     @lock_state_machine
     def create_transition(self, from_state_id, from_outcome, to_state_id, to_outcome, transition_id):
@@ -1214,6 +1298,7 @@ class ContainerState(State):
         else:
             self.transitions[transition_id] = \
                 Transition(None, None, to_state_id, to_outcome, transition_id, self)
+        self._invalidate_lookup_tables()
 
         # notify all states waiting for transition to be connected
         self._transitions_cv.acquire()
@@ -1245,6 +1330,7 @@ class ContainerState(State):
 
         new_transition = Transition(from_state_id, from_outcome, to_state_id, to_outcome, transition_id, self)
         self.transitions[transition_id] = new_transition
+        self._invalidate_lookup_tables()
 
         # notify all states waiting for transition to be connected
         self._transitions_cv.acquire()
@@ -1265,11 +1351,7 @@ class ContainerState(State):
             raise TypeError("state must be of type State")
         if not isinstance(outcome, Outcome):
             raise TypeError("outcome must be of type Outcome")
-        result_transition = None
-        for key, transition in self.transitions.items():
-            if transition.from_state == state.state_id and transition.from_outcome == outcome.outcome_id:
-                result_transition = transition
-        return result_transition
+        return self._get_lookup_tables()[0].get((state.state_id, outcome.outcome_id))
 
     @lock_state_machine
     @Observable.observed
@@ -1281,11 +1363,13 @@ class ContainerState(State):
         """
         if transition_id == -1 or transition_id == -2:
             raise AttributeError("The transition_id must not be -1 (Aborted) or -2 (Preempted)")
-        if transition_id not in self._transitions:
+        if transition_id not in self.transitions:
             raise AttributeError("The transition_id %s does not exist" % str(transition_id))
 
         self.transitions[transition_id].parent = None
-        return self.transitions.pop(transition_id)
+        transition = self.transitions.pop(transition_id)
+        self._invalidate_lookup_tables()
+        return transition
 
     @lock_state_machine
     def remove_outcome_hook(self, outcome_id):
@@ -1312,11 +1396,11 @@ class ContainerState(State):
         :raises exceptions.AttributeError: if data_flow.data_flow_id already exists
         """
         if data_flow_id is not None:
-            if data_flow_id in self._data_flows.keys():
+            if data_flow_id in self.data_flows.keys():
                 raise AttributeError("The data_flow id %s already exists. Cannot add data_flow!", data_flow_id)
         else:
             data_flow_id = generate_data_flow_id()
-            while data_flow_id in self._data_flows.keys():
+            while data_flow_id in self.data_flows.keys():
                 data_flow_id = generate_data_flow_id()
         return data_flow_id
 
@@ -1336,6 +1420,7 @@ class ContainerState(State):
 
         self.data_flows[data_flow_id] = DataFlow(from_state_id, from_data_port_id, to_state_id, to_data_port_id,
                                                  data_flow_id, self)
+        self._invalidate_lookup_tables()
         return data_flow_id
 
     @lock_state_machine
@@ -1346,11 +1431,13 @@ class ContainerState(State):
         :param int data_flow_id: the id of the data_flow to remove
         :raises exceptions.AttributeError: if the data_flow_id does not exist
         """
-        if data_flow_id not in self._data_flows:
+        if data_flow_id not in self.data_flows:
             raise AttributeError("The data_flow_id %s does not exist" % str(data_flow_id))
 
         self._data_flows[data_flow_id].parent = None
-        return self._data_flows.pop(data_flow_id)
+        data_flow = self._data_flows.pop(data_flow_id)
+        self._invalidate_lookup_tables()
+        return data_flow
 
     @lock_state_machine
     def remove_data_flows_with_data_port_id(self, data_port_id):
@@ -1401,13 +1488,15 @@ class ContainerState(State):
 
     @lock_state_machine
     @Observable.observed
-    def add_scoped_variable(self, name, data_type=None, default_value=None, scoped_variable_id=None):
+    def add_scoped_variable(self, name, data_type=None, default_value=None, scoped_variable_id=None,
+                            pass_by_reference=False):
         """ Adds a scoped variable to the container state
 
         :param name: The name of the scoped variable
         :param data_type: An optional data type of the scoped variable
         :param default_value: An optional default value of the scoped variable
         :param scoped_variable_id: An optional scoped variable id of the
+        :param bool pass_by_reference: whether the values of the scoped variable are passed without copying them
         :return: the unique id of the added scoped variable
         :raises exceptions.ValueError: if the scoped variable is not valid
         """
@@ -1415,7 +1504,7 @@ class ContainerState(State):
             # All data port ids have to passed to the id generation as the data port id has to be unique inside a state
             scoped_variable_id = generate_data_port_id(self.get_data_port_ids())
         self._scoped_variables[scoped_variable_id] = ScopedVariable(name, data_type, default_value,
-                                                                    scoped_variable_id, self)
+                                                                    scoped_variable_id, self, pass_by_reference)
 
         # Check for name uniqueness
         valid, message = self._check_data_port_name(self._scoped_variables[scoped_variable_id])
@@ -1507,6 +1596,7 @@ class ContainerState(State):
         :param state: the state of which the input data is determined
         :return: the input data of the target state
         """
+        start_time = timer() if execution_metrics.enabled else None
         result_dict = {}
 
         tmp_dict = self.get_default_input_values_for_state(state)
@@ -1516,27 +1606,26 @@ class ContainerState(State):
             # for all input keys fetch the correct data_flow connection and read data into the result_dict
             actual_value = None
             actual_value_time = 0
-            for data_flow_key, data_flow in self.data_flows.items():
-
-                if data_flow.to_key == input_port_key:
-                    if data_flow.to_state == state.state_id:
-                        # fetch data from the scoped_data list: the key is the data_port_key + the state_id
-                        key = str(data_flow.from_key) + data_flow.from_state
-                        if key in self.scoped_data:
-                            if actual_value is None or actual_value_time < self.scoped_data[key].timestamp:
-                                actual_value = deepcopy(self.scoped_data[key].value)
-                                actual_value_time = self.scoped_data[key].timestamp
+            for data_flow in self.get_data_flows_to_port(state.state_id, input_port_key):
+                # fetch data from the scoped_data list: the key is the data_port_key + the state_id
+                key = str(data_flow.from_key) + data_flow.from_state
+                if key in self.scoped_data:
+                    if actual_value is None or actual_value_time < self.scoped_data[key].timestamp:
+                        actual_value = value.get_value_to_pass(self.scoped_data[key].value)
+                        actual_value_time = self.scoped_data[key].timestamp
 
             if actual_value is not None:
                 result_dict[value.name] = actual_value
 
+        if start_time is not None:
+            execution_metrics.record_duration(state, 'input', timer() - start_time)
         return result_dict
 
     # ---------------------------------------------------------------------------------------------
     # ---------------------------- functions to modify the scoped data ----------------------------
     # ---------------------------------------------------------------------------------------------
 
-    @lock_state_machine
+    @lock_state_machine_unless_frozen(observed=False)
     def add_input_data_to_scoped_data(self, dictionary):
         """Add a dictionary to the scoped data
 
@@ -1550,17 +1639,18 @@ class ContainerState(State):
             for input_data_port_key, data_port in list(self.input_data_ports.items()):
                 if dict_key == data_port.name:
                     self.scoped_data[str(input_data_port_key) + self.state_id] = \
-                        ScopedData(data_port.name, value, type(value), self.state_id, ScopedVariable, parent=self)
+                        ScopedData(data_port.name, value, type(value), self.state_id, ScopedVariable, parent=self,
+                                   pass_by_reference=data_port.pass_by_reference)
                     # forward the data to scoped variables
-                    for data_flow_key, data_flow in self.data_flows.items():
-                        if data_flow.from_key == input_data_port_key and data_flow.from_state == self.state_id:
-                            if data_flow.to_state == self.state_id and data_flow.to_key in self.scoped_variables:
-                                current_scoped_variable = self.scoped_variables[data_flow.to_key]
-                                self.scoped_data[str(data_flow.to_key) + self.state_id] = \
-                                    ScopedData(current_scoped_variable.name, value, type(value), self.state_id,
-                                               ScopedVariable, parent=self)
+                    for data_flow in self.get_data_flows_from_port(self.state_id, input_data_port_key):
+                        if data_flow.to_state == self.state_id and data_flow.to_key in self.scoped_variables:
+                            current_scoped_variable = self.scoped_variables[data_flow.to_key]
+                            self.scoped_data[str(data_flow.to_key) + self.state_id] = \
+                                ScopedData(current_scoped_variable.name, value, type(value), self.state_id,
+                                           ScopedVariable, parent=self,
+                                           pass_by_reference=current_scoped_variable.pass_by_reference)
 
-    @lock_state_machine
+    @lock_state_machine_unless_frozen(observed=False)
     def add_state_execution_output_to_scoped_data(self, dictionary, state):
         """Add a state execution output to the scoped data
 
@@ -1577,9 +1667,10 @@ class ContainerState(State):
                             logger.error("The data type of output port {0} should be of type {1}, but is of type {2}".
                                          format(output_name, data_port.data_type, type(value)))
                     self.scoped_data[str(output_data_port_key) + state.state_id] = \
-                        ScopedData(data_port.name, value, type(value), state.state_id, OutputDataPort, parent=self)
+                        ScopedData(data_port.name, value, type(value), state.state_id, OutputDataPort, parent=self,
+                                   pass_by_reference=data_port.pass_by_reference)
 
-    @lock_state_machine
+    @lock_state_machine_unless_frozen(observed=False)
     def add_default_values_of_scoped_variables_to_scoped_data(self):
         """Add the scoped variables default values to the scoped_data dictionary
 
@@ -1587,9 +1678,9 @@ class ContainerState(State):
         for key, scoped_var in self.scoped_variables.items():
             self.scoped_data[str(scoped_var.data_port_id) + self.state_id] = \
                 ScopedData(scoped_var.name, scoped_var.default_value, scoped_var.data_type, self.state_id,
-                           ScopedVariable, parent=self)
+                           ScopedVariable, parent=self, pass_by_reference=scoped_var.pass_by_reference)
 
-    @lock_state_machine
+    @lock_state_machine_unless_frozen(observed=False)
     def update_scoped_variables_with_output_dictionary(self, dictionary, state):
         """Update the values of the scoped variables with the output dictionary of a specific state.
 
@@ -1607,14 +1698,14 @@ class ContainerState(State):
                 if not key == "error":
                     logger.warning("Output variable %s was written during state execution, "
                                    "that has no data port connected to it.", str(key))
-            for data_flow_key, data_flow in self.data_flows.items():
-                if data_flow.from_key == output_data_port_key and data_flow.from_state == state.state_id:
-                    if data_flow.to_state == self.state_id:  # is target of data flow own state id?
-                        if data_flow.to_key in self.scoped_variables.keys():  # is target data port scoped?
-                            current_scoped_variable = self.scoped_variables[data_flow.to_key]
-                            self.scoped_data[str(data_flow.to_key) + self.state_id] = \
-                                ScopedData(current_scoped_variable.name, value, type(value), state.state_id,
-                                           ScopedVariable, parent=self)
+            for data_flow in self.get_data_flows_from_port(state.state_id, output_data_port_key):
+                if data_flow.to_state == self.state_id:  # is target of data flow own state id?
+                    if data_flow.to_key in self.scoped_variables.keys():  # is target data port scoped?
+                        current_scoped_variable = self.scoped_variables[data_flow.to_key]
+                        self.scoped_data[str(data_flow.to_key) + self.state_id] = \
+                            ScopedData(current_scoped_variable.name, value, type(value), state.state_id,
+                                       ScopedVariable, parent=self,
+                                       pass_by_reference=current_scoped_variable.pass_by_reference)
 
     # ---------------------------------------------------------------------------------------------
     # ------------------------ functions to modify the scoped data end ----------------------------
@@ -1644,6 +1735,7 @@ class ContainerState(State):
                 data_flow._from_state = self.state_id
             if data_flow.to_state == old_state_id:
                 data_flow._to_state = self.state_id
+        self._invalidate_lookup_tables()
 
     def get_state_for_transition(self, transition):
         """Calculate the target state of a transition
@@ -1673,28 +1765,29 @@ class ContainerState(State):
 
         for output_name, value in self.output_data.items():
             output_port_id = self.get_io_data_port_id_from_name_and_type(output_name, OutputDataPort)
+            if output_port_id is None:  # e.g. the error output, which is not connected to any data flow
+                continue
+            output_port = self.output_data_ports[output_port_id]
             actual_value = None
             actual_value_was_written = False
             actual_value_time = 0
-            for data_flow_id, data_flow in self.data_flows.items():
-                if data_flow.to_state == self.state_id:
-                    if data_flow.to_key == output_port_id:
-                        scoped_data_key = str(data_flow.from_key) + data_flow.from_state
-                        if scoped_data_key in self.scoped_data:
-                            # if self.scoped_data[scoped_data_key].timestamp > actual_value_time is True
-                            # the data of a previous execution of the same state is overwritten
-                            if actual_value is None or self.scoped_data[scoped_data_key].timestamp > actual_value_time:
-                                actual_value = deepcopy(self.scoped_data[scoped_data_key].value)
-                                actual_value_time = self.scoped_data[scoped_data_key].timestamp
-                                actual_value_was_written = True
-                        else:
-                            if not self.backward_execution:
-                                logger.debug(
-                                    "Output data with name {0} of state {1} was not found in the scoped data "
-                                    "of state {2}. Thus the state did not write onto this output. "
-                                    "This can mean a state machine design error.".format(
-                                        str(output_name), str(self.states[data_flow.from_state].get_path()),
-                                        self.get_path()))
+            for data_flow in self.get_data_flows_to_port(self.state_id, output_port_id):
+                scoped_data_key = str(data_flow.from_key) + data_flow.from_state
+                if scoped_data_key in self.scoped_data:
+                    # if self.scoped_data[scoped_data_key].timestamp > actual_value_time is True
+                    # the data of a previous execution of the same state is overwritten
+                    if actual_value is None or self.scoped_data[scoped_data_key].timestamp > actual_value_time:
+                        actual_value = output_port.get_value_to_pass(self.scoped_data[scoped_data_key].value)
+                        actual_value_time = self.scoped_data[scoped_data_key].timestamp
+                        actual_value_was_written = True
+                else:
+                    if not self.backward_execution:
+                        logger.debug(
+                            "Output data with name {0} of state {1} was not found in the scoped data "
+                            "of state {2}. Thus the state did not write onto this output. "
+                            "This can mean a state machine design error.".format(
+                                str(output_name), str(self.states[data_flow.from_state].get_path()),
+                                self.get_path()))
             if actual_value_was_written:
                 output_dict[output_name] = actual_value
 
@@ -1719,8 +1812,12 @@ class ContainerState(State):
         # Continue with checks if previous ones did not fail
         # Check type of child and call appropriate validity test
         if isinstance(child, DataFlow):
+            # the check is triggered by every modification of the data flow
+            self._invalidate_lookup_tables()
             return self._check_data_flow_validity(child)
         if isinstance(child, Transition):
+            # the check is triggered by every modification of the transition
+            self._invalidate_lookup_tables()
             return self._check_transition_validity(child)
         return valid, message
 
@@ -2054,6 +2151,51 @@ class ContainerState(State):
     # ----------------------------------------- misc ----------------------------------------------
     # ---------------------------------------------------------------------------------------------
 
+    def set_child_states_loader(self, loader):
+        """Defers the loading of the child states, transitions and data flows
+
+        The loader is called on the first access of the child states, transitions or data flows and has to add them
+        to the state. Thus, the subtree of a container state can be loaded lazily.
+
+        :param callable loader: the function loading the child states, transitions and data flows
+        """
+        self._child_states_loader = loader
+
+    @property
+    def child_states_loaded(self):
+        """Whether the child states, transitions and data flows were loaded (see :meth:`set_child_states_loader`)
+
+        :rtype: bool
+        """
+        return self._child_states_loader is None
+
+    def _load_lazily_loaded_child_states(self):
+        """Calls the loader of the child states, transitions and data flows, if their loading was deferred"""
+        if self._child_states_loader is None:
+            return
+        # the state machine lock is acquired first, as the loader modifies the state
+        state_machine = self.get_state_machine()
+        if state_machine is not None:
+            state_machine.acquire_modification_lock()
+        try:
+            with self._child_states_loader_lock:
+                if self._child_states_loader is None or self._loading_child_states:
+                    return
+                self._loading_child_states = True
+                # the child states are added to frozen states, too
+                frozen_state_machine = self._frozen_state_machine
+                self._frozen_state_machine = None
+                try:
+                    self._child_states_loader()
+                    self._child_states_loader = None
+                finally:
+                    self._loading_child_states = False
+                    if frozen_state_machine is not None:
+                        self._set_frozen_state_machine(frozen_state_machine)
+        finally:
+            if state_machine is not None:
+                state_machine.release_modification_lock()
+
     def get_states_statistics(self, hierarchy_level):
         """
         Returns the numer of child states
@@ -2093,6 +2235,7 @@ class ContainerState(State):
         the elements by calling the parent-setter.
 
         """
+        self._load_lazily_loaded_child_states()
         return self._states
 
     @states.setter
@@ -2107,6 +2250,7 @@ class ContainerState(State):
         :raises exceptions.TypeError: if the states parameter is of wrong type
         :raises exceptions.AttributeError: if the keys of the dictionary and the state_ids in the dictionary do not match
         """
+        self._load_lazily_loaded_child_states()
         if not isinstance(states, dict):
             raise TypeError("states must be of type dict")
         if [state_id for state_id, state in states.items() if not isinstance(state, State)]:
@@ -2140,6 +2284,7 @@ class ContainerState(State):
         :return: Dictionary transitions[transition_id] of :class:`rafcon.core.transition.Transition`
         :rtype: dict
         """
+        self._load_lazily_loaded_child_states()
         return self._transitions
 
     @transitions.setter
@@ -2155,6 +2300,7 @@ class ContainerState(State):
         :raises exceptions.AttributeError: if the keys of the transitions dictionary and the transition_ids of the
                                             transitions in the dictionary do not match
         """
+        self._load_lazily_loaded_child_states()
         if not isinstance(transitions, dict):
             raise TypeError("transitions must be of type dict")
         if [t_id for t_id, transition in transitions.items() if not isinstance(transition, Transition)]:
@@ -2179,6 +2325,7 @@ class ContainerState(State):
 
         self._transitions = dict((transition_id, t) for (transition_id, t) in self._transitions.items()
                                  if transition_id not in transition_ids_to_delete)
+        self._invalidate_lookup_tables()
 
         # check that all old_transitions are no more referencing self as there parent
         for old_transition in old_transitions.values():
@@ -2197,6 +2344,7 @@ class ContainerState(State):
         :return: Dictionary data_flows[data_flow_id] of :class:`rafcon.core.data_flow.DataFlow`
         :rtype: dict
         """
+        self._load_lazily_loaded_child_states()
         return self._data_flows
 
     @data_flows.setter
@@ -2212,6 +2360,7 @@ class ContainerState(State):
         :raises exceptions.AttributeError: if the keys of the data_flows dictionary and the data_flow_ids of the
                                             data flows in the dictionary do not match
         """
+        self._load_lazily_loaded_child_states()
         if not isinstance(data_flows, dict):
             raise TypeError("data_flows must be of type dict")
         if [df_id for df_id, data_flow in data_flows.items() if not isinstance(data_flow, DataFlow)]:
@@ -2236,6 +2385,7 @@ class ContainerState(State):
 
         self._data_flows = dict((data_flow_id, d) for (data_flow_id, d) in self._data_flows.items()
                                 if data_flow_id not in data_flow_ids_to_delete)
+        self._invalidate_lookup_tables()
 
         # check that all old_data_flows are no more referencing self as there parent
         for old_data_flow in old_data_flows.values():
@@ -2349,15 +2499,15 @@ class ContainerState(State):
         return self._scoped_data
 
     @scoped_data.setter
-    @lock_state_machine
-    # @Observable.observed
+    @lock_state_machine_unless_frozen(observed=False)
     def scoped_data(self, scoped_data):
         if not isinstance(scoped_data, dict):
             raise TypeError("scoped_results must be of type dict")
         for key, s in scoped_data.items():
             if not isinstance(s, ScopedData):
                 raise TypeError("element of scoped_data must be of type ScopedData")
-        self._scoped_data = scoped_data
+        # the dictionary is copied, as it may be a snapshot shared by several history items
+        self._scoped_data = dict(scoped_data)
 
     @property
     def child_execution(self):
@@ -23,15 +23,19 @@ import traceback
 import sys
 import os
 from copy import copy, deepcopy
+from timeit import default_timer as timer
 
 from gtkmvc3.observable import Observable
 
 from rafcon.core.states.state import State
-from rafcon.core.decorators import lock_state_machine
+from rafcon.core.decorators import lock_state_machine, lock_state_machine_unless_frozen
 from rafcon.core.state_elements.logical_port import Outcome
 from rafcon.core.script import Script
 from rafcon.core.states.state import StateExecutionStatus
 from rafcon.core.execution.execution_history import CallType
+from rafcon.core.execution.execution_process_pool import ScriptExecutionError
+from rafcon.core.config import global_config
+from rafcon.core.singleton import execution_metrics
 
 from rafcon.utils import log
 logger = log.get_logger(__name__)
@@ -41,13 +45,18 @@ class ExecutionState(State):
     """A class to represent a state for executing arbitrary functions
 
     This kind of state does not have any child states.
+
+    :ivar str execution_backend: the backend executing the script, one of EXECUTION_BACKENDS; None to use the backend
+                                 defined by the config option EXECUTION_STATE_BACKEND
     """
 
     yaml_tag = u'!ExecutionState'
 
+    EXECUTION_BACKENDS = ('THREAD', 'PROCESS')
+
     def __init__(self, name=None, state_id=None, input_data_ports=None, output_data_ports=None,
                  income=None, outcomes=None,
-                 path=None, filename=None, check_path=True):
+                 path=None, filename=None, check_path=True, execution_backend=None):
 
         State.__init__(self, name, state_id, input_data_ports, output_data_ports, income, outcomes)
         self._script = None
@@ -55,6 +64,8 @@ class ExecutionState(State):
         self.logger = log.get_logger(self.name)
         # here all persistent variables that should be available for the next state run should be stored
         self.persistent_variables = {}
+        self._execution_backend = None
+        self.execution_backend = execution_backend
 
     def __hash__(self):
         return id(self)
@@ -70,6 +81,7 @@ class ExecutionState(State):
         income = copy(self._income)
         outcomes = {elem_id: copy(elem) for elem_id, elem in list(self._outcomes.items())}
         state = self.__class__(self.name, self.state_id, input_data_ports, output_data_ports, income, outcomes, None)
+        state.execution_backend = self.execution_backend
         state.script_text = deepcopy(self.script_text)
         state.description = deepcopy(self.description)
         state.semantic_data = deepcopy(self.semantic_data)
@@ -79,7 +91,7 @@ class ExecutionState(State):
     def __deepcopy__(self, memo=None, _nil=[]):
         return self.__copy__()
 
-    @lock_state_machine
+    @lock_state_machine_unless_frozen(observed=False)
     def update_hash(self, obj_hash):
         super(ExecutionState, self).update_hash(obj_hash)
         obj_hash.update(self.get_object_hash_string(self.script.script))
@@ -93,6 +105,7 @@ class ExecutionState(State):
         income = dictionary.get('income', None)  # older state machine versions don't have this set
         outcomes = dictionary['outcomes']
         state = cls(name, state_id, input_data_ports, output_data_ports, income, outcomes, check_path=False)
+        state.execution_backend = dictionary.get('execution_backend', None)
         try:
             state.description = dictionary['description']
         except (TypeError, KeyError):  # (Very) old state machines do not have a description field
@@ -101,13 +114,41 @@ class ExecutionState(State):
             logger.warning("Erroneous description for state '{1}': {0}".format(formatted_lines[-1], dictionary['name']))
         return state
 
+    @staticmethod
+    def state_to_dict(state):
+        dict_representation = State.state_to_dict(state)
+        # only stored if set, to keep the files of existing state machines unchanged
+        if state.execution_backend is not None:
+            dict_representation['execution_backend'] = state.execution_backend
+        return dict_representation
+
+    def _uses_process_backend(self):
+        execution_backend = self.execution_backend or global_config.get_config_value("EXECUTION_STATE_BACKEND",
+                                                                                     "THREAD")
+        return execution_backend == 'PROCESS'
+
+    def _execute_in_process(self, execute_inputs, execute_outputs, backward_execution):
+        """Executes the script in a worker process of the execution process pool of the state machine
+
+        Exceptions of the script are raised as :class:`ScriptExecutionError` holding the traceback of the worker
+        process, which is logged by :meth:`run`.
+        """
+        state_machine = self.get_state_machine()
+        if state_machine is None:
+            raise RuntimeError("{0} cannot be executed in a worker process without a state machine".format(self))
+        return state_machine.get_execution_process_pool().execute(
+            self, self.script_text, self._script.filename, execute_inputs, execute_outputs, backward_execution,
+            reload_module=global_config.get_config_value("RELOAD_SCRIPT_ON_EVERY_EXECUTION", False))
+
     def _execute(self, execute_inputs, execute_outputs, backward_execution=False):
         """Calls the custom execute function of the script.py of the state
 
         """
-        self._script.build_module()
-
-        outcome_item = self._script.execute(self, execute_inputs, execute_outputs, backward_execution)
+        if self._uses_process_backend():
+            outcome_item = self._execute_in_process(execute_inputs, execute_outputs, backward_execution)
+        else:
+            self._script.build_module()
+            outcome_item = self._script.execute(self, execute_inputs, execute_outputs, backward_execution)
 
         # in the case of backward execution the outcome is not relevant
         if backward_execution:
@@ -144,7 +185,11 @@ class ExecutionState(State):
             self.setup_run()
 
         try:
+            metrics_enabled = execution_metrics.enabled
+            start_time = timer() if metrics_enabled else None
             outcome = self._execute(self.input_data, self.output_data, self.backward_execution)
+            if metrics_enabled:
+                execution_metrics.record_duration(self, 'script', timer() - start_time)
             self.state_execution_status = StateExecutionStatus.WAIT_FOR_NEXT_STATE
 
             if self.backward_execution:
@@ -152,15 +197,22 @@ class ExecutionState(State):
                 result = self.finalize()
             else:
                 # check output data
+                start_time = timer() if metrics_enabled else None
                 self.check_output_data_type()
+                if metrics_enabled:
+                    execution_metrics.record_duration(self, 'output', timer() - start_time)
                 result = self.finalize(outcome)
 
             if self.is_root_state:
                 self.execution_history.push_return_history_item(self, CallType.EXECUTE, None, self.output_data)
             return result
         except Exception as e:
-            exc_type, exc_value, exc_traceback = sys.exc_info()
-            formatted_exc = traceback.format_exception(exc_type, exc_value, exc_traceback)
+            if isinstance(e, ScriptExecutionError):
+                # the exception was raised in a worker process, only its traceback there is of interest
+                formatted_exc = e.formatted_traceback.splitlines(True)
+            else:
+                exc_type, exc_value, exc_traceback = sys.exc_info()
+                formatted_exc = traceback.format_exception(exc_type, exc_value, exc_traceback)
             truncated_exc = []
             for line in formatted_exc:
                 if os.path.join("rafcon", "core") not in line:
@@ -185,6 +237,21 @@ class ExecutionState(State):
         State.name.fset(self, name)
         self.logger = log.get_logger(self.name)
 
+    @property
+    def execution_backend(self):
+        """Property for the _execution_backend field
+
+        """
+        return self._execution_backend
+
+    @execution_backend.setter
+    @lock_state_machine
+    @Observable.observed
+    def execution_backend(self, execution_backend):
+        if execution_backend is not None and execution_backend not in self.EXECUTION_BACKENDS:
+            raise ValueError("execution_backend must be one of {0} or None".format(self.EXECUTION_BACKENDS))
+        self._execution_backend = execution_backend
+
     @property
     def script(self):
         """Returns the property for the _script field.
@@ -118,6 +118,15 @@ class HierarchyState(ContainerState):
                     else:
                         break
                 elif execution_mode == StateMachineExecutionStatus.BACKWARD:
+                    if not self.execution_history.is_backward_step_possible():
+                        # the required history items were dropped due to the retention limits of the history
+                        logger.warning("Cannot step back from {0}: the execution history does not hold the required "
+                                       "data anymore".format(self.child_state))
+                        state_machine = self.get_state_machine()
+                        singleton.state_machine_execution_engine.set_execution_mode(
+                            StateMachineExecutionStatus.STEP_MODE,
+                            state_machine_id=state_machine.state_machine_id if state_machine else None)
+                        continue
                     break_loop = self._handle_backward_execution_before_child_execution()
                     if break_loop:
                         break
@@ -203,8 +212,14 @@ class HierarchyState(ContainerState):
         if not self.backward_execution:  # only add history item if it is not a backward execution
             self.execution_history.push_call_history_item(
                 self.child_state, CallType.EXECUTE, self, self.child_state.input_data)
-        self.child_state.start(self.execution_history, backward_execution=self.backward_execution,
-                               generate_run_id=False)
+        state_machine = self.get_state_machine()
+        if state_machine is not None and state_machine.inline_hierarchy_children:
+            # the hierarchy state waits for its child anyway, thus the child can use the thread of its parent
+            self.child_state.run_inline(self.execution_history, backward_execution=self.backward_execution,
+                                        generate_run_id=False)
+        else:
+            self.child_state.start(self.execution_history, backward_execution=self.backward_execution,
+                                   generate_run_id=False)
 
         self.child_state.join()
 
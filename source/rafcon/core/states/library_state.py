@@ -20,8 +20,10 @@
 from future.utils import string_types
 from builtins import str
 from copy import copy, deepcopy
+from threading import Lock
 
 from gtkmvc3.observable import Observable
+from rafcon.core.config import global_config
 from rafcon.core.states.state import StateExecutionStatus
 from rafcon.core.singleton import library_manager
 from rafcon.core.states.state import State, PATH_SEPARATOR
@@ -51,6 +53,11 @@ class LibraryState(State):
     :ivar dict output_data_port_runtime_values: a dict to store all the runtime values for the output data ports
     :ivar dict use_runtime_value_output_data_ports: flags to indicate if the runtime or the default value should be used
                                                     for a specific output data port
+
+    If the config value LIBRARY_STATE_LAZY_COPY is set, the root state of the library is not copied on creation of the
+    library state. The library state then only holds copies of the outcomes and data ports and shares the loaded
+    library with all other library states of the same library. The root state is copied on the first access of
+    :attr:`state_copy`, e.g. when the library state is executed.
     """
 
     yaml_tag = u'!LibraryState'
@@ -59,6 +66,7 @@ class LibraryState(State):
     _library_name = None
     _version = None
     _state_copy = None
+    _state_template = None
 
     _input_data_port_runtime_values = {}
     _use_runtime_value_input_data_ports = {}
@@ -76,6 +84,7 @@ class LibraryState(State):
         # this variable is set to true if the state initialization is finished! after initialization no change to the
         # library state is allowed any more
         self.initialized = False
+        self._state_copy_lock = Lock()
         State.__init__(self, name, state_id, None, None, income, outcomes)
 
         self.library_path = library_path
@@ -95,21 +104,33 @@ class LibraryState(State):
             logger.info("New library name '{0}' is located at {1}".format(new_library_name, new_library_path))
 
         # key = load_library_root_state_timer.start()
-        lib_version, state_copy = library_manager.get_library_state_copy_instance(self.lib_os_path)
-        self.state_copy = state_copy
+        if global_config.get_config_value("LIBRARY_STATE_LAZY_COPY", False):
+            lib_version, library_root_state = library_manager.get_library_state_template(self.lib_os_path)
+            self._state_template = library_root_state
+        else:
+            lib_version, library_root_state = library_manager.get_library_state_copy_instance(self.lib_os_path)
+            self.state_copy = library_root_state
+            self.state_copy.parent = self
         # load_library_root_state_timer.stop(key)
-        self.state_copy.parent = self
         if not str(lib_version) == version and not str(lib_version) == "None":
             raise AttributeError("Library does not have the correct version!")
 
         if name is None:
-            self.name = self.state_copy.name
-
-        # copy all ports and outcomes of self.state_copy to let the library state appear like the container state
-        # this will also set the parent of all outcomes and data ports to self
-        self.outcomes = self.state_copy.outcomes
-        self.input_data_ports = self.state_copy.input_data_ports
-        self.output_data_ports = self.state_copy.output_data_ports
+            self.name = library_root_state.name
+
+        if self._state_template is not None:
+            # the ports and outcomes of the shared library root state are copied, as their parent is set to self
+            self.outcomes = {elem_id: copy(elem) for elem_id, elem in library_root_state.outcomes.items()}
+            self.input_data_ports = {elem_id: copy(elem) for elem_id, elem in
+                                     library_root_state.input_data_ports.items()}
+            self.output_data_ports = {elem_id: copy(elem) for elem_id, elem in
+                                      library_root_state.output_data_ports.items()}
+        else:
+            # copy all ports and outcomes of self.state_copy to let the library state appear like the container state
+            # this will also set the parent of all outcomes and data ports to self
+            self.outcomes = self.state_copy.outcomes
+            self.input_data_ports = self.state_copy.input_data_ports
+            self.output_data_ports = self.state_copy.output_data_ports
 
         # handle input runtime values
         self.input_data_port_runtime_values = input_data_port_runtime_values
@@ -176,7 +197,7 @@ class LibraryState(State):
     def __eq__(self, other):
         if not isinstance(other, self.__class__):
             return False
-        return str(self) == str(other) and self._state_copy == other.state_copy
+        return str(self) == str(other) and self.state_copy == other.state_copy
 
     def __copy__(self):
         income = self._income
@@ -201,11 +222,12 @@ class LibraryState(State):
     def destroy(self, recursive=True):
         super(LibraryState, self).destroy(recursive)
         if recursive:
-            if self.state_copy:
-                self.state_copy.destroy(recursive)
-            else:
+            if self._state_copy:
+                self._state_copy.destroy(recursive)
+            elif self._state_template is None:
                 logger.verbose("Multiple calls of destroy {0}".format(self))
             self._state_copy = None
+            self._state_template = None
 
     def run(self):
         """ This defines the sequence of actions that are taken when the library state is executed
@@ -270,7 +292,8 @@ class LibraryState(State):
             raise NotImplementedError("Remove outcome is not implemented for library state {}".format(self))
 
     @lock_state_machine
-    def add_input_data_port(self, name, data_type=None, default_value=None, data_port_id=None):
+    def add_input_data_port(self, name, data_type=None, default_value=None, data_port_id=None,
+                            pass_by_reference=False):
         """Overwrites the add_input_data_port method of the State class. Prevents user from adding a
         output data port to the library state.
 
@@ -296,7 +319,7 @@ class LibraryState(State):
             raise NotImplementedError("Remove input data port is not implemented for library state {}".format(self))
 
     @lock_state_machine
-    def add_output_data_port(self, name, data_type, default_value=None, data_port_id=None):
+    def add_output_data_port(self, name, data_type, default_value=None, data_port_id=None, pass_by_reference=False):
         """Overwrites the add_output_data_port method of the State class. Prevents user from adding a
         output data port to the library state.
 
@@ -322,7 +345,7 @@ class LibraryState(State):
     @lock_state_machine
     @Observable.observed
     def set_input_runtime_value(self, input_data_port_id, value):
-        checked_value = self.state_copy.input_data_ports[input_data_port_id].check_default_value(value)
+        checked_value = self.input_data_ports[input_data_port_id].check_default_value(value)
         self._input_data_port_runtime_values[input_data_port_id] = checked_value
 
     @lock_state_machine
@@ -333,7 +356,7 @@ class LibraryState(State):
     @lock_state_machine
     @Observable.observed
     def set_output_runtime_value(self, output_data_port_id, value):
-        checked_value = self.state_copy.output_data_ports[output_data_port_id].check_default_value(value)
+        checked_value = self.output_data_ports[output_data_port_id].check_default_value(value)
         self._output_data_port_runtime_values[output_data_port_id] = checked_value
 
     @lock_state_machine
@@ -399,14 +422,51 @@ class LibraryState(State):
         Returns the numer of child states. As per default states do not have child states return 1.
         :return:
         """
-        return self.state_copy.get_states_statistics(hierarchy_level)
+        # the statistics of a not yet copied root state are taken from the shared library root state
+        library_root_state = self._state_copy if self._state_copy is not None else self._state_template
+        return library_root_state.get_states_statistics(hierarchy_level)
 
     def get_number_of_transitions(self):
         """
         Return the number of transitions for a state. Per default states do not have transitions.
         :return:
         """
-        return self.state_copy.get_number_of_transitions()
+        library_root_state = self._state_copy if self._state_copy is not None else self._state_template
+        return library_root_state.get_number_of_transitions()
+
+    def _set_frozen_state_machine(self, state_machine):
+        super(LibraryState, self)._set_frozen_state_machine(state_machine)
+        if self._state_copy is not None:
+            self._state_copy._set_frozen_state_machine(state_machine)
+
+    def _invalidate_child_path_caches(self):
+        if self._state_copy is not None:
+            self._state_copy._invalidate_path_cache()
+
+    @property
+    def state_copy_created(self):
+        """Whether the root state of the library was already copied for this library state
+
+        :rtype: bool
+        """
+        return self._state_copy is not None
+
+    def _copy_state_template(self):
+        """Creates the copy of the shared library root state on first access"""
+        with self._state_copy_lock:
+            if self._state_copy is not None or self._state_template is None:
+                return
+            state_copy = deepcopy(self._state_template)
+            # like for eagerly copied library root states, the library state and its root state share the outcomes
+            # and data ports
+            state_copy._outcomes = self._outcomes
+            state_copy._input_data_ports = self._input_data_ports
+            state_copy._output_data_ports = self._output_data_ports
+            state_copy.parent = self
+            if self._frozen_state_machine is not None:
+                state_copy._set_frozen_state_machine(self._frozen_state_machine)
+            self._state_copy = state_copy
+            self._state_template = None
 
     #########################################################################
     # Properties for all class fields that must be observed by gtkmvc3
@@ -464,7 +524,10 @@ class LibraryState(State):
     def state_copy(self):
         """Property for the _state_copy field
 
+        If the library root state was not yet copied (see LIBRARY_STATE_LAZY_COPY), it is copied now.
         """
+        if self._state_copy is None and self._state_template is not None:
+            self._copy_state_template()
         return self._state_copy
 
     @state_copy.setter
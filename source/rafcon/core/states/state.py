@@ -29,6 +29,7 @@ import copy
 import os
 import threading
 from builtins import staticmethod
+from timeit import default_timer as timer
 from weakref import ref
 import copy
 
@@ -38,8 +39,10 @@ from jsonconversion.jsonobject import JSONObject
 from yaml import YAMLObject
 
 from rafcon.core.id_generator import *
+from rafcon.core.execution.execution_thread_pool import ExecutionTask
+from rafcon.core.singleton import execution_event_bus, execution_metrics
 from rafcon.core.state_elements.state_element import StateElement
-from rafcon.core.state_elements.data_port import DataPort, InputDataPort, OutputDataPort
+from rafcon.core.state_elements.data_port import DataPort, InputDataPort, OutputDataPort, make_read_only
 from rafcon.core.state_elements.logical_port import Income, Outcome
 from rafcon.core.state_elements.scope import ScopedData
 from rafcon.core.storage import storage
@@ -49,7 +52,7 @@ from rafcon.utils import multi_event
 from rafcon.utils.constants import RAFCON_TEMP_PATH_STORAGE
 from rafcon.utils.hashable import Hashable
 from rafcon.utils.vividict import Vividict
-from rafcon.core.decorators import lock_state_machine
+from rafcon.core.decorators import lock_state_machine, lock_state_machine_unless_frozen
 
 logger = log.get_logger(__name__)
 PATH_SEPARATOR = '/'
@@ -73,6 +76,13 @@ class State(Observable, YAMLObject, JSONObject, Hashable):
     """
 
     _parent = None
+    # the state machine of the state, if it is frozen during its execution, see StateMachine.freeze
+    _frozen_state_machine = None
+    # the cached paths of the state by state ids and by names, see get_path
+    _path = None
+    _path_by_name = None
+    # the number of edits of the state and its state elements, see lock_state_machine
+    modification_counter = 0
     _state_element_attrs = ['income', 'outcomes', 'input_data_ports', 'output_data_ports']
 
     def __init__(self, name=None, state_id=None, input_data_ports=None, output_data_ports=None,
@@ -110,9 +120,12 @@ class State(Observable, YAMLObject, JSONObject, Hashable):
         # before storing a state the file_system_path cannot return the file system path
         # therefore this variable is None till the state was stored
         self._file_system_path = None
+        # the fingerprints of the files written by the last saves of the state, used for incremental saves
+        self.storage_fingerprints = {}
 
         self.thread = None
         self._run_id = None
+        self._execution_start_time = None
 
         self._semantic_data = Vividict()
 
@@ -247,14 +260,39 @@ class State(Observable, YAMLObject, JSONObject, Hashable):
     def start(self, execution_history, backward_execution=False, generate_run_id=True):
         """ Starts the execution of the state in a new thread.
 
+        If the state belongs to a state machine with an execution thread pool, a pooled worker thread is used instead
+        of creating a new thread.
+
+        :return:
+        """
+        self.execution_history = execution_history
+        if generate_run_id:
+            self._run_id = run_id_generator()
+        self.backward_execution = copy.copy(backward_execution)
+        self._execution_start_time = timer() if execution_metrics.enabled else None
+        state_machine = self.get_state_machine()
+        execution_thread_pool = state_machine.execution_thread_pool if state_machine else None
+        if execution_thread_pool:
+            self.thread = execution_thread_pool.start_task(self.run)
+        else:
+            self.thread = threading.Thread(target=self.run)
+            self.thread.start()
+
+    def run_inline(self, execution_history, backward_execution=False, generate_run_id=True):
+        """ Executes the state directly in the calling thread.
+
+        In contrast to :meth:`start` the method blocks until the execution of the state finished. Other threads can
+        still use :meth:`join` to wait for the execution to finish.
+
         :return:
         """
         self.execution_history = execution_history
         if generate_run_id:
             self._run_id = run_id_generator()
         self.backward_execution = copy.copy(backward_execution)
-        self.thread = threading.Thread(target=self.run)
-        self.thread.start()
+        self._execution_start_time = timer() if execution_metrics.enabled else None
+        self.thread = ExecutionTask(self.run)
+        self.thread.run()
 
     def generate_run_id(self):
         self._run_id = run_id_generator()
@@ -350,6 +388,8 @@ class State(Observable, YAMLObject, JSONObject, Hashable):
                 else:
                     global_value = gvm.get_variable(var_name)
                 result_dict[value.name] = global_value
+            elif value.pass_by_reference:
+                result_dict[value.name] = make_read_only(default)
             else:
                 # set input to its default value
                 result_dict[value.name] = copy.copy(default)
@@ -366,9 +406,13 @@ class State(Observable, YAMLObject, JSONObject, Hashable):
         result_dict = {}
         for key, data_port in state.output_data_ports.items():
             if isinstance(state, LibraryState) and state.use_runtime_value_output_data_ports[key]:
-                result_dict[data_port.name] = copy.copy(state.output_data_port_runtime_values[key])
+                default = state.output_data_port_runtime_values[key]
+            else:
+                default = data_port.default_value
+            if data_port.pass_by_reference:
+                result_dict[data_port.name] = make_read_only(default)
             else:
-                result_dict[data_port.name] = copy.copy(data_port.default_value)
+                result_dict[data_port.name] = copy.copy(default)
         return result_dict
     # ---------------------------------------------------------------------------------------------
     # ----------------------------------- data port functions -------------------------------------
@@ -376,7 +420,8 @@ class State(Observable, YAMLObject, JSONObject, Hashable):
 
     @lock_state_machine
     @Observable.observed
-    def add_input_data_port(self, name, data_type=None, default_value=None, data_port_id=None):
+    def add_input_data_port(self, name, data_type=None, default_value=None, data_port_id=None,
+                            pass_by_reference=False):
         """Add a new input data port to the state.
 
         :param str name: the name of the new input data port
@@ -384,6 +429,7 @@ class State(Observable, YAMLObject, JSONObject, Hashable):
                           :class:`str` which has to be convertible to :class:`type`
         :param default_value: the default value of the data port
         :param int data_port_id: the data_port_id of the new data port
+        :param bool pass_by_reference: whether the values of the data port are passed without copying them
         :return: data_port_id of new input data port
         :rtype: int
         :raises exceptions.ValueError: if name of the input port is not unique
@@ -391,7 +437,8 @@ class State(Observable, YAMLObject, JSONObject, Hashable):
         if data_port_id is None:
             # All data port ids have to passed to the id generation as the data port id has to be unique inside a state
             data_port_id = generate_data_port_id(self.get_data_port_ids())
-        self._input_data_ports[data_port_id] = InputDataPort(name, data_type, default_value, data_port_id, self)
+        self._input_data_ports[data_port_id] = InputDataPort(name, data_type, default_value, data_port_id, self,
+                                                             pass_by_reference=pass_by_reference)
 
         # Check for name uniqueness
         valid, message = self._check_data_port_name(self._input_data_ports[data_port_id])
@@ -440,7 +487,7 @@ class State(Observable, YAMLObject, JSONObject, Hashable):
 
     @lock_state_machine
     @Observable.observed
-    def add_output_data_port(self, name, data_type, default_value=None, data_port_id=None):
+    def add_output_data_port(self, name, data_type, default_value=None, data_port_id=None, pass_by_reference=False):
         """Add a new output data port to the state
 
         :param str name: the name of the new output data port
@@ -448,6 +495,7 @@ class State(Observable, YAMLObject, JSONObject, Hashable):
                           :class:`str` which has to be convertible to :class:`type`
         :param default_value: the default value of the data port
         :param int data_port_id: the data_port_id of the new data port
+        :param bool pass_by_reference: whether the values of the data port are passed without copying them
         :return: data_port_id of new output data port
         :rtype: int
         :raises exceptions.ValueError: if name of the output port is not unique
@@ -455,7 +503,8 @@ class State(Observable, YAMLObject, JSONObject, Hashable):
         if data_port_id is None:
             # All data port ids have to passed to the id generation as the data port id has to be unique inside a state
             data_port_id = generate_data_port_id(self.get_data_port_ids())
-        self._output_data_ports[data_port_id] = OutputDataPort(name, data_type, default_value, data_port_id, self)
+        self._output_data_ports[data_port_id] = OutputDataPort(name, data_type, default_value, data_port_id, self,
+                                                               pass_by_reference=pass_by_reference)
 
         # Check for name uniqueness
         valid, message = self._check_data_port_name(self._output_data_ports[data_port_id])
@@ -531,26 +580,66 @@ class State(Observable, YAMLObject, JSONObject, Hashable):
         concatenates either State.state_id (always unique) or State.name (maybe not unique but human readable) as
         state identifier for the path.
 
+        The path is cached and only generated again after the parent, the id or the name of the state or of one of its
+        ancestors changed.
+
         :param str appendix: the part of the path that was already calculated by previous function calls
         :param bool by_name: The boolean enables name usage to generate the path
         :rtype: str
         :return: the full path to the root state
         """
-        if by_name:
-            state_identifier = self.name
-        else:
-            state_identifier = self.state_id
+        path = self._path_by_name if by_name else self._path
+        if path is None:
+            if by_name:
+                state_identifier = self.name
+            else:
+                state_identifier = self.state_id
 
-        if not self.is_root_state:
-            if appendix is None:
-                return self.parent.get_path(state_identifier, by_name)
+            if not self.is_root_state:
+                path = self.parent.get_path(by_name=by_name) + PATH_SEPARATOR + state_identifier
             else:
-                return self.parent.get_path(state_identifier + PATH_SEPARATOR + appendix, by_name)
-        else:
-            if appendix is None:
-                return state_identifier
+                path = state_identifier
+            if by_name:
+                self._path_by_name = path
             else:
-                return state_identifier + PATH_SEPARATOR + appendix
+                self._path = path
+
+        if appendix is None:
+            return path
+        else:
+            return path + PATH_SEPARATOR + appendix
+
+    def _invalidate_path_cache(self):
+        """Marks the cached paths of the state and all its descendants as outdated
+
+        Must be called whenever the parent, the id or the name of the state changes. As a path is only cached after
+        the paths of all ancestors were cached, the descendants of a state without cached paths have no cached paths,
+        either.
+        """
+        if self._path is None and self._path_by_name is None:
+            return
+        self._path = None
+        self._path_by_name = None
+        self._invalidate_child_path_caches()
+
+    def _invalidate_child_path_caches(self):
+        pass
+
+    @property
+    def frozen_state_machine(self):
+        """The state machine of the state, if it is frozen during its execution, otherwise None
+
+        :rtype: rafcon.core.state_machine.StateMachine
+        """
+        return self._frozen_state_machine
+
+    def _set_frozen_state_machine(self, state_machine):
+        """Marks the state and all its descendants as part of a frozen state machine
+
+        :param rafcon.core.state_machine.StateMachine state_machine: the frozen state machine or None, if the state
+            machine is not frozen anymore
+        """
+        self._frozen_state_machine = state_machine
 
     def get_storage_path(self, appendix=None):
         """ Recursively create the storage path of the state.
@@ -601,7 +690,7 @@ class State(Observable, YAMLObject, JSONObject, Hashable):
         return self._file_system_path
 
     @file_system_path.setter
-    @lock_state_machine
+    @lock_state_machine_unless_frozen(observed=False)
     def file_system_path(self, file_system_path):
         """Setter for file_system_path attribute of state
 
@@ -890,6 +979,7 @@ class State(Observable, YAMLObject, JSONObject, Hashable):
                 state_id = state_id_generator(used_state_ids=used_ids)
 
         self._state_id = state_id
+        self._invalidate_path_cache()
 
     def get_states_statistics(self, hierarchy_level):
         """Get states statistic tuple
@@ -1005,6 +1095,7 @@ class State(Observable, YAMLObject, JSONObject, Hashable):
                 raise ValueError("Name must have at least one character")
 
         self._name = name
+        self._invalidate_path_cache()
 
     @property
     def parent(self):
@@ -1030,6 +1121,7 @@ class State(Observable, YAMLObject, JSONObject, Hashable):
                 raise TypeError("parent must be of type State or StateMachine or None")
 
             self._parent = ref(parent)
+        self._invalidate_path_cache()
 
     @property
     def input_data_ports(self):
@@ -1068,7 +1160,8 @@ class State(Observable, YAMLObject, JSONObject, Hashable):
         for port_id, port in input_data_ports.items():
             if not isinstance(port, InputDataPort):
                 if isinstance(port, DataPort):
-                    port = InputDataPort(port.name, port.data_type, port.default_value, port.data_port_id)
+                    port = InputDataPort(port.name, port.data_type, port.default_value, port.data_port_id,
+                                         pass_by_reference=port.pass_by_reference)
                     input_data_ports[port_id] = port
                 else:
                     raise TypeError("Elements of input_data_ports must be of type InputDataPort, given: {0}".format(
@@ -1126,7 +1219,8 @@ class State(Observable, YAMLObject, JSONObject, Hashable):
         for port_id, port in output_data_ports.items():
             if not isinstance(port, OutputDataPort):
                 if isinstance(port, DataPort):
-                    port = OutputDataPort(port.name, port.data_type, port.default_value, port.data_port_id)
+                    port = OutputDataPort(port.name, port.data_type, port.default_value, port.data_port_id,
+                                          pass_by_reference=port.pass_by_reference)
                     output_data_ports[port_id] = port
                 else:
                     raise TypeError("Elements of output_data_ports must be of type OutputDataPort, given: {0}".format(
@@ -1234,8 +1328,7 @@ class State(Observable, YAMLObject, JSONObject, Hashable):
         return self._input_data
 
     @input_data.setter
-    @lock_state_machine
-    #@Observable.observed
+    @lock_state_machine_unless_frozen(observed=False)
     def input_data(self, input_data):
         if not isinstance(input_data, dict):
             raise TypeError("input_data must be of type dict")
@@ -1249,8 +1342,7 @@ class State(Observable, YAMLObject, JSONObject, Hashable):
         return self._output_data
 
     @output_data.setter
-    @lock_state_machine
-    #@Observable.observed
+    @lock_state_machine_unless_frozen(observed=False)
     def output_data(self, output_data):
         if not isinstance(output_data, dict):
             raise TypeError("output_data must be of type dict")
@@ -1263,7 +1355,7 @@ class State(Observable, YAMLObject, JSONObject, Hashable):
         return self._preempted.is_set()
 
     @preempted.setter
-    @lock_state_machine
+    @lock_state_machine_unless_frozen(observed=False)
     def preempted(self, preempted):
         if not isinstance(preempted, bool):
             raise TypeError("preempted must be of type bool")
@@ -1279,7 +1371,7 @@ class State(Observable, YAMLObject, JSONObject, Hashable):
         return self._started.is_set()
 
     @started.setter
-    @lock_state_machine
+    @lock_state_machine_unless_frozen(observed=False)
     def started(self, started):
         if not isinstance(started, bool):
             raise TypeError("started must be of type bool")
@@ -1295,7 +1387,7 @@ class State(Observable, YAMLObject, JSONObject, Hashable):
         return self._paused.is_set()
 
     @paused.setter
-    @lock_state_machine
+    @lock_state_machine_unless_frozen(observed=False)
     def paused(self, paused):
         if not isinstance(paused, bool):
             raise TypeError("paused must be of type bool")
@@ -1330,8 +1422,7 @@ class State(Observable, YAMLObject, JSONObject, Hashable):
         return self._concurrency_queue
 
     @concurrency_queue.setter
-    @lock_state_machine
-    #@Observable.observed
+    @lock_state_machine_unless_frozen(observed=False)
     def concurrency_queue(self, concurrency_queue):
         if not isinstance(concurrency_queue, queue.Queue):
             if not concurrency_queue is None:
@@ -1349,8 +1440,7 @@ class State(Observable, YAMLObject, JSONObject, Hashable):
         return self._final_outcome
 
     @final_outcome.setter
-    @lock_state_machine
-    #@Observable.observed
+    @lock_state_machine_unless_frozen(observed=False)
     def final_outcome(self, final_outcome):
         if not isinstance(final_outcome, Outcome):
             raise TypeError("final_outcome must be of type Outcome")
@@ -1394,13 +1484,22 @@ class State(Observable, YAMLObject, JSONObject, Hashable):
         return self._state_execution_status
 
     @state_execution_status.setter
-    @lock_state_machine
-    @Observable.observed
+    @lock_state_machine_unless_frozen
     def state_execution_status(self, state_execution_status):
         if not isinstance(state_execution_status, StateExecutionStatus):
             raise TypeError("state_execution_status must be of type StateExecutionStatus")
 
+        changed = state_execution_status is not self._state_execution_status
         self._state_execution_status = state_execution_status
+        state_machine = self._frozen_state_machine
+        if state_machine is not None:
+            # observers are not notified within frozen state machines, but the execution status callbacks are called
+            state_machine.notify_execution_status_callbacks(self, state_execution_status)
+        if changed:
+            if state_machine is None:
+                state_machine = self.get_state_machine()
+            execution_event_bus.publish(state_machine.state_machine_id if state_machine is not None else None,
+                                        self.get_path(), state_execution_status, self._run_id)
 
     @property
     def is_root_state(self):
@@ -1471,6 +1570,11 @@ class State(Observable, YAMLObject, JSONObject, Hashable):
         if outcome is not None:
             self.final_outcome = outcome
 
+        if self._execution_start_time is not None:
+            execution_metrics.record_execution(self, timer() - self._execution_start_time,
+                                               None if self.backward_execution else self.final_outcome)
+            self._execution_start_time = None
+
         # If we are within a concurrency state, we have to notify it about our finalization
         if self.concurrency_queue:
             self.concurrency_queue.put(self.state_id)
@@ -0,0 +1,168 @@
+# Copyright (C) 2019 DLR
+#
+# All rights reserved. This program and the accompanying materials are made
+# available under the terms of the Eclipse Public License v1.0 which
+# accompanies this distribution, and is available at
+# http://www.eclipse.org/legal/epl-v10.html
+
+"""
+.. module:: file_prefetcher
+   :synopsis: Concurrent reading of the files of a state machine folder before loading the state machine
+
+Loading a state machine from the folder layout requires a directory listing and several file accesses per state. On
+network storage, these accesses dominate the loading time. Thus, the folders of a state machine are read concurrently
+by a thread pool, level by level of the state hierarchy, before the states are decoded from memory.
+"""
+import atexit
+from functools import partial
+from multiprocessing.pool import ThreadPool
+from threading import Lock
+import os
+
+from rafcon.core.storage.packed_state_machine import StateMachineFiles, file_system
+from rafcon.utils import storage_utils
+from rafcon.utils import log
+
+logger = log.get_logger(__name__)
+
+# the thread pools are shared by all loads, as starting and joining the threads of a pool takes longer than reading the
+# files of a small state machine; a pool is kept per size, so that loads with different sizes do not close the pool of
+# a running load
+_thread_pools = {}
+_thread_pool_lock = Lock()
+
+
+def _get_thread_pool(size):
+    """Returns the shared thread pool of the given size, which is created on demand
+
+    :param int size: the number of threads of the pool
+    :rtype: multiprocessing.pool.ThreadPool
+    """
+    with _thread_pool_lock:
+        thread_pool = _thread_pools.get(size)
+        if thread_pool is None:
+            thread_pool = _thread_pools[size] = ThreadPool(size)
+        return thread_pool
+
+
+def close_thread_pools():
+    """Closes the shared thread pools and waits for their threads
+
+    Called at the exit of the interpreter. Loads started afterwards create new thread pools.
+    """
+    with _thread_pool_lock:
+        thread_pools = list(_thread_pools.values())
+        _thread_pools.clear()
+    for thread_pool in thread_pools:
+        thread_pool.close()
+        thread_pool.join()
+
+
+atexit.register(close_thread_pools)
+
+
+def _read_folder(path, prefetched_file_names=()):
+    """Lists a folder and reads the files needed for loading the states
+
+    Files that cannot be decoded as text are not read in advance.
+
+    :param str path: the path of the folder
+    :param prefetched_file_names: the names of the files, which are read
+    :return: the names of the files, the contents of the read files by their names and the names of the sub folders
+    """
+    file_names = set()
+    contents = {}
+    folder_names = []
+    for name in os.listdir(path):
+        element_path = os.path.join(path, name)
+        if os.path.isdir(element_path):
+            folder_names.append(name)
+            continue
+        file_names.add(name)
+        if name in prefetched_file_names:
+            try:
+                with open(element_path, 'r') as f:
+                    contents[name] = f.read()
+            except UnicodeDecodeError:
+                logger.verbose("Cannot prefetch {0}, it is read on access".format(element_path))
+    return file_names, contents, folder_names
+
+
+class PrefetchedStateMachineFiles(StateMachineFiles):
+    """The files of a state machine folder, read concurrently in advance
+
+    Files of folders that were not read in advance (e.g. below `max_depth`) and files not needed for loading the states
+    are read from the file system on access.
+
+    :ivar str path: the path of the read folder
+    """
+
+    def __init__(self, path, thread_pool_size=8, max_depth=0, prefetched_file_names=()):
+        """Reads the files of a folder and its sub folders
+
+        :param str path: the path of the folder
+        :param int thread_pool_size: the number of threads reading the folders
+        :param int max_depth: the number of folder levels to be read, 0 reads all levels
+        :param prefetched_file_names: the names of the files, which are read in advance, e.g. the core data and
+            scripts needed for loading the core state machine; other files, like resources of the states, are only
+            listed
+        """
+        self.path = path = os.path.normpath(path)
+        self.thread_pool_size = thread_pool_size
+        self.prefetched_file_names = prefetched_file_names
+        # the contents of all read files and the names of all files and sub folders by their folder paths
+        self._contents = {}
+        self._file_names = {}
+        self._folder_names = {}
+
+        read_folder = partial(_read_folder, prefetched_file_names=prefetched_file_names)
+        pool = _get_thread_pool(max(1, thread_pool_size))
+        folders = [path]
+        depth = 0
+        while folders and (max_depth <= 0 or depth < max_depth):
+            sub_folders = []
+            for folder, (file_names, contents, folder_names) in zip(folders, pool.map(read_folder, folders)):
+                self._file_names[folder] = file_names
+                self._folder_names[folder] = folder_names
+                for name, content in contents.items():
+                    self._contents[os.path.join(folder, name)] = content
+                sub_folders.extend(os.path.join(folder, name) for name in folder_names)
+            folders = sub_folders
+            depth += 1
+
+    def exists(self, path):
+        path = os.path.normpath(path)
+        folder, name = os.path.split(path)
+        if folder in self._file_names:
+            return name in self._file_names[folder] or name in self._folder_names[folder]
+        if path in self._folder_names:
+            return True
+        return file_system.exists(path)
+
+    def read_file(self, path):
+        path = os.path.normpath(path)
+        if path in self._contents:
+            return self._contents[path]
+        folder, name = os.path.split(path)
+        if folder in self._file_names and name not in self._file_names[folder]:
+            return None
+        return file_system.read_file(path)
+
+    def load_json(self, path, as_dict=False):
+        path = os.path.normpath(path)
+        if path in self._contents:
+            return storage_utils.load_objects_from_json_string(self._contents[path], as_dict)
+        return file_system.load_json(path, as_dict)
+
+    def get_folder_names(self, path):
+        path = os.path.normpath(path)
+        if path in self._folder_names:
+            return list(self._folder_names[path])
+        return file_system.get_folder_names(path)
+
+    def get_subtree_files(self, path, max_depth=0):
+        path = os.path.normpath(path)
+        if max_depth <= 0 and path in self._folder_names:
+            # the whole subtree was already read
+            return self
+        return PrefetchedStateMachineFiles(path, self.thread_pool_size, max_depth, self.prefetched_file_names)
@@ -0,0 +1,293 @@
+# Copyright (C) 2019 DLR
+#
+# All rights reserved. This program and the accompanying materials are made
+# available under the terms of the Eclipse Public License v1.0 which
+# accompanies this distribution, and is available at
+# http://www.eclipse.org/legal/epl-v10.html
+
+"""
+.. module:: packed_state_machine
+   :synopsis: A single-file format for state machines, holding all files of the folder layout
+
+A packed state machine is a single JSON document holding the content of all files of a state machine stored in the
+folder layout (state machine file, core data, scripts, semantic data and meta data of all states). The files are
+identified by their path relative to the state machine folder. Thus, a state machine can be loaded with a single file
+access, which pays off on network storage, and both formats can be converted into each other without loss.
+
+Within a packed state machine, the folder of a state is addressed by a virtual path: the path of the packed file
+joined with the relative path of the state folder.
+
+The module can be run to convert state machines::
+
+    python -m rafcon.core.storage.packed_state_machine pack <state machine folder> <packed file>
+    python -m rafcon.core.storage.packed_state_machine unpack <packed file> <state machine folder>
+"""
+from builtins import object
+from builtins import str
+import io
+import json
+import os
+
+from rafcon.utils.filesystem import read_file, write_file
+from rafcon.utils import storage_utils
+from rafcon.utils import log
+
+logger = log.get_logger(__name__)
+
+FILE_EXTENSION = 'rsm'
+FORMAT_VERSION = 1
+
+
+def is_packed_state_machine(path):
+    """Checks whether the given path is a packed state machine
+
+    :param str path: the path to be checked
+    :rtype: bool
+    """
+    return path.endswith('.' + FILE_EXTENSION) and os.path.isfile(path)
+
+
+def split_packed_path(path):
+    """Splits a virtual path pointing into a packed state machine
+
+    :param str path: the path to be split
+    :return: the path of the packed file and the path relative to it, or (None, None), if the path does not point
+        into a packed state machine
+    :rtype: tuple
+    """
+    if '.' + FILE_EXTENSION not in path:
+        return None, None
+    packed_file_path = path
+    while True:
+        if is_packed_state_machine(packed_file_path):
+            relative_path = os.path.relpath(path, packed_file_path)
+            return packed_file_path, '' if relative_path == os.curdir else relative_path.replace(os.sep, '/')
+        parent_path = os.path.dirname(packed_file_path)
+        if parent_path == packed_file_path:
+            return None, None
+        packed_file_path = parent_path
+
+
+class StateMachineFiles(object):
+    """Read access to the files of state machines in the folder layout
+
+    The class defines the interface used by the storage to load state machines, which is also implemented by
+    :class:`PackedStateMachine`.
+    """
+
+    def exists(self, path):
+        """Checks whether a file exists
+
+        :param str path: the path of the file
+        :rtype: bool
+        """
+        return os.path.exists(path)
+
+    def read_file(self, path):
+        """Returns the content of a file
+
+        :param str path: the path of the file
+        :return: the content of the file or None, if the file does not exist
+        :rtype: str
+        """
+        return read_file(path)
+
+    def load_json(self, path, as_dict=False):
+        """Loads the objects of a json file
+
+        :param str path: the path of the file
+        :param bool as_dict: whether to skip the conversion of the dictionaries to objects
+        :return: the loaded objects
+        """
+        return storage_utils.load_objects_from_json(path, as_dict)
+
+    def get_folder_names(self, path):
+        """Returns the names of the folders within a folder
+
+        :param str path: the path of the folder
+        :rtype: list
+        """
+        return [name for name in os.listdir(path) if os.path.isdir(os.path.join(path, name))]
+
+    def get_subtree_files(self, path, max_depth=0):
+        """Returns the access to the files of a sub folder, e.g. to load a subtree of a state machine
+
+        :param str path: the path of the sub folder
+        :param int max_depth: the number of folder levels to be accessed, 0 for all levels
+        :rtype: StateMachineFiles
+        """
+        return self
+
+
+#: Access to the files of state machines in the folder layout
+file_system = StateMachineFiles()
+
+
+class PackedStateMachine(StateMachineFiles):
+    """The files of a state machine packed into a single file
+
+    :ivar str path: the path of the packed file
+    :ivar dict files: the contents of the files by their paths relative to the state machine folder (with '/' as
+        separator)
+    """
+
+    def __init__(self, path, files=None):
+        self.path = path
+        self.files = files if files is not None else {}
+        self._folders = None
+
+    @classmethod
+    def load(cls, path):
+        """Loads a packed state machine
+
+        :param str path: the path of the packed file
+        :rtype: PackedStateMachine
+        :raises ValueError: if the file is no packed state machine
+        """
+        with io.open(path, 'r', encoding='utf-8') as f:
+            document = json.load(f)
+        if not isinstance(document, dict) or 'files' not in document:
+            raise ValueError("{0} is not a packed state machine".format(path))
+        if document.get('format_version', FORMAT_VERSION) > FORMAT_VERSION:
+            logger.warning("The packed state machine {0} was written with a newer format version".format(path))
+        return cls(path, document['files'])
+
+    def save(self):
+        """Writes the packed file atomically"""
+        document = {'format_version': FORMAT_VERSION, 'files': self.files}
+        write_file(self.path, json.dumps(document, indent=1, sort_keys=True), atomic=True)
+
+    def get_relative_path(self, path):
+        """Returns the path of a file relative to the packed state machine
+
+        :param str path: the virtual path of the file, i.e. the path of the packed file joined with the relative path
+        :return: the relative path or None, if the path does not point into the packed state machine
+        :rtype: str
+        """
+        # virtual paths are usually created by joining the path of the packed file and the relative path
+        if path.startswith(self.path + os.sep):
+            return path[len(self.path) + len(os.sep):].replace(os.sep, '/')
+        relative_path = os.path.relpath(path, self.path)
+        if relative_path == os.curdir:
+            return ''
+        if relative_path.startswith(os.pardir):
+            return None
+        return relative_path.replace(os.sep, '/')
+
+    def add_file(self, relative_path, content):
+        """Adds a file to the packed state machine
+
+        :param str relative_path: the path of the file relative to the state machine folder
+        :param str content: the content of the file
+        """
+        self.files[relative_path.replace(os.sep, '/')] = content
+        self._folders = None
+
+    def exists(self, path):
+        relative_path = self.get_relative_path(path)
+        if relative_path is None:
+            return False
+        if relative_path in self.files:
+            return True
+        return relative_path in self._get_folders()
+
+    def read_file(self, path):
+        relative_path = self.get_relative_path(path)
+        return self.files.get(relative_path) if relative_path is not None else None
+
+    def load_json(self, path, as_dict=False):
+        content = self.read_file(path)
+        if content is None:
+            raise IOError("File not found in packed state machine {0}: {1}".format(self.path, path))
+        return storage_utils.load_objects_from_json_string(content, as_dict)
+
+    def _get_folders(self):
+        # maps each folder to the names of its sub folders, created once on demand
+        if self._folders is None:
+            self._folders = {'': set()}
+            for relative_path in self.files:
+                parts = relative_path.split('/')[:-1]
+                for index, name in enumerate(parts):
+                    parent = '/'.join(parts[:index])
+                    self._folders.setdefault(parent, set()).add(name)
+                    self._folders.setdefault('/'.join(parts[:index + 1]), set())
+        return self._folders
+
+    def get_folder_names(self, path):
+        relative_path = self.get_relative_path(path)
+        return sorted(self._get_folders().get(relative_path, ()))
+
+
+def pack_state_machine(folder_path, packed_file_path):
+    """Packs a state machine stored in the folder layout into a single file
+
+    All text files of the state machine folder are packed, other files are skipped.
+
+    :param str folder_path: the path of the state machine folder
+    :param str packed_file_path: the path of the packed file to be created
+    :return: the number of packed files
+    :rtype: int
+    """
+    from rafcon.core.storage.storage import STATEMACHINE_FILE
+    if not os.path.isfile(os.path.join(folder_path, STATEMACHINE_FILE)):
+        raise ValueError("{0} does not contain a state machine".format(folder_path))
+    packed_state_machine = PackedStateMachine(packed_file_path)
+    for root, _, file_names in os.walk(folder_path):
+        for file_name in file_names:
+            file_path = os.path.join(root, file_name)
+            try:
+                with io.open(file_path, 'r', encoding='utf-8') as f:
+                    content = f.read()
+            except UnicodeDecodeError:
+                logger.warning("Skipping file that is no text file: {0}".format(file_path))
+                continue
+            packed_state_machine.add_file(os.path.relpath(file_path, folder_path), content)
+    packed_state_machine.save()
+    return len(packed_state_machine.files)
+
+
+def unpack_state_machine(packed_file_path, folder_path):
+    """Unpacks a packed state machine into the folder layout
+
+    :param str packed_file_path: the path of the packed file
+    :param str folder_path: the path of the state machine folder to be created
+    :return: the number of unpacked files
+    :rtype: int
+    """
+    if os.path.exists(folder_path):
+        raise ValueError("The target path {0} already exists".format(folder_path))
+    packed_state_machine = PackedStateMachine.load(packed_file_path)
+    for relative_path, content in packed_state_machine.files.items():
+        file_path = os.path.join(folder_path, *relative_path.split('/'))
+        if not os.path.exists(os.path.dirname(file_path)):
+            os.makedirs(os.path.dirname(file_path))
+        with io.open(file_path, 'w', encoding='utf-8') as f:
+            f.write(str(content))
+    return len(packed_state_machine.files)
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Convert state machines between the folder layout and the packed "
+                                                 "single-file format")
+    subparsers = parser.add_subparsers(dest='command')
+    pack_parser = subparsers.add_parser('pack', help="pack a state machine folder into a single file")
+    pack_parser.add_argument("folder_path", help="path of the state machine folder")
+    pack_parser.add_argument("packed_file_path", help="path of the packed file to be created (*.{0})".format(
+        FILE_EXTENSION))
+    unpack_parser = subparsers.add_parser('unpack', help="unpack a packed state machine into a folder")
+    unpack_parser.add_argument("packed_file_path", help="path of the packed file")
+    unpack_parser.add_argument("folder_path", help="path of the state machine folder to be created")
+    args = parser.parse_args()
+    if args.command == 'pack':
+        number_of_files = pack_state_machine(args.folder_path, args.packed_file_path)
+    elif args.command == 'unpack':
+        number_of_files = unpack_state_machine(args.packed_file_path, args.folder_path)
+    else:
+        parser.print_usage()
+        return
+    logger.info("Converted {0} files".format(number_of_files))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,252 @@
+# Copyright (C) 2019 DLR
+#
+# All rights reserved. This program and the accompanying materials are made
+# available under the terms of the Eclipse Public License v1.0 which
+# accompanies this distribution, and is available at
+# http://www.eclipse.org/legal/epl-v10.html
+
+"""
+.. module:: state_machine_cache
+   :synopsis: A persistent cache of the files of loaded state machines and libraries
+
+The cache holds a snapshot of each loaded state machine (or library) in a single pickle file: the scripts and the
+already decoded content of all json files. The snapshot is keyed by the path of the state machine and validated by the
+modification times and sizes of all files of the state machine. Thus, a state machine that did not change since its
+last loading is loaded with a single file access and without parsing json, also by other processes using the same
+cache folder (e.g. `rafcon_core` and the GUI).
+
+The core objects cannot be cached themselves, as states hold locks and weak references. They are still created from
+the decoded data on every load.
+
+Loading a pickle file can execute arbitrary code. Thus, the cache folder is created accessible only by its user and the
+cache is only used, if the folder and the cache files are owned by the user and cannot be modified by other users.
+"""
+from builtins import object
+import hashlib
+import json
+import os
+import pickle
+import stat
+
+import rafcon
+from rafcon.core.storage.packed_state_machine import PackedStateMachine, is_packed_state_machine
+from rafcon.utils.filesystem import replace_file
+from rafcon.utils import storage_utils
+from rafcon.utils import log
+
+logger = log.get_logger(__name__)
+
+CACHE_FORMAT_VERSION = 1
+CACHE_FILE_EXTENSION = 'pickle'
+
+# the cache folders not used, as other users could modify them, for warning only once per folder
+_insecure_cache_paths = set()
+
+
+def is_private_path(path):
+    """Checks whether a file or folder is owned by the current user and cannot be modified by other users
+
+    On systems without user ids (Windows), all existing paths are regarded as private.
+
+    :param str path: the path of the file or folder
+    :rtype: bool
+    """
+    try:
+        path_stat = os.stat(path)
+    except OSError:
+        return False
+    if not hasattr(os, 'getuid'):
+        return True
+    return path_stat.st_uid == os.getuid() and not path_stat.st_mode & (stat.S_IWGRP | stat.S_IWOTH)
+
+
+def get_state_machine_signature(path, skipped_file_names=()):
+    """Returns the modification times and sizes of all files of a state machine
+
+    :param str path: the path of the state machine folder or packed state machine file
+    :param skipped_file_names: the names of the files to be ignored
+    :return: the sorted tuples of relative file path, modification time and size
+    :rtype: list
+    """
+    if os.path.isfile(path):
+        stat = os.stat(path)
+        return [('', stat.st_mtime, stat.st_size)]
+    signature = []
+    for root, _, file_names in os.walk(path):
+        for file_name in file_names:
+            if file_name in skipped_file_names:
+                continue
+            file_path = os.path.join(root, file_name)
+            stat = os.stat(file_path)
+            signature.append((os.path.relpath(file_path, path), stat.st_mtime, stat.st_size))
+    return sorted(signature)
+
+
+class CachedStateMachineFiles(PackedStateMachine):
+    """The files of a state machine restored from the cache
+
+    The content of json files is kept in its decoded, but not yet converted form.
+
+    :ivar dict decoded_files: the pickled, decoded content of the json files by their relative paths
+    """
+
+    def __init__(self, path, files, decoded_files):
+        super(CachedStateMachineFiles, self).__init__(path, files)
+        self.decoded_files = decoded_files
+
+    def exists(self, path):
+        relative_path = self.get_relative_path(path)
+        if relative_path in self.decoded_files:
+            return True
+        return super(CachedStateMachineFiles, self).exists(path)
+
+    def load_json(self, path, as_dict=False):
+        relative_path = self.get_relative_path(path)
+        if relative_path not in self.decoded_files:
+            return super(CachedStateMachineFiles, self).load_json(path, as_dict)
+        # the data is unpickled on each access, as the conversion to objects modifies it
+        data = pickle.loads(self.decoded_files[relative_path])
+        if as_dict:
+            return data
+        return storage_utils.load_objects_from_decoded_json(data)
+
+    def _get_folders(self):
+        if self._folders is None:
+            all_files = dict(self.files)
+            all_files.update(self.decoded_files)
+            self._folders = PackedStateMachine(self.path, all_files)._get_folders()
+        return self._folders
+
+
+class StateMachineCache(object):
+    """A cache of the files of state machines in a cache folder
+
+    :ivar str cache_path: the path of the cache folder
+    :ivar skipped_file_names: the names of the files, which are not cached, e.g. as the core does not need them
+    """
+
+    def __init__(self, cache_path, skipped_file_names=()):
+        self.cache_path = os.path.expanduser(os.path.expandvars(cache_path))
+        self.skipped_file_names = skipped_file_names
+
+    def get_cache_file_path(self, path):
+        """Returns the path of the cache file of a state machine
+
+        :param str path: the path of the state machine folder or packed state machine file
+        :rtype: str
+        """
+        key = hashlib.sha1(os.path.abspath(path).encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_path, "{0}.{1}".format(key, CACHE_FILE_EXTENSION))
+
+    def get_files(self, path):
+        """Returns the files of a state machine from the cache
+
+        If the cache holds no valid snapshot of the state machine, the state machine files are read and cached.
+
+        :param str path: the path of the state machine folder or packed state machine file
+        :return: the files of the state machine
+        :rtype: CachedStateMachineFiles
+        """
+        path = os.path.normpath(path)
+        if not self._is_cache_path_usable():
+            files, decoded_files = self._read_files(path)
+            return CachedStateMachineFiles(path, files, decoded_files)
+        signature = get_state_machine_signature(path, self.skipped_file_names)
+        cache_file_path = self.get_cache_file_path(path)
+        snapshot = self._load_snapshot(cache_file_path)
+        if snapshot is not None and snapshot['path'] == os.path.abspath(path) and \
+                snapshot['signature'] == signature:
+            logger.debug("Loading state machine {0} from the cache".format(path))
+            return CachedStateMachineFiles(path, snapshot['files'], snapshot['decoded_files'])
+
+        files, decoded_files = self._read_files(path)
+        self._save_snapshot(cache_file_path, {'format_version': CACHE_FORMAT_VERSION,
+                                              'rafcon_version': rafcon.__version__,
+                                              'path': os.path.abspath(path),
+                                              'signature': signature,
+                                              'files': files,
+                                              'decoded_files': decoded_files})
+        return CachedStateMachineFiles(path, files, decoded_files)
+
+    def remove(self, path):
+        """Removes the snapshot of a state machine from the cache
+
+        :param str path: the path of the state machine folder or packed state machine file
+        """
+        cache_file_path = self.get_cache_file_path(os.path.normpath(path))
+        if os.path.exists(cache_file_path):
+            os.remove(cache_file_path)
+
+    def _is_cache_path_usable(self):
+        """Checks whether the cache folder is private, it is created if it does not exist
+
+        :return: False, if other users could modify the cache folder
+        :rtype: bool
+        """
+        if not os.path.isdir(self.cache_path):
+            try:
+                os.makedirs(self.cache_path, 0o700)
+            except OSError as e:
+                logger.warning("Could not create the state machine cache folder {0}: {1}".format(self.cache_path, e))
+                return False
+        if is_private_path(self.cache_path):
+            return True
+        if self.cache_path not in _insecure_cache_paths:
+            _insecure_cache_paths.add(self.cache_path)
+            logger.warning("The state machine cache {0} is not used, as it is not owned by the user or can be "
+                           "modified by other users".format(self.cache_path))
+        return False
+
+    def _read_files(self, path):
+        if is_packed_state_machine(path):
+            contents = PackedStateMachine.load(path).files
+        else:
+            contents = {}
+            for root, _, file_names in os.walk(path):
+                for file_name in file_names:
+                    if file_name in self.skipped_file_names:
+                        continue
+                    file_path = os.path.join(root, file_name)
+                    try:
+                        with open(file_path, 'r') as f:
+                            contents[os.path.relpath(file_path, path).replace(os.sep, '/')] = f.read()
+                    except UnicodeDecodeError:
+                        logger.debug("Not caching file that is no text file: {0}".format(file_path))
+        files = {}
+        decoded_files = {}
+        for relative_path, content in contents.items():
+            if relative_path.endswith('.json') and relative_path.split('/')[-1] not in self.skipped_file_names:
+                try:
+                    decoded_files[relative_path] = pickle.dumps(json.loads(content), protocol=2)
+                    continue
+                except ValueError:
+                    pass
+            files[relative_path] = content
+        return files, decoded_files
+
+    @staticmethod
+    def _load_snapshot(cache_file_path):
+        if not is_private_path(cache_file_path):
+            return None
+        try:
+            with open(cache_file_path, 'rb') as f:
+                snapshot = pickle.load(f)
+        except (IOError, OSError):
+            return None
+        except Exception as e:
+            logger.debug("Ignoring invalid cache file {0}: {1}".format(cache_file_path, e))
+            return None
+        if not isinstance(snapshot, dict) or snapshot.get('format_version') != CACHE_FORMAT_VERSION or \
+                snapshot.get('rafcon_version') != rafcon.__version__:
+            return None
+        return snapshot
+
+    def _save_snapshot(self, cache_file_path, snapshot):
+        try:
+            # the snapshot is written atomically, as other processes might read it concurrently
+            temp_file_path = "{0}.{1}.tmp".format(cache_file_path, os.getpid())
+            with os.fdopen(os.open(temp_file_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), 'wb') as f:
+                pickle.dump(snapshot, f, protocol=2)
+            replace_file(temp_file_path, cache_file_path)
+        except (IOError, OSError) as e:
+            logger.warning("Could not write the state machine cache file {0}: {1}".format(cache_file_path, e))
@@ -24,7 +24,10 @@ import math
 import shutil
 import glob
 import copy
+import hashlib
+import threading
 import yaml
+from contextlib import contextmanager
 from distutils.version import StrictVersion
 
 import rafcon
@@ -38,6 +41,10 @@ from rafcon.core.custom_exceptions import LibraryNotFoundException
 from rafcon.core.constants import DEFAULT_SCRIPT_PATH
 from rafcon.core.config import global_config
 from rafcon.core.state_machine import StateMachine
+from rafcon.core.storage.packed_state_machine import PackedStateMachine, is_packed_state_machine, file_system, \
+    split_packed_path, FILE_EXTENSION as PACKED_FILE_EXTENSION
+from rafcon.core.storage.file_prefetcher import PrefetchedStateMachineFiles
+from rafcon.core.storage.state_machine_cache import StateMachineCache
 
 logger = log.get_logger(__name__)
 
@@ -54,6 +61,9 @@ STATEMACHINE_FILE = 'statemachine.json'
 STATEMACHINE_FILE_OLD = 'statemachine.yaml'
 ID_NAME_DELIMITER = "_"
 
+#: The categories of the files of a state machine, the changes of which are tracked separately for incremental saves
+FILE_CATEGORIES = ('state_machine', 'core_data', 'script', 'semantic_data', 'meta_data')
+
 REPLACED_CHARACTERS_FOR_NO_OS_LIMITATION = {'/': '', r'\0': '', '<': '', '>': '', ':': '_',
                                             '\\': '', '|': '_', '?': '', '*': '_'}
 
@@ -64,7 +74,200 @@ if os.path.exists(DEFAULT_SCRIPT_PATH):
         shutil.rmtree(f)
 
 
-def remove_obsolete_folders(states, path):
+class StorageReport(object):
+    """Reports the changes on the file system made by saving a state machine
+
+    :ivar dict written_files: the paths of the written files for each of the `FILE_CATEGORIES`
+    :ivar int number_of_unchanged_files: the number of files skipped by an incremental save, as they did not change
+    :ivar list removed_folders: the paths of the removed obsolete state folders
+    """
+
+    def __init__(self):
+        self.written_files = {category: [] for category in FILE_CATEGORIES}
+        self.number_of_unchanged_files = 0
+        self.removed_folders = []
+
+    def __str__(self):
+        return "{0} files written ({1}), {2} files unchanged, {3} obsolete folders removed".format(
+            self.number_of_written_files,
+            ", ".join("{0}: {1}".format(category, len(self.written_files[category])) for category in FILE_CATEGORIES),
+            self.number_of_unchanged_files, len(self.removed_folders))
+
+    @property
+    def number_of_written_files(self):
+        """The total number of written files"""
+        return sum(len(file_paths) for file_paths in self.written_files.values())
+
+    def get_written_files(self, category=None):
+        """Returns the paths of the written files
+
+        :param str category: one of the `FILE_CATEGORIES` or None for the files of all categories
+        :rtype: list
+        """
+        if category is not None:
+            return list(self.written_files[category])
+        return [file_path for category in FILE_CATEGORIES for file_path in self.written_files[category]]
+
+
+def _get_content_hash(content):
+    if not isinstance(content, bytes):
+        content = content.encode('utf-8')
+    return hashlib.sha1(content).hexdigest()
+
+
+def _get_file_stat(file_path):
+    try:
+        file_stat = os.stat(file_path)
+    except OSError:
+        return None
+    return file_stat.st_mtime, file_stat.st_size
+
+
+def is_file_dirty(owner, file_path, content):
+    """Checks whether a file of a state or state machine differs from the given content
+
+    The check is based on the fingerprints of the files the owner wrote before, consisting of the hash of the content
+    and the modification time and size of the file. Thus, the file is not read, if it was written by the owner and not
+    changed on the file system since. Other files are read and compared.
+
+    :param owner: the state or state machine the file belongs to
+    :param str file_path: the path of the file
+    :param str content: the content the file should have
+    :return: whether the file has to be written to get the given content
+    :rtype: bool
+    """
+    content_hash = _get_content_hash(content)
+    fingerprint = owner.storage_fingerprints.get(file_path)
+    if fingerprint is not None:
+        return fingerprint != (content_hash, _get_file_stat(file_path))
+    file_content = read_file(file_path)
+    if file_content is None or _get_content_hash(file_content) != content_hash:
+        return True
+    owner.storage_fingerprints[file_path] = (content_hash, _get_file_stat(file_path))
+    return False
+
+
+def is_core_data_unchanged(state, file_path):
+    """Checks without serializing the state, whether its core data file written by the last save is up to date
+
+    This is the case, if the state was not edited since (see its `modification_counter`) and the file was not changed
+    on the file system. The core data of library states also depends on their library, thus they are never regarded as
+    unchanged.
+
+    :param rafcon.core.states.state.State state: the state the core data file belongs to
+    :param str file_path: the path of the core data file
+    :rtype: bool
+    """
+    from rafcon.core.states.library_state import LibraryState
+    if isinstance(state, LibraryState):
+        return False
+    fingerprint = state.storage_fingerprints.get(file_path)
+    return fingerprint is not None and fingerprint[1] is not None and \
+        state.storage_fingerprints.get((file_path, 'modification_counter')) == state.modification_counter and \
+        fingerprint[1] == _get_file_stat(file_path)
+
+
+# the packed state machines read by get_files_of_path, by their path, together with the stat of the packed file
+_read_packed_state_machines = {}
+_read_packed_state_machines_lock = threading.Lock()
+# the packed state machines modified within packed_file_updates, per thread
+_packed_file_updates = threading.local()
+
+
+def get_files_of_path(path):
+    """Returns the access to the files of the state machine containing the given path
+
+    Paths of states of packed state machines are virtual paths pointing into the packed file (see
+    :mod:`rafcon.core.storage.packed_state_machine`). The read packed files are cached until they change.
+
+    :param str path: the path of a file or folder of a state machine
+    :return: the packed state machine containing the path or the file system
+    :rtype: rafcon.core.storage.packed_state_machine.StateMachineFiles
+    """
+    packed_file_path, _ = split_packed_path(path)
+    if packed_file_path is None:
+        return file_system
+    file_stat = _get_file_stat(packed_file_path)
+    with _read_packed_state_machines_lock:
+        cached_file_stat, packed_state_machine = _read_packed_state_machines.get(packed_file_path, (None, None))
+        if packed_state_machine is None or cached_file_stat != file_stat:
+            packed_state_machine = PackedStateMachine.load(packed_file_path)
+            _read_packed_state_machines[packed_file_path] = (file_stat, packed_state_machine)
+    return packed_state_machine
+
+
+@contextmanager
+def packed_file_updates():
+    """Collects the files saved into packed state machines and writes each packed file once at the end
+
+    Without this context, each file saved by :func:`save_file` into a packed state machine rewrites the packed file.
+    """
+    if getattr(_packed_file_updates, 'packed_state_machines', None) is not None:
+        # nested context, the outermost one writes the packed files
+        yield
+        return
+    _packed_file_updates.packed_state_machines = {}
+    try:
+        yield
+        for packed_state_machine in _packed_file_updates.packed_state_machines.values():
+            packed_state_machine.save()
+    finally:
+        _packed_file_updates.packed_state_machines = None
+
+
+def _save_file_into_packed_state_machine(packed_file_path, relative_path, content, incremental):
+    packed_state_machines = getattr(_packed_file_updates, 'packed_state_machines', None)
+    if packed_state_machines is not None and packed_file_path in packed_state_machines:
+        packed_state_machine = packed_state_machines[packed_file_path]
+    else:
+        packed_state_machine = PackedStateMachine.load(packed_file_path)
+    if incremental and packed_state_machine.files.get(relative_path) == content:
+        return False
+    packed_state_machine.add_file(relative_path, content)
+    if packed_state_machines is not None:
+        packed_state_machines[packed_file_path] = packed_state_machine
+    else:
+        packed_state_machine.save()
+    return True
+
+
+def save_file(owner, file_path, content, category, report=None, incremental=False):
+    """Atomically writes a file of a state or state machine
+
+    The file is written to a temporary file first, which then replaces the file. In incremental mode, the file is only
+    written, if its content changed (see :func:`is_file_dirty`). Files with a virtual path pointing into a packed
+    state machine are written into the packed file (see :func:`packed_file_updates`).
+
+    :param owner: the state or state machine the file belongs to, it keeps the fingerprints of its written files
+    :param str file_path: the path of the file
+    :param str content: the content of the file
+    :param str category: the category of the file, one of the `FILE_CATEGORIES`
+    :param StorageReport report: the report the file is added to
+    :param bool incremental: whether to skip unchanged files
+    :return: whether the file was written
+    :rtype: bool
+    """
+    packed_file_path, relative_path = split_packed_path(file_path)
+    if packed_file_path is not None:
+        if not _save_file_into_packed_state_machine(packed_file_path, relative_path, content, incremental):
+            if report is not None:
+                report.number_of_unchanged_files += 1
+            return False
+        if report is not None:
+            report.written_files[category].append(file_path)
+        return True
+    if incremental and not is_file_dirty(owner, file_path, content):
+        if report is not None:
+            report.number_of_unchanged_files += 1
+        return False
+    write_file(file_path, content, atomic=True)
+    owner.storage_fingerprints[file_path] = (_get_content_hash(content), _get_file_stat(file_path))
+    if report is not None:
+        report.written_files[category].append(file_path)
+    return True
+
+
+def remove_obsolete_folders(states, path, report=None):
     """Removes obsolete state machine folders
 
     This function removes all folders in the file system folder `path` that do not belong to the states given by
@@ -72,6 +275,7 @@ def remove_obsolete_folders(states, path):
     
     :param list states: the states that should reside in this very folder
     :param str path: the file system path to be checked for valid folders
+    :param StorageReport report: the report the removed folders are added to
     """
     elements_in_folder = os.listdir(path)
     # find all state folder elements in system path
@@ -90,6 +294,8 @@ def remove_obsolete_folders(states, path):
     # remove the remaining state folders
     for folder_name in state_folders_in_file_system:
         shutil.rmtree(os.path.join(path, folder_name))
+        if report is not None:
+            report.removed_folders.append(os.path.join(path, folder_name))
 
 
 def clean_path_from_deprecated_naming(base_path):
@@ -144,17 +350,32 @@ def clean_path(base_path):
     return base_path
 
 
-def save_state_machine_to_path(state_machine, base_path, delete_old_state_machine=False, as_copy=False):
+def save_state_machine_to_path(state_machine, base_path, delete_old_state_machine=False, as_copy=False,
+                               incremental=False):
     """Saves a state machine recursively to the file system
 
     The `as_copy` flag determines whether the state machine is saved as copy. If so (`as_copy=True`), some state
     machine attributes will be left untouched, such as the `file_system_path` or the `dirty_flag`.
 
+    In incremental mode, only the files whose content changed are written. States not edited since their last save
+    to the same path are not serialized again (see :func:`is_core_data_unchanged`). The content of the other files of a
+    state (core data of edited states, script and semantic data) is compared with the fingerprint of the file written
+    by the last save to the same path. Obsolete state folders are only searched for in container states whose child
+    states changed, unless `delete_old_state_machine` is set. The state machine file (and thus the `last_update` time)
+    is only updated if any other file changed.
+
     :param rafcon.core.state_machine.StateMachine state_machine: the state_machine to be saved
     :param str base_path: base_path to which all further relative paths refers to
-    :param bool delete_old_state_machine: Whether to delete any state machine existing at the given path
+    :param bool delete_old_state_machine: Whether to delete any state machine existing at the given path, in
+        incremental mode only the folders not belonging to any state are deleted
     :param bool as_copy: Whether to use a copy storage for the state machine
+    :param bool incremental: Whether to only write changed files
+    :return: the report of the written files
+    :rtype: StorageReport
     """
+    if base_path.endswith('.' + PACKED_FILE_EXTENSION):
+        return save_state_machine_to_packed_file(state_machine, base_path, as_copy)
+
     # warns the user in the logger when using deprecated names
     clean_path_from_deprecated_naming(base_path)
 
@@ -162,8 +383,8 @@ def save_state_machine_to_path(state_machine, base_path, delete_old_state_machin
     try:
         root_state = state_machine.root_state
 
-        # clean old path first
-        if delete_old_state_machine:
+        # clean old path first, in incremental mode only the folders of deleted or renamed states are removed below
+        if delete_old_state_machine and not incremental:
             if os.path.exists(base_path):
                 shutil.rmtree(base_path)
 
@@ -171,31 +392,117 @@ def save_state_machine_to_path(state_machine, base_path, delete_old_state_machin
         if not os.path.exists(base_path):
             os.makedirs(base_path)
 
-        old_update_time = state_machine.last_update
-        state_machine.last_update = storage_utils.get_current_time_string()
+        report = StorageReport()
+        # add root state recursively
+        skip_folder_checks = incremental and not delete_old_state_machine
+        remove_obsolete_child_state_folders([root_state], base_path, state_machine, report, skip_folder_checks)
+        save_state_recursively(root_state, base_path, "", as_copy, report, incremental, skip_folder_checks)
+
+        # the state machine file is rewritten in incremental mode, if anything else or its content except for the
+        # update time changed
         state_machine_dict = state_machine.to_dict()
-        storage_utils.write_dict_to_json(state_machine_dict, os.path.join(base_path, STATEMACHINE_FILE))
+        del state_machine_dict['last_update']
+        state_machine_file_path = os.path.join(base_path, STATEMACHINE_FILE)
+        state_machine_key = (base_path, 'state_machine')
+        state_machine_hash = _get_content_hash(storage_utils.get_json_string(state_machine_dict))
+        previous_state_machine_hash = state_machine.storage_fingerprints.get(state_machine_key)
+        if incremental and previous_state_machine_hash is None and os.path.isfile(state_machine_file_path):
+            previous_state_machine_dict = storage_utils.load_objects_from_json(state_machine_file_path)
+            previous_state_machine_dict.pop('last_update', None)
+            previous_state_machine_hash = _get_content_hash(storage_utils.get_json_string(previous_state_machine_dict))
+        if not incremental or report.number_of_written_files > 0 or report.removed_folders or \
+                previous_state_machine_hash != state_machine_hash or _get_file_stat(state_machine_file_path) is None:
+            old_update_time = state_machine.last_update
+            state_machine.last_update = storage_utils.get_current_time_string()
+            save_file(state_machine, state_machine_file_path, storage_utils.get_json_string(state_machine.to_dict()),
+                      'state_machine', report)
+            state_machine.storage_fingerprints[state_machine_key] = state_machine_hash
+            if as_copy:
+                state_machine.last_update = old_update_time
+        else:
+            state_machine.storage_fingerprints[state_machine_key] = state_machine_hash
+            report.number_of_unchanged_files += 1
 
         # set the file_system_path of the state machine
         if not as_copy:
             state_machine.file_system_path = copy.copy(base_path)
-        else:
-            state_machine.last_update = old_update_time
-
-        # add root state recursively
-        remove_obsolete_folders([root_state], base_path)
-        save_state_recursively(root_state, base_path, "", as_copy)
 
         if state_machine.marked_dirty and not as_copy:
             state_machine.marked_dirty = False
-        logger.debug("State machine with id {0} was saved at {1}".format(state_machine.state_machine_id, base_path))
+        logger.debug("State machine with id {0} was saved at {1}: {2}".format(state_machine.state_machine_id,
+                                                                              base_path, report))
+        return report
     except Exception:
         raise
     finally:
         state_machine.release_modification_lock()
 
 
-def save_script_file_for_state_and_source_path(state, state_path_full, as_copy=False):
+def save_state_machine_to_packed_file(state_machine, file_path, as_copy=False):
+    """Saves a state machine to a single packed file
+
+    The packed file holds the same files as the folder layout (see :mod:`rafcon.core.storage.packed_state_machine`).
+    As meta data is not part of the core state machine, the meta data files of an existing packed file are kept for
+    all states that are still part of the state machine.
+
+    :param rafcon.core.state_machine.StateMachine state_machine: the state_machine to be saved
+    :param str file_path: the path of the packed file
+    :param bool as_copy: Whether to use a copy storage for the state machine
+    :return: the report of the written files
+    :rtype: StorageReport
+    """
+    from rafcon.core.states.execution_state import ExecutionState
+    from rafcon.core.states.container_state import ContainerState
+
+    def pack_state(state, parent_path):
+        state_path = get_storage_id_for_state(state) if parent_path is None else \
+            parent_path + '/' + get_storage_id_for_state(state)
+        packed_state_machine.add_file(state_path + '/' + FILE_NAME_CORE_DATA, storage_utils.get_json_string(state))
+        if isinstance(state, ExecutionState):
+            packed_state_machine.add_file(state_path + '/' + SCRIPT_FILE, state.script_text)
+            if not as_copy:
+                state.script.filename = SCRIPT_FILE
+                state.script.path = os.path.join(file_path, state_path)
+        packed_state_machine.add_file(state_path + '/' + SEMANTIC_DATA_FILE,
+                                      storage_utils.get_json_string(state.semantic_data))
+        if not as_copy:
+            state.file_system_path = os.path.join(file_path, state_path)
+        if isinstance(state, ContainerState):
+            for child_state in state.states.values():
+                pack_state(child_state, state_path)
+
+    state_machine.acquire_modification_lock()
+    try:
+        packed_state_machine = PackedStateMachine(file_path)
+        pack_state(state_machine.root_state, None)
+
+        old_update_time = state_machine.last_update
+        state_machine.last_update = storage_utils.get_current_time_string()
+        packed_state_machine.add_file(STATEMACHINE_FILE, storage_utils.get_json_string(state_machine.to_dict()))
+        if as_copy:
+            state_machine.last_update = old_update_time
+
+        if is_packed_state_machine(file_path):
+            for relative_path, content in PackedStateMachine.load(file_path).files.items():
+                folder, _, file_name = relative_path.rpartition('/')
+                if file_name == FILE_NAME_META_DATA and (not folder or folder + '/' + FILE_NAME_CORE_DATA in
+                                                         packed_state_machine.files):
+                    packed_state_machine.add_file(relative_path, content)
+        packed_state_machine.save()
+
+        if not as_copy:
+            state_machine.file_system_path = file_path
+            state_machine.marked_dirty = False
+        report = StorageReport()
+        report.written_files['state_machine'].append(file_path)
+        logger.debug("State machine with id {0} was saved to the packed file {1}".format(
+            state_machine.state_machine_id, file_path))
+        return report
+    finally:
+        state_machine.release_modification_lock()
+
+
+def save_script_file_for_state_and_source_path(state, state_path_full, as_copy=False, report=None, incremental=False):
     """Saves the script file for a state to the directory of the state.
 
     The script name will be set to the SCRIPT_FILE constant.
@@ -203,6 +510,8 @@ def save_script_file_for_state_and_source_path(state, state_path_full, as_copy=F
     :param state: The state of which the script file should be saved
     :param str state_path_full: The path to the file system storage location of the state
     :param bool as_copy: Temporary storage flag to signal that the given path is not the new file_system_path
+    :param StorageReport report: the report the written file is added to
+    :param bool incremental: Whether to skip writing an unchanged script
     """
     from rafcon.core.states.execution_state import ExecutionState
     if isinstance(state, ExecutionState):
@@ -210,7 +519,7 @@ def save_script_file_for_state_and_source_path(state, state_path_full, as_copy=F
         destination_script_file = os.path.join(state_path_full, SCRIPT_FILE)
 
         try:
-            write_file(destination_script_file, state.script_text)
+            save_file(state, destination_script_file, state.script_text, 'script', report, incremental)
         except Exception:
             logger.exception("Storing of script file failed: {0} -> {1}".format(state.get_path(),
                                                                                 destination_script_file))
@@ -221,24 +530,47 @@ def save_script_file_for_state_and_source_path(state, state_path_full, as_copy=F
             state.script.path = state_path_full
 
 
-def save_semantic_data_for_state(state, state_path_full):
+def save_semantic_data_for_state(state, state_path_full, report=None, incremental=False):
     """Saves the semantic data in a separate json file.
 
     :param state: The state of which the script file should be saved
     :param str state_path_full: The path to the file system storage location of the state
+    :param StorageReport report: the report the written file is added to
+    :param bool incremental: Whether to skip writing unchanged semantic data
     """
 
     destination_script_file = os.path.join(state_path_full, SEMANTIC_DATA_FILE)
 
     try:
-        storage_utils.write_dict_to_json(state.semantic_data, destination_script_file)
+        save_file(state, destination_script_file, storage_utils.get_json_string(state.semantic_data), 'semantic_data',
+                  report, incremental)
     except IOError:
         logger.exception("Storing of semantic data for state {0} failed! Destination path: {1}".
                          format(state.get_path(), destination_script_file))
         raise
 
 
-def save_state_recursively(state, base_path, parent_path, as_copy=False):
+def remove_obsolete_child_state_folders(states, path, owner, report=None, incremental=False):
+    """Removes the folders of obsolete child states
+
+    In incremental mode, the folder is only checked for obsolete state folders, if the child states changed since the
+    last save to this folder.
+
+    :param list states: the child states that should reside in the folder
+    :param str path: the file system path of the folder
+    :param owner: the state or state machine the folder belongs to, it keeps the fingerprints of its written files
+    :param StorageReport report: the report the removed folders are added to
+    :param bool incremental: Whether to skip the check for unchanged child states
+    """
+    child_states_key = (path, 'child_states')
+    storage_ids = frozenset(get_storage_id_for_state(state) for state in states)
+    if not incremental or owner.storage_fingerprints.get(child_states_key) != storage_ids:
+        remove_obsolete_folders(states, path, report)
+        owner.storage_fingerprints[child_states_key] = storage_ids
+
+
+def save_state_recursively(state, base_path, parent_path, as_copy=False, report=None, incremental=False,
+                           skip_folder_checks=None):
     """Recursively saves a state to a json file
 
     It calls this method on all its substates.
@@ -247,47 +579,90 @@ def save_state_recursively(state, base_path, parent_path, as_copy=False):
     :param base_path: Path to the state machine
     :param parent_path: Path to the parent state
     :param bool as_copy: Temporary storage flag to signal that the given path is not the new file_system_path
+    :param StorageReport report: the report the written files are added to
+    :param bool incremental: Whether to only write changed files
+    :param bool skip_folder_checks: Whether to skip the check for obsolete state folders in container states with
+        unchanged child states, None to skip it in incremental mode
     :return:
     """
     from rafcon.core.states.execution_state import ExecutionState
     from rafcon.core.states.container_state import ContainerState
 
+    if skip_folder_checks is None:
+        skip_folder_checks = incremental
     state_path = os.path.join(parent_path, get_storage_id_for_state(state))
     state_path_full = os.path.join(base_path, state_path)
     if not os.path.exists(state_path_full):
         os.makedirs(state_path_full)
 
-    storage_utils.write_dict_to_json(state, os.path.join(state_path_full, FILE_NAME_CORE_DATA))
+    core_data_file_path = os.path.join(state_path_full, FILE_NAME_CORE_DATA)
+    if incremental and is_core_data_unchanged(state, core_data_file_path):
+        if report is not None:
+            report.number_of_unchanged_files += 1
+    else:
+        modification_counter = state.modification_counter
+        save_file(state, core_data_file_path, storage_utils.get_json_string(state), 'core_data', report, incremental)
+        state.storage_fingerprints[(core_data_file_path, 'modification_counter')] = modification_counter
     if not as_copy:
         state.file_system_path = state_path_full
 
     if isinstance(state, ExecutionState):
-        save_script_file_for_state_and_source_path(state, state_path_full, as_copy)
+        save_script_file_for_state_and_source_path(state, state_path_full, as_copy, report, incremental)
 
-    save_semantic_data_for_state(state, state_path_full)
+    save_semantic_data_for_state(state, state_path_full, report, incremental)
 
     # create yaml files for all children
     if isinstance(state, ContainerState):
-        remove_obsolete_folders(state.states.values(), os.path.join(base_path, state_path))
+        remove_obsolete_child_state_folders(list(state.states.values()), state_path_full, state, report,
+                                            skip_folder_checks)
         for state in state.states.values():
-            save_state_recursively(state, base_path, state_path, as_copy)
+            save_state_recursively(state, base_path, state_path, as_copy, report, incremental, skip_folder_checks)
 
 
 @measure_time
 def load_state_machine_from_path(base_path, state_machine_id=None):
     """Loads a state machine from the given path
 
+    The path can either be a state machine folder or a packed state machine file (see
+    :mod:`rafcon.core.storage.packed_state_machine`). The files of a state machine folder are read concurrently in
+    advance, if the config value STORAGE_LOAD_THREAD_POOL_SIZE is greater than 0. If the config value
+    STORAGE_LAZY_LOAD_DEPTH is greater than 0, only the given number of hierarchy levels is loaded, the child states of
+    deeper container states are loaded on their first access. If the config value STORAGE_CACHE_PATH is set, the files
+    of the state machine are taken from the cache, if they did not change since they were cached (see
+    :mod:`rafcon.core.storage.state_machine_cache`).
+
     :param base_path: An optional base path for the state machine.
     :return: a tuple of the loaded container state, the version of the state and the creation time
     :raises ValueError: if the provided path does not contain a valid state machine
     """
     logger.debug("Loading state machine from path {0}...".format(base_path))
 
+    thread_pool_size = global_config.get_config_value('STORAGE_LOAD_THREAD_POOL_SIZE', 0) or 0
+    lazy_load_depth = global_config.get_config_value('STORAGE_LAZY_LOAD_DEPTH', 0) or 0
+    cache_path = global_config.get_config_value('STORAGE_CACHE_PATH', None)
+    if cache_path and cache_path != "None" and (is_packed_state_machine(base_path) or
+                       os.path.isfile(os.path.join(base_path, STATEMACHINE_FILE)) or
+                       os.path.isfile(os.path.join(base_path, STATEMACHINE_FILE_OLD))):
+        state_machine_cache = StateMachineCache(cache_path,
+                                                skipped_file_names=(FILE_NAME_META_DATA, FILE_NAME_META_DATA_OLD))
+        files = state_machine_cache.get_files(base_path)
+    elif is_packed_state_machine(base_path):
+        files = PackedStateMachine.load(base_path)
+    elif thread_pool_size > 0 and os.path.isdir(base_path):
+        # the folder of the state machine, the folder of the root state and the folders of the eagerly loaded states
+        max_depth = lazy_load_depth + 1 if lazy_load_depth > 0 else 0
+        files = PrefetchedStateMachineFiles(base_path, thread_pool_size, max_depth,
+                                            prefetched_file_names=(STATEMACHINE_FILE, STATEMACHINE_FILE_OLD,
+                                                                   FILE_NAME_CORE_DATA, FILE_NAME_CORE_DATA_OLD,
+                                                                   SCRIPT_FILE, SEMANTIC_DATA_FILE))
+    else:
+        files = file_system
+
     state_machine_file_path = os.path.join(base_path, STATEMACHINE_FILE)
     state_machine_file_path_old = os.path.join(base_path, STATEMACHINE_FILE_OLD)
 
     # was the root state specified as state machine base_path to load from?
-    if not os.path.exists(state_machine_file_path) and not os.path.exists(state_machine_file_path_old):
+    if not files.exists(state_machine_file_path) and not files.exists(state_machine_file_path_old):
 
         # catch the case that a state machine root file is handed
         if os.path.exists(base_path) and os.path.isfile(base_path):
@@ -298,7 +673,7 @@ def load_state_machine_from_path(base_path, state_machine_id=None):
         if not os.path.exists(state_machine_file_path) and not os.path.exists(state_machine_file_path_old):
             raise ValueError("Provided path doesn't contain a valid state machine: {0}".format(base_path))
 
-    state_machine_dict = storage_utils.load_objects_from_json(state_machine_file_path)
+    state_machine_dict = files.load_json(state_machine_file_path)
     if 'used_rafcon_version' in state_machine_dict:
         previously_used_rafcon_version = StrictVersion(state_machine_dict['used_rafcon_version']).version
         active_rafcon_version = StrictVersion(rafcon.__version__).version
@@ -346,12 +721,17 @@ def load_state_machine_from_path(base_path, state_machine_id=None):
     state_machine.file_system_path = base_path
     dirty_states = []
     state_machine.root_state = load_state_recursively(parent=state_machine, state_path=root_state_path,
-                                                      dirty_states=dirty_states)
+                                                      dirty_states=dirty_states, files=files,
+                                                      lazy_load_depth=lazy_load_depth)
     if len(dirty_states) > 0:
         state_machine.marked_dirty = True
     else:
         state_machine.marked_dirty = False
 
+    if lazy_load_depth > 0:
+        # the statistics would load all lazily loaded states
+        return state_machine
+
     hierarchy_level = 0
     number_of_states, hierarchy_level = state_machine.root_state.get_states_statistics(hierarchy_level)
     logger.debug("Loaded state machine ({1}) has {0} states. (Max hierarchy level {2})".format(
@@ -371,14 +751,21 @@ def load_state_from_path(state_path):
     return load_state_recursively(parent=None, state_path=state_path)
 
 
-def load_state_recursively(parent, state_path=None, dirty_states=[]):
+def load_state_recursively(parent, state_path=None, dirty_states=[], files=file_system, lazy_load_depth=0,
+                           hierarchy_level=1):
     """Recursively loads the state
 
-    It calls this method on each sub-state of a container state.
+    It calls this method on each sub-state of a container state. If a lazy load depth is given, the child states of
+    container states on that hierarchy level are not loaded, but when they are accessed for the first time (see
+    :meth:`rafcon.core.states.container_state.ContainerState.set_child_states_loader`).
 
     :param parent:  the root state of the last load call to which the loaded state will be added
     :param state_path: the path on the filesystem where to find the meta file for the state
     :param dirty_states: a dict of states which changed during loading
+    :param rafcon.core.storage.packed_state_machine.StateMachineFiles files: the access to the files of the state
+        machine, either in the folder layout or in a packed state machine
+    :param int lazy_load_depth: the number of hierarchy levels to be loaded at once, 0 loads all levels
+    :param int hierarchy_level: the hierarchy level of the state, relative to the last state loaded lazily
     :return:
     """
     from rafcon.core.states.execution_state import ExecutionState
@@ -390,18 +777,18 @@ def load_state_recursively(parent, state_path=None, dirty_states=[]):
     logger.debug("Load state recursively: {0}".format(str(state_path)))
 
     # TODO: Should be removed with next minor release
-    if not os.path.exists(path_core_data):
+    if not files.exists(path_core_data):
         path_core_data = os.path.join(state_path, FILE_NAME_CORE_DATA_OLD)
 
     try:
-        state_info = load_data_file(path_core_data)
+        state_info = load_data_file(path_core_data, files)
     except ValueError as e:
         logger.exception("Error while loading state data: {0}".format(e))
         return
     except LibraryNotFoundException as e:
         logger.error("Library could not be loaded: {0}\n"
                      "Skipping library and continuing loading the state machine".format(e))
-        state_info = storage_utils.load_objects_from_json(path_core_data, as_dict=True)
+        state_info = files.load_json(path_core_data, as_dict=True)
         state_id = state_info["state_id"]
         dummy_state = HierarchyState(LIBRARY_NOT_FOUND_DUMMY_STATE_NAME, state_id=state_id)
         # set parent of dummy state
@@ -429,53 +816,93 @@ def load_state_recursively(parent, state_path=None, dirty_states=[]):
 
     # read script file if an execution state
     if isinstance(state, ExecutionState):
-        script_text = read_file(state_path, state.script.filename)
+        script_text = files.read_file(os.path.join(state_path, state.script.filename))
         state.script_text = script_text
 
     # load semantic data
     try:
-        semantic_data = load_data_file(os.path.join(state_path, SEMANTIC_DATA_FILE))
+        semantic_data = load_data_file(os.path.join(state_path, SEMANTIC_DATA_FILE), files)
         state.semantic_data = semantic_data
     except Exception as e:
         # semantic data file does not have to be there
         pass
 
+    if not isinstance(state_info, tuple):
+        transitions = data_flows = None
+
+    if isinstance(state, ContainerState) and 0 < lazy_load_depth <= hierarchy_level:
+        def load_lazily_loaded_child_states():
+            # the files of the subtree are read not before the child states are accessed
+            subtree_files = files.get_subtree_files(state_path, lazy_load_depth + 1)
+            number_of_dirty_states = len(dirty_states)
+            load_child_states(state, state_path, transitions, data_flows, dirty_states, subtree_files,
+                              lazy_load_depth)
+            if len(dirty_states) > number_of_dirty_states:
+                # the state machine exists now and can be marked dirty directly
+                state_machine = state.get_state_machine()
+                if state_machine is not None:
+                    state_machine.marked_dirty = True
+        state.set_child_states_loader(load_lazily_loaded_child_states)
+    else:
+        load_child_states(state, state_path, transitions, data_flows, dirty_states, files, lazy_load_depth,
+                          hierarchy_level + 1)
+
+    state.file_system_path = state_path
+
+    if state.marked_dirty:
+        dirty_states.append(state)
+
+    return state
+
+
+def load_child_states(state, state_path, transitions, data_flows, dirty_states, files=file_system, lazy_load_depth=0,
+                      hierarchy_level=1):
+    """Loads the child states of a state and adds the transitions and data flows of the state afterwards
+
+    :param rafcon.core.states.state.State state: the state, whose child states are loaded
+    :param str state_path: the path of the state folder
+    :param transitions: the loaded transitions of the state or None, if the state is no container state
+    :param data_flows: the loaded data flows of the state or None, if the state is no container state
+    :param dirty_states: a list of states which changed during loading
+    :param rafcon.core.storage.packed_state_machine.StateMachineFiles files: the access to the files of the state
+        machine
+    :param int lazy_load_depth: the number of hierarchy levels to be loaded at once, 0 loads all levels
+    :param int hierarchy_level: the hierarchy level of the child states, relative to the last state loaded lazily
+    """
     one_of_my_child_states_not_found = False
 
     # load child states
-    for p in os.listdir(state_path):
+    for p in files.get_folder_names(state_path):
         child_state_path = os.path.join(state_path, p)
-        if os.path.isdir(child_state_path):
-            child_state = load_state_recursively(state, child_state_path, dirty_states)
-            if child_state.name is LIBRARY_NOT_FOUND_DUMMY_STATE_NAME:
-                one_of_my_child_states_not_found = True
+        child_state = load_state_recursively(state, child_state_path, dirty_states, files, lazy_load_depth,
+                                             hierarchy_level)
+        if child_state.name is LIBRARY_NOT_FOUND_DUMMY_STATE_NAME:
+            one_of_my_child_states_not_found = True
 
     if one_of_my_child_states_not_found:
         # omit adding transitions and data flows in this case
         pass
     else:
         # Now we can add transitions and data flows, as all child states were added
-        if isinstance(state_info, tuple):
+        if transitions is not None:
             state.transitions = transitions
             state.data_flows = data_flows
 
-    state.file_system_path = state_path
-
-    if state.marked_dirty:
-        dirty_states.append(state)
-
-    return state
-
 
-def load_data_file(path_of_file):
+def load_data_file(path_of_file, files=None):
     """ Loads the content of a file by using json.load.
 
     :param path_of_file: the path of the file to load
+    :param rafcon.core.storage.packed_state_machine.StateMachineFiles files: the access to the files, either in the
+        folder layout or in a packed state machine, if None, it is derived from the path (see
+        :func:`get_files_of_path`)
     :return: the file content as a string
     :raises exceptions.ValueError: if the file was not found
     """
-    if os.path.exists(path_of_file):
-        return storage_utils.load_objects_from_json(path_of_file)
+    if files is None:
+        files = get_files_of_path(path_of_file)
+    if files.exists(path_of_file):
+        return files.load_json(path_of_file)
     raise ValueError("Data file not found: {0}".format(path_of_file))
 
 
@@ -14,7 +14,6 @@ from builtins import str
 from gi.repository import Gtk
 from gi.repository import Gdk
 from gi.repository import GObject
-import shelve
 import os.path
 
 import rafcon.utils.execution_log as log_helper
@@ -34,12 +33,12 @@ class ExecutionLogTreeController(ExtendedController):
         logger.verbose("Select run_id: {0}".format(run_id_to_select))
         super(ExecutionLogTreeController, self).__init__(model, view)
 
-        if not os.path.isfile(filename):
+        if not os.path.isfile(filename) and not log_helper.is_binary_execution_log(filename):
             logger.error("File does not exist!")
             exit()
 
         self.run_id_to_select = run_id_to_select
-        self.hist_items = shelve.open(filename, 'r')
+        self.hist_items = log_helper.open_execution_log(filename)
         self.start, self.next_, self.concurrent, self.hierarchy, self.items = \
             log_helper.log_to_collapsed_structure(self.hist_items,
                                                   throw_on_pickle_error=False,
@@ -14,6 +14,8 @@
 
 """
 
+from gi.repository import GLib
+
 import rafcon.core.singleton
 
 from rafcon.gui.controllers.utils.extended_controller import ExtendedController
@@ -32,7 +34,8 @@ class ExecutionTickerController(ExtendedController):
     """Controller handling the execution ticker for all active state machines
     
      The class shows the last execution update in a text field. Currently this is only one state and one active state
-     machine.
+     machine. The execution updates are read from the execution event bus with a fixed frame rate, so that the
+     execution is not slowed down by updates of the widget.
 
     :param rafcon.gui.models.state_machine_execution_engine.StateMachineExecutionEngineModel model:
         The execution engine model to observe
@@ -42,6 +45,8 @@ class ExecutionTickerController(ExtendedController):
     # TODO In future there will be multiple active state machines which have to be taken into account
     # TODO Currently concurrent states are also not taken into account what could be an extension or other feature
     _fix_text_of_label = ", CURRENT STATE:  "
+    # interval in milliseconds, in which the execution events are read and the widget is updated
+    UPDATE_INTERVAL = 100
 
     def __init__(self, model, view):
         """Constructor"""
@@ -49,6 +54,8 @@ class ExecutionTickerController(ExtendedController):
         ExtendedController.__init__(self, model, view)
         self.observe_model(rafcon.gui.singleton.gui_config_model)
         self.current_observed_sm_m = None
+        self._event_consumer = None
+        self._update_timer_id = None
         self._view_initialized = True
 
     def _idle_register_view(self, view):
@@ -101,18 +108,14 @@ class ExecutionTickerController(ExtendedController):
         if self.current_observed_sm_m is None:
             self.start_active_sm_m_observation()
 
-    @ExtendedController.observe("state_machine", after=True)
-    def on_state_execution_status_changed_after(self, model, prop_name, info):
-        """ Show current execution status in the widget
+    def _update_ticker(self):
+        """ Show the current execution status in the widget
+
+        Drains the execution event bus and shows the state, which changed its execution status last, of the observed
+        state machine. Called periodically by a GLib timer.
 
-        This function specifies what happens if the state machine execution status of a state changes
-        
-        :param model: the model of the state that has changed (most likely its execution status)
-        :param prop_name: property name that has been changed
-        :param info: notification info dictionary
-        :return:
+        :return: True to keep the timer running
         """
-        from rafcon.gui.utils.notification_overview import NotificationOverview
         from rafcon.core.states.state import State
 
         def name_and_next_state(state):
@@ -134,22 +137,33 @@ class ExecutionTickerController(ExtendedController):
                 path = separator + '..' + path
             return path
 
-        if 'kwargs' in info and 'method_name' in info['kwargs']:
-            overview = NotificationOverview(info)
-            if overview['method_name'][-1] == 'state_execution_status':
-                active_state = overview['model'][-1].state
-                assert isinstance(active_state, State)
-
-                path_depth = rafcon.gui.singleton.global_gui_config.get_config_value("EXECUTION_TICKER_PATH_DEPTH", 3)
-
-                message = self._fix_text_of_label + create_path(active_state, path_depth)
-                if rafcon.gui.singleton.main_window_controller.view is not None:
-                    self.ticker_text_label.set_text(message)
-                else:
-                    logger.warn("Not initialized yet")
+        if self._event_consumer is None or self.current_observed_sm_m is None:
+            return True
+        state_machine = self.current_observed_sm_m.state_machine
+        # only the latest status of each state is of interest
+        events = self._event_consumer.drain(coalesce=True)
+        for event in reversed(events):
+            if event.state_machine_id != state_machine.state_machine_id:
+                continue
+            active_state = state_machine.get_state_by_path(event.path, as_check=True)
+            if active_state is None:
+                continue
+
+            path_depth = rafcon.gui.singleton.global_gui_config.get_config_value("EXECUTION_TICKER_PATH_DEPTH", 3)
+
+            message = self._fix_text_of_label + create_path(active_state, path_depth)
+            if rafcon.gui.singleton.main_window_controller.view is not None:
+                self.ticker_text_label.set_text(message)
+            else:
+                logger.warn("Not initialized yet")
+            break
+        return True
 
     def stop_sm_m_observation(self, sm_m):
-        self.relieve_model(sm_m)
+        if self._update_timer_id is not None:
+            GLib.source_remove(self._update_timer_id)
+            self._update_timer_id = None
+        self._event_consumer = None
         self.ticker_text_label.set_text(self._fix_text_of_label + 'None')
         self.current_observed_sm_m = None
 
@@ -157,7 +171,8 @@ class ExecutionTickerController(ExtendedController):
         active_sm_id = rafcon.gui.singleton.state_machine_manager_model.state_machine_manager.active_state_machine_id
         if active_sm_id:
             self.current_observed_sm_m = rafcon.gui.singleton.state_machine_manager_model.state_machines[active_sm_id]
-            self.observe_model(self.current_observed_sm_m)
+            self._event_consumer = rafcon.core.singleton.execution_event_bus.create_consumer()
+            self._update_timer_id = GLib.timeout_add(self.UPDATE_INTERVAL, self._update_ticker)
 
     @ExtendedController.observe("execution_engine", after=True)
     def execution_engine_model_changed(self, model, prop_name, info):
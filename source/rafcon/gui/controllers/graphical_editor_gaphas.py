@@ -30,6 +30,7 @@ from gaphas.aspect import InMotion, ItemFinder
 from gaphas.item import Item
 import math
 
+import rafcon.core.singleton
 from rafcon.core.decorators import lock_state_machine
 from rafcon.core.states.state import StateType
 from rafcon.gui.clipboard import global_clipboard
@@ -70,6 +71,8 @@ class GraphicalEditorController(ExtendedController):
 
     drag_motion_handler_id = None
     focus_changed_handler_id = None
+    # interval in milliseconds, in which the execution events are read and the state views are redrawn
+    EXECUTION_STATUS_UPDATE_INTERVAL = 40
 
     def __init__(self, model, view):
         """Constructor"""
@@ -84,6 +87,8 @@ class GraphicalEditorController(ExtendedController):
         self.canvas = MyCanvas()
         self.zoom = 3.
         self.perform_drag_and_drop = False
+        self._execution_event_consumer = None
+        self._execution_status_timer_id = None
 
         view.setup_canvas(self.canvas, self.zoom)
 
@@ -93,6 +98,9 @@ class GraphicalEditorController(ExtendedController):
                        "".format(time.time() - start_time, self.model.state_machine_id))
 
     def destroy(self):
+        if self._execution_status_timer_id is not None:
+            GLib.source_remove(self._execution_status_timer_id)
+            self._execution_status_timer_id = None
         if self.view:
             self.view.editor.prepare_destruction()
         super(GraphicalEditorController, self).destroy()
@@ -108,6 +116,40 @@ class GraphicalEditorController(ExtendedController):
 
         self.setup_canvas()
 
+        # the execution status of the states is read from the execution event bus instead of being observed, so that
+        # the execution is not slowed down by redrawing the state views
+        self._execution_event_consumer = rafcon.core.singleton.execution_event_bus.create_consumer()
+        self._execution_status_timer_id = GLib.timeout_add(self.EXECUTION_STATUS_UPDATE_INTERVAL,
+                                                           self._update_execution_status)
+
+    def _update_execution_status(self):
+        """Redraws the views of all states, whose execution status changed since the last call
+
+        Drains the execution event bus, reduced to the latest status of each state. Called periodically by a GLib
+        timer.
+
+        :return: True to keep the timer running
+        """
+        missed_events = self._execution_event_consumer.missed_events
+        events = self._execution_event_consumer.drain(coalesce=True)
+        if self._execution_event_consumer.missed_events != missed_events:
+            # it is unknown which states changed their status, thus all are redrawn
+            for item in self.canvas.get_all_items():
+                if isinstance(item, StateView):
+                    self.canvas.request_update(item, matrix=False)
+            return True
+        for event in events:
+            if event.state_machine_id != self.model.state_machine_id:
+                continue
+            try:
+                state_m = self.model.get_state_model_by_path(event.path)
+            except ValueError:  # the state was removed in the meantime
+                continue
+            state_v = self.canvas.get_view_for_model(state_m)
+            if state_v:  # Children of LibraryStates are not modeled, yet
+                self.canvas.request_update(state_v, matrix=False)
+        return True
+
     def register_actions(self, shortcut_manager):
         """Register callback methods for triggered actions
 
@@ -391,7 +433,8 @@ class GraphicalEditorController(ExtendedController):
         if 'method_name' in info and info['method_name'] == 'root_state_change':
             method_name, model, result, arguments, instance = self._extract_info_data(info['kwargs'])
 
-            if self.model.ongoing_complex_actions:
+            # execution status changes are read from the execution event bus, see _update_execution_status
+            if method_name == 'state_execution_status' or self.model.ongoing_complex_actions:
                 return
 
             # The method causing the change raised an exception, thus nothing was changed
@@ -415,11 +458,7 @@ class GraphicalEditorController(ExtendedController):
                     if not parent_library_root_state_m.parent.show_content():
                         return
 
-            if method_name == 'state_execution_status':
-                state_v = self.canvas.get_view_for_model(model)
-                if state_v:  # Children of LibraryStates are not modeled, yet
-                    self.canvas.request_update(state_v, matrix=False)
-            elif method_name == 'add_state':
+            if method_name == 'add_state':
                 new_state = arguments[1]
                 new_state_m = model.states[new_state.state_id]
                 self.add_state_view_with_meta_data_for_model(new_state_m, model)
@@ -210,11 +210,12 @@ def save_state_machine(delete_old_state_machine=False, recent_opened_notificatio
     state_machine_m = state_machine_manager_model.get_selected_state_machine_model()
     sm_path = state_machine_m.state_machine.file_system_path
 
-    storage.save_state_machine_to_path(state_machine_m.state_machine, copy_path if as_copy else sm_path,
-                                       delete_old_state_machine=delete_old_state_machine, as_copy=as_copy)
+    report = storage.save_state_machine_to_path(state_machine_m.state_machine, copy_path if as_copy else sm_path,
+                                                delete_old_state_machine=delete_old_state_machine, as_copy=as_copy,
+                                                incremental=True)
     if recent_opened_notification:
         global_runtime_config.update_recently_opened_state_machines_with(state_machine_m.state_machine)
-    state_machine_m.store_meta_data(copy_path=copy_path if as_copy else None)
+    state_machine_m.store_meta_data(copy_path=copy_path if as_copy else None, report=report, incremental=True)
     logger.debug("Saved state machine and its meta data.")
     library_manager_model.state_machine_was_stored(state_machine_m, previous_path)
     return True
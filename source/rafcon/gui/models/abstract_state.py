@@ -487,9 +487,11 @@ class AbstractStateModel(MetaModel, Hashable):
             self.meta = Vividict({})
             return False
         path_meta_data = os.path.join(path, storage.FILE_NAME_META_DATA)
+        # the path of a state of a packed state machine points into the packed file
+        files = storage.get_files_of_path(path)
 
         # TODO: Should be removed with next minor release
-        if not os.path.exists(path_meta_data):
+        if not files.exists(path_meta_data):
             logger.debug("Because meta data was not found in {0} use backup option {1}"
                          "".format(path_meta_data, os.path.join(path, storage.FILE_NAME_META_DATA_OLD)))
             path_meta_data = os.path.join(path, storage.FILE_NAME_META_DATA_OLD)
@@ -499,12 +501,12 @@ class AbstractStateModel(MetaModel, Hashable):
 
         try:
             # print("try to load meta data from {0} for state {1}".format(path_meta_data, self.state))
-            tmp_meta = storage.load_data_file(path_meta_data)
+            tmp_meta = storage.load_data_file(path_meta_data, files)
         except ValueError as e:
             # if no element which is newly generated log a warning
             # if os.path.exists(os.path.dirname(path)):
             #     logger.debug("Because '{1}' meta data of {0} was not loaded properly.".format(self, e))
-            if not path.startswith(constants.RAFCON_TEMP_PATH_STORAGE) and not os.path.exists(os.path.dirname(path)):
+            if not path.startswith(constants.RAFCON_TEMP_PATH_STORAGE) and not files.exists(os.path.dirname(path)):
                 logger.debug("Because '{1}' meta data of {0} was not loaded properly.".format(self, e))
             tmp_meta = {}
 
@@ -521,7 +523,7 @@ class AbstractStateModel(MetaModel, Hashable):
             # print("nothing to parse", tmp_meta)
             return False
 
-    def store_meta_data(self, copy_path=None):
+    def store_meta_data(self, copy_path=None, report=None, incremental=False):
         """Save meta data of state model to the file system
 
         This method generates a dictionary of the meta data of the state together with the meta data of all state
@@ -534,6 +536,8 @@ class AbstractStateModel(MetaModel, Hashable):
         Dues the core elements of the state machine has to be stored first.
 
         :param str copy_path: Optional copy path if meta data is not stored to the file system path of state machine
+        :param rafcon.core.storage.storage.StorageReport report: Optional report the written file is added to
+        :param bool incremental: Whether to skip writing unchanged meta data
         """
         if copy_path:
             meta_file_path_json = os.path.join(copy_path, self.state.get_storage_path(), storage.FILE_NAME_META_DATA)
@@ -545,7 +549,8 @@ class AbstractStateModel(MetaModel, Hashable):
             meta_file_path_json = os.path.join(self.state.file_system_path, storage.FILE_NAME_META_DATA)
         meta_data = deepcopy(self.meta)
         self._generate_element_meta_data(meta_data)
-        storage_utils.write_dict_to_json(meta_data, meta_file_path_json)
+        storage.save_file(self.state, meta_file_path_json, storage_utils.get_json_string(meta_data), 'meta_data',
+                          report, incremental)
 
     def copy_meta_data_from_state_m(self, source_state_m):
         """Dismiss current meta data and copy meta data from given state model
@@ -480,10 +480,14 @@ class AutoBackupModel(ModelMT):
         sm = self.state_machine_model.state_machine
         logger.debug('Performing auto backup of state machine {} to temp folder'.format(sm.state_machine_id))
         self.update_tmp_storage_path()
-        storage.save_state_machine_to_path(sm, self._tmp_storage_path, delete_old_state_machine=True, as_copy=True)
+        # only changed files are written, as the backup of the previous interval is usually still in the temp folder,
+        # while the folders of deleted or renamed states are removed
+        report = storage.save_state_machine_to_path(sm, self._tmp_storage_path, delete_old_state_machine=True,
+                                                    as_copy=True, incremental=True)
         self.update_last_backup_meta_data()
         self.write_backup_meta_data()
-        self.state_machine_model.store_meta_data(copy_path=self._tmp_storage_path)
+        self.state_machine_model.store_meta_data(copy_path=self._tmp_storage_path, report=report, incremental=True)
+        logger.debug("Auto backup of state machine {0}: {1}".format(sm.state_machine_id, report))
         self.last_backup_time = time.time()  # used as 'last-backup' time
         self.timer_request_lock.acquire()
         self._timer_request_time = None
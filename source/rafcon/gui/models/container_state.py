@@ -419,17 +419,19 @@ class ContainerStateModel(StateModel):
 
     # ---------------------------------------- meta data methods ---------------------------------------------
 
-    def store_meta_data(self, copy_path=None):
+    def store_meta_data(self, copy_path=None, report=None, incremental=False):
         """Store meta data of container states to the filesystem
 
         Recursively stores meta data of child states. For further insides read the description of also called respective
         super class method.
 
         :param str copy_path: Optional copy path if meta data is not stored to the file system path of state machine
+        :param rafcon.core.storage.storage.StorageReport report: Optional report the written files are added to
+        :param bool incremental: Whether to skip writing unchanged meta data
         """
-        super(ContainerStateModel, self).store_meta_data(copy_path)
+        super(ContainerStateModel, self).store_meta_data(copy_path, report, incremental)
         for state_key, state in self.states.items():
-            state.store_meta_data(copy_path)
+            state.store_meta_data(copy_path, report, incremental)
 
     def copy_meta_data_from_state_m(self, source_state_m):
         """Dismiss current meta data and copy meta data from given state model
@@ -371,21 +371,26 @@ class StateMachineModel(MetaModel, Hashable):
             self.meta = tmp_meta
             self.meta_signal.emit(MetaSignalMsg("load_meta_data", "all", True))
 
-    def store_meta_data(self, copy_path=None):
+    def store_meta_data(self, copy_path=None, report=None, incremental=False):
         """Save meta data of the state machine model to the file system
 
         This method generates a dictionary of the meta data of the state machine and stores it on the filesystem.
 
         :param str copy_path: Optional, if the path is specified, it will be used instead of the file system path
+        :param rafcon.core.storage.storage.StorageReport report: Optional report the written files are added to
+        :param bool incremental: Whether to skip writing unchanged meta data
         """
         if copy_path:
             meta_file_json = os.path.join(copy_path, storage.FILE_NAME_META_DATA)
         else:
             meta_file_json = os.path.join(self.state_machine.file_system_path, storage.FILE_NAME_META_DATA)
 
-        storage_utils.write_dict_to_json(self.meta, meta_file_json)
+        # the meta data files of packed state machines are collected and written into the packed file at once
+        with storage.packed_file_updates():
+            storage.save_file(self.state_machine, meta_file_json, storage_utils.get_json_string(self.meta),
+                              'meta_data', report, incremental)
 
-        self.root_state.store_meta_data(copy_path)
+            self.root_state.store_meta_data(copy_path, report, incremental)
 
 
 class ComplexActionObserver(Observer):
@@ -97,6 +97,7 @@ def convert(config_path, source_path, target_path=None):
     global_gui_config.load(path=setup_config['gui_config_path'])
     global_runtime_config.load(path=setup_config['gui_config_path'])
 
+    core_singletons.global_variable_manager.initialize()
     # Initialize library
     core_singletons.library_manager.initialize()
 
@@ -259,9 +259,8 @@ def signal_handler(signal, frame=None):
         SIGNALS_TO_NAMES_DICT.get(signal, "[unknown]")))
 
     try:
-        if not state_machine_execution_engine.finished_or_stopped():
-            state_machine_execution_engine.stop()
-            state_machine_execution_engine.join(3)  # Wait max 3 sec for the execution to stop
+        # stops all concurrently executed state machines, not only the active one
+        state_machine_execution_engine.stop_all(3)  # Wait max 3 sec for each execution to stop
     except Exception as e:
         import traceback
         print(_("Could not stop state machine: {0} {1}").format(e, traceback.format_exc()))
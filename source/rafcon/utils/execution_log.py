@@ -13,14 +13,59 @@
 from future.utils import string_types, native_str
 from builtins import range
 from builtins import str
+import os
 import shelve
 import json
 import pickle
+try:
+    from collections.abc import Mapping
+except ImportError:
+    from collections import Mapping
 
+from rafcon.core.execution.binary_execution_log import BinaryExecutionLogReader, BinaryExecutionLogWriter, \
+    is_binary_execution_log
 from rafcon.utils import log
 logger = log.get_logger(__name__)
 
 
+def open_execution_log(path):
+    """Opens an execution log for reading
+
+    :param str path: the path of a shelve log file or of a binary log directory
+    :return: the history items of the log as mapping history_item_id --> history item
+    :rtype: shelve.Shelf | rafcon.core.execution.binary_execution_log.BinaryExecutionLogReader
+    """
+    if is_binary_execution_log(path):
+        return BinaryExecutionLogReader(path)
+    return shelve.open(path, 'r')
+
+
+def convert_shelve_to_binary_log(shelve_path, binary_log_path):
+    """Converts a shelve execution log into a binary execution log
+
+    As shelve logs have no order, the history items are written sorted by their timestamp.
+
+    :param str shelve_path: the path of the shelve log file
+    :param str binary_log_path: the path of the binary log directory to be created
+    :return: the number of converted history items
+    :rtype: int
+    """
+    if os.path.exists(binary_log_path):
+        raise ValueError("The target path {0} already exists".format(binary_log_path))
+    execution_history_items = shelve.open(shelve_path, 'r')
+    try:
+        keys_by_time = sorted((v.get('timestamp') or 0., k) for k, v in execution_history_items.items())
+        writer = BinaryExecutionLogWriter(binary_log_path)
+        try:
+            for _, k in keys_by_time:
+                writer[k] = execution_history_items[k]
+        finally:
+            writer.close()
+    finally:
+        execution_history_items.close()
+    return len(keys_by_time)
+
+
 def log_to_raw_structure(execution_history_items):
     """
     :param dict execution_history_items: history items, in the simplest case
@@ -302,6 +347,164 @@ def log_to_collapsed_structure(execution_history_items, throw_on_pickle_error=Tr
     return start_item, collapsed_next, collapsed_concurrent, collapsed_hierarchy, collapsed_items
 
 
+class LazyDataDict(Mapping):
+    """A read-only dictionary of logged data, that unpickles the values on access
+
+    :param dict data_dict: the logged data (pickled values, keys starting with '!' mark values that could not be
+        pickled during the execution)
+    :param bool throw_on_pickle_error: flag if an error is thrown if an object cannot be un-pickled, otherwise a
+        KeyError is raised on access
+    :param bool include_erroneous_data_ports: flag if to include erroneous data ports; values that cannot be un-pickled
+        are returned as tuple of the error message and the pickled value
+    """
+
+    def __init__(self, data_dict, throw_on_pickle_error=True, include_erroneous_data_ports=False):
+        self._data_dict = data_dict
+        self._unpickled = {}
+        self._throw_on_pickle_error = throw_on_pickle_error
+        self._include_erroneous_data_ports = include_erroneous_data_ports
+        self._keys = [k for k in data_dict if include_erroneous_data_ports or not k.startswith('!')]
+
+    def __getitem__(self, key):
+        if key in self._unpickled:
+            return self._unpickled[key]
+        if key not in self._data_dict or (key.startswith('!') and not self._include_erroneous_data_ports):
+            raise KeyError(key)
+        value = self._data_dict[key]
+        if not key.startswith('!'):  # ! indicates storage error
+            try:
+                value = pickle.loads(value)
+            except Exception as e:
+                if self._throw_on_pickle_error:
+                    raise
+                if not self._include_erroneous_data_ports:
+                    raise KeyError(key)
+                value = (str(e), value)
+        self._unpickled[key] = value
+        return value
+
+    def __iter__(self):
+        return iter(self._keys)
+
+    def __len__(self):
+        return len(self._keys)
+
+
+def _get_keys_in_execution_order(execution_history_items):
+    """Determines the ids of all history items in the order of their creation
+
+    Binary execution logs are already ordered. For other logs (e.g. shelve), the keys are sorted by the timestamps of
+    the history items. Only the keys are kept in memory.
+
+    :param execution_history_items: history items, e.g. an opened execution log
+    :rtype: list
+    """
+    if isinstance(execution_history_items, BinaryExecutionLogReader):
+        return list(execution_history_items.keys())
+    return [k for _, k in sorted((v['timestamp'] or 0., k) for k, v in execution_history_items.items())]
+
+
+def _collapse_items(run_id, call_item, return_item, throw_on_pickle_error, include_erroneous_data_ports):
+    """Merges the call and return item of a state execution into one collapsed item
+
+    :return: the collapsed item with lazily un-pickled data
+    :rtype: dict
+    """
+    def lazy_data(data_dict):
+        # support backward compatibility
+        if isinstance(data_dict, string_types):  # formerly data dict was a json string
+            return json.loads(data_dict)
+        return LazyDataDict(data_dict, throw_on_pickle_error, include_erroneous_data_ports)
+
+    if call_item is None:
+        logger.warning('Could not find a CallItem in run_id group %s\nThere will probably be log information missing '
+                       'on this execution branch!' % str(run_id))
+        call_item = dict(description=None, path_by_name=None, state_name=None, run_id=run_id, state_type=None,
+                         path=None, timestamp=None, input_output_data={}, scoped_data={})
+    if return_item is None:
+        logger.warning('Could not find a ReturnItem in run_id group %s\nThere will probably be log information missing '
+                       'on this execution branch!' % str(run_id))
+        return_item = dict(outcome_name=None, outcome_id=None, timestamp=None, input_output_data={}, scoped_data={})
+
+    execution_item = {}
+    for l in ['description', 'path_by_name', 'state_name', 'run_id', 'state_type', 'path']:
+        execution_item[l] = call_item[l]
+    for l, default in [('semantic_data', {}),
+                       ('is_library', None),
+                       ('library_state_name', None),
+                       ('library_name', None),
+                       ('library_path', None)]:
+        execution_item[l] = return_item.get(l, default)
+    for l in ['outcome_name', 'outcome_id']:
+        execution_item[l] = return_item[l]
+    execution_item['timestamp_call'] = call_item['timestamp']
+    execution_item['timestamp_return'] = return_item['timestamp']
+
+    execution_item['data_ins'] = lazy_data(call_item['input_output_data'])
+    execution_item['data_outs'] = lazy_data(return_item['input_output_data'])
+    execution_item['scoped_data_ins'] = lazy_data(call_item['scoped_data'])
+    execution_item['scoped_data_outs'] = lazy_data(return_item['scoped_data'])
+    execution_item['semantic_data'] = lazy_data(execution_item['semantic_data'])
+    return execution_item
+
+
+def log_to_collapsed_items(execution_history_items, throw_on_pickle_error=True, include_erroneous_data_ports=False,
+                           include_start_item=False):
+    """Yields the collapsed items of an execution log one by one
+
+    This is the streaming variant of :func:`log_to_collapsed_structure`: the history items are processed in the order
+    of their creation and a collapsed item is yielded as soon as the execution of its state returned. Thus, only the
+    history items of the currently running state executions are held in memory. The data ports of the collapsed items
+    are un-pickled lazily on access (see :class:`LazyDataDict`). The relations between the collapsed items are not
+    determined.
+
+    :param dict execution_history_items: history items, in the simplest case directly the opened log file
+    :param bool throw_on_pickle_error: flag if an error is thrown if an object cannot be un-pickled
+    :param bool include_erroneous_data_ports: flag if to include erroneous data ports
+    :param bool include_start_item: flag if to yield the StateMachineStartItem first (as returned by
+        :func:`log_to_collapsed_structure`)
+    :return: generator of collapsed items, ordered by the time their state execution returned
+    """
+    # run_id --> [EXECUTE call item, CONTAINER call item]
+    open_executions = {}
+
+    for k in _get_keys_in_execution_order(execution_history_items):
+        item = execution_history_items[k]
+        item_type = item['item_type']
+        run_id = item['run_id']
+        if item_type == 'StateMachineStartItem':
+            if include_start_item:
+                start_item = {l: item.get(l) for l in ['description', 'path_by_name', 'state_name', 'run_id',
+                                                       'state_type', 'path', 'timestamp', 'root_state_storage_id',
+                                                       'state_machine_version', 'used_rafcon_version',
+                                                       'creation_time', 'last_update', 'os_environment']}
+                for l, default in [('semantic_data', {}),
+                                   ('is_library', None),
+                                   ('library_state_name', None),
+                                   ('library_name', None),
+                                   ('library_path', None)]:
+                    start_item[l] = item.get(l, default)
+                yield start_item
+        elif item_type == 'CallItem':
+            call_items = open_executions.setdefault(run_id, [None, None])
+            index = 0 if item['call_type'] == 'EXECUTE' else 1
+            if call_items[index] is None:
+                call_items[index] = item
+        elif item_type == 'ReturnItem':
+            call_items = open_executions.get(run_id, [None, None])
+            if item['call_type'] == 'CONTAINER' and call_items[0] is not None:
+                # the execution of a child container state is finished with the EXECUTE return item of its parent
+                continue
+            open_executions.pop(run_id, None)
+            call_item = call_items[0] if call_items[0] is not None else call_items[1]
+            yield _collapse_items(run_id, call_item, item, throw_on_pickle_error, include_erroneous_data_ports)
+
+    # state executions that did not return
+    for run_id, call_items in open_executions.items():
+        call_item = call_items[0] if call_items[0] is not None else call_items[1]
+        yield _collapse_items(run_id, call_item, None, throw_on_pickle_error, include_erroneous_data_ports)
+
+
 def log_to_DataFrame(execution_history_items, data_in_columns=[], data_out_columns=[], scoped_in_columns=[],
                      scoped_out_columns=[], semantic_data_columns=[], throw_on_pickle_error=True):
     """
@@ -322,43 +525,33 @@ def log_to_DataFrame(execution_history_items, data_in_columns=[], data_out_colum
     except ImportError:
         raise ImportError("The Python package 'pandas' is required for log_to_DataFrame.")
 
-    start, next_, concurrency, hierarchy, gitems = log_to_collapsed_structure(
-        execution_history_items, throw_on_pickle_error=throw_on_pickle_error)
-    gitems.pop(start['run_id'])
-    if len(gitems) == 0:
+    selected_columns = [('data_ins', data_in_columns),
+                        ('data_outs', data_out_columns),
+                        ('scoped_data_ins', scoped_in_columns),
+                        ('scoped_data_outs', scoped_out_columns),
+                        ('semantic_data', semantic_data_columns)]
+    data_keys = [key for key, _ in selected_columns]
+
+    # the columns are filled directly from the stream of collapsed items
+    df_keys = None
+    columns = {}
+    for item in log_to_collapsed_items(execution_history_items, throw_on_pickle_error=throw_on_pickle_error):
+        if df_keys is None:
+            # remove columns which are not generic over all states (basically the data flow stuff)
+            df_keys = sorted(k for k in item if k not in data_keys)
+            for key, selected in selected_columns:
+                df_keys.extend([key + '__' + s for s in selected])
+            columns = {k: [] for k in df_keys}
+        for key, selected in selected_columns:
+            for column_key in selected:
+                columns[key + '__' + column_key].append(item[key].get(column_key, None))
+        for k in item:
+            if k not in data_keys:
+                columns[k].append(item[k])
+    if df_keys is None:
         return pd.DataFrame()
 
-    # remove columns which are not generic over all states (basically the
-    # data flow stuff)
-    df_keys = list(list(gitems.values())[0].keys())
-    df_keys.remove('data_ins')
-    df_keys.remove('data_outs')
-    df_keys.remove('scoped_data_ins')
-    df_keys.remove('scoped_data_outs')
-    df_keys.remove('semantic_data')
-    df_keys.sort()
-
-    df_items = []
-
-    for rid, item in gitems.items():
-        row_data = [item[k] for k in df_keys]
-
-        for key, selected_columns in [('data_ins', data_in_columns),
-                                      ('data_outs', data_out_columns),
-                                      ('scoped_data_ins', scoped_in_columns),
-                                      ('scoped_data_outs', scoped_out_columns),
-                                      ('semantic_data', semantic_data_columns)]:
-            for column_key in selected_columns:
-                row_data.append(item[key].get(column_key, None))
-        df_items.append(row_data)
-
-    for key, selected_columns in [('data_ins', data_in_columns),
-                                  ('data_outs', data_out_columns),
-                                  ('scoped_data_ins', scoped_in_columns),
-                                  ('scoped_data_outs', scoped_out_columns),
-                                  ('semantic_data', semantic_data_columns)]:
-        df_keys.extend([key + '__' + s for s in selected_columns])
-    df = pd.DataFrame(df_items, columns=df_keys)
+    df = pd.DataFrame(columns, columns=df_keys)
     # convert epoch to datetime
     df.timestamp_call = pd.to_datetime(df.timestamp_call, unit='s')
     df.timestamp_return = pd.to_datetime(df.timestamp_return, unit='s')
@@ -397,3 +590,13 @@ def log_to_ganttplot(execution_history_items):
     ax.barh(bottom=[name2idx[k] for k in d.path_by_name], width=returndate-calldate,
             left=calldate, align='center', color=[state2color[s] for s in d.state_type], lw=0.0)
     plt.yticks(list(range(len(ordered_unique_states))), ordered_unique_states)
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description="Convert a shelve execution log into a binary execution log")
+    parser.add_argument("shelve_path", help="path to the shelve log file")
+    parser.add_argument("binary_log_path", help="path of the binary log directory to be created")
+    args = parser.parse_args()
+    number_of_items = convert_shelve_to_binary_log(args.shelve_path, args.binary_log_path)
+    logger.info("Converted {0} history items".format(number_of_items))
@@ -97,13 +97,47 @@ def read_file(file_path, filename=None):
     return file_content
 
     
-def write_file(file_path, content, create_full_path=False):
+def write_file(file_path, content, create_full_path=False, atomic=False):
+    """ Write content to a file
+
+    :param str file_path: Path of the file
+    :param str content: The content to be written
+    :param bool create_full_path: Whether to create the parent folders of the file, if they do not exist
+    :param bool atomic: Whether to write the content to a temporary file first, which then replaces the file. Thus,
+        the file either has its old or its new content, even if the writing is interrupted.
+    """
     file_path = os.path.realpath(file_path)
     if create_full_path:
         head, tail = os.path.split(file_path)
         create_path(head)
-    with open(file_path, 'w') as file_pointer:
-        file_pointer.write(content)
+    if not atomic:
+        with open(file_path, 'w') as file_pointer:
+            file_pointer.write(content)
+        return
+    temp_file_path = "{0}.{1}.tmp".format(file_path, os.getpid())
+    try:
+        with open(temp_file_path, 'w') as file_pointer:
+            file_pointer.write(content)
+        replace_file(temp_file_path, file_path)
+    except Exception:
+        if os.path.exists(temp_file_path):
+            os.remove(temp_file_path)
+        raise
+
+
+def replace_file(source_file, target_file):
+    """ Rename a file, replacing an existing target file
+
+    :param str source_file: Path of the file to be renamed
+    :param str target_file: Path of the file to be replaced
+    """
+    if hasattr(os, 'replace'):
+        os.replace(source_file, target_file)
+    else:
+        # Python 2: rename replaces existing files only on POSIX systems
+        if os.name == 'nt' and os.path.exists(target_file):
+            os.remove(target_file)
+        os.rename(source_file, target_file)
     
         
 def get_default_config_path():
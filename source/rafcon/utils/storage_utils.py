@@ -99,6 +99,16 @@ def load_dict_from_yaml(path):
     return dictionary
 
 
+def get_json_string(dictionary, **kwargs):
+    """
+    Serialize a dictionary in the format of the json files written by :func:`write_dict_to_json`.
+    :param dictionary: The dictionary to be serialized
+    :param kwargs: optional additional parameters for dumper
+    :return: the json string
+    """
+    return json.dumps(dictionary, cls=JSONObjectEncoder, indent=4, check_circular=False, sort_keys=True, **kwargs)
+
+
 def write_dict_to_json(dictionary, path, **kwargs):
     """
     Write a dictionary to a json file.
@@ -106,8 +116,7 @@ def write_dict_to_json(dictionary, path, **kwargs):
     :param dictionary: The dictionary to get saved
     :param kwargs: optional additional parameters for dumper
     """
-    result_string = json.dumps(dictionary, cls=JSONObjectEncoder,
-                               indent=4, check_circular=False, sort_keys=True, **kwargs)
+    result_string = get_json_string(dictionary, **kwargs)
     with open(path, 'w') as f:
         # We cannot write directly to the file, as otherwise the 'encode' method wouldn't be called
         f.write(result_string)
@@ -126,3 +135,37 @@ def load_objects_from_json(path, as_dict=False):
         result = json.load(f, cls=JSONObjectDecoder, substitute_modules=substitute_modules)
     f.close()
     return result
+
+
+def load_objects_from_json_string(json_string, as_dict=False):
+    """Loads a dictionary from a json string.
+
+    :param json_string: The json string, e.g. the content of a json file
+    :return: The dictionary specified in the json string
+    """
+    if as_dict:
+        return json.loads(json_string)
+    return json.loads(json_string, cls=JSONObjectDecoder, substitute_modules=substitute_modules)
+
+
+def load_objects_from_decoded_json(data, decoder=None):
+    """Converts data decoded from json without conversion (e.g. loaded with `as_dict=True`) into objects
+
+    The conversion is the same as with :func:`load_objects_from_json_string`. Dictionaries of the data are reused.
+
+    :param data: the decoded json data
+    :param decoder: the decoder converting the dictionaries, created if not given
+    :return: the converted objects
+    """
+    if decoder is None:
+        decoder = JSONObjectDecoder(substitute_modules=substitute_modules)
+    # like the json decoder, convert the inner dictionaries first
+    if isinstance(data, dict):
+        for key, value in data.items():
+            if isinstance(value, (dict, list)):
+                data[key] = load_objects_from_decoded_json(value, decoder)
+        return decoder.object_hook(data)
+    if isinstance(data, list):
+        return [load_objects_from_decoded_json(value, decoder) if isinstance(value, (dict, list)) else value
+                for value in data]
+    return data
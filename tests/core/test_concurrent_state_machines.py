@@ -0,0 +1,157 @@
+import time
+
+import pytest
+
+# core elements
+import rafcon.core.singleton
+from rafcon.core.execution.execution_status import StateMachineExecutionStatus
+from rafcon.core.states.execution_state import ExecutionState
+from rafcon.core.states.hierarchy_state import HierarchyState
+from rafcon.core.state_machine import StateMachine
+
+# test environment elements
+from tests import utils as testing_utils
+
+
+def create_counting_state_machine(variable_name, loop=False, number_child_states=3):
+    """Creates a state machine, whose states increment a global variable"""
+    root_state = HierarchyState("root")
+    last_state = None
+    for i in range(number_child_states):
+        state = ExecutionState("state{}".format(i))
+        state.script_text = "def execute(self, inputs, outputs, gvm):\n" \
+                            "    self.preemptive_wait(0.005)\n" \
+                            "    gvm.set_variable({0!r}, gvm.get_variable({0!r}) + 1)\n" \
+                            "    return 0\n".format(variable_name)
+        root_state.add_state(state)
+        if last_state is None:
+            root_state.set_start_state(state.state_id)
+        else:
+            root_state.add_transition(last_state.state_id, 0, state.state_id, None)
+        last_state = state
+    if loop:
+        root_state.add_transition(last_state.state_id, 0, root_state.start_state_id, None)
+    else:
+        root_state.add_transition(last_state.state_id, 0, root_state.state_id, 0)
+    rafcon.core.singleton.global_variable_manager.set_variable(variable_name, 0)
+    return StateMachine(root_state)
+
+
+def wait_for_increase(variable_name, timeout=5.):
+    gvm = rafcon.core.singleton.global_variable_manager
+    value = gvm.get_variable(variable_name)
+    end_time = time.time() + timeout
+    while gvm.get_variable(variable_name) == value and time.time() < end_time:
+        time.sleep(0.01)
+    return gvm.get_variable(variable_name) > value
+
+
+def test_concurrent_execution(caplog):
+    testing_utils.initialize_environment_core()
+    engine = rafcon.core.singleton.state_machine_execution_engine
+    state_machine_manager = rafcon.core.singleton.state_machine_manager
+    state_machines = [create_counting_state_machine("counter{}".format(i)) for i in range(4)]
+    try:
+        for state_machine in state_machines:
+            state_machine_manager.add_state_machine(state_machine)
+        for state_machine in state_machines:
+            engine.start(state_machine.state_machine_id)
+        # the first state machine is executed within the primary context and becomes the active state machine
+        assert state_machine_manager.active_state_machine_id == state_machines[0].state_machine_id
+        for state_machine in state_machines:
+            assert engine.join(10., state_machine_id=state_machine.state_machine_id)
+            assert engine.finished_or_stopped(state_machine.state_machine_id)
+        for i in range(len(state_machines)):
+            assert rafcon.core.singleton.global_variable_manager.get_variable("counter{}".format(i)) == 3
+
+        # the state machines can be executed again
+        engine.start(state_machines[1].state_machine_id)
+        engine.start(state_machines[2].state_machine_id)
+        assert engine.join(10., state_machine_id=state_machines[2].state_machine_id)
+        assert engine.join(10., state_machine_id=state_machines[1].state_machine_id)
+        assert rafcon.core.singleton.global_variable_manager.get_variable("counter2") == 6
+    finally:
+        for state_machine in state_machines:
+            state_machine_manager.remove_state_machine(state_machine.state_machine_id)
+        testing_utils.shutdown_environment_only_core(caplog=caplog)
+
+
+def test_independent_execution_control(caplog):
+    testing_utils.initialize_environment_core()
+    engine = rafcon.core.singleton.state_machine_execution_engine
+    state_machine_manager = rafcon.core.singleton.state_machine_manager
+    gvm = rafcon.core.singleton.global_variable_manager
+    state_machines = [create_counting_state_machine("loop{}".format(i), loop=True) for i in range(3)]
+    first_id, second_id, third_id = [state_machine.state_machine_id for state_machine in state_machines]
+    try:
+        for state_machine in state_machines:
+            state_machine_manager.add_state_machine(state_machine)
+            engine.start(state_machine.state_machine_id)
+        assert all(wait_for_increase("loop{}".format(i)) for i in range(3))
+
+        # pausing one state machine does not influence the others
+        engine.pause(second_id)
+        assert engine.get_execution_context(second_id).status.execution_mode is StateMachineExecutionStatus.PAUSED
+        assert engine.status.execution_mode is StateMachineExecutionStatus.STARTED
+        time.sleep(0.05)
+        paused_value = gvm.get_variable("loop1")
+        assert wait_for_increase("loop0") and wait_for_increase("loop2")
+        assert gvm.get_variable("loop1") == paused_value
+
+        # single steps of a paused state machine
+        engine.step_mode(second_id)
+        engine.step_into(second_id)
+        assert wait_for_increase("loop1")
+        engine.start(second_id)
+        assert wait_for_increase("loop1")
+
+        # stopping one state machine does not stop the others
+        engine.stop(third_id)
+        assert engine.join(5., state_machine_id=third_id)
+        assert engine.finished_or_stopped(third_id)
+        assert not engine.finished_or_stopped(first_id) and not engine.finished_or_stopped(second_id)
+        assert wait_for_increase("loop0") and wait_for_increase("loop1")
+
+        # the legacy interface controls the active state machine
+        engine.stop()
+        assert engine.join(5.)
+        assert not engine.finished_or_stopped(second_id)
+        assert wait_for_increase("loop1")
+        engine.stop(second_id)
+        assert engine.join(5., state_machine_id=second_id)
+    finally:
+        for state_machine in state_machines:
+            engine.stop(state_machine.state_machine_id)
+            engine.join(5., state_machine_id=state_machine.state_machine_id)
+            state_machine_manager.remove_state_machine(state_machine.state_machine_id)
+        testing_utils.shutdown_environment_only_core(caplog=caplog)
+
+
+def test_stop_all_state_machines(caplog):
+    testing_utils.initialize_environment_core()
+    engine = rafcon.core.singleton.state_machine_execution_engine
+    state_machine_manager = rafcon.core.singleton.state_machine_manager
+    state_machines = [create_counting_state_machine("stop{}".format(i), loop=True) for i in range(3)]
+    try:
+        for state_machine in state_machines:
+            state_machine_manager.add_state_machine(state_machine)
+            engine.start(state_machine.state_machine_id)
+        assert all(wait_for_increase("stop{}".format(i)) for i in range(3))
+        # a concurrently executed state machine cannot become the active state machine
+        with pytest.raises(AttributeError):
+            state_machine_manager.active_state_machine_id = state_machines[1].state_machine_id
+
+        assert engine.stop_all(5.)
+        for state_machine in state_machines:
+            assert engine.finished_or_stopped(state_machine.state_machine_id)
+            assert engine.join(1., state_machine_id=state_machine.state_machine_id)
+            # the contexts are removed after the execution finished
+            assert engine.get_execution_context(state_machine.state_machine_id) is engine.get_execution_context()
+    finally:
+        for state_machine in state_machines:
+            state_machine_manager.remove_state_machine(state_machine.state_machine_id)
+        testing_utils.shutdown_environment_only_core(caplog=caplog)
+
+
+if __name__ == '__main__':
+    pytest.main(['-s', __file__])
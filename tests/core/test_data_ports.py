@@ -249,6 +249,64 @@ def test_connections_from_object_type(caplog):
 
 
 
+PRODUCER_SCRIPT = """
+import numpy
+
+def execute(self, inputs, outputs, gvm):
+    outputs['image'] = numpy.zeros(100)
+    return 0
+"""
+
+CONSUMER_SCRIPT = """
+def execute(self, inputs, outputs, gvm):
+    outputs['read_only'] = not inputs['image'].flags.writeable
+    return 0
+"""
+
+
+def create_pass_by_reference_state_machine(pass_by_reference):
+    root_state = HierarchyState("root")
+    root_state.add_output_data_port("read_only", bool)
+    producer = ExecutionState("producer")
+    producer.script_text = PRODUCER_SCRIPT
+    image_output_id = producer.add_output_data_port("image", object, pass_by_reference=pass_by_reference)
+    consumer = ExecutionState("consumer")
+    consumer.script_text = CONSUMER_SCRIPT
+    image_input_id = consumer.add_input_data_port("image", object, pass_by_reference=pass_by_reference)
+    read_only_id = consumer.add_output_data_port("read_only", bool)
+    root_state.add_state(producer)
+    root_state.add_state(consumer)
+    root_state.set_start_state(producer.state_id)
+    root_state.add_transition(producer.state_id, 0, consumer.state_id, None)
+    root_state.add_transition(consumer.state_id, 0, root_state.state_id, 0)
+    root_state.add_data_flow(producer.state_id, image_output_id, consumer.state_id, image_input_id)
+    root_state.add_data_flow(consumer.state_id, read_only_id, root_state.state_id,
+                             list(root_state.output_data_ports.keys())[0])
+    return StateMachine(root_state)
+
+
+@pytest.mark.parametrize("pass_by_reference", [False, True])
+def test_pass_by_reference(pass_by_reference, caplog):
+    pytest.importorskip("numpy")
+    storage_path = testing_utils.get_unique_temp_path()
+    storage.save_state_machine_to_path(create_pass_by_reference_state_machine(pass_by_reference), storage_path)
+    state_machine = storage.load_state_machine_from_path(storage_path)
+    root_state = state_machine.root_state
+    consumer = [state for state in root_state.states.values() if state.name == "consumer"][0]
+    assert list(consumer.input_data_ports.values())[0].pass_by_reference is pass_by_reference
+
+    testing_utils.test_multithreading_lock.acquire()
+    try:
+        rafcon.core.singleton.state_machine_manager.add_state_machine(state_machine)
+        rafcon.core.singleton.state_machine_execution_engine.start(state_machine.state_machine_id)
+        rafcon.core.singleton.state_machine_execution_engine.join()
+        rafcon.core.singleton.state_machine_manager.remove_state_machine(state_machine.state_machine_id)
+        # values passed by reference are read-only views
+        assert root_state.output_data["read_only"] is pass_by_reference
+        testing_utils.assert_logger_warnings_and_errors(caplog)
+    finally:
+        testing_utils.test_multithreading_lock.release()
+
 
 if __name__ == '__main__':
     test_default_values_of_data_ports(None)
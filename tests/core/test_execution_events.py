@@ -0,0 +1,113 @@
+import threading
+
+import pytest
+from pytest import raises
+
+# core elements
+import rafcon.core.singleton
+from rafcon.core.execution.execution_events import ExecutionEventBus
+from rafcon.core.states.execution_state import ExecutionState
+from rafcon.core.states.hierarchy_state import HierarchyState
+from rafcon.core.states.state import StateExecutionStatus
+from rafcon.core.state_machine import StateMachine
+
+# test environment elements
+from tests import utils as testing_utils
+
+
+def test_event_bus():
+    with raises(ValueError):
+        ExecutionEventBus(0)
+    event_bus = ExecutionEventBus(size=10)
+    consumer = event_bus.create_consumer()
+    assert consumer.drain() == []
+
+    event_bus.publish(1, "a", StateExecutionStatus.ACTIVE, "run")
+    event_bus.publish(1, "a/b", StateExecutionStatus.ACTIVE)
+    event_bus.publish(1, "a/b", StateExecutionStatus.WAIT_FOR_NEXT_STATE)
+    event_bus.publish(2, "a/b", StateExecutionStatus.ACTIVE)
+    events = consumer.drain(max_events=2)
+    assert [event.sequence_number for event in events] == [0, 1]
+    assert events[0].path == "a" and events[0].status is StateExecutionStatus.ACTIVE and events[0].run_id == "run"
+
+    # a second consumer reads the same events
+    other_consumer = event_bus.create_consumer(from_oldest=True)
+    assert len(other_consumer.drain()) == 4
+    # only the latest status of each state is kept, the states are ordered by their latest change
+    events = consumer.drain(coalesce=True)
+    assert [(event.state_machine_id, event.status) for event in events] == \
+        [(1, StateExecutionStatus.WAIT_FOR_NEXT_STATE), (2, StateExecutionStatus.ACTIVE)]
+    assert consumer.drain() == [] and consumer.missed_events == 0
+
+    # overwritten events are skipped and counted
+    for i in range(25):
+        event_bus.publish(1, str(i), StateExecutionStatus.ACTIVE)
+    events = consumer.drain()
+    assert consumer.missed_events == 15
+    assert [event.path for event in events] == [str(i) for i in range(15, 25)]
+
+
+def test_concurrent_publishers():
+    event_bus = ExecutionEventBus(size=100000)
+    consumer = event_bus.create_consumer()
+    number_publishers, number_events = 4, 5000
+    drained_events = []
+    finished = threading.Event()
+
+    def publish(publisher):
+        for i in range(number_events):
+            event_bus.publish(publisher, str(i), StateExecutionStatus.ACTIVE)
+
+    def drain():
+        while not finished.is_set():
+            drained_events.extend(consumer.drain())
+        drained_events.extend(consumer.drain())
+
+    draining_thread = threading.Thread(target=drain)
+    draining_thread.start()
+    publishing_threads = [threading.Thread(target=publish, args=(i,)) for i in range(number_publishers)]
+    for thread in publishing_threads:
+        thread.start()
+    for thread in publishing_threads:
+        thread.join()
+    finished.set()
+    draining_thread.join()
+
+    assert [event.sequence_number for event in drained_events] == list(range(number_publishers * number_events))
+    for publisher in range(number_publishers):
+        assert [event.path for event in drained_events if event.state_machine_id == publisher] == \
+            [str(i) for i in range(number_events)]
+
+
+def test_execution_events(caplog):
+    testing_utils.initialize_environment_core()
+    root_state = HierarchyState("root")
+    child_state = ExecutionState("child")
+    root_state.add_state(child_state)
+    root_state.set_start_state(child_state.state_id)
+    root_state.add_transition(child_state.state_id, 0, root_state.state_id, 0)
+    state_machine = StateMachine(root_state)
+    consumer = rafcon.core.singleton.execution_event_bus.create_consumer()
+    coalescing_consumer = rafcon.core.singleton.execution_event_bus.create_consumer()
+    try:
+        rafcon.core.singleton.state_machine_manager.add_state_machine(state_machine)
+        rafcon.core.singleton.state_machine_execution_engine.start(state_machine.state_machine_id)
+        rafcon.core.singleton.state_machine_execution_engine.join()
+
+        events = [event for event in consumer.drain() if event.state_machine_id == state_machine.state_machine_id]
+        assert (child_state.get_path(), StateExecutionStatus.ACTIVE) in [(e.path, e.status) for e in events]
+        assert (root_state.get_path(), StateExecutionStatus.ACTIVE) in [(e.path, e.status) for e in events]
+        assert all(event.run_id is not None for event in events if event.status is StateExecutionStatus.ACTIVE)
+        # the coalesced events reflect the final status of the states
+        events = [event for event in coalescing_consumer.drain(coalesce=True)
+                  if event.state_machine_id == state_machine.state_machine_id]
+        assert len(events) == 2
+        for event in events:
+            assert state_machine.get_state_by_path(event.path).state_execution_status is event.status
+    finally:
+        rafcon.core.singleton.state_machine_manager.remove_state_machine(state_machine.state_machine_id)
+        testing_utils.shutdown_environment_only_core(caplog=caplog)
+
+
+if __name__ == '__main__':
+    pytest.main(['-s', __file__])
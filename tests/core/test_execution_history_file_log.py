@@ -1,6 +1,11 @@
 # singleton elements
 import rafcon.core.singleton
 from rafcon.core.storage import storage as global_storage
+from rafcon.core.execution.execution_history import ExecutionHistory, ExecutionHistoryStorage, CallType
+from rafcon.core.execution.binary_execution_log import BinaryExecutionLogReader, BinaryExecutionLogWriter
+from rafcon.core.states.execution_state import ExecutionState
+from rafcon.core.states.hierarchy_state import HierarchyState
+from rafcon.core.state_machine import StateMachine
 import rafcon.utils.execution_log as log_helper
 
 # test environment elements
@@ -9,11 +14,30 @@ from tests import utils as testing_utils
 import os
 
 
-def test_execution_log(caplog):
+def assert_streamed_items_match_collapsed_structure(ss):
+    start, next, concurrent, hierarchy, collapsed_items = log_helper.log_to_collapsed_structure(ss)
+    streamed_items = {item['run_id']: item for item in log_helper.log_to_collapsed_items(ss)}
+    assert set(streamed_items.keys()) == set(collapsed_items.keys()) - {start['run_id']}
+    for run_id, item in streamed_items.items():
+        for key, value in collapsed_items[run_id].items():
+            if isinstance(item[key], log_helper.LazyDataDict):
+                assert set(item[key].keys()) == set(value.keys())
+                assert all(str(item[key][k]) == str(v) for k, v in value.items())
+            else:
+                assert item[key] == value
+    return streamed_items
+
+
+@pytest.mark.parametrize("queue_size, backend", [(0, 'shelve'), (1000, 'shelve'), (1000, 'binary')])
+def test_execution_log(queue_size, backend, caplog):
+    # the states of the test state machine and log_to_DataFrame use pandas
+    pytest.importorskip("pandas")
     try:
         testing_utils.initialize_environment_core(
             core_config={'EXECUTION_LOG_ENABLE': True,
-                         'EXECUTION_LOG_PATH': testing_utils.get_unique_temp_path()+'/test_execution_log'})
+                         'EXECUTION_LOG_PATH': testing_utils.get_unique_temp_path()+'/test_execution_log',
+                         'EXECUTION_LOG_QUEUE_SIZE': queue_size,
+                         'EXECUTION_LOG_BACKEND': backend})
 
         state_machine = global_storage.load_state_machine_from_path(
             testing_utils.get_test_sm_path(os.path.join("unit_test_state_machines",
@@ -23,9 +47,7 @@ def test_execution_log(caplog):
         rafcon.core.singleton.state_machine_execution_engine.start(state_machine.state_machine_id)
         rafcon.core.singleton.state_machine_execution_engine.join()
 
-        import shelve
-        import json
-        ss = shelve.open(state_machine.get_last_execution_log_filename())
+        ss = log_helper.open_execution_log(state_machine.get_last_execution_log_filename())
 
         assert len(ss) == 36
 
@@ -56,12 +78,165 @@ def test_execution_log(caplog):
         assert len(all_starts) == 3
         assert list(all_starts['outcome_name']) == ['success', 'success', 'done']
 
+        assert_streamed_items_match_collapsed_structure(ss)
+
+        df = log_helper.log_to_DataFrame(ss, data_in_columns=['input_1'], scoped_out_columns=['product'])
+        prod2_row = df.groupby('state_name').get_group('MakeProd2')
+        assert list(prod2_row['data_ins__input_1']) == [0]
+        assert list(prod2_row['scoped_data_outs__product']) == [1]
+
+        ss.close()
         rafcon.core.singleton.state_machine_manager.remove_state_machine(state_machine.state_machine_id)
-    except ImportError:  # if pandas is not installed
-        pass
     finally:
         testing_utils.shutdown_environment_only_core(caplog=caplog, expected_warnings=0, expected_errors=0)
 
+
+@pytest.mark.parametrize("backend", ['shelve', 'binary'])
+def test_collapsed_items_of_execution_log(backend, caplog):
+    testing_utils.initialize_environment_core(
+        core_config={'EXECUTION_LOG_ENABLE': True,
+                     'EXECUTION_LOG_PATH': testing_utils.get_unique_temp_path() + '/test_execution_log',
+                     'EXECUTION_LOG_BACKEND': backend})
+    try:
+        root_state = HierarchyState("root")
+        scoped_variable_id = root_state.add_scoped_variable("counter", "int", 0)
+        last_state = None
+        for i in range(3):
+            state = ExecutionState("state{0}".format(i))
+            state.script_text = "def execute(self, inputs, outputs, gvm):\n" \
+                                "    outputs['counter'] = inputs['counter'] + 1\n" \
+                                "    return 0\n"
+            input_port_id = state.add_input_data_port("counter", "int", 0)
+            output_port_id = state.add_output_data_port("counter", "int", 0)
+            root_state.add_state(state)
+            root_state.add_data_flow(root_state.state_id, scoped_variable_id, state.state_id, input_port_id)
+            root_state.add_data_flow(state.state_id, output_port_id, root_state.state_id, scoped_variable_id)
+            if last_state is None:
+                root_state.set_start_state(state.state_id)
+            else:
+                root_state.add_transition(last_state.state_id, 0, state.state_id, None)
+            last_state = state
+        root_state.add_transition(last_state.state_id, 0, root_state.state_id, 0)
+        state_machine = StateMachine(root_state)
+
+        rafcon.core.singleton.state_machine_manager.add_state_machine(state_machine)
+        rafcon.core.singleton.state_machine_execution_engine.start(state_machine.state_machine_id)
+        rafcon.core.singleton.state_machine_execution_engine.join()
+
+        ss = log_helper.open_execution_log(state_machine.get_last_execution_log_filename())
+        streamed_items = assert_streamed_items_match_collapsed_structure(ss)
+        counters = sorted((item['state_name'], item['data_ins']['counter'], item['data_outs']['counter'])
+                          for item in streamed_items.values() if item['state_type'] == 'ExecutionState')
+        assert counters == [("state0", 0, 1), ("state1", 1, 2), ("state2", 2, 3)]
+        ss.close()
+        rafcon.core.singleton.state_machine_manager.remove_state_machine(state_machine.state_machine_id)
+    finally:
+        testing_utils.shutdown_environment_only_core(caplog=caplog)
+
+
+def test_binary_execution_log(caplog):
+    testing_utils.initialize_environment_core()
+    try:
+        log_path = os.path.join(testing_utils.get_unique_temp_path(), 'execution_log')
+        writer = BinaryExecutionLogWriter(log_path, segment_size=200)
+        for i in range(10):
+            writer[str(i)] = {'run_id': 'run' + str(i % 2), 'path': 'root/state', 'timestamp': float(i),
+                              'data': 'x' * 100}
+        writer.close()
+        assert len([f for f in os.listdir(log_path) if f.startswith('segment')]) > 1
+
+        # a crash while writing leaves an incomplete index entry
+        with open(os.path.join(log_path, 'index'), 'ab') as index_file:
+            index_file.write(b'\xff\x00\x00\x00incomplete')
+
+        with BinaryExecutionLogReader(log_path) as reader:
+            assert list(reader.keys()) == [str(i) for i in range(10)]
+            assert reader['3']['timestamp'] == 3.
+            assert reader.get_keys_by_run_id('run1') == ['1', '3', '5', '7', '9']
+            assert len(reader.get_keys_by_path('root/state')) == 10
+            assert reader.get_keys_by_time(2., 5.) == ['2', '3', '4']
+    finally:
+        testing_utils.shutdown_environment_only_core(caplog=caplog, expected_warnings=1)
+
+
+def test_convert_shelve_to_binary_log(caplog):
+    testing_utils.initialize_environment_core()
+    try:
+        import shelve
+        shelve_path = os.path.join(testing_utils.get_unique_temp_path(), 'execution_log.shelve')
+        ss = shelve.open(shelve_path, flag='c', protocol=2)
+        for i in [3, 1, 2]:
+            ss[str(i)] = {'run_id': 'run', 'path': 'root', 'timestamp': float(i)}
+        ss.close()
+
+        binary_log_path = os.path.join(testing_utils.get_unique_temp_path(), 'execution_log.rlog')
+        assert log_helper.convert_shelve_to_binary_log(shelve_path, binary_log_path) == 3
+        reader = log_helper.open_execution_log(binary_log_path)
+        assert list(reader.keys()) == ['1', '2', '3']
+        assert reader['2'] == {'run_id': 'run', 'path': 'root', 'timestamp': 2.}
+        reader.close()
+    finally:
+        testing_utils.shutdown_environment_only_core(caplog=caplog)
+
+
+def test_execution_log_backpressure_drops_data(caplog):
+    testing_utils.initialize_environment_core()
+    try:
+        state = ExecutionState("logged_state")
+        state.add_input_data_port("input", "int", 0)
+        filename = os.path.join(testing_utils.get_unique_temp_path(), 'execution_log.shelve')
+        storage = ExecutionHistoryStorage(filename, queue_size=2, batch_size=100, flush_interval=60.,
+                                          backpressure_policy='DROP_DATA')
+        execution_history = ExecutionHistory()
+        execution_history.set_execution_history_storage(storage)
+        for _ in range(6):
+            execution_history.push_call_history_item(state, CallType.EXECUTE, None, {'input': 42})
+        # the queue is bounded: two items with data, two items without data, the other items are dropped
+        assert storage.number_of_items_without_data == 2 and storage.number_of_dropped_items == 2
+        storage.close()
+        execution_history.destroy()
+
+        import shelve
+        ss = shelve.open(filename)
+        records = sorted(ss.values(), key=lambda record: record['timestamp'])
+        assert len(records) == 4
+        for record in records[:2]:
+            assert 'data_dropped' not in record and record['input_output_data']
+        for record in records[2:]:
+            assert record['data_dropped'] and record['input_output_data'] == {}
+            assert record['state_name'] == "logged_state"
+        ss.close()
+    finally:
+        testing_utils.shutdown_environment_only_core(caplog=caplog, expected_warnings=2)
+
+
+def test_execution_log_shows_state_at_execution_step(caplog):
+    testing_utils.initialize_environment_core()
+    try:
+        state = ExecutionState("logged_state")
+        state.semantic_data["key"] = ["value"]
+        filename = os.path.join(testing_utils.get_unique_temp_path(), 'execution_log.shelve')
+        storage = ExecutionHistoryStorage(filename, queue_size=10, batch_size=100, flush_interval=60.)
+        execution_history = ExecutionHistory()
+        execution_history.set_execution_history_storage(storage)
+        execution_history.push_call_history_item(state, CallType.EXECUTE, None, {})
+        # the state is changed, before the writer thread writes the history item
+        state.name = "renamed_state"
+        state.description = "changed"
+        state.semantic_data["key"].append("changed value")
+        storage.close()
+        execution_history.destroy()
+
+        import pickle
+        import shelve
+        ss = shelve.open(filename)
+        record = list(ss.values())[0]
+        assert record['state_name'] == "logged_state" and record['description'] != "changed"
+        assert pickle.loads(record['semantic_data']['key']) == ["value"]
+        ss.close()
+    finally:
+        testing_utils.shutdown_environment_only_core(caplog=caplog)
+
 if __name__ == '__main__':
-    test_execution_log(None)
+    test_execution_log(0, 'shelve', None)
     # pytest.main([__file__])
@@ -0,0 +1,111 @@
+import pytest
+
+# core elements
+import rafcon.core.singleton
+from rafcon.core.execution.execution_history import ExecutionHistory, CallType, CallItem, ReturnItem
+from rafcon.core.states.execution_state import ExecutionState
+from rafcon.core.states.hierarchy_state import HierarchyState
+from rafcon.core.state_machine import StateMachine
+
+# test environment elements
+from tests import utils as testing_utils
+
+
+def push_state_executions(execution_history, container_state, state, number_of_executions):
+    for _ in range(number_of_executions):
+        state.input_data = {'input': list(range(100))}
+        execution_history.push_call_history_item(state, CallType.EXECUTE, container_state, state.input_data)
+        execution_history.push_return_history_item(state, CallType.EXECUTE, container_state, state.input_data)
+
+
+def create_states():
+    root_state = HierarchyState("root")
+    state = ExecutionState("state")
+    root_state.add_state(state)
+    root_state.add_scoped_variable("counter", "int", 0)
+    root_state.add_default_values_of_scoped_variables_to_scoped_data()
+    return root_state, state
+
+
+@pytest.mark.parametrize("retention_policy", ExecutionHistory.RETENTION_POLICIES)
+def test_execution_history_max_items(retention_policy, caplog):
+    testing_utils.initialize_environment_core()
+    try:
+        root_state, state = create_states()
+        execution_history = ExecutionHistory(max_items=4, retention_policy=retention_policy)
+        push_state_executions(execution_history, root_state, state, 10)
+
+        history_items = list(execution_history)
+        if retention_policy == 'DROP_ITEMS':
+            assert len(history_items) == 4
+            assert history_items[0].prev is None
+            assert history_items[0].prev_history_item_id is not None
+            assert history_items[0].to_dict()['prev_history_item_id'] == history_items[0].prev_history_item_id
+        else:
+            assert len(history_items) == 20
+            assert all(item.child_state_input_output_data == {} for item in history_items[:16])
+            assert all(item.child_state_input_output_data for item in history_items[16:])
+            keep_scoped_data = retention_policy == 'KEEP_SCOPED_DATA'
+            assert all(bool(item.scoped_data) is keep_scoped_data for item in history_items[:16])
+        assert isinstance(execution_history.get_last_history_item(), ReturnItem)
+        # the history can be sliced like a list, e.g. by the execution history tree of the GUI
+        assert execution_history[1:] == history_items[1:]
+        assert execution_history[-1] is history_items[-1]
+        assert execution_history.is_backward_step_possible()
+
+        # step back over the executions kept with their data
+        for _ in range(4):
+            execution_history.pop_last_item()
+        assert execution_history.is_backward_step_possible() is (retention_policy == 'KEEP_SCOPED_DATA')
+        execution_history.destroy()
+    finally:
+        testing_utils.shutdown_environment_only_core(caplog=caplog)
+
+
+def test_execution_history_max_bytes(caplog):
+    testing_utils.initialize_environment_core()
+    try:
+        root_state, state = create_states()
+        execution_history = ExecutionHistory(max_bytes=3000, retention_policy='DROP_DATA')
+        push_state_executions(execution_history, root_state, state, 10)
+        assert 0 < execution_history.data_size <= 3000
+        assert isinstance(execution_history[0], CallItem)
+        assert execution_history[0].data_released
+
+        data_size = execution_history.data_size
+        execution_history.pop_last_item()
+        assert execution_history.data_size < data_size
+        execution_history.destroy()
+    finally:
+        testing_utils.shutdown_environment_only_core(caplog=caplog)
+
+
+def test_execution_history_max_runs(caplog):
+    testing_utils.initialize_environment_core(core_config={'EXECUTION_HISTORY_MAX_ITEMS': 5,
+                                                           'EXECUTION_HISTORY_MAX_RUNS': 2})
+    try:
+        root_state = HierarchyState("root")
+        last_state = None
+        for i in range(3):
+            state = ExecutionState("state{0}".format(i))
+            root_state.add_state(state)
+            if last_state is None:
+                root_state.set_start_state(state.state_id)
+            else:
+                root_state.add_transition(last_state.state_id, 0, state.state_id, None)
+            last_state = state
+        root_state.add_transition(last_state.state_id, 0, root_state.state_id, 0)
+        state_machine = StateMachine(root_state)
+        rafcon.core.singleton.state_machine_manager.add_state_machine(state_machine)
+        for _ in range(3):
+            rafcon.core.singleton.state_machine_execution_engine.start(state_machine.state_machine_id)
+            rafcon.core.singleton.state_machine_execution_engine.join()
+        assert len(state_machine.execution_histories) == 2
+        assert all(len(execution_history) == 5 for execution_history in state_machine.execution_histories)
+        rafcon.core.singleton.state_machine_manager.remove_state_machine(state_machine.state_machine_id)
+    finally:
+        testing_utils.shutdown_environment_only_core(caplog=caplog)
+
+
+if __name__ == '__main__':
+    pytest.main(['-s', __file__])
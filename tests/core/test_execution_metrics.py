@@ -0,0 +1,170 @@
+import json
+import os
+import random
+
+import pytest
+from pytest import raises
+
+# core elements
+import rafcon.core.singleton
+from rafcon.core.config import global_config
+from rafcon.core.execution.binary_execution_log import BinaryExecutionLogReader
+from rafcon.core.execution.execution_metrics import LatencyHistogram
+from rafcon.core.states.execution_state import ExecutionState
+from rafcon.core.states.hierarchy_state import HierarchyState
+from rafcon.core.state_machine import StateMachine
+
+# test environment elements
+from tests import utils as testing_utils
+
+
+def test_latency_histogram():
+    histogram = LatencyHistogram()
+    assert histogram.quantile(0.5) is None and histogram.mean is None
+    random_generator = random.Random(0)
+    durations = sorted(random_generator.uniform(1e-6, 10.) * 10 ** random_generator.randint(-5, 0)
+                       for _ in range(10000))
+    for duration in durations:
+        histogram.record(duration)
+    assert histogram.count == len(durations)
+    assert histogram.min == durations[0] and histogram.max == durations[-1]
+    assert histogram.sum == pytest.approx(sum(durations))
+    # the relative error of the quantiles is bounded by the size of the sub-buckets
+    for q in [0.1, 0.5, 0.9, 0.99]:
+        exact_value = durations[int(q * len(durations) + 0.5) - 1]
+        assert histogram.quantile(q) == pytest.approx(exact_value, rel=1. / 16, abs=1e-6)
+    assert histogram.quantile(1.) == durations[-1]
+
+    other_histogram = LatencyHistogram()
+    other_histogram.record(100.)
+    histogram.merge(other_histogram)
+    assert histogram.count == len(durations) + 1 and histogram.max == 100.
+    with raises(ValueError):
+        histogram.merge(LatencyHistogram(unit=1e-3))
+
+
+def create_state_machine():
+    root_state = HierarchyState("root")
+    working_state = ExecutionState("working state")
+    working_state.script_text = "def execute(self, inputs, outputs, gvm):\n" \
+                                "    self.preemptive_wait(0.02)\n" \
+                                "    outputs['value'] = inputs['value'] + 1\n" \
+                                "    return 0\n"
+    working_state.add_input_data_port("value", "int", 0)
+    working_state.add_output_data_port("value", "int", 0)
+    failing_state = ExecutionState("failing state")
+    failing_state.script_text = "def execute(self, inputs, outputs, gvm):\n" \
+                                "    raise ValueError('failure')\n"
+    root_state.add_state(working_state)
+    root_state.add_state(failing_state)
+    root_state.set_start_state(working_state.state_id)
+    root_state.add_transition(working_state.state_id, 0, failing_state.state_id, None)
+    root_state.add_transition(failing_state.state_id, -1, root_state.state_id, 0)
+    return StateMachine(root_state), working_state, failing_state
+
+
+def test_execution_metrics(caplog):
+    testing_utils.initialize_environment_core()
+    execution_metrics = rafcon.core.singleton.execution_metrics
+    export_folder = testing_utils.get_unique_temp_path()
+    global_config.set_config_value('EXECUTION_METRICS_EXPORT_PATH', os.path.join(export_folder, "metrics.prom"))
+    execution_metrics.reset()
+    execution_metrics.enabled = True
+    state_machine, working_state, failing_state = create_state_machine()
+    try:
+        rafcon.core.singleton.state_machine_manager.add_state_machine(state_machine)
+        for run in range(2):
+            rafcon.core.singleton.state_machine_execution_engine.start(state_machine.state_machine_id)
+            rafcon.core.singleton.state_machine_execution_engine.join()
+
+        working_state_metrics = execution_metrics.get_metrics(working_state.get_path())[0]
+        assert working_state_metrics.executions == 2 and working_state_metrics.aborted == 0
+        assert working_state_metrics.history_items == 4
+        assert set(working_state_metrics.durations) == {'total', 'input', 'script', 'output', 'history'}
+        assert working_state_metrics.durations['script'].count == 2
+        assert working_state_metrics.durations['script'].min >= 0.02
+        assert working_state_metrics.library is None and working_state_metrics.state_type == "ExecutionState"
+        failing_state_metrics = execution_metrics.get_metrics(failing_state.get_path())[0]
+        assert failing_state_metrics.executions == 2 and failing_state_metrics.aborted == 2
+        root_state_metrics = execution_metrics.get_metrics(state_machine.root_state.get_path())[0]
+        assert root_state_metrics.executions == 2
+        assert len(execution_metrics.get_metrics(state_machine.root_state.get_path())) == 3
+
+        # the root state and the working state take the most time
+        hot_spots = execution_metrics.get_hot_spots(number=2)
+        assert [metrics.path for metrics in hot_spots] == [state_machine.root_state.get_path(),
+                                                            working_state.get_path()]
+        assert execution_metrics.get_hot_spots('script', number=1)[0] is working_state_metrics
+
+        # the metrics were exported after each run
+        with open(os.path.join(export_folder, "metrics.prom")) as prometheus_file:
+            prometheus_text = prometheus_file.read()
+        assert "# TYPE rafcon_state_executions_total counter" in prometheus_text
+        assert 'rafcon_state_aborted_total{{path="{0}",name="failing state",library=""}} 2'.format(
+            failing_state.get_path()) in prometheus_text
+        assert 'rafcon_state_duration_seconds_count{{path="{0}",name="working state",library="",' \
+               'phase="script"}} 2'.format(working_state.get_path()) in prometheus_text
+        execution_metrics.export(os.path.join(export_folder, "metrics.json"))
+        with open(os.path.join(export_folder, "metrics.json")) as json_file:
+            snapshot = json.load(json_file)
+        state_snapshots = {state_snapshot['path']: state_snapshot for state_snapshot in snapshot['states']}
+        assert state_snapshots[working_state.get_path()]['durations']['script']['count'] == 2
+
+        # no metrics are recorded if the registry is disabled
+        execution_metrics.reset()
+        execution_metrics.enabled = False
+        rafcon.core.singleton.state_machine_execution_engine.start(state_machine.state_machine_id)
+        rafcon.core.singleton.state_machine_execution_engine.join()
+        assert execution_metrics.get_metrics() == []
+    finally:
+        execution_metrics.enabled = None
+        execution_metrics.reset()
+        global_config.set_config_value('EXECUTION_METRICS_EXPORT_PATH', None)
+        rafcon.core.singleton.state_machine_manager.remove_state_machine(state_machine.state_machine_id)
+        testing_utils.shutdown_environment_only_core(caplog=caplog, expected_errors=3)
+
+
+@pytest.mark.parametrize("queue_size", [0, 1000])
+def test_execution_log_metrics(queue_size, caplog):
+    testing_utils.initialize_environment_core(
+        core_config={'EXECUTION_LOG_ENABLE': True,
+                     'EXECUTION_LOG_PATH': testing_utils.get_unique_temp_path() + '/test_execution_log',
+                     'EXECUTION_LOG_QUEUE_SIZE': queue_size,
+                     'EXECUTION_LOG_BACKEND': 'binary'})
+    execution_metrics = rafcon.core.singleton.execution_metrics
+    execution_metrics.reset()
+    execution_metrics.enabled = True
+    state_machine, working_state, failing_state = create_state_machine()
+    try:
+        rafcon.core.singleton.state_machine_manager.add_state_machine(state_machine)
+        rafcon.core.singleton.state_machine_execution_engine.start(state_machine.state_machine_id)
+        rafcon.core.singleton.state_machine_execution_engine.join()
+
+        # the bytes written by the binary writer are recorded
+        log_path = state_machine.get_last_execution_log_filename()
+        with BinaryExecutionLogReader(log_path) as log_reader:
+            number_of_records = len(log_reader)
+        log_size = sum(os.path.getsize(os.path.join(log_path, file_name)) for file_name in os.listdir(log_path))
+        state_metrics = execution_metrics.get_metrics()
+        assert sum(metrics.log_items for metrics in state_metrics) == number_of_records
+        assert sum(metrics.log_bytes for metrics in state_metrics) == log_size
+        working_state_metrics = execution_metrics.get_metrics(working_state.get_path())[0]
+        assert working_state_metrics.log_items == 2 and working_state_metrics.log_bytes > 0
+        assert 'rafcon_state_log_bytes_total{{path="{0}",name="working state",library=""}} {1}'.format(
+            working_state.get_path(), working_state_metrics.log_bytes) in execution_metrics.to_prometheus_text()
+
+        # the metrics show the current name of a renamed state
+        working_state.name = "renamed state"
+        rafcon.core.singleton.state_machine_execution_engine.start(state_machine.state_machine_id)
+        rafcon.core.singleton.state_machine_execution_engine.join()
+        assert working_state_metrics.log_items == 4
+        assert working_state_metrics.to_dict()['name'] == "renamed state"
+    finally:
+        execution_metrics.enabled = None
+        execution_metrics.reset()
+        rafcon.core.singleton.state_machine_manager.remove_state_machine(state_machine.state_machine_id)
+        testing_utils.shutdown_environment_only_core(caplog=caplog, expected_errors=2)
+
+
+if __name__ == '__main__':
+    pytest.main(['-s', __file__])
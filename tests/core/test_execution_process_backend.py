@@ -0,0 +1,126 @@
+import time
+
+import pytest
+
+# core elements
+import rafcon.core.singleton
+from rafcon.core.states.execution_state import ExecutionState
+from rafcon.core.states.hierarchy_state import HierarchyState
+from rafcon.core.states.preemptive_concurrency_state import PreemptiveConcurrencyState
+from rafcon.core.storage import storage
+from rafcon.core.state_machine import StateMachine
+
+# test environment elements
+from tests import utils as testing_utils
+
+COMPUTE_SCRIPT = """
+import os
+
+def execute(self, inputs, outputs, gvm):
+    gvm.set_variable("worker_pid", os.getpid())
+    outputs["result"] = inputs["value"] * 2
+    self.persistent_variables["runs"] = self.persistent_variables.get("runs", 0) + 1
+    return "success"
+"""
+
+BUSY_SCRIPT = """
+def execute(self, inputs, outputs, gvm):
+    while True:
+        pass
+"""
+
+FAST_SCRIPT = """
+import time
+
+def execute(self, inputs, outputs, gvm):
+    time.sleep(0.2)
+    return 0
+"""
+
+FAULTY_SCRIPT = """
+def execute(self, inputs, outputs, gvm):
+    return 1 / 0
+"""
+
+
+def execute_state_machine(state_machine):
+    rafcon.core.singleton.state_machine_manager.add_state_machine(state_machine)
+    try:
+        rafcon.core.singleton.state_machine_execution_engine.start(state_machine.state_machine_id)
+        rafcon.core.singleton.state_machine_execution_engine.join()
+    finally:
+        rafcon.core.singleton.state_machine_manager.remove_state_machine(state_machine.state_machine_id)
+
+
+def test_process_backend_exchanges_data(caplog):
+    testing_utils.initialize_environment_core()
+    try:
+        root_state = HierarchyState("root")
+        root_state.add_input_data_port("value", "int", 21)
+        output_id = root_state.add_output_data_port("result", "int")
+        state = ExecutionState("compute", execution_backend='PROCESS')
+        state.script_text = COMPUTE_SCRIPT
+        state_input_id = state.add_input_data_port("value", "int")
+        state_output_id = state.add_output_data_port("result", "int")
+        root_state.add_state(state)
+        root_state.set_start_state(state.state_id)
+        root_state.add_transition(state.state_id, 0, root_state.state_id, 0)
+        root_state.add_data_flow(root_state.state_id, list(root_state.input_data_ports.keys())[0],
+                                 state.state_id, state_input_id)
+        root_state.add_data_flow(state.state_id, state_output_id, root_state.state_id, output_id)
+
+        storage_path = testing_utils.get_unique_temp_path()
+        storage.save_state_machine_to_path(StateMachine(root_state), storage_path)
+        state_machine = storage.load_state_machine_from_path(storage_path)
+        assert list(state_machine.root_state.states.values())[0].execution_backend == 'PROCESS'
+
+        execute_state_machine(state_machine)
+        assert state_machine.root_state.output_data["result"] == 42
+        assert state_machine.root_state.final_outcome.outcome_id == 0
+        worker_pid = rafcon.core.singleton.global_variable_manager.get_variable("worker_pid")
+        assert worker_pid is not None and worker_pid != __import__('os').getpid()
+    finally:
+        testing_utils.shutdown_environment_only_core(caplog=caplog)
+
+
+def test_process_backend_terminates_preempted_state(caplog):
+    testing_utils.initialize_environment_core(core_config={'EXECUTION_STATE_BACKEND': 'PROCESS'})
+    try:
+        preemptive_state = PreemptiveConcurrencyState("preemptive")
+        busy_state = ExecutionState("busy")
+        busy_state.script_text = BUSY_SCRIPT
+        fast_state = ExecutionState("fast", execution_backend='THREAD')
+        fast_state.script_text = FAST_SCRIPT
+        preemptive_state.add_state(busy_state)
+        preemptive_state.add_state(fast_state)
+        preemptive_state.add_transition(fast_state.state_id, 0, preemptive_state.state_id, 0)
+        state_machine = StateMachine(preemptive_state)
+
+        start_time = time.time()
+        execute_state_machine(state_machine)
+        # the busy script cannot be preempted cooperatively, thus its worker process must have been terminated
+        assert time.time() - start_time < 10.
+        assert preemptive_state.final_outcome.outcome_id == 0
+    finally:
+        testing_utils.shutdown_environment_only_core(caplog=caplog)
+
+
+def test_process_backend_propagates_errors(caplog):
+    testing_utils.initialize_environment_core(core_config={'EXECUTION_STATE_BACKEND': 'PROCESS'})
+    try:
+        state = ExecutionState("faulty")
+        state.script_text = FAULTY_SCRIPT
+        state_machine = StateMachine(state)
+        execute_state_machine(state_machine)
+        assert state.final_outcome.outcome_id == -1
+        assert "ZeroDivisionError" in str(state.output_data["error"])
+        # the error is logged once, with the traceback of the worker process
+        error_records = [record for record in caplog.records if record.levelname == "ERROR"]
+        assert len(error_records) == 1 and "ZeroDivisionError" in error_records[0].getMessage()
+        assert "Traceback" in error_records[0].getMessage()
+    finally:
+        testing_utils.shutdown_environment_only_core(caplog=caplog, expected_errors=1)
+
+
+if __name__ == '__main__':
+    pytest.main(['-s', __file__])
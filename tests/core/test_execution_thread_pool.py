@@ -0,0 +1,109 @@
+import threading
+
+import pytest
+
+# core elements
+import rafcon.core.singleton
+from rafcon.core.config import global_config
+from rafcon.core.execution.execution_thread_pool import ExecutionThreadPool
+from rafcon.core.states.execution_state import ExecutionState
+from rafcon.core.states.hierarchy_state import HierarchyState
+from rafcon.core.states.barrier_concurrency_state import BarrierConcurrencyState
+from rafcon.core.constants import UNIQUE_DECIDER_STATE_ID
+from rafcon.core.state_machine import StateMachine
+
+# test environment elements
+from tests import utils as testing_utils
+
+
+def test_thread_pool_reuses_idle_threads():
+    pool = ExecutionThreadPool(max_idle_threads=2)
+    thread_names = []
+
+    def work():
+        thread_names.append(threading.current_thread().name)
+
+    for _ in range(5):
+        pool.start_task(work).join()
+    assert len(thread_names) == 5
+    assert pool.number_of_created_threads == 1
+
+    # after the shutdown, tasks are executed by new threads, which are not kept by the pool
+    pool.shutdown()
+    task = pool.start_task(work)
+    task.join(5)
+    assert not task.is_alive()
+    assert len(thread_names) == 6
+    assert pool.number_of_created_threads == 1
+    assert pool.number_of_idle_threads == 0
+
+
+def test_thread_pool_does_not_block_nested_tasks():
+    pool = ExecutionThreadPool(max_idle_threads=1)
+    finished = []
+
+    def nested(depth):
+        if depth > 0:
+            pool.start_task(lambda: nested(depth - 1)).join()
+        finished.append(depth)
+
+    task = pool.start_task(lambda: nested(5))
+    task.join(5)
+    assert not task.is_alive()
+    assert finished == [0, 1, 2, 3, 4, 5]
+    pool.shutdown()
+
+
+def create_state_machine():
+    root_state = HierarchyState("root")
+    root_state.add_output_data_port("counter", "int", 0)
+    last_state = None
+    for i in range(3):
+        state = ExecutionState("state{}".format(i))
+        state.script_text = "def execute(self, inputs, outputs, gvm):\n" \
+                            "    outputs['counter'] = inputs['counter'] + 1\n" \
+                            "    return 0\n"
+        state.add_input_data_port("counter", "int", 0)
+        state.add_output_data_port("counter", "int", 0)
+        root_state.add_state(state)
+        if last_state is None:
+            root_state.set_start_state(state.state_id)
+        else:
+            root_state.add_transition(last_state.state_id, 0, state.state_id, None)
+            root_state.add_data_flow(last_state.state_id, list(last_state.output_data_ports.keys())[0],
+                                     state.state_id, list(state.input_data_ports.keys())[0])
+        last_state = state
+    root_state.add_transition(last_state.state_id, 0, root_state.state_id, 0)
+    root_state.add_data_flow(last_state.state_id, list(last_state.output_data_ports.keys())[0],
+                             root_state.state_id, list(root_state.output_data_ports.keys())[0])
+
+    barrier_state = BarrierConcurrencyState("barrier")
+    barrier_state.add_state(root_state)
+    barrier_state.add_transition(UNIQUE_DECIDER_STATE_ID, 0, barrier_state.state_id, 0)
+    return StateMachine(barrier_state), root_state
+
+
+@pytest.mark.parametrize("thread_pool_size, inline", [(0, False), (10, False), (10, True)])
+def test_execution_with_thread_pool(thread_pool_size, inline, caplog):
+    testing_utils.initialize_environment_core()
+    global_config.set_config_value("EXECUTION_THREAD_POOL_SIZE", thread_pool_size)
+    global_config.set_config_value("EXECUTION_INLINE_HIERARCHY_CHILDREN", inline)
+    state_machine, hierarchy_state = create_state_machine()
+    try:
+        rafcon.core.singleton.state_machine_manager.add_state_machine(state_machine)
+        for _ in range(2):
+            rafcon.core.singleton.state_machine_execution_engine.start(state_machine.state_machine_id)
+            rafcon.core.singleton.state_machine_execution_engine.join()
+            assert hierarchy_state.output_data["counter"] == 3
+        if thread_pool_size:
+            assert state_machine.execution_thread_pool.number_of_idle_threads > 0
+        else:
+            assert state_machine.execution_thread_pool is None
+        assert state_machine.inline_hierarchy_children is inline
+    finally:
+        testing_utils.shutdown_environment_only_core(caplog=caplog)
+    assert state_machine.execution_thread_pool is None
+
+
+if __name__ == '__main__':
+    pytest.main(['-s', __file__])
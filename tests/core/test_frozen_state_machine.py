@@ -0,0 +1,120 @@
+import threading
+
+import pytest
+from pytest import raises
+
+# core elements
+import rafcon.core.singleton
+from rafcon.core.config import global_config
+from rafcon.core.states.execution_state import ExecutionState
+from rafcon.core.states.hierarchy_state import HierarchyState
+from rafcon.core.states.state import StateExecutionStatus
+from rafcon.core.state_machine import StateMachine
+
+# test environment elements
+from tests import utils as testing_utils
+
+
+def create_state_machine():
+    root_state = HierarchyState("root")
+    root_state.add_output_data_port("counter", "int", 0)
+    root_state.add_scoped_variable("counter", "int", 0)
+    last_state = None
+    for i in range(3):
+        state = ExecutionState("state{}".format(i))
+        state.script_text = "def execute(self, inputs, outputs, gvm):\n" \
+                            "    outputs['counter'] = inputs['counter'] + 1\n" \
+                            "    return 0\n"
+        input_port_id = state.add_input_data_port("counter", "int", 0)
+        output_port_id = state.add_output_data_port("counter", "int", 0)
+        root_state.add_state(state)
+        if last_state is None:
+            root_state.set_start_state(state.state_id)
+        else:
+            root_state.add_transition(last_state.state_id, 0, state.state_id, None)
+        root_state.add_data_flow(root_state.state_id, list(root_state.scoped_variables.keys())[0],
+                                 state.state_id, input_port_id)
+        root_state.add_data_flow(state.state_id, output_port_id,
+                                 root_state.state_id, list(root_state.scoped_variables.keys())[0])
+        last_state = state
+    root_state.add_transition(last_state.state_id, 0, root_state.state_id, 0)
+    root_state.add_data_flow(last_state.state_id, list(last_state.output_data_ports.keys())[0],
+                             root_state.state_id, list(root_state.output_data_ports.keys())[0])
+    return StateMachine(root_state)
+
+
+def test_frozen_state_machine(caplog):
+    state_machine = create_state_machine()
+    root_state = state_machine.root_state
+    child_state = list(root_state.states.values())[0]
+    changes = []
+    state_machine.add_execution_status_callback(lambda state, status: changes.append((state, status)))
+
+    state_machine.freeze()
+    assert state_machine.frozen
+    assert child_state.frozen_state_machine is state_machine
+    assert list(child_state.outcomes.values())[0].frozen_state_machine is state_machine
+
+    # the structure cannot be modified
+    with raises(RuntimeError):
+        root_state.add_state(ExecutionState("new state"))
+    with raises(RuntimeError):
+        child_state.name = "new name"
+    with raises(RuntimeError):
+        child_state.add_outcome("new outcome")
+    assert len(root_state.states) == 3 and child_state.name == "state0"
+
+    # execution data is changed without acquiring the modification lock
+    modification_lock_acquired = threading.Event()
+    release_modification_lock = threading.Event()
+
+    def hold_modification_lock():
+        with state_machine.modification_lock():
+            modification_lock_acquired.set()
+            release_modification_lock.wait(5.)
+    locking_thread = threading.Thread(target=hold_modification_lock)
+    locking_thread.start()
+    try:
+        assert modification_lock_acquired.wait(5.)
+        child_state.state_execution_status = StateExecutionStatus.ACTIVE
+        root_state.add_input_data_to_scoped_data({})
+    finally:
+        release_modification_lock.set()
+        locking_thread.join()
+    assert changes == [(child_state, StateExecutionStatus.ACTIVE)]
+
+    state_machine.unfreeze()
+    assert not state_machine.frozen and child_state.frozen_state_machine is None
+    child_state.name = "new name"
+    # callbacks are only called for frozen state machines
+    child_state.state_execution_status = StateExecutionStatus.INACTIVE
+    assert len(changes) == 1
+    testing_utils.assert_logger_warnings_and_errors(caplog)
+
+
+def test_frozen_execution(caplog):
+    testing_utils.initialize_environment_core(core_config={'EXECUTION_FREEZE_STATE_MACHINE': True})
+    state_machine = create_state_machine()
+    changes = []
+    state_machine.add_execution_status_callback(lambda state, status: changes.append((state, status)))
+    try:
+        rafcon.core.singleton.state_machine_manager.add_state_machine(state_machine)
+        for run in range(2):
+            rafcon.core.singleton.state_machine_execution_engine.start(state_machine.state_machine_id)
+            rafcon.core.singleton.state_machine_execution_engine.join()
+            assert state_machine.root_state.output_data["counter"] == 3
+            assert not state_machine.frozen
+        # the statuses of all states were reported
+        for state in state_machine.root_state.states.values():
+            assert (state, StateExecutionStatus.ACTIVE) in changes
+        assert (state_machine.root_state, StateExecutionStatus.ACTIVE) in changes
+        # the state machine can be modified after the execution
+        state_machine.root_state.add_state(ExecutionState("new state"))
+    finally:
+        global_config.set_config_value('EXECUTION_FREEZE_STATE_MACHINE', False)
+        rafcon.core.singleton.state_machine_manager.remove_state_machine(state_machine.state_machine_id)
+        testing_utils.shutdown_environment_only_core(caplog=caplog)
+
+
+if __name__ == '__main__':
+    pytest.main(['-s', __file__])
@@ -0,0 +1,151 @@
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+from pytest import raises
+
+from rafcon.core import global_variable_server
+from rafcon.core.config import global_config
+from rafcon.core.global_variable_manager import GlobalVariableManager
+from rafcon.core.global_variable_server import GlobalVariableServer
+from rafcon.core.states.execution_state import ExecutionState
+
+from tests import utils as testing_utils
+
+
+@pytest.fixture
+def server():
+    server = GlobalVariableServer(os.path.join(testing_utils.get_unique_temp_path(), "gvm.sock"), idle_timeout=0)
+    assert server.start()
+    yield server
+    server.shutdown()
+
+
+def test_shared_variables(server, caplog):
+    first_gvm = GlobalVariableManager()
+    second_gvm = GlobalVariableManager()
+    first_gvm.connect_to_server(server.address, start_server=False)
+    second_gvm.connect_to_server(server.address, start_server=False)
+    try:
+        assert first_gvm.shared
+        first_gvm.set_variable('a', {'x': 1}, data_type=dict)
+        assert second_gvm.get_variable('a') == {'x': 1}
+        assert second_gvm.get_data_type('a') is dict
+        assert second_gvm.get_variable_version('a') == 1
+        with raises(TypeError):
+            second_gvm.set_variable('a', 1)
+        second_gvm.set_variables({'b': 2, 'c': 3}, immutable=True)
+        assert first_gvm.get_variables(['b', 'c']) == {'b': 2, 'c': 3}
+        assert sorted(first_gvm.get_all_keys()) == ['a', 'b', 'c']
+        assert first_gvm.global_variable_dictionary['c'] == 3
+
+        # locks and access keys are shared
+        access_key = first_gvm.lock_variable('a')
+        assert second_gvm.is_locked('a')
+        with raises(RuntimeError):
+            second_gvm.set_variable('a', {'x': 2})
+        assert second_gvm.lock_variable('a', block=True, timeout=0.01) is False
+        first_gvm.set_variable('a', {'x': 2}, access_key=access_key)
+        first_gvm.unlock_variable('a', access_key)
+        assert second_gvm.get_variable('a') == {'x': 2}
+
+        # the locks of a disconnected process are released
+        second_gvm.lock_variable('a')
+        second_gvm.disconnect_from_server()
+        assert first_gvm.lock_variable('a', block=True, timeout=1.)
+        assert not second_gvm.shared and second_gvm.get_all_keys() == []
+
+        first_gvm.delete_variable('b')
+        assert not first_gvm.variable_exist('b')
+    finally:
+        first_gvm.disconnect_from_server()
+        second_gvm.disconnect_from_server()
+
+
+def test_shared_variable_changes(server, caplog):
+    first_gvm = GlobalVariableManager()
+    second_gvm = GlobalVariableManager()
+    first_gvm.connect_to_server(server.address, start_server=False)
+    second_gvm.connect_to_server(server.address, start_server=False)
+    try:
+        changes = []
+        changed = threading.Event()
+        second_gvm.subscribe(lambda change: (changes.append(change), changed.set()), keys=['a'])
+
+        threading.Timer(0.05, lambda: first_gvm.set_variable('a', 5)).start()
+        assert second_gvm.wait_for_value('a', 5, timeout=2.)
+        assert changed.wait(2.)
+        assert changes[0].key == 'a' and changes[0].version == 1
+
+        # waiting states are woken up on preemption
+        state = ExecutionState("waiting state")
+        threading.Timer(0.05, lambda: setattr(state, 'preempted', True)).start()
+        start_time = time.time()
+        assert second_gvm.wait_for_change('a', state=state) is None
+        assert time.time() - start_time < 2.
+    finally:
+        first_gvm.disconnect_from_server()
+        second_gvm.disconnect_from_server()
+
+
+def test_shared_backend_configuration(server):
+    global_config.set_config_value('GLOBAL_VARIABLE_BACKEND', 'SHARED')
+    global_config.set_config_value('GLOBAL_VARIABLE_SERVER_ADDRESS', server.address)
+    gvm = GlobalVariableManager()
+    try:
+        gvm.initialize()
+        assert gvm.shared
+    finally:
+        gvm.disconnect_from_server()
+        global_config.set_config_value('GLOBAL_VARIABLE_BACKEND', 'LOCAL')
+        global_config.set_config_value('GLOBAL_VARIABLE_SERVER_ADDRESS', None)
+
+
+def test_wait_cancellations(server, monkeypatch):
+    gvm = GlobalVariableManager()
+    gvm.connect_to_server(server.address, start_server=False)
+    try:
+        # a cancellation received before its wait cancels the wait
+        gvm._server_client.call('cancel_wait', ("early", ))
+        assert server._call(None, 'wait_for_change', (None, None, 2.), {'wait_id': "early"}) is None
+        assert not server._wait_cancellations
+
+        # a cancellation received after its wait ended is removed after a while
+        gvm._server_client.call('cancel_wait', ("late", ))
+        assert list(server._wait_cancellations) == ["late"]
+        monkeypatch.setattr(global_variable_server, 'UNCLAIMED_CANCELLATION_TIMEOUT', 0.)
+        time.sleep(0.01)
+        gvm._server_client.call('cancel_wait', ("other late", ))
+        assert list(server._wait_cancellations) == ["other late"]
+    finally:
+        gvm.disconnect_from_server()
+
+
+def test_server_started_on_demand(caplog):
+    address = os.path.join(testing_utils.get_unique_temp_path(), "gvm.sock")
+    gvm = GlobalVariableManager()
+    gvm.connect_to_server(address, idle_timeout=1.)
+    try:
+        gvm.set_variable('shared', [1, 2, 3])
+        # another process reads the variable
+        script = "from rafcon.core.global_variable_manager import GlobalVariableManager\n" \
+                 "gvm = GlobalVariableManager()\n" \
+                 "gvm.connect_to_server({0!r}, start_server=False)\n" \
+                 "gvm.set_variable('result', sum(gvm.get_variable('shared')))\n".format(address)
+        subprocess.check_call([sys.executable, "-c", script], env=dict(os.environ,
+                                                                       PYTHONPATH=os.pathsep.join(sys.path)))
+        assert gvm.get_variable('result') == 6
+    finally:
+        gvm.disconnect_from_server()
+    # the idle server stops and removes its socket
+    end_time = time.time() + 10.
+    while os.path.exists(address) and time.time() < end_time:
+        time.sleep(0.1)
+    assert not os.path.exists(address)
+
+
+if __name__ == '__main__':
+    pytest.main(['-s', __file__])
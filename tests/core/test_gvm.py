@@ -1,4 +1,7 @@
-from rafcon.core.global_variable_manager import GlobalVariableManager
+import threading
+import time
+
+from rafcon.core.global_variable_manager import GlobalVariableManager, VariableLock, FrozenDict
 import pytest
 from tests import utils as testing_utils
 from pytest import raises
@@ -58,6 +61,220 @@ def test_locks(caplog):
     testing_utils.assert_logger_warnings_and_errors(caplog, expected_warnings=1, expected_errors=1)
 
 
+def test_blocking_locks(caplog):
+    gvm = GlobalVariableManager()
+    gvm.set_variable('a', 1)
+    access_key = gvm.lock_variable('a')
+
+    # a timed out lock request fails with a warning
+    start_time = time.time()
+    assert gvm.lock_variable('a', block=True, timeout=0.05) is False
+    assert 0.05 <= time.time() - start_time < 1.
+
+    # waiting threads get the lock right after it was released, in the order of their requests
+    acquired = []
+
+    def lock_and_unlock(name):
+        thread_access_key = gvm.lock_variable('a', block=True)
+        acquired.append((name, time.time()))
+        gvm.unlock_variable('a', thread_access_key)
+
+    threads = []
+    for name in ("first", "second", "third"):
+        thread = threading.Thread(target=lock_and_unlock, args=(name, ))
+        thread.start()
+        threads.append(thread)
+        time.sleep(0.02)
+    release_time = time.time()
+    gvm.unlock_variable('a', access_key)
+    for thread in threads:
+        thread.join()
+    assert [name for name, _ in acquired] == ["first", "second", "third"]
+    # the lock was not acquired by polling
+    assert acquired[-1][1] - release_time < 0.05
+    testing_utils.assert_logger_warnings_and_errors(caplog, expected_warnings=1)
+
+
+def test_variable_lock_readers_and_writers():
+    lock = VariableLock('a')
+    # several readers share the lock
+    assert lock.acquire(shared=True)
+    assert lock.acquire(blocking=False, shared=True)
+    assert not lock.locked()
+    assert not lock.acquire(blocking=False)
+
+    # a waiting writer blocks subsequent readers, so that it does not starve
+    writer_acquired = threading.Event()
+
+    def write():
+        lock.acquire()
+        writer_acquired.set()
+        time.sleep(0.02)
+        lock.release()
+
+    writer = threading.Thread(target=write)
+    writer.start()
+    time.sleep(0.02)
+    assert not lock.acquire(blocking=False, shared=True)
+    assert not lock.acquire(timeout=0.01, shared=True)
+    lock.release(shared=True)
+    lock.release(shared=True)
+    assert writer_acquired.wait(1.)
+    assert lock.acquire(timeout=1., shared=True)
+    lock.release(shared=True)
+    writer.join()
+    with raises(RuntimeError):
+        lock.release()
+
+
+def test_immutable_variables(caplog):
+    gvm = GlobalVariableManager()
+    config = {'a': 1, 'nested': {'list': [1, 2]}, 'tuple': (3, [4])}
+    gvm.set_variable('config', config, immutable=True)
+    assert gvm.is_immutable('config')
+    assert gvm.get_variable_version('config') == 1
+
+    # readers share the same frozen snapshot, also when asking for a copy
+    snapshot = gvm.get_variable('config')
+    assert snapshot is gvm.get_variable('config', per_reference=False)
+    assert snapshot is gvm.get_variable('config', per_reference=True)
+    assert isinstance(snapshot, FrozenDict) and snapshot == config
+    config['nested']['list'].append(3)
+    assert snapshot['nested']['list'] == [1, 2]
+    with raises(TypeError):
+        snapshot['a'] = 2
+    with raises(TypeError):
+        snapshot['nested']['list'].append(3)
+    with raises(TypeError):
+        snapshot['tuple'][1].append(5)
+    import copy
+    import pickle
+    assert copy.deepcopy(snapshot) is snapshot
+    unpickled_snapshot = pickle.loads(pickle.dumps(snapshot))
+    assert unpickled_snapshot == snapshot and isinstance(unpickled_snapshot['nested'], FrozenDict)
+
+    # every change increases the version
+    gvm.set_variable('config', {'a': 2})
+    assert not gvm.is_immutable('config')
+    assert gvm.get_variable_version('config') == 2
+    assert gvm.get_variable('config') is not gvm.get_variable('config')
+    assert gvm.get_variable_version('unknown') is None
+    gvm.delete_variable('config')
+    assert gvm.get_variable_version('config') is None
+    testing_utils.assert_logger_warnings_and_errors(caplog)
+
+
+def test_batch_access(caplog):
+    gvm = GlobalVariableManager()
+    gvm.set_variable('a', 0, data_type=int)
+    gvm.set_variables({'a': 1, 'b': [2], 'c': 'three'})
+    assert gvm.get_variables(['a', 'b', 'd'], default=0) == {'a': 1, 'b': [2], 'd': 0}
+    assert gvm.get_variable_version('a') == 2
+    gvm.set_variables({'a': 4, 'd': {'x': 1}}, immutable=True)
+    variables = gvm.get_variables(['a', 'd'])
+    assert variables == {'a': 4, 'd': {'x': 1}}
+    assert variables['d'] is gvm.get_variable('d')
+    assert gvm.get_variable_version('a') == 3
+
+    with raises(TypeError):
+        gvm.set_variables({'a': "no int", 'e': 5})
+    assert not gvm.variable_exist('e')
+
+    access_key = gvm.lock_variable('a')
+    with raises(RuntimeError):
+        gvm.set_variables({'a': 5})
+    gvm.unlock_variable('a', access_key)
+    testing_utils.assert_logger_warnings_and_errors(caplog)
+
+
+def test_change_subscriptions(caplog):
+    gvm = GlobalVariableManager()
+    changes = []
+    subscription_id = gvm.subscribe(changes.append, keys=['a'])
+    all_changes = []
+    gvm.subscribe(all_changes.append)
+    gvm.set_variable('a', 1)
+    gvm.set_variables({'a': 2, 'b': 3})
+    gvm.delete_variable('a')
+    assert [(change.key, change.version, change.deleted) for change in changes] == \
+        [('a', 1, False), ('a', 2, False), ('a', None, True)]
+    assert len(all_changes) == 4
+    gvm.unsubscribe(subscription_id)
+    gvm.set_variable('a', 4)
+    assert len(changes) == 3 and len(all_changes) == 5
+
+    # the change feed
+    assert gvm.change_sequence_number == 5
+    assert [change.sequence_number for change in gvm.get_changes()] == [1, 2, 3, 4, 5]
+    assert [change.key for change in gvm.get_changes(3)] == ['a', 'a']
+    testing_utils.assert_logger_warnings_and_errors(caplog)
+
+
+def test_wait_for_changes(caplog):
+    from rafcon.core.states.execution_state import ExecutionState
+    gvm = GlobalVariableManager()
+    gvm.set_variable('counter', 0)
+
+    def count_up():
+        for value in range(1, 6):
+            time.sleep(0.01)
+            gvm.set_variable('counter', value)
+            gvm.set_variable('other', value)
+
+    # changes that happened already are returned immediately
+    sequence_number = gvm.change_sequence_number
+    gvm.set_variable('counter', 0)
+    assert gvm.wait_for_change('counter', since_sequence_number=sequence_number, timeout=0.).key == 'counter'
+    assert gvm.wait_for_change(['counter'], timeout=0.01) is None
+
+    thread = threading.Thread(target=count_up)
+    thread.start()
+    change = gvm.wait_for_change(['counter', 'unknown'], timeout=1.)
+    assert change.key == 'counter'
+    assert gvm.wait_for_value('counter', lambda value: value >= 3, timeout=1.)
+    assert gvm.get_variable('counter') >= 3
+    assert gvm.wait_for_value('counter', 5, timeout=1.)
+    thread.join()
+    start_time = time.time()
+    assert not gvm.wait_for_value('counter', 6, timeout=0.05)
+    assert time.time() - start_time >= 0.05
+
+    # waiting states are woken up on preemption
+    state = ExecutionState("waiting state")
+    threading.Timer(0.05, lambda: setattr(state, 'preempted', True)).start()
+    start_time = time.time()
+    assert not gvm.wait_for_value('counter', 6, state=state)
+    assert time.time() - start_time < 1.
+    assert gvm.wait_for_change(state=state) is None
+    testing_utils.assert_logger_warnings_and_errors(caplog)
+
+
+def test_order_of_concurrent_changes(caplog):
+    gvm = GlobalVariableManager()
+
+    def set_variables(thread_number):
+        for value in range(100):
+            if thread_number % 2:
+                gvm.set_variable('a', value)
+            else:
+                gvm.set_variables({'a': value, 'b': value})
+
+    threads = [threading.Thread(target=set_variables, args=(i, )) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # the changes are recorded in the order of the versions of the variables
+    changes = gvm.get_changes()
+    assert [change.sequence_number for change in changes] == \
+        list(range(gvm.change_sequence_number - len(changes) + 1, gvm.change_sequence_number + 1))
+    for key in ['a', 'b']:
+        versions = [change.version for change in changes if change.key == key]
+        assert versions == sorted(versions) and versions[-1] == gvm.get_variable_version(key)
+    testing_utils.assert_logger_warnings_and_errors(caplog)
+
+
 def test_type_check(caplog):
     # valid
     gvm = GlobalVariableManager()
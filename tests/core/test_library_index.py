@@ -0,0 +1,131 @@
+import os
+import shutil
+import time
+
+import pytest
+
+# core elements
+import rafcon.core.singleton
+from rafcon.core.config import global_config
+from rafcon.core.library_index import LibraryIndex
+from rafcon.core.states.execution_state import ExecutionState
+from rafcon.core.states.library_state import LibraryState
+from rafcon.core.state_machine import StateMachine
+from rafcon.core.storage import storage
+
+# test environment elements
+from tests import utils as testing_utils
+
+
+def save_library(path, name, output_port_name="output"):
+    state = ExecutionState(name)
+    state.add_output_data_port(output_port_name, "int")
+    storage.save_state_machine_to_path(StateMachine(state), path)
+
+
+def test_library_index_updates(caplog):
+    library_root_path = os.path.realpath(testing_utils.get_unique_temp_path())
+    save_library(os.path.join(library_root_path, "first"), "first")
+    save_library(os.path.join(library_root_path, "folder", "second"), "second")
+    index_file_path = os.path.join(testing_utils.get_unique_temp_path(), "library_index.json")
+    testing_utils.initialize_environment_core(core_config={'LIBRARY_INDEX_PATH': index_file_path},
+                                              libraries={'index_test': library_root_path})
+    library_manager = rafcon.core.singleton.library_manager
+    try:
+        libraries = library_manager.libraries['index_test']
+        assert list(libraries.keys()) == ["first", "folder"]
+        assert libraries["folder"]["second"] == os.path.join(library_root_path, "folder", "second")
+        assert not library_manager.update_libraries()
+
+        # the index is stored and reused
+        assert os.path.isfile(index_file_path)
+        stored_index = LibraryIndex(index_file_path)
+        library_tree, changed_library_paths = stored_index.update(library_root_path)
+        assert library_tree["folder"]["second"] == libraries["folder"]["second"]
+        assert not changed_library_paths
+
+        # added and removed libraries
+        save_library(os.path.join(library_root_path, "folder", "third"), "third")
+        shutil.rmtree(os.path.join(library_root_path, "first"))
+        assert library_manager.update_libraries()
+        libraries = library_manager.libraries['index_test']
+        assert list(libraries.keys()) == ["folder"]
+        assert list(libraries["folder"].keys()) == ["second", "third"]
+
+        # changed libraries are loaded again
+        library_os_path = libraries["folder"]["second"]
+        library_state = LibraryState("index_test/folder", "second", "0.1", "second")
+        assert list(library_state.output_data_ports.values())[0].name == "output"
+        interface_signature = library_manager.get_library_info(library_os_path)['interface_signature']
+        time.sleep(0.01)
+        save_library(library_os_path, "second", output_port_name="changed")
+        assert not library_manager.update_libraries()
+        library_state = LibraryState("index_test/folder", "second", "0.1", "second")
+        assert list(library_state.output_data_ports.values())[0].name == "changed"
+        assert library_manager.get_library_info(library_os_path)['interface_signature'] != interface_signature
+
+        # saving a library rewrites its state machine file, also if only a script changed
+        library_tree, changed_library_paths = stored_index.update(library_root_path)
+        time.sleep(0.01)
+        state_machine = storage.load_state_machine_from_path(library_os_path)
+        state_machine.root_state.script_text += "# changed\n"
+        report = storage.save_state_machine_to_path(state_machine, library_os_path, incremental=True)
+        assert report.get_written_files('script') and report.get_written_files('state_machine')
+        library_tree, changed_library_paths = stored_index.update(library_root_path)
+        assert changed_library_paths == {library_os_path}
+    finally:
+        testing_utils.shutdown_environment_only_core(caplog=caplog)
+
+
+def test_library_watcher(caplog):
+    library_root_path = os.path.realpath(testing_utils.get_unique_temp_path())
+    save_library(os.path.join(library_root_path, "first"), "first")
+    testing_utils.initialize_environment_core(core_config={'LIBRARY_WATCH_INTERVAL': 0.05},
+                                              libraries={'watcher_test': library_root_path})
+    library_manager = rafcon.core.singleton.library_manager
+    try:
+        save_library(os.path.join(library_root_path, "second"), "second")
+        end_time = time.time() + 5.
+        while "second" not in library_manager.libraries['watcher_test'] and time.time() < end_time:
+            time.sleep(0.05)
+        assert "second" in library_manager.libraries['watcher_test']
+
+        # a new initialization stops the previous watcher before the libraries are rebuilt
+        library_watcher = library_manager._library_watcher
+        library_manager.initialize()
+        assert not library_watcher.is_alive()
+        assert library_manager._library_watcher.is_alive()
+    finally:
+        global_config.set_config_value('LIBRARY_WATCH_INTERVAL', 0)
+        library_manager.stop_library_watcher()
+        testing_utils.shutdown_environment_only_core(caplog=caplog)
+
+
+def test_concurrently_loaded_library(caplog, monkeypatch):
+    library_root_path = os.path.realpath(testing_utils.get_unique_temp_path())
+    library_os_path = os.path.join(library_root_path, "first")
+    save_library(library_os_path, "first")
+    testing_utils.initialize_environment_core(libraries={'concurrent_test': library_root_path})
+    library_manager = rafcon.core.singleton.library_manager
+    try:
+        load_state_machine_from_path = storage.load_state_machine_from_path
+        other_state_machine = load_state_machine_from_path(library_os_path)
+
+        def load_while_other_thread_loads(path):
+            # another thread stores the library, while this thread is loading it
+            library_manager._loaded_libraries[path] = other_state_machine
+            return load_state_machine_from_path(path)
+
+        monkeypatch.setattr(storage, 'load_state_machine_from_path', load_while_other_thread_loads)
+        state_machine, was_loaded = library_manager._get_loaded_library(library_os_path)
+        assert state_machine is other_state_machine and was_loaded
+        # the root state of the shared state machine is copied
+        _, root_state = library_manager.get_library_state_copy_instance(library_os_path)
+        assert root_state is not other_state_machine.root_state
+    finally:
+        library_manager.clean_loaded_libraries()
+        testing_utils.shutdown_environment_only_core(caplog=caplog)
+
+
+if __name__ == '__main__':
+    pytest.main(['-s', __file__])
@@ -186,6 +186,39 @@ def test_nested_library_state_machine(caplog):
         testing_utils.test_multithreading_lock.release()
 
 
+def test_library_state_lazy_copy(caplog):
+    testing_utils.test_multithreading_lock.acquire()
+    try:
+        rafcon.core.config.global_config.set_config_value("LIBRARY_STATE_LAZY_COPY", False)
+        library_container_state_sm = create_hierarchy_state_library_state_machine()
+        eager_lib_state = library_container_state_sm.root_state.states["library_hierarchy_state"]
+        assert eager_lib_state.state_copy_created
+
+        rafcon.core.config.global_config.set_config_value("LIBRARY_STATE_LAZY_COPY", True)
+        library_container_state_sm = create_hierarchy_state_library_state_machine()
+        lib_state = library_container_state_sm.root_state.states["library_hierarchy_state"]
+        other_lib_state = LibraryState("temporary_libraries", "hierarchy_library", "0.1", "other", state_id="other")
+        assert not lib_state.state_copy_created and not other_lib_state.state_copy_created
+        # the interface is not shared between the library states
+        assert lib_state.input_data_ports is not other_lib_state.input_data_ports
+        assert list(lib_state.input_data_ports.values())[0].parent is lib_state
+        assert lib_state.get_states_statistics(0) == eager_lib_state.get_states_statistics(0)
+
+        rafcon.core.singleton.state_machine_manager.add_state_machine(library_container_state_sm)
+        rafcon.core.singleton.state_machine_execution_engine.start(library_container_state_sm.state_machine_id)
+        rafcon.core.singleton.state_machine_execution_engine.join()
+        assert library_container_state_sm.root_state.output_data["data_output_port1"] == 42.0
+        rafcon.core.singleton.state_machine_manager.remove_state_machine(library_container_state_sm.state_machine_id)
+
+        assert lib_state.state_copy_created and not other_lib_state.state_copy_created
+        assert lib_state.state_copy.parent is lib_state
+        assert lib_state.state_copy.input_data_ports is lib_state.input_data_ports
+        assert lib_state.state_copy == eager_lib_state.state_copy
+        testing_utils.assert_logger_warnings_and_errors(caplog)
+    finally:
+        testing_utils.test_multithreading_lock.release()
+
+
 def test_rafcon_library_path_variable(caplog):
     rafcon.core.config.global_config.set_config_value("LIBRARY_PATHS", {})
     os.environ['RAFCON_LIBRARY_PATH'] = os.path.join(testing_utils.LIBRARY_SM_PATH, 'generic')
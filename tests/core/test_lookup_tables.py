@@ -0,0 +1,108 @@
+import pytest
+
+# core elements
+from rafcon.core.states.execution_state import ExecutionState
+from rafcon.core.states.hierarchy_state import HierarchyState
+from rafcon.core.state_elements.transition import Transition
+from rafcon.core.state_elements.data_flow import DataFlow
+
+# test environment elements
+from tests import utils as testing_utils
+
+
+def create_hierarchy_state():
+    root_state = HierarchyState("root")
+    root_state.add_output_data_port("out", "int", 0)
+    state1 = ExecutionState("state1")
+    state1.add_output_data_port("out", "int", 0)
+    state1.add_outcome("other", 1)
+    state2 = ExecutionState("state2")
+    state2.add_input_data_port("in", "int", 0)
+    root_state.add_state(state1)
+    root_state.add_state(state2)
+    root_state.set_start_state(state1.state_id)
+    return root_state, state1, state2
+
+
+def test_transition_lookup(caplog):
+    testing_utils.initialize_environment_core()
+    try:
+        root_state, state1, state2 = create_hierarchy_state()
+        outcome = state1.outcomes[0]
+        assert root_state.get_transition_for_outcome(state1, outcome) is None
+
+        transition_id = root_state.add_transition(state1.state_id, 0, state2.state_id, None)
+        transition = root_state.transitions[transition_id]
+        assert root_state.get_transition_for_outcome(state1, outcome) is transition
+
+        transition.modify_origin(state1.state_id, 1)
+        assert root_state.get_transition_for_outcome(state1, outcome) is None
+        assert root_state.get_transition_for_outcome(state1, state1.outcomes[1]) is transition
+
+        transition.from_outcome = 0
+        assert root_state.get_transition_for_outcome(state1, outcome) is transition
+
+        root_state.remove_transition(transition_id)
+        assert root_state.get_transition_for_outcome(state1, outcome) is None
+
+        root_state.transitions = {5: Transition(state1.state_id, 0, state2.state_id, None, 5)}
+        assert root_state.get_transition_for_outcome(state1, outcome) is root_state.transitions[5]
+    finally:
+        testing_utils.shutdown_environment_only_core(caplog=caplog)
+
+
+def test_data_flow_lookup(caplog):
+    testing_utils.initialize_environment_core()
+    try:
+        root_state, state1, state2 = create_hierarchy_state()
+        state1_output_id = list(state1.output_data_ports.keys())[0]
+        state2_input_id = list(state2.input_data_ports.keys())[0]
+        root_output_id = list(root_state.output_data_ports.keys())[0]
+
+        data_flow_id = root_state.add_data_flow(state1.state_id, state1_output_id, state2.state_id, state2_input_id)
+        data_flow = root_state.data_flows[data_flow_id]
+        assert root_state.get_data_flows_from_port(state1.state_id, state1_output_id) == [data_flow]
+        assert root_state.get_data_flows_to_port(state2.state_id, state2_input_id) == [data_flow]
+
+        data_flow.modify_target(root_state.state_id, root_output_id)
+        assert root_state.get_data_flows_to_port(state2.state_id, state2_input_id) == []
+        assert root_state.get_data_flows_to_port(root_state.state_id, root_output_id) == [data_flow]
+
+        root_state.remove_data_flow(data_flow_id)
+        assert root_state.get_data_flows_from_port(state1.state_id, state1_output_id) == []
+
+        root_state.data_flows = {7: DataFlow(state1.state_id, state1_output_id, state2.state_id, state2_input_id, 7)}
+        assert root_state.get_data_flows_to_port(state2.state_id, state2_input_id) == [root_state.data_flows[7]]
+    finally:
+        testing_utils.shutdown_environment_only_core(caplog=caplog)
+
+
+def test_lookup_after_rejected_change(caplog, monkeypatch):
+    testing_utils.initialize_environment_core()
+    try:
+        root_state, state1, state2 = create_hierarchy_state()
+        transition_id = root_state.add_transition(state1.state_id, 0, state2.state_id, None)
+        transition = root_state.transitions[transition_id]
+        root_state.add_transition(state1.state_id, 1, root_state.state_id, 0)
+        check_transition_connection = root_state._check_transition_connection
+
+        def check_transition_connection_with_lookup(check_transition):
+            # the lookup tables are rebuilt during the check, e.g. by an executing thread
+            root_state.get_transition_for_outcome(state1, state1.outcomes[1])
+            return check_transition_connection(check_transition)
+
+        monkeypatch.setattr(root_state, '_check_transition_connection', check_transition_connection_with_lookup)
+        with pytest.raises(ValueError):
+            transition.from_outcome = 1
+        with pytest.raises(ValueError):
+            transition.modify_origin(state1.state_id, 1)
+        assert transition.from_outcome == 0
+        assert root_state.get_transition_for_outcome(state1, state1.outcomes[0]) is transition
+        assert root_state.get_transition_for_outcome(state1, state1.outcomes[1]) is not transition
+    finally:
+        testing_utils.shutdown_environment_only_core(caplog=caplog)
+
+
+if __name__ == '__main__':
+    test_transition_lookup(None)
+    test_data_flow_lookup(None)
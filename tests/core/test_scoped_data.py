@@ -3,8 +3,10 @@ import rafcon.core.singleton
 from rafcon.core.states.execution_state import ExecutionState
 from rafcon.core.states.hierarchy_state import HierarchyState
 from rafcon.core.state_elements.data_port import InputDataPort, OutputDataPort
+from rafcon.core.state_elements.scope import ScopedData
 from rafcon.core.storage import storage
 from rafcon.core.state_machine import StateMachine
+from rafcon.core.execution.execution_history import CallItem, CallType
 
 # test environment elements
 from tests import utils as testing_utils
@@ -71,5 +73,45 @@ def test_scoped_data(caplog):
         testing_utils.test_multithreading_lock.release()
 
 
+def test_scoped_data_snapshots(caplog):
+    state_machine = create_state_machine()
+    hierarchy_state = state_machine.root_state
+
+    testing_utils.test_multithreading_lock.acquire()
+    try:
+        rafcon.core.singleton.state_machine_manager.add_state_machine(state_machine)
+        rafcon.core.singleton.state_machine_execution_engine.start(state_machine.state_machine_id)
+        rafcon.core.singleton.state_machine_execution_engine.join()
+
+        call_items = [item for item in state_machine.execution_histories[-1]
+                      if isinstance(item, CallItem) and item.call_type is CallType.EXECUTE and
+                      item.state_reference is not hierarchy_state]
+        assert [item.state_reference.name for item in call_items] == ["first_state", "second_state"]
+        first_scoped_data, second_scoped_data = call_items[0].scoped_data, call_items[1].scoped_data
+        # the unchanged input data of the hierarchy state is shared, the output of the first state is new
+        input_key = [key for key, entry in first_scoped_data.items() if entry.name == "data_input_port1"][0]
+        assert first_scoped_data[input_key] is second_scoped_data[input_key]
+        assert first_scoped_data[input_key] is not hierarchy_state.scoped_data[input_key]
+        assert len(second_scoped_data) == len(first_scoped_data) + 1
+        rafcon.core.singleton.state_machine_manager.remove_state_machine(state_machine.state_machine_id)
+        testing_utils.assert_logger_warnings_and_errors(caplog)
+    finally:
+        testing_utils.test_multithreading_lock.release()
+
+
+def test_snapshots_of_values_passed_by_reference():
+    state = HierarchyState("root")
+    mutable_value = {'key': 'value'}
+    mutable_entry = ScopedData("mutable", mutable_value, dict, state.state_id, OutputDataPort, pass_by_reference=True)
+    immutable_entry = ScopedData("immutable", "value", str, state.state_id, OutputDataPort, pass_by_reference=True)
+
+    # a value passed by reference, which can be modified in place, is copied for each snapshot
+    snapshot = mutable_entry.get_snapshot()
+    mutable_value['key'] = 'changed'
+    assert snapshot.value == {'key': 'value'}
+    assert mutable_entry.get_snapshot().value == {'key': 'changed'}
+    assert immutable_entry.get_snapshot() is immutable_entry.get_snapshot()
+
+
 if __name__ == '__main__':
     pytest.main([__file__])
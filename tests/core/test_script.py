@@ -0,0 +1,76 @@
+from copy import deepcopy
+
+# core elements
+from rafcon.core.config import global_config
+from rafcon.core import script
+from rafcon.core.script import get_compiled_code
+from rafcon.core.states.execution_state import ExecutionState
+
+# test environment elements
+from tests import utils as testing_utils
+
+SCRIPT = """
+counter = 0
+
+def execute(self, inputs, outputs, gvm):
+    global counter
+    counter += 1
+    return 0
+"""
+
+
+def test_script_module_is_only_built_on_change(caplog):
+    testing_utils.initialize_environment_core()
+    try:
+        state = ExecutionState("script_state")
+        state.script_text = SCRIPT
+
+        state.script.build_module()
+        module = state.script.compiled_module
+        state.script.build_module()
+        assert state.script.compiled_module is module
+
+        state.script_text = SCRIPT.replace("counter += 1", "counter += 2")
+        state.script.build_module()
+        assert state.script.compiled_module is not module
+
+        global_config.set_config_value("RELOAD_SCRIPT_ON_EVERY_EXECUTION", True)
+        module = state.script.compiled_module
+        state.script.build_module()
+        assert state.script.compiled_module is not module
+    finally:
+        testing_utils.shutdown_environment_only_core(caplog=caplog)
+
+
+def test_compiled_code_is_shared_between_copies(caplog):
+    testing_utils.initialize_environment_core()
+    try:
+        state = ExecutionState("script_state")
+        state.script_text = SCRIPT
+        state_copy = deepcopy(state)
+
+        state.script.build_module()
+        state_copy.script.build_module()
+        assert state.script.compiled_module is not state_copy.script.compiled_module
+        assert state.script.compiled_module.execute.__code__ is state_copy.script.compiled_module.execute.__code__
+        assert get_compiled_code(SCRIPT, state.script.filename) is get_compiled_code(SCRIPT, state.script.filename)
+    finally:
+        testing_utils.shutdown_environment_only_core(caplog=caplog)
+
+
+def test_compiled_code_cache_is_bounded(monkeypatch):
+    monkeypatch.setattr(script, 'COMPILED_CODE_CACHE_SIZE', 3)
+    script.clear_compiled_code_cache()
+    codes = [get_compiled_code("value = {0}\n".format(i), "script.py") for i in range(3)]
+    # the first code object was used most recently and is kept
+    assert get_compiled_code("value = 0\n", "script.py") is codes[0]
+    get_compiled_code("value = 3\n", "script.py")
+    assert len(script._compiled_code_cache) == 3
+    assert get_compiled_code("value = 0\n", "script.py") is codes[0]
+    assert get_compiled_code("value = 1\n", "script.py") is not codes[1]
+    script.clear_compiled_code_cache()
+
+
+if __name__ == '__main__':
+    test_script_module_is_only_built_on_change(None)
+    test_compiled_code_is_shared_between_copies(None)
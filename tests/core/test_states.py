@@ -5,7 +5,9 @@ from pytest import raises
 from rafcon.core.states.execution_state import ExecutionState
 from rafcon.core.states.container_state import ContainerState
 from rafcon.core.states.barrier_concurrency_state import BarrierConcurrencyState
+from rafcon.core.states.hierarchy_state import HierarchyState
 from rafcon.core.states.state import InputDataPort
+from rafcon.core.state_machine import StateMachine
 from tests.utils import assert_logger_warnings_and_errors
 from rafcon.utils import log
 logger = log.get_logger(__name__)
@@ -261,8 +263,48 @@ def test_port_and_outcome_removal(caplog):
     assert_logger_warnings_and_errors(caplog)
 
 
+def test_state_paths(caplog):
+    root_state = HierarchyState("root")
+    first_container = HierarchyState("first")
+    second_container = HierarchyState("second")
+    state = ExecutionState("state")
+    root_state.add_state(first_container)
+    root_state.add_state(second_container)
+    first_container.add_state(state)
+    state_machine = StateMachine(root_state)
+
+    path = "/".join([root_state.state_id, first_container.state_id, state.state_id])
+    assert state.get_path() == path
+    assert state.get_path(by_name=True) == "root/first/state"
+    assert state.get_path("child") == path + "/child"
+    assert state_machine.get_state_by_path(path) is state
+    assert state_machine.get_state_by_path(path) is state
+
+    # the cached paths of all descendants are updated on name changes
+    first_container.name = "renamed"
+    assert state.get_path(by_name=True) == "root/renamed/state"
+    assert state.get_path() == path
+
+    # on parent changes
+    first_container.remove_state(state.state_id, recursive=False, destroy=False)
+    assert state.get_path() == state.state_id
+    assert state_machine.get_state_by_path(path, as_check=True) is None
+
+    # and on id changes
+    state.change_state_id()
+    assert state.get_path() == state.state_id
+    second_container.add_state(state)
+    new_path = "/".join([root_state.state_id, second_container.state_id, state.state_id])
+    assert state.get_path() == new_path
+    assert state.get_path(by_name=True) == "root/second/state"
+    assert state_machine.get_state_by_path(new_path) is state
+
+    assert_logger_warnings_and_errors(caplog)
+
+
 if __name__ == '__main__':
     test_create_state(None)
     test_port_and_outcome_removal(None)
     test_create_container_state(None)
+    test_state_paths(None)
     # pytest.main([__file__])
@@ -0,0 +1,353 @@
+import os
+import shutil
+
+import pytest
+
+# core elements
+from rafcon.core.states.state import State
+from rafcon.core.states.execution_state import ExecutionState
+from rafcon.core.states.hierarchy_state import HierarchyState
+from rafcon.core.state_machine import StateMachine
+from rafcon.core.storage import storage
+from rafcon.core.storage import packed_state_machine
+
+# test environment elements
+from tests import utils as testing_utils
+
+
+def create_state_machine():
+    root_state = HierarchyState("root")
+    for index in range(3):
+        state = ExecutionState("state{0}".format(index))
+        state.script_text = state.script_text + "\n# state {0}\n".format(index)
+        root_state.add_state(state)
+    return StateMachine(root_state)
+
+
+def test_incremental_save(caplog, monkeypatch):
+    testing_utils.initialize_environment_core()
+    try:
+        state_machine = create_state_machine()
+        root_state = state_machine.root_state
+        storage_path = testing_utils.get_unique_temp_path()
+
+        report = storage.save_state_machine_to_path(state_machine, storage_path, incremental=True)
+        # core data and semantic data of four states, three scripts and the state machine file
+        assert report.number_of_written_files == 12
+        assert len(report.get_written_files('script')) == 3
+
+        # states that were not edited are not serialized again
+        serialized_states = []
+        get_json_string = storage.storage_utils.get_json_string
+
+        def get_json_string_of_state(dictionary, **kwargs):
+            if isinstance(dictionary, State):
+                serialized_states.append(dictionary)
+            return get_json_string(dictionary, **kwargs)
+
+        monkeypatch.setattr(storage.storage_utils, 'get_json_string', get_json_string_of_state)
+        report = storage.save_state_machine_to_path(state_machine, storage_path, incremental=True)
+        assert report.number_of_written_files == 0
+        assert report.number_of_unchanged_files == 12
+        assert not serialized_states
+        list(root_state.states.values())[1].description = "changed"
+        report = storage.save_state_machine_to_path(state_machine, storage_path, incremental=True)
+        assert serialized_states == [list(root_state.states.values())[1]]
+        assert len(report.get_written_files('core_data')) == 1
+        monkeypatch.undo()
+
+        state = list(root_state.states.values())[0]
+        state.script_text = state.script_text + "\n# changed\n"
+        report = storage.save_state_machine_to_path(state_machine, storage_path, incremental=True)
+        assert set(report.get_written_files()) == set(report.get_written_files('script') +
+                                                      report.get_written_files('state_machine'))
+        assert report.get_written_files('script') == [os.path.join(state.file_system_path, storage.SCRIPT_FILE)]
+
+        state.semantic_data["key"] = "value"
+        report = storage.save_state_machine_to_path(state_machine, storage_path, incremental=True)
+        assert report.get_written_files('semantic_data') == [os.path.join(state.file_system_path,
+                                                                          storage.SEMANTIC_DATA_FILE)]
+        assert not report.get_written_files('core_data')
+
+        # renaming a state changes its folder
+        state.name = "renamed"
+        report = storage.save_state_machine_to_path(state_machine, storage_path, incremental=True)
+        assert len(report.removed_folders) == 1
+        assert len(report.get_written_files('core_data')) == 1
+
+        # the folders of states not existing anymore are removed, although the child states did not change
+        shutil.copytree(state.file_system_path, state.file_system_path + "_obsolete")
+        report = storage.save_state_machine_to_path(state_machine, storage_path, incremental=True)
+        assert not report.removed_folders
+        report = storage.save_state_machine_to_path(state_machine, storage_path, delete_old_state_machine=True,
+                                                    incremental=True)
+        assert report.removed_folders == [state.file_system_path + "_obsolete"]
+        assert report.get_written_files() == report.get_written_files('state_machine')
+
+        # files changed or removed on the file system are rewritten
+        os.remove(os.path.join(state.file_system_path, storage.FILE_NAME_CORE_DATA))
+        report = storage.save_state_machine_to_path(state_machine, storage_path, incremental=True)
+        assert report.get_written_files('core_data') == [os.path.join(state.file_system_path,
+                                                                      storage.FILE_NAME_CORE_DATA)]
+
+        # a loaded state machine is compared with the existing files
+        loaded_state_machine = storage.load_state_machine_from_path(storage_path)
+        assert loaded_state_machine.root_state.states[state.state_id].name == "renamed"
+        report = storage.save_state_machine_to_path(loaded_state_machine, storage_path, incremental=True)
+        assert report.number_of_written_files == 0
+        assert not [file_name for _, _, file_names in os.walk(storage_path) for file_name in file_names
+                    if file_name.endswith(".tmp")]
+    finally:
+        testing_utils.shutdown_environment_only_core(caplog=caplog)
+
+
+def get_states(state):
+    states = [state]
+    for child_state in getattr(state, 'states', {}).values():
+        states.extend(get_states(child_state))
+    return states
+
+
+def assert_equal_state_machines(state_machine, other_state_machine):
+    states = {state.get_path(): state for state in get_states(state_machine.root_state)}
+    other_states = {state.get_path(): state for state in get_states(other_state_machine.root_state)}
+    assert set(states) == set(other_states)
+    for path, state in states.items():
+        assert state == other_states[path]
+        assert getattr(state, 'script_text', None) == getattr(other_states[path], 'script_text', None)
+        assert state.semantic_data == other_states[path].semantic_data
+
+
+def test_packed_state_machine(caplog):
+    testing_utils.initialize_environment_core()
+    try:
+        folder_path = testing_utils.get_test_sm_path(os.path.join("unit_test_state_machines", "stepping_test"))
+        packed_file_path = os.path.join(testing_utils.get_unique_temp_path(), "stepping_test.rsm")
+        number_of_files = packed_state_machine.pack_state_machine(folder_path, packed_file_path)
+        assert number_of_files == sum(len(file_names) for _, _, file_names in os.walk(folder_path))
+
+        state_machine = storage.load_state_machine_from_path(folder_path)
+        packed_state_machine_ = storage.load_state_machine_from_path(packed_file_path)
+        assert_equal_state_machines(state_machine, packed_state_machine_)
+        root_state = packed_state_machine_.root_state
+        assert root_state.file_system_path == os.path.join(packed_file_path, storage.get_storage_id_for_state(root_state))
+
+        # unpacking restores the original files
+        unpacked_folder_path = os.path.join(os.path.dirname(packed_file_path), "unpacked")
+        packed_state_machine.unpack_state_machine(packed_file_path, unpacked_folder_path)
+        for root, _, file_names in os.walk(folder_path):
+            for file_name in file_names:
+                file_path = os.path.join(root, file_name)
+                unpacked_file_path = os.path.join(unpacked_folder_path, os.path.relpath(file_path, folder_path))
+                with open(file_path) as f, open(unpacked_file_path) as unpacked_f:
+                    assert f.read() == unpacked_f.read()
+
+        # saving to a packed file keeps the meta data of the states
+        list(root_state.states.values())[0].semantic_data["key"] = "value"
+        storage.save_state_machine_to_path(packed_state_machine_, packed_file_path)
+        files = packed_state_machine.PackedStateMachine.load(packed_file_path).files
+        assert len([path for path in files if path.endswith(storage.FILE_NAME_META_DATA)]) == \
+            len(get_states(root_state)) + 1
+        assert_equal_state_machines(packed_state_machine_, storage.load_state_machine_from_path(packed_file_path))
+    finally:
+        testing_utils.shutdown_environment_only_core(caplog=caplog)
+
+
+def test_meta_data_of_packed_state_machine(caplog):
+    testing_utils.initialize_environment_core()
+    try:
+        state_machine = create_state_machine()
+        packed_file_path = os.path.join(testing_utils.get_unique_temp_path(), "meta_data.rsm")
+        storage.save_state_machine_to_path(state_machine, packed_file_path)
+        states = [state_machine.root_state] + list(state_machine.root_state.states.values())
+        meta_data_paths = [os.path.join(state.file_system_path, storage.FILE_NAME_META_DATA) for state in states]
+        assert storage.get_files_of_path(meta_data_paths[-1]).path == packed_file_path
+        assert storage.get_files_of_path(packed_file_path + "_folder") is packed_state_machine.file_system
+
+        # the meta data files are written into the packed file, which is written once at the end
+        report = storage.StorageReport()
+        packed_file_stat = os.stat(packed_file_path)
+        with storage.packed_file_updates():
+            for state, meta_data_path in zip(states, meta_data_paths):
+                storage.save_file(state, meta_data_path, '{"name": "%s"}' % state.name, 'meta_data', report, True)
+            assert os.stat(packed_file_path).st_mtime == packed_file_stat.st_mtime
+        assert report.get_written_files('meta_data') == meta_data_paths
+        assert not os.path.exists(os.path.join(packed_file_path, storage.FILE_NAME_META_DATA))
+        for state, meta_data_path in zip(states, meta_data_paths):
+            assert storage.load_data_file(meta_data_path) == {"name": state.name}
+
+        # unchanged meta data is not written again
+        report = storage.StorageReport()
+        storage.save_file(states[0], meta_data_paths[0], '{"name": "root"}', 'meta_data', report, True)
+        assert report.number_of_unchanged_files == 1 and report.get_written_files() == []
+        storage.save_file(states[0], meta_data_paths[0], '{"name": "new root"}', 'meta_data', report, True)
+        assert storage.load_data_file(meta_data_paths[0]) == {"name": "new root"}
+
+        # saving the state machine again keeps the meta data
+        storage.save_state_machine_to_path(state_machine, packed_file_path)
+        assert storage.load_data_file(meta_data_paths[1]) == {"name": states[1].name}
+    finally:
+        testing_utils.shutdown_environment_only_core(caplog=caplog)
+
+
+def create_nested_state_machine():
+    root_state = HierarchyState("root")
+    output_id = root_state.add_output_data_port("result", "int")
+    child_state = HierarchyState("child")
+    child_output_id = child_state.add_output_data_port("result", "int")
+    state = ExecutionState("grandchild")
+    state.script_text = "def execute(self, inputs, outputs, gvm):\n    outputs['result'] = 42\n    return 0\n"
+    state_output_id = state.add_output_data_port("result", "int")
+    child_state.add_state(state)
+    child_state.set_start_state(state.state_id)
+    child_state.add_transition(state.state_id, 0, child_state.state_id, 0)
+    child_state.add_data_flow(state.state_id, state_output_id, child_state.state_id, child_output_id)
+    root_state.add_state(child_state)
+    root_state.set_start_state(child_state.state_id)
+    root_state.add_transition(child_state.state_id, 0, root_state.state_id, 0)
+    root_state.add_data_flow(child_state.state_id, child_output_id, root_state.state_id, output_id)
+    return StateMachine(root_state)
+
+
+def test_prefetched_and_lazy_loading(caplog):
+    import rafcon.core.singleton
+    from rafcon.core.config import global_config
+    testing_utils.initialize_environment_core(core_config={'STORAGE_LOAD_THREAD_POOL_SIZE': 0})
+    try:
+        folder_path = testing_utils.get_test_sm_path(os.path.join("unit_test_state_machines", "stepping_test"))
+        state_machine = storage.load_state_machine_from_path(folder_path)
+
+        global_config.set_config_value('STORAGE_LOAD_THREAD_POOL_SIZE', 4)
+        assert_equal_state_machines(state_machine, storage.load_state_machine_from_path(folder_path))
+
+        global_config.set_config_value('STORAGE_LAZY_LOAD_DEPTH', 1)
+        lazy_state_machine = storage.load_state_machine_from_path(folder_path)
+        assert not lazy_state_machine.root_state.child_states_loaded
+        assert_equal_state_machines(state_machine, lazy_state_machine)
+        assert lazy_state_machine.root_state.child_states_loaded
+
+        # lazily loaded state machines can be executed
+        global_config.set_config_value('STORAGE_LAZY_LOAD_DEPTH', 2)
+        storage_path = testing_utils.get_unique_temp_path()
+        storage.save_state_machine_to_path(create_nested_state_machine(), storage_path)
+        state_machine = storage.load_state_machine_from_path(storage_path)
+        child_state = list(state_machine.root_state._states.values())[0]
+        assert state_machine.root_state.child_states_loaded and not child_state.child_states_loaded
+        rafcon.core.singleton.state_machine_manager.add_state_machine(state_machine)
+        try:
+            rafcon.core.singleton.state_machine_execution_engine.start(state_machine.state_machine_id)
+            rafcon.core.singleton.state_machine_execution_engine.join()
+        finally:
+            rafcon.core.singleton.state_machine_manager.remove_state_machine(state_machine.state_machine_id)
+        assert child_state.child_states_loaded
+        assert state_machine.root_state.output_data["result"] == 42
+    finally:
+        testing_utils.shutdown_environment_only_core(caplog=caplog)
+
+
+def test_dirty_lazily_loaded_states(caplog, monkeypatch):
+    from rafcon.core.config import global_config
+    testing_utils.initialize_environment_core(core_config={'STORAGE_LAZY_LOAD_DEPTH': 1})
+    try:
+        storage_path = testing_utils.get_unique_temp_path()
+        storage.save_state_machine_to_path(create_nested_state_machine(), storage_path)
+        load_data_file = storage.load_data_file
+
+        def load_data_file_marking_grandchild_dirty(path_of_file, files=storage.file_system):
+            state_info = load_data_file(path_of_file, files)
+            state = state_info[0] if isinstance(state_info, tuple) else state_info
+            if getattr(state, 'name', None) == "grandchild":
+                # e.g. a library state whose runtime values do not match its data ports anymore
+                state.marked_dirty = True
+            return state_info
+        monkeypatch.setattr(storage, 'load_data_file', load_data_file_marking_grandchild_dirty)
+
+        state_machine = storage.load_state_machine_from_path(storage_path)
+        assert not state_machine.marked_dirty
+        child_state = list(state_machine.root_state.states.values())[0]
+        assert not child_state.child_states_loaded
+        list(child_state.states.values())
+        assert state_machine.marked_dirty
+    finally:
+        global_config.set_config_value('STORAGE_LAZY_LOAD_DEPTH', 0)
+        testing_utils.shutdown_environment_only_core(caplog=caplog)
+
+
+def test_prefetched_loading_with_resources(caplog):
+    import threading
+    from rafcon.core.config import global_config
+    from rafcon.core.storage import file_prefetcher
+    testing_utils.initialize_environment_core(core_config={'STORAGE_LOAD_THREAD_POOL_SIZE': 4})
+    try:
+        storage_path = testing_utils.get_unique_temp_path()
+        state_machine = create_nested_state_machine()
+        storage.save_state_machine_to_path(state_machine, storage_path)
+        # binary resources next to the states are not read in advance
+        root_state_path = os.path.join(storage_path, storage.get_storage_id_for_state(state_machine.root_state))
+        with open(os.path.join(root_state_path, "image.png"), 'wb') as f:
+            f.write(b'\x89PNG\r\n\x1a\n\xff\xfe\x00')
+        assert_equal_state_machines(state_machine, storage.load_state_machine_from_path(storage_path))
+
+        # concurrent loads with different thread pool sizes do not interfere
+        errors = []
+
+        def load(thread_pool_size):
+            try:
+                for _ in range(5):
+                    storage.PrefetchedStateMachineFiles(storage_path, thread_pool_size)
+            except Exception as e:
+                errors.append(e)
+        threads = [threading.Thread(target=load, args=(size,)) for size in (2, 3, 2, 3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert not errors
+        file_prefetcher.close_thread_pools()
+        global_config.set_config_value('STORAGE_LOAD_THREAD_POOL_SIZE', 2)
+        assert_equal_state_machines(state_machine, storage.load_state_machine_from_path(storage_path))
+    finally:
+        testing_utils.shutdown_environment_only_core(caplog=caplog)
+
+
+def test_state_machine_cache(caplog):
+    from rafcon.core.storage.state_machine_cache import StateMachineCache
+    cache_path = testing_utils.get_unique_temp_path()
+    testing_utils.initialize_environment_core(core_config={'STORAGE_CACHE_PATH': cache_path})
+    try:
+        storage_path = testing_utils.get_unique_temp_path()
+        storage.save_state_machine_to_path(create_state_machine(), storage_path)
+        state_machine = storage.load_state_machine_from_path(storage_path)
+        cache_file_path = StateMachineCache(cache_path).get_cache_file_path(storage_path)
+        assert os.path.isfile(cache_file_path)
+        cache_file_mtime = os.path.getmtime(cache_file_path)
+
+        # an unchanged state machine is loaded from the cache
+        cached_state_machine = storage.load_state_machine_from_path(storage_path)
+        assert os.path.getmtime(cache_file_path) == cache_file_mtime
+        assert_equal_state_machines(state_machine, cached_state_machine)
+
+        # changed files invalidate the snapshot
+        state = list(cached_state_machine.root_state.states.values())[0]
+        state.script_text = state.script_text + "\n# changed script of different length\n"
+        storage.save_state_machine_to_path(cached_state_machine, storage_path)
+        changed_state_machine = storage.load_state_machine_from_path(storage_path)
+        assert changed_state_machine.root_state.states[state.state_id].script_text == state.script_text
+
+        # invalid cache files are ignored
+        with open(cache_file_path, 'w') as f:
+            f.write("invalid")
+        assert_equal_state_machines(changed_state_machine, storage.load_state_machine_from_path(storage_path))
+
+        # the cache folder is private and not used, if other users can modify it
+        assert os.stat(cache_path).st_mode & 0o777 == 0o700
+        os.remove(cache_file_path)
+        os.chmod(cache_path, 0o777)
+        assert_equal_state_machines(changed_state_machine, storage.load_state_machine_from_path(storage_path))
+        assert not os.path.exists(cache_file_path)
+    finally:
+        testing_utils.shutdown_environment_only_core(caplog=caplog, expected_warnings=1)
+
+
+if __name__ == '__main__':
+    pytest.main(['-s', __file__])
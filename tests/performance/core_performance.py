@@ -1,7 +1,14 @@
 # core elements
+from __future__ import print_function
 from builtins import range
 from builtins import str
+import os
+import time
+from copy import deepcopy
+import pytest
+
 import rafcon.core.singleton
+from rafcon.core.config import global_config
 from rafcon.core.states.execution_state import ExecutionState
 from rafcon.core.states.hierarchy_state import HierarchyState
 from rafcon.core.states.barrier_concurrency_state import BarrierConcurrencyState
@@ -9,6 +16,9 @@ from rafcon.core.states.preemptive_concurrency_state import PreemptiveConcurrenc
 from rafcon.core.constants import UNIQUE_DECIDER_STATE_ID
 from rafcon.core.state_elements.data_port import InputDataPort, OutputDataPort
 from rafcon.core.state_machine import StateMachine
+from rafcon.core.storage import storage
+from rafcon.core.storage.packed_state_machine import pack_state_machine
+import rafcon.core.execution.execution_history as execution_history_module
 
 from rafcon.utils.timer import measure_time
 
@@ -112,9 +122,402 @@ def test_preemption_concurrency_state_execution(number_child_states=10, number_c
     execute_state(preemption_state)
 
 
+def measure_transitions_per_second(number_child_states=100, runs=10, thread_pool_size=0, inline=False, frozen=False):
+    """Measure the number of state transitions per second of a sequential hierarchy state
+
+    :param int number_child_states: the number of child states of the hierarchy state
+    :param int runs: how often the state machine is executed
+    :param int thread_pool_size: the value of EXECUTION_THREAD_POOL_SIZE, 0 creates a new thread for every state
+    :param bool inline: the value of EXECUTION_INLINE_HIERARCHY_CHILDREN
+    :param bool frozen: the value of EXECUTION_FREEZE_STATE_MACHINE
+    :return: the number of transitions per second
+    """
+    global_config.set_config_value("EXECUTION_THREAD_POOL_SIZE", thread_pool_size)
+    global_config.set_config_value("EXECUTION_INLINE_HIERARCHY_CHILDREN", inline)
+    global_config.set_config_value("EXECUTION_FREEZE_STATE_MACHINE", frozen)
+    state_machine = StateMachine(create_hierarchy_state(number_child_states))
+    rafcon.core.singleton.state_machine_manager.add_state_machine(state_machine)
+    try:
+        start = time.time()
+        for _ in range(runs):
+            rafcon.core.singleton.state_machine_execution_engine.start(state_machine.state_machine_id)
+            rafcon.core.singleton.state_machine_execution_engine.join()
+        duration = time.time() - start
+    finally:
+        rafcon.core.singleton.state_machine_manager.remove_state_machine(state_machine.state_machine_id)
+    return number_child_states * runs / duration
+
+
+@pytest.mark.timeout(60)
+def test_execution_thread_pool_transitions_per_second(number_child_states=100, runs=5):
+    testing_utils.initialize_environment_core()
+    try:
+        new_thread_per_state = measure_transitions_per_second(number_child_states, runs, thread_pool_size=0)
+        thread_pool = measure_transitions_per_second(number_child_states, runs, thread_pool_size=10)
+        inline = measure_transitions_per_second(number_child_states, runs, thread_pool_size=10, inline=True)
+    finally:
+        testing_utils.shutdown_environment_only_core()
+    print("Transitions per second - new thread per state: {0:.0f}, thread pool: {1:.0f}, inline: {2:.0f}"
+          "".format(new_thread_per_state, thread_pool, inline))
+
+
+@pytest.mark.timeout(60)
+def test_frozen_state_machine_transition_time(number_child_states=200, runs=5):
+    testing_utils.initialize_environment_core()
+    try:
+        results = {}
+        for frozen in (False, True):
+            results[frozen] = 10.**6 / measure_transitions_per_second(number_child_states, runs, thread_pool_size=10,
+                                                                      inline=True, frozen=frozen)
+    finally:
+        testing_utils.shutdown_environment_only_core()
+    print("Time per transition in us - state machine not frozen: {0:.1f}, frozen: {1:.1f}"
+          "".format(results[False], results[True]))
+
+
+def measure_step_latency(number_child_states=100, runs=5, execution_log=False, log_queue_size=0):
+    """Measure the average execution time of a state of a sequential hierarchy state
+
+    :param int number_child_states: the number of child states of the hierarchy state
+    :param int runs: how often the state machine is executed
+    :param bool execution_log: the value of EXECUTION_LOG_ENABLE
+    :param int log_queue_size: the value of EXECUTION_LOG_QUEUE_SIZE, 0 writes the log synchronously
+    :return: the average time per state execution in milliseconds
+    """
+    global_config.set_config_value("EXECUTION_LOG_ENABLE", execution_log)
+    global_config.set_config_value("EXECUTION_LOG_PATH", testing_utils.get_unique_temp_path())
+    global_config.set_config_value("EXECUTION_LOG_QUEUE_SIZE", log_queue_size)
+    try:
+        return 1000. / measure_transitions_per_second(number_child_states, runs, thread_pool_size=10)
+    finally:
+        global_config.set_config_value("EXECUTION_LOG_ENABLE", False)
+
+
+@pytest.mark.timeout(60)
+def test_execution_log_step_latency(number_child_states=100, runs=5):
+    testing_utils.initialize_environment_core()
+    try:
+        no_log = measure_step_latency(number_child_states, runs)
+        synchronous_log = measure_step_latency(number_child_states, runs, execution_log=True, log_queue_size=0)
+        asynchronous_log = measure_step_latency(number_child_states, runs, execution_log=True, log_queue_size=1000)
+    finally:
+        testing_utils.shutdown_environment_only_core()
+    print("Step latency in ms - no execution log: {0:.3f}, synchronous log: {1:.3f}, asynchronous log: {2:.3f}"
+          "".format(no_log, synchronous_log, asynchronous_log))
+
+
+def measure_execution_history_memory(number_child_states=20, payload_size=10**6, copy_scoped_data=False):
+    """Measure the memory held by the execution history of a hierarchy state with a large scoped variable
+
+    :param int number_child_states: the number of child states of the hierarchy state
+    :param int payload_size: the number of floats of the numpy array stored in a scoped variable
+    :param bool copy_scoped_data: if True, every history item gets a deep copy of the scoped data (the former behavior)
+    :return: the memory held by the execution history in MB and the number of history items
+    """
+    import numpy
+    import tracemalloc
+    hierarchy_state = create_hierarchy_state(number_child_states)
+    hierarchy_state.add_scoped_variable("payload", "object", numpy.zeros(payload_size))
+    state_machine = StateMachine(hierarchy_state)
+    rafcon.core.singleton.state_machine_manager.add_state_machine(state_machine)
+    get_scoped_data_snapshot = execution_history_module.get_scoped_data_snapshot
+    if copy_scoped_data:
+        execution_history_module.get_scoped_data_snapshot = deepcopy
+    tracemalloc.start()
+    try:
+        rafcon.core.singleton.state_machine_execution_engine.start(state_machine.state_machine_id)
+        rafcon.core.singleton.state_machine_execution_engine.join()
+        memory, _ = tracemalloc.get_traced_memory()
+        number_of_history_items = len(state_machine.execution_histories[-1])
+    finally:
+        tracemalloc.stop()
+        execution_history_module.get_scoped_data_snapshot = get_scoped_data_snapshot
+        rafcon.core.singleton.state_machine_manager.remove_state_machine(state_machine.state_machine_id)
+    return memory / 1024. / 1024., number_of_history_items
+
+
+@pytest.mark.timeout(60)
+def test_execution_history_memory(number_child_states=20, payload_size=10**6):
+    pytest.importorskip("numpy")
+    pytest.importorskip("tracemalloc")
+    testing_utils.initialize_environment_core()
+    try:
+        shared_memory, number_of_history_items = measure_execution_history_memory(number_child_states, payload_size)
+        copied_memory, _ = measure_execution_history_memory(number_child_states, payload_size, copy_scoped_data=True)
+    finally:
+        testing_utils.shutdown_environment_only_core()
+    print("Memory of an execution history with {0} items and a {1:.1f} MB scoped variable - shared scoped data: "
+          "{2:.1f} MB, copied scoped data: {3:.1f} MB".format(number_of_history_items, payload_size * 8 / 1024. / 1024.,
+                                                             shared_memory, copied_memory))
+    assert shared_memory < copied_memory
+
+
+def measure_large_payload_execution_time(number_child_states=20, payload_size=10**6, pass_by_reference=False):
+    """Measure the execution time of a sequence of states passing a large numpy array
+
+    :param int number_child_states: the number of child states of the hierarchy state
+    :param int payload_size: the number of floats of the passed numpy array
+    :param bool pass_by_reference: whether the data ports pass the array by reference
+    :return: the execution time in seconds
+    """
+    hierarchy_state = HierarchyState("hierarchy")
+    last_state = None
+    for i in range(number_child_states):
+        state = ExecutionState("state{}".format(i))
+        state.script_text = "import numpy\n" \
+                            "def execute(self, inputs, outputs, gvm):\n" \
+                            "    outputs['payload'] = inputs['payload'] if inputs['payload'] is not None " \
+                            "else numpy.zeros({0})\n" \
+                            "    return 0\n".format(payload_size)
+        input_id = state.add_input_data_port("payload", "object", pass_by_reference=pass_by_reference)
+        state.add_output_data_port("payload", "object", pass_by_reference=pass_by_reference)
+        hierarchy_state.add_state(state)
+        if last_state is None:
+            hierarchy_state.set_start_state(state.state_id)
+        else:
+            hierarchy_state.add_transition(last_state.state_id, 0, state.state_id, None)
+            hierarchy_state.add_data_flow(last_state.state_id, list(last_state.output_data_ports.keys())[0],
+                                          state.state_id, input_id)
+        last_state = state
+    hierarchy_state.add_transition(last_state.state_id, 0, hierarchy_state.state_id, 0)
+
+    start_time = time.time()
+    execute_state(hierarchy_state)
+    return time.time() - start_time
+
+
+@pytest.mark.timeout(60)
+def test_pass_by_reference_execution_time(number_child_states=20, payload_size=10**6):
+    pytest.importorskip("numpy")
+    testing_utils.initialize_environment_core()
+    try:
+        copied = measure_large_payload_execution_time(number_child_states, payload_size)
+        by_reference = measure_large_payload_execution_time(number_child_states, payload_size, pass_by_reference=True)
+    finally:
+        testing_utils.shutdown_environment_only_core()
+    print("Execution time of {0} states passing a {1:.1f} MB array - copied: {2:.3f} s, passed by reference: {3:.3f} s"
+          "".format(number_child_states, payload_size * 8 / 1024. / 1024., copied, by_reference))
+
+
+def measure_load_time(paths, runs=5):
+    """Measure the time needed to load state machines
+
+    :param list paths: the paths of the state machines (folders or packed files)
+    :param int runs: how often each state machine is loaded
+    :return: the average time in milliseconds to load all state machines
+    """
+    start_time = time.time()
+    for _ in range(runs):
+        for path in paths:
+            storage.load_state_machine_from_path(path)
+    return (time.time() - start_time) * 1000. / runs
+
+
+@pytest.mark.timeout(120)
+def get_loadable_test_state_machine_paths():
+    state_machines_path = testing_utils.get_test_sm_path("unit_test_state_machines")
+    folder_paths = []
+    for name in sorted(os.listdir(state_machines_path)):
+        folder_path = os.path.join(state_machines_path, name)
+        if not os.path.isfile(os.path.join(folder_path, storage.STATEMACHINE_FILE)):
+            continue
+        try:
+            storage.load_state_machine_from_path(folder_path)
+        except Exception:
+            continue
+        folder_paths.append(folder_path)
+    return folder_paths
+
+
+def test_packed_state_machine_load_time(runs=5):
+    testing_utils.initialize_environment_core(libraries={'unit_test_state_machines': testing_utils.get_test_sm_path(
+        "unit_test_state_machines")})
+    try:
+        packed_path = testing_utils.get_unique_temp_path()
+        folder_paths = get_loadable_test_state_machine_paths()
+        packed_file_paths = []
+        for folder_path in folder_paths:
+            packed_file_paths.append(os.path.join(packed_path, os.path.basename(folder_path) + ".rsm"))
+            pack_state_machine(folder_path, packed_file_paths[-1])
+        folder_time = measure_load_time(folder_paths, runs)
+        packed_time = measure_load_time(packed_file_paths, runs)
+    finally:
+        testing_utils.shutdown_environment_only_core()
+    print("Load time of {0} state machines - folder layout: {1:.1f} ms, packed files: {2:.1f} ms"
+          "".format(len(folder_paths), folder_time, packed_time))
+
+
+def test_cached_state_machine_load_time(runs=5):
+    testing_utils.initialize_environment_core(libraries={'unit_test_state_machines': testing_utils.get_test_sm_path(
+        "unit_test_state_machines")})
+    try:
+        folder_paths = get_loadable_test_state_machine_paths()
+        folder_time = measure_load_time(folder_paths, runs)
+        global_config.set_config_value('STORAGE_CACHE_PATH', testing_utils.get_unique_temp_path())
+        # fill the cache
+        measure_load_time(folder_paths, 1)
+        cached_time = measure_load_time(folder_paths, runs)
+    finally:
+        testing_utils.shutdown_environment_only_core()
+    print("Load time of {0} state machines - without cache: {1:.1f} ms, with cache: {2:.1f} ms"
+          "".format(len(folder_paths), folder_time, cached_time))
+
+
+@pytest.mark.timeout(300)
+def test_cached_large_state_machine_load_time(number_child_states=300, runs=3):
+    testing_utils.initialize_environment_core()
+    try:
+        storage_path = testing_utils.get_unique_temp_path()
+        storage.save_state_machine_to_path(StateMachine(create_hierarchy_state(number_child_states)), storage_path)
+        folder_time = measure_load_time([storage_path], runs)
+        global_config.set_config_value('STORAGE_CACHE_PATH', testing_utils.get_unique_temp_path())
+        # fill the cache
+        measure_load_time([storage_path], 1)
+        cached_time = measure_load_time([storage_path], runs)
+    finally:
+        testing_utils.shutdown_environment_only_core()
+    print("Load time of a state machine with {0} states - without cache: {1:.1f} ms, with cache: {2:.1f} ms"
+          "".format(number_child_states, folder_time, cached_time))
+
+
+def test_library_state_load_time_and_memory(number_of_library_states=200, runs=3):
+    import tracemalloc
+    from rafcon.core.states.library_state import LibraryState
+    testing_utils.initialize_environment_core()
+    try:
+        root_state = HierarchyState("root")
+        for index in range(number_of_library_states):
+            root_state.add_state(LibraryState("generic", "wait", "0.1", "wait {0}".format(index)))
+        storage_path = testing_utils.get_unique_temp_path()
+        storage.save_state_machine_to_path(StateMachine(root_state), storage_path)
+
+        results = {}
+        for lazy_copy in (False, True):
+            global_config.set_config_value("LIBRARY_STATE_LAZY_COPY", lazy_copy)
+            load_time = measure_load_time([storage_path], runs)
+            tracemalloc.start()
+            state_machine = storage.load_state_machine_from_path(storage_path)
+            memory = tracemalloc.get_traced_memory()[0]
+            tracemalloc.stop()
+            results[lazy_copy] = load_time, memory / 1024. / 1024.
+            del state_machine
+    finally:
+        testing_utils.shutdown_environment_only_core()
+    print("State machine with {0} library states - copied libraries: {1[0]:.1f} ms, {1[1]:.1f} MB, lazily copied "
+          "libraries: {2[0]:.1f} ms, {2[1]:.1f} MB".format(number_of_library_states, results[False], results[True]))
+
+
+def test_global_variable_read_time(number_of_entries=10000, reads=100):
+    from rafcon.core.global_variable_manager import GlobalVariableManager
+    gvm = GlobalVariableManager()
+    config = {"parameter {0}".format(index): {"values": list(range(5)), "name": str(index)}
+              for index in range(number_of_entries)}
+    results = {}
+    for immutable in (False, True):
+        gvm.set_variable("config", config, immutable=immutable)
+        start_time = time.time()
+        for _ in range(reads):
+            gvm.get_variable("config")
+        results[immutable] = (time.time() - start_time) * 1000. / reads
+    print("Read time of a global variable with {0} entries - copied: {1:.3f} ms, immutable: {2:.3f} ms"
+          "".format(number_of_entries, results[False], results[True]))
+
+
+def execute_state_machines_in_one_engine(number_of_state_machines, number_child_states):
+    state_machines = [StateMachine(create_hierarchy_state(number_child_states, sleep=True))
+                      for _ in range(number_of_state_machines)]
+    engine = rafcon.core.singleton.state_machine_execution_engine
+    for state_machine in state_machines:
+        rafcon.core.singleton.state_machine_manager.add_state_machine(state_machine)
+    try:
+        start_time = time.time()
+        for state_machine in state_machines:
+            engine.start(state_machine.state_machine_id)
+        for state_machine in state_machines:
+            engine.join(state_machine_id=state_machine.state_machine_id)
+        return time.time() - start_time
+    finally:
+        for state_machine in state_machines:
+            rafcon.core.singleton.state_machine_manager.remove_state_machine(state_machine.state_machine_id)
+
+
+def execute_state_machine_in_process(number_child_states):
+    testing_utils.initialize_environment_core()
+    try:
+        execute_state(create_hierarchy_state(number_child_states, sleep=True))
+    finally:
+        testing_utils.shutdown_environment_only_core()
+
+
+def execute_state_machines_in_processes(number_of_state_machines, number_child_states):
+    import multiprocessing
+    context = multiprocessing.get_context("spawn")
+    start_time = time.time()
+    processes = [context.Process(target=execute_state_machine_in_process, args=(number_child_states, ))
+                 for _ in range(number_of_state_machines)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+        assert process.exitcode == 0
+    return time.time() - start_time
+
+
+@pytest.mark.timeout(120)
+def test_concurrent_state_machines_throughput(number_of_state_machines=8, number_child_states=20):
+    testing_utils.initialize_environment_core()
+    try:
+        one_engine = execute_state_machines_in_one_engine(number_of_state_machines, number_child_states)
+    finally:
+        testing_utils.shutdown_environment_only_core()
+    processes = execute_state_machines_in_processes(number_of_state_machines, number_child_states)
+    transitions = number_of_state_machines * number_child_states
+    print("Transitions per second of {0} concurrent state machines - one execution engine: {1:.0f}, separate "
+          "processes: {2:.0f}".format(number_of_state_machines, transitions / one_engine, transitions / processes))
+
+
+def test_state_path_time(depth=50, calls=10000):
+    state = root_state = HierarchyState("root")
+    for i in range(depth):
+        child_state = HierarchyState("state{0}".format(i))
+        state.add_state(child_state)
+        state = child_state
+    results = {}
+    for cached in (False, True):
+        start_time = time.time()
+        for _ in range(calls):
+            if not cached:
+                root_state._invalidate_path_cache()
+            state.get_path()
+        results[cached] = (time.time() - start_time) * 10.**6 / calls
+    print("Time of get_path for a state at depth {0} - generated: {1:.2f} us, cached: {2:.2f} us"
+          "".format(depth, results[False], results[True]))
+
+
+@pytest.mark.timeout(60)
+def test_execution_metrics_transition_time(number_child_states=200, runs=5):
+    testing_utils.initialize_environment_core()
+    execution_metrics = rafcon.core.singleton.execution_metrics
+    try:
+        results = {}
+        for enabled in (False, True):
+            execution_metrics.enabled = enabled
+            results[enabled] = 10.**6 / measure_transitions_per_second(number_child_states, runs, thread_pool_size=10,
+                                                                       inline=True)
+        hot_spot = execution_metrics.get_hot_spots('script', number=1)[0]
+    finally:
+        execution_metrics.enabled = None
+        execution_metrics.reset()
+        testing_utils.shutdown_environment_only_core()
+    print("Time per transition in us - metrics disabled: {0:.1f}, enabled: {1:.1f}; slowest script: {2} "
+          "(p99: {3:.1f} us)".format(results[False], results[True], hot_spot.name,
+                                     hot_spot.durations['script'].quantile(0.99) * 10.**6))
+
+
 if __name__ == '__main__':
     # test_hierarchy_state_execution(10)
     test_hierarchy_state_execution(100)
+    # test_execution_thread_pool_transitions_per_second(100, 5)
     # TODO: state creation takes too long (> 100 seconds) => investigate
     # test_hierarchy_state_execution(1000)
     # test_barrier_concurrency_state_execution(10, 10)